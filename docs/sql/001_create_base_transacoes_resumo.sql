@@ -0,0 +1,56 @@
+-- =====================================================
+-- Tabelas: base_transacoes_resumo_diario / base_transacoes_resumo_recebimento
+-- Descrição: Agregados diários de base_transacoes_unificadas para o Portal Lojista
+--            (home, totais de vendas e resumo de recebimentos).
+--            Mantidas incrementalmente pelas cargas da base unificada
+--            (gestao_financeira.services_resumo_diario.ResumoDiarioService)
+--            e reconstruídas via: python manage.py reconstruir_resumo_diario
+-- Data: 2026-10-19
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS base_transacoes_resumo_diario (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    loja_id INT NOT NULL COMMENT 'var6',
+    canal_id INT NULL COMMENT 'loja.canal_id',
+    data DATE NOT NULL COMMENT 'DATE(data_transacao)',
+    tipo_operacao VARCHAR(20) NOT NULL,
+    bandeira VARCHAR(50) NOT NULL DEFAULT '' COMMENT 'var12',
+    modalidade VARCHAR(50) NOT NULL DEFAULT '' COMMENT 'var8',
+
+    qtd_total INT NOT NULL DEFAULT 0,
+    qtd_aprovadas INT NOT NULL DEFAULT 0 COMMENT 'var68 = TRANS. APROVADO',
+    qtd_aprovadas_com_valor INT NOT NULL DEFAULT 0 COMMENT 'aprovadas com var19 preenchida',
+    qtd_nao_aprovadas INT NOT NULL DEFAULT 0 COMMENT 'canceladas/negadas',
+    valor_bruto_aprovado DECIMAL(15,2) NOT NULL DEFAULT 0 COMMENT 'SUM(var19) aprovadas',
+    valor_pago_aprovado DECIMAL(15,2) NOT NULL DEFAULT 0 COMMENT 'SUM(COALESCE(NULLIF(var44,0),var42)) aprovadas',
+    valor_bruto_nao_aprovado DECIMAL(15,2) NOT NULL DEFAULT 0,
+
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_resumo_diario (loja_id, data, tipo_operacao, bandeira, modalidade),
+    KEY idx_resumo_diario_data (data),
+    KEY idx_resumo_diario_canal_data (canal_id, data)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Agregado diário de base_transacoes_unificadas por loja/canal/tipo/bandeira/modalidade';
+
+CREATE TABLE IF NOT EXISTS base_transacoes_resumo_recebimento (
+    id BIGINT NOT NULL AUTO_INCREMENT,
+    loja_id INT NOT NULL COMMENT 'var6',
+    canal_id INT NULL COMMENT 'loja.canal_id',
+    data_recebimento DATE NOT NULL COMMENT 'STR_TO_DATE(var45)',
+    tipo_operacao VARCHAR(20) NOT NULL,
+
+    quantidade INT NOT NULL DEFAULT 0,
+    valor_total DECIMAL(15,2) NOT NULL DEFAULT 0 COMMENT 'SUM(COALESCE(var44,0))',
+
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_resumo_recebimento (loja_id, data_recebimento, tipo_operacao),
+    KEY idx_resumo_recebimento_data (data_recebimento)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+COMMENT='Agregado de recebimentos (var45) de base_transacoes_unificadas por loja/data';
+
+-- Índice de apoio para recálculo de buckets (loja + dia) na tabela fato
+-- CREATE INDEX idx_btu_var6_data_transacao ON base_transacoes_unificadas (var6, data_transacao);
@@ -0,0 +1,13 @@
+-- =====================================================
+-- Índice: base_transacoes_unificadas (var7, var4, data_transacao, id)
+-- Descrição: Extrato do app (apps.transacoes TransacaoService.consultar_extrato)
+--            filtra por CPF (var7) + nome do canal (var4) e pagina por keyset
+--            em (data_transacao DESC, id DESC) - cada página vira um range scan.
+-- Data: 2026-10-19
+-- =====================================================
+
+CREATE INDEX idx_btu_extrato_cliente
+    ON base_transacoes_unificadas (var7, var4, data_transacao, id);
+
+-- Apoio para a verificação de cancelamentos em lote (var7 IN (...))
+-- CREATE INDEX idx_btg_var7_var68 ON baseTransacoesGestao (var7, var68);
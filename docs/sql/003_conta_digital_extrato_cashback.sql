@@ -0,0 +1,22 @@
+-- =====================================================
+-- Tabela: conta_digital_movimentacoes
+-- Descrição: Dados de cashback (origem, status, data de aplicação) copiados do
+--            cashback_uso para a própria movimentação de crédito. O extrato do app
+--            (apps.conta_digital ExtratoService) lê só a movimentação, paginando por
+--            keyset em (data_movimentacao DESC, id DESC) - o índice existente
+--            (conta_digital_id, data_movimentacao) já carrega o id (InnoDB).
+--            Mantidos por CashbackService a cada aplicação/mudança de status.
+-- Data: 2026-10-19
+-- =====================================================
+
+ALTER TABLE conta_digital_movimentacoes
+    ADD COLUMN cashback_tipo_origem VARCHAR(10) NULL,
+    ADD COLUMN cashback_status VARCHAR(20) NULL,
+    ADD COLUMN cashback_aplicado_em DATETIME(6) NULL;
+
+-- Backfill do histórico existente
+UPDATE conta_digital_movimentacoes m
+  JOIN cashback_uso cu ON cu.movimentacao_id = m.id
+   SET m.cashback_tipo_origem = cu.tipo_origem,
+       m.cashback_status = cu.status,
+       m.cashback_aplicado_em = cu.aplicado_em;
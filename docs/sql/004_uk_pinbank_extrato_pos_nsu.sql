@@ -0,0 +1,20 @@
+-- =====================================================
+-- Tabela: pinbankExtratoPOS
+-- Índice: uk_extrato_pos_nsu_parcela (NsuOperacao, NumeroParcela)
+-- Descrição: Chave natural da carga de extrato POS (CargaExtratoPOSService).
+--            A carga grava em lotes de INSERT ... ON DUPLICATE KEY UPDATE e
+--            depende desta chave única para atualizar o registro existente em
+--            vez de duplicá-lo (antes: SELECT por registro + INSERT).
+--            Rodar a verificação abaixo antes - duplicatas impedem a criação.
+-- Data: 2026-10-19
+-- =====================================================
+
+-- Duplicatas existentes (deve retornar vazio)
+SELECT NsuOperacao, NumeroParcela, COUNT(*) AS registros
+  FROM pinbankExtratoPOS
+ GROUP BY NsuOperacao, NumeroParcela
+HAVING COUNT(*) > 1;
+
+-- Pular se SHOW INDEX já mostrar um índice único nessas colunas
+ALTER TABLE pinbankExtratoPOS
+    ADD UNIQUE KEY uk_extrato_pos_nsu_parcela (NsuOperacao, NumeroParcela);
@@ -0,0 +1,24 @@
+-- =====================================================
+-- Tabela: ownCargaJanelas
+-- Descrição: Checkpoint da carga Own Financial por janela de data
+--            (adquirente_own CargaJanelasOwnService). Cada janela concluída é
+--            gravada na mesma transação dos registros da janela; um backfill
+--            interrompido recomeça só pelas janelas sem status CONCLUIDA.
+-- Data: 2026-10-19
+-- =====================================================
+
+CREATE TABLE ownCargaJanelas (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(20) NOT NULL,
+    cnpj_cliente VARCHAR(14) NOT NULL,
+    doc_parceiro VARCHAR(14) NOT NULL DEFAULT '',
+    inicio DATETIME(6) NOT NULL,
+    fim DATETIME(6) NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    total_registros INT NOT NULL DEFAULT 0,
+    tentativas INT NOT NULL DEFAULT 0,
+    erro VARCHAR(500) NULL,
+    created_at DATETIME(6) NOT NULL,
+    updated_at DATETIME(6) NOT NULL,
+    UNIQUE KEY uk_own_carga_janela (tipo, cnpj_cliente, doc_parceiro, inicio, fim)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,39 @@
+-- =====================================================
+-- Tabelas: ownWebhookEventos, ownWebhookEventosFalhos
+-- Descrição: Fila de eventos dos webhooks Own Financial (transação e
+--            liquidação). A view grava o evento bruto com INSERT IGNORE
+--            (evento_id único = deduplicação) e responde 200; a task
+--            adquirente_own.processar_webhooks aplica os eventos em ordem por
+--            loja. Eventos que esgotam as tentativas são copiados para
+--            ownWebhookEventosFalhos (dead-letter) e ficam com status FALHA.
+-- Data: 2026-10-19
+-- =====================================================
+
+CREATE TABLE ownWebhookEventos (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    evento_id VARCHAR(80) NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    doc_parceiro VARCHAR(20) NOT NULL DEFAULT '',
+    payload LONGTEXT NOT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'PENDENTE',
+    tentativas INT NOT NULL DEFAULT 0,
+    proxima_tentativa DATETIME(6) NULL,
+    erro VARCHAR(500) NULL,
+    recebido_em DATETIME(6) NOT NULL,
+    processado_em DATETIME(6) NULL,
+    UNIQUE KEY uk_own_webhook_evento (evento_id),
+    KEY idx_own_webhook_status_id (status, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE ownWebhookEventosFalhos (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    evento_id VARCHAR(80) NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    doc_parceiro VARCHAR(20) NOT NULL DEFAULT '',
+    payload LONGTEXT NOT NULL,
+    tentativas INT NOT NULL,
+    erro VARCHAR(500) NULL,
+    recebido_em DATETIME(6) NOT NULL,
+    falhou_em DATETIME(6) NOT NULL,
+    UNIQUE KEY uk_own_webhook_evento_falho (evento_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,28 @@
+-- =====================================================
+-- Coluna/Índices: base_transacoes_unificadas.data_pagamento,
+--                 pagamentos_efetuados.data_pagamento
+-- Descrição: Data de pagamento (var45, texto DD/MM/YYYY) tipada como DATE.
+--            Filtros por período do Portal Lojista (conciliação, recebimentos)
+--            e do relatório financeiro viram range scan em (var6, data_pagamento)
+--            em vez de STR_TO_DATE(var45) por linha.
+--            Coluna comum (não gerada): var45 tem valores fora do padrão e
+--            STR_TO_DATE em modo estrito falharia no ALTER. As cargas da base
+--            unificada e o PagamentoService preenchem a coluna; datas inválidas
+--            ficam NULL.
+--            Ordem de deploy: aplicar este DDL antes do código (os INSERTs já
+--            gravam data_pagamento) e depois rodar o backfill:
+--                python manage.py backfill_data_pagamento
+-- Data: 2026-10-19
+-- =====================================================
+
+ALTER TABLE base_transacoes_unificadas
+    ADD COLUMN data_pagamento DATE NULL COMMENT 'var45 tipada' AFTER var45;
+
+CREATE INDEX idx_btu_loja_data_pagamento
+    ON base_transacoes_unificadas (var6, data_pagamento);
+
+ALTER TABLE pagamentos_efetuados
+    ADD COLUMN data_pagamento DATE NULL COMMENT 'var45 tipada' AFTER var45;
+
+CREATE INDEX idx_pagamentos_data_pagamento
+    ON pagamentos_efetuados (data_pagamento);
@@ -0,0 +1,29 @@
+-- =====================================================
+-- Tabela: email_outbox
+-- Descrição: Fila de saída de emails (wallclub_core.integracoes.email_outbox).
+--            EmailService.enviar_email grava a mensagem já renderizada e
+--            retorna; a task wallclub_core.processar_email_outbox envia os
+--            pendentes em lote por uma conexão SMTP/SES, com limite de envio
+--            por segundo. Mensagens idênticas na janela de deduplicação não
+--            são gravadas (chave_dedup no cache). Após as tentativas ficam
+--            com status FALHA.
+-- Data: 2026-10-19
+-- =====================================================
+
+CREATE TABLE email_outbox (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    chave_dedup CHAR(64) NOT NULL,
+    remetente VARCHAR(256) NOT NULL,
+    destinatarios JSON NOT NULL,
+    assunto VARCHAR(512) NOT NULL,
+    corpo_texto LONGTEXT NOT NULL,
+    corpo_html LONGTEXT NULL,
+    anexos JSON NULL COMMENT '[{nome, tipo, conteudo_b64}]',
+    status VARCHAR(10) NOT NULL DEFAULT 'PENDENTE',
+    tentativas INT NOT NULL DEFAULT 0,
+    proxima_tentativa DATETIME(6) NULL,
+    erro VARCHAR(500) NULL,
+    created_at DATETIME(6) NOT NULL,
+    enviado_em DATETIME(6) NULL,
+    KEY idx_email_outbox_status_id (status, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,49 @@
+-- =====================================================
+-- Tabela: auditoria_login_minuto
+-- Descrição: Resumo por minuto das tentativas de login (CPF x IP), gravado
+--            em lote junto com cliente_auditoria_validacao_senha pelo
+--            histórico do login (apps.cliente.gravar_tentativas_login) e por
+--            AuditoriaService.registrar_tentativa_login. Responde
+--            AuditoriaService.obter_tentativas_suspeitas e
+--            obter_estatisticas_cpf sem GROUP BY sobre o histórico bruto:
+--            uma rajada de força bruta vira uma linha por minuto.
+-- Data: 2026-10-19
+-- =====================================================
+
+CREATE TABLE auditoria_login_minuto (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    minuto DATETIME NOT NULL,
+    cpf VARCHAR(14) NOT NULL,
+    ip_address VARCHAR(45) NOT NULL,
+    falhas INT NOT NULL DEFAULT 0,
+    sucessos INT NOT NULL DEFAULT 0,
+    ultima_tentativa DATETIME(6) NOT NULL,
+    ultimo_sucesso TINYINT(1) NOT NULL DEFAULT 0 COMMENT 'Resultado da última tentativa do minuto',
+    UNIQUE KEY uk_auditoria_login_minuto (minuto, cpf, ip_address),
+    KEY idx_auditoria_login_cpf (cpf, minuto),
+    KEY idx_auditoria_login_ip (ip_address, minuto)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Carga inicial: últimos 7 dias do histórico (maior janela dos relatórios).
+-- Executar antes de publicar o código que passa a gravar o resumo.
+INSERT INTO auditoria_login_minuto
+    (minuto, cpf, ip_address, falhas, sucessos, ultima_tentativa, ultimo_sucesso)
+SELECT
+    r.minuto, r.cpf, r.ip_address, r.falhas, r.sucessos, r.ultima_tentativa,
+    (SELECT a2.sucesso
+     FROM cliente_auditoria_validacao_senha a2
+     WHERE a2.cpf = r.cpf AND a2.ip_address = r.ip_address AND a2.timestamp = r.ultima_tentativa
+     ORDER BY a2.id DESC
+     LIMIT 1)
+FROM (
+    SELECT
+        DATE_FORMAT(a.timestamp, '%Y-%m-%d %H:%i:00') AS minuto,
+        a.cpf,
+        a.ip_address,
+        SUM(a.sucesso = 0) AS falhas,
+        SUM(a.sucesso = 1) AS sucessos,
+        MAX(a.timestamp) AS ultima_tentativa
+    FROM cliente_auditoria_validacao_senha a
+    WHERE a.timestamp >= NOW() - INTERVAL 7 DAY
+    GROUP BY minuto, a.cpf, a.ip_address
+) r;
@@ -0,0 +1,37 @@
+-- =====================================================
+-- Tabelas: pinbankMarcaCancelamentos, pinbankCancelamentosPendentes
+-- Descrição: Marca d'água da varredura de cancelamentos da base unificada
+--            Credenciadora (CargaBaseUnificadaCredenciadoraService
+--            .atualizar_cancelamentos). Guarda o maior
+--            pinbankExtratoPOS.updated_at já varrido; cada execução consulta
+--            só o extrato alterado desde a marca (menos uma margem) em vez de
+--            cruzar toda a base unificada com o extrato.
+--            O índice em updated_at atende esse filtro.
+--            NSUs que falham (recálculo ou estorno de cashback) ficam em
+--            pinbankCancelamentosPendentes e entram de novo em toda execução,
+--            sem segurar a marca.
+-- Data: 2026-10-19
+-- =====================================================
+
+CREATE TABLE pinbankMarcaCancelamentos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    processo VARCHAR(50) NOT NULL,
+    ultimo_updated_at DATETIME(6) NULL,
+    total_processados INT NOT NULL DEFAULT 0,
+    updated_at DATETIME(6) NOT NULL,
+    UNIQUE KEY uk_pinbank_marca_cancelamentos (processo)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE pinbankCancelamentosPendentes (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    NsuOperacao BIGINT NOT NULL,
+    tentativas INT NOT NULL DEFAULT 1,
+    erro VARCHAR(500) NULL,
+    created_at DATETIME(6) NOT NULL,
+    updated_at DATETIME(6) NOT NULL,
+    UNIQUE KEY uk_pinbank_cancelamentos_pendentes_nsu (NsuOperacao)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Pular se SHOW INDEX já mostrar um índice em updated_at
+ALTER TABLE pinbankExtratoPOS
+    ADD INDEX idx_extrato_pos_updated_at (updated_at);
@@ -15,7 +15,7 @@ Componentes:
 - seguranca: 2FA, Device Management, Rate Limiter, Validador CPF
 - services: Auditoria
 - templatetags: Tags de formatação
-- utilitarios: Config Manager, Export Utils, Formatação
+- utilitarios: Config Manager, Export Utils, Formatação, Calendário de dias úteis
 """
 
 __version__ = "1.0.0"
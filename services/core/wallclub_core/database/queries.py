@@ -226,7 +226,38 @@ class TransacoesQueries:
             from wallclub_core.utilitarios.log_control import registrar_log
             registrar_log('comum.database', f"Erro ao verificar cancelamento: {str(e)}", nivel='ERROR')
             return False
-    
+
+    @staticmethod
+    def listar_nsus_cancelados(nsus: List[str]) -> set:
+        """
+        Versão em lote de verificar_transacao_cancelada (uma query por até 1000 NSUs)
+
+        Args:
+            nsus: Lista de NSUs
+
+        Returns:
+            set com os NSUs (str) que possuem cancelamento
+        """
+        cancelados = set()
+        unicos = sorted({str(nsu) for nsu in nsus if nsu is not None})
+        try:
+            with connection.cursor() as cursor:
+                for inicio in range(0, len(unicos), 1000):
+                    lote = unicos[inicio:inicio + 1000]
+                    cursor.execute(f"""
+                        SELECT DISTINCT var7
+                        FROM baseTransacoesGestao
+                        WHERE var7 IN ({','.join(['%s'] * len(lote))})
+                        AND var68 = 'TRANS. CANCELADO'
+                    """, lote)
+                    cancelados.update(str(row[0]) for row in cursor.fetchall())
+            return cancelados
+
+        except Exception as e:
+            from wallclub_core.utilitarios.log_control import registrar_log
+            registrar_log('comum.database', f"Erro ao verificar cancelamentos em lote: {str(e)}", nivel='ERROR')
+            return cancelados
+
     @staticmethod
     def listar_recebimentos_agrupados(filtros: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,265 @@
+"""
+Árvore da hierarquia organizacional em memória
+Canal → Regional → Vendedor → Grupo Econômico → Loja
+
+Carregada com uma query por nível, imutável depois de montada e compartilhada
+via cache com chave de versão (incrementada a cada escrita na hierarquia).
+"""
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from wallclub_core.utilitarios.log_control import registrar_log
+
+TIPOS = ('canal', 'regional', 'vendedor', 'grupo', 'loja')
+TIPO_FILHO = {'canal': 'regional', 'regional': 'vendedor', 'vendedor': 'grupo', 'grupo': 'loja'}
+TIPO_PAI = {filho: pai for pai, filho in TIPO_FILHO.items()}
+
+# filhos: tupla de ids do nível seguinte, na ordem de exibição
+No = namedtuple('No', ['tipo', 'id', 'nome', 'pai_id', 'filhos', 'marca', 'cnpj', 'canal_id'],
+                defaults=(None, None, None))
+
+
+class ArvoreHierarquia:
+    """
+    Estrutura imutável com índice por (tipo, id) e lojas de cada subárvore.
+    """
+
+    def __init__(self, canais, regionais, vendedores, grupos, lojas):
+        """
+        Args (linhas na ordem de exibição):
+            canais: (id, nome, marca)
+            regionais: (id, nome, canal_id)
+            vendedores: (id, nome, regional_id)
+            grupos: (id, nome, vendedor_id)
+            lojas: (id, razao_social, cnpj, grupo_id, canal_id)
+        """
+        filhos = {tipo: {} for tipo in TIPO_FILHO}
+        for tipo, linhas, pos_pai in (('canal', regionais, 2), ('regional', vendedores, 2),
+                                      ('vendedor', grupos, 2), ('grupo', lojas, 3)):
+            for linha in linhas:
+                filhos[tipo].setdefault(linha[pos_pai], []).append(linha[0])
+
+        def _filhos(tipo, no_id):
+            return tuple(filhos[tipo].get(no_id, ()))
+
+        self._nos: Dict[str, Dict[int, No]] = {
+            'canal': {
+                cid: No('canal', cid, nome, None, _filhos('canal', cid), marca=marca)
+                for cid, nome, marca in canais
+            },
+            'regional': {
+                rid: No('regional', rid, nome, canal_id, _filhos('regional', rid))
+                for rid, nome, canal_id in regionais
+            },
+            'vendedor': {
+                vid: No('vendedor', vid, nome, regional_id, _filhos('vendedor', vid))
+                for vid, nome, regional_id in vendedores
+            },
+            'grupo': {
+                gid: No('grupo', gid, nome, vendedor_id, _filhos('grupo', gid))
+                for gid, nome, vendedor_id in grupos
+            },
+            'loja': {
+                lid: No('loja', lid, razao_social, grupo_id, (), cnpj=cnpj, canal_id=canal_id)
+                for lid, razao_social, cnpj, grupo_id, canal_id in lojas
+            },
+        }
+
+        # Lojas por subárvore, montadas de baixo para cima
+        self._lojas: Dict[Tuple[str, int], Tuple[int, ...]] = {}
+        for tipo in ('grupo', 'vendedor', 'regional', 'canal'):
+            filho = TIPO_FILHO[tipo]
+            for no in self._nos[tipo].values():
+                if filho == 'loja':
+                    self._lojas[(tipo, no.id)] = no.filhos
+                else:
+                    self._lojas[(tipo, no.id)] = tuple(
+                        loja_id for i in no.filhos for loja_id in self._lojas.get((filho, i), ())
+                    )
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def no(self, tipo: str, no_id) -> Optional[No]:
+        try:
+            return self._nos[tipo].get(int(no_id))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def nos(self, tipo: str) -> List[No]:
+        """Todos os nós do nível, na ordem de exibição"""
+        return list(self._nos[tipo].values())
+
+    def total(self, tipo: str) -> int:
+        return len(self._nos[tipo])
+
+    def filhos(self, tipo: str, no_id) -> List[No]:
+        no = self.no(tipo, no_id)
+        if no is None or tipo == 'loja':
+            return []
+        indice = self._nos[TIPO_FILHO[tipo]]
+        return [indice[i] for i in no.filhos if i in indice]
+
+    def pai(self, no: Optional[No]) -> Optional[No]:
+        if no is None or no.tipo == 'canal' or no.pai_id is None:
+            return None
+        return self.no(TIPO_PAI[no.tipo], no.pai_id)
+
+    def ancestrais(self, tipo: str, no_id) -> Dict[str, Optional[No]]:
+        """
+        Caminho do nó até o canal: {'grupo': No, 'vendedor': No, ...}
+        Níveis acima de um pai inexistente ficam None.
+        """
+        caminho = {}
+        atual = self.no(tipo, no_id)
+        while tipo in TIPO_PAI:
+            tipo = TIPO_PAI[tipo]
+            atual = self.pai(atual)
+            caminho[tipo] = atual
+        return caminho
+
+    def lojas_ids(self, tipo: str, no_id) -> Tuple[int, ...]:
+        """Todas as lojas sob o nó (na ordem de exibição)"""
+        no = self.no(tipo, no_id)
+        if no is None:
+            return ()
+        if tipo == 'loja':
+            return (no.id,)
+        return self._lojas.get((tipo, no.id), ())
+
+    def descendentes(self, tipo: str, no_id, tipo_alvo: str) -> List[No]:
+        """Nós do nível tipo_alvo sob o nó (ex: grupos de um canal)"""
+        if TIPOS.index(tipo_alvo) < TIPOS.index(tipo):
+            return []
+        atuais = [no for no in [self.no(tipo, no_id)] if no is not None]
+        while atuais and tipo != tipo_alvo:
+            atuais = [filho for no in atuais for filho in self.filhos(tipo, no.id)]
+            tipo = TIPO_FILHO[tipo]
+        return atuais
+
+    def contagens(self, tipo: str, no_id) -> Dict[str, int]:
+        """Quantidade de nós de cada nível abaixo do nó (ex: {'regional': 2, ..., 'loja': 40})"""
+        resultado = {}
+        lojas = len(self.lojas_ids(tipo, no_id))
+        atuais = [no for no in [self.no(tipo, no_id)] if no is not None]
+        while tipo in TIPO_FILHO and TIPO_FILHO[tipo] != 'loja':
+            atuais = [filho for no in atuais for filho in self.filhos(tipo, no.id)]
+            tipo = TIPO_FILHO[tipo]
+            resultado[tipo] = len(atuais)
+        resultado['loja'] = lojas
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Serialização (UI)
+    # ------------------------------------------------------------------
+
+    def no_json(self, no: No) -> Dict:
+        dados = {'tipo': no.tipo, 'id': no.id, 'nome': no.nome}
+        if no.tipo == 'canal':
+            dados['marca'] = no.marca
+        if no.tipo == 'loja':
+            dados['cnpj'] = no.cnpj
+        else:
+            dados['total_lojas'] = len(self._lojas.get((no.tipo, no.id), ()))
+            dados['tem_filhos'] = bool(no.filhos)
+        return dados
+
+    def filhos_json(self, tipo: Optional[str] = None, no_id=None) -> List[Dict]:
+        """
+        Filhos diretos do nó (ou os canais, sem nó) para carregamento sob demanda na UI
+        """
+        if tipo is None:
+            return [self.no_json(no) for no in self.nos('canal')]
+        return [self.no_json(no) for no in self.filhos(tipo, no_id)]
+
+
+class ArvoreHierarquiaService:
+    """
+    Acesso à árvore compartilhada.
+
+    - hierarquia:versao: incrementada (após commit) a cada escrita na hierarquia
+    - hierarquia:arvore:<versao>: árvore serializada no cache compartilhado
+    - memo local do processo: evita desserializar a cada request (1 GET da versão)
+    """
+
+    CHAVE_VERSAO = 'hierarquia:versao'
+    CACHE_TIMEOUT = 3600  # rede de segurança para escritas fora dos serviços/views
+
+    _lock = threading.Lock()
+    _memo: Optional[Tuple[int, ArvoreHierarquia]] = None
+
+    @staticmethod
+    def _nova_versao() -> int:
+        return time.time_ns() // 1000
+
+    @classmethod
+    def versao(cls) -> int:
+        versao = cache.get(cls.CHAVE_VERSAO)
+        if versao is None:
+            versao = cls._nova_versao()
+            if not cache.add(cls.CHAVE_VERSAO, versao, timeout=None):
+                versao = cache.get(cls.CHAVE_VERSAO, versao)
+        return versao
+
+    @classmethod
+    def invalidar(cls):
+        """Chamar após criar/alterar canal, regional, vendedor, grupo ou loja"""
+        transaction.on_commit(
+            lambda: cache.set(cls.CHAVE_VERSAO, cls._nova_versao(), timeout=None)
+        )
+
+    @classmethod
+    def obter_arvore(cls) -> ArvoreHierarquia:
+        versao = cls.versao()
+        memo = cls._memo
+        if memo is not None and memo[0] == versao:
+            return memo[1]
+
+        with cls._lock:
+            memo = cls._memo
+            if memo is not None and memo[0] == versao:
+                return memo[1]
+
+            chave = f"hierarquia:arvore:{versao}"
+            arvore = cache.get(chave)
+            if arvore is None:
+                arvore = cls.carregar()
+                cache.set(chave, arvore, cls.CACHE_TIMEOUT)
+            cls._memo = (versao, arvore)
+            return arvore
+
+    @staticmethod
+    def carregar() -> ArvoreHierarquia:
+        """Monta a árvore a partir do banco (5 queries, uma por nível)"""
+        inicio = time.time()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, nome, marca FROM canal ORDER BY nome, id")
+            canais = cursor.fetchall()
+            cursor.execute("SELECT id, nome, canalId FROM regionais ORDER BY nome, id")
+            regionais = cursor.fetchall()
+            cursor.execute("SELECT id, nome, regionalId FROM vendedores ORDER BY nome, id")
+            vendedores = cursor.fetchall()
+            cursor.execute("SELECT id, nome, vendedorId FROM gruposeconomicos ORDER BY nome, id")
+            grupos = cursor.fetchall()
+            cursor.execute("""
+                SELECT id, razao_social, cnpj, GrupoEconomicoId, canal_id
+                FROM loja
+                ORDER BY razao_social, id
+            """)
+            lojas = cursor.fetchall()
+
+        arvore = ArvoreHierarquia(canais, regionais, vendedores, grupos, lojas)
+        registrar_log(
+            'comum.estr_organizacional',
+            f"Árvore da hierarquia carregada: {len(canais)} canais, {len(regionais)} regionais, "
+            f"{len(vendedores)} vendedores, {len(grupos)} grupos, {len(lojas)} lojas "
+            f"({(time.time() - inicio) * 1000:.0f}ms)",
+            nivel='DEBUG'
+        )
+        return arvore
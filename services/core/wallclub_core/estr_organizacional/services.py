@@ -7,6 +7,7 @@ from typing import Optional, Dict, List, Tuple
 from django.db import transaction
 from wallclub_core.utilitarios.log_control import registrar_log
 
+from .arvore import ArvoreHierarquiaService
 from .canal import Canal
 from .regional import Regional
 from .vendedor import Vendedor
@@ -76,6 +77,7 @@ class HierarquiaOrganizacionalService:
             
             canal, sucesso = Canal.criar_canal(nome, marca, cnpj, **kwargs)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Canal criado: {canal.id} - {canal.nome}", nivel='INFO')
             return canal, sucesso
         except Exception as e:
@@ -89,6 +91,7 @@ class HierarquiaOrganizacionalService:
         try:
             canal, sucesso = Canal.atualizar_canal(canal_id, **kwargs)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Canal atualizado: {canal_id}", nivel='INFO')
             return canal, sucesso
         except Exception as e:
@@ -152,6 +155,7 @@ class HierarquiaOrganizacionalService:
             
             regional, sucesso = Regional.criar_regional(nome, canal_id)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Regional criada: {regional.id} - {regional.nome}", nivel='INFO')
             return regional, sucesso
         except Exception as e:
@@ -165,6 +169,7 @@ class HierarquiaOrganizacionalService:
         try:
             regional, sucesso = Regional.atualizar_regional(regional_id, **kwargs)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Regional atualizada: {regional_id}", nivel='INFO')
             return regional, sucesso
         except Exception as e:
@@ -229,6 +234,7 @@ class HierarquiaOrganizacionalService:
             
             vendedor, sucesso = Vendedor.criar_vendedor(nome, regional_id)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Vendedor criado: {vendedor.id} - {vendedor.nome}", nivel='INFO')
             return vendedor, sucesso
         except Exception as e:
@@ -242,6 +248,7 @@ class HierarquiaOrganizacionalService:
         try:
             vendedor, sucesso = Vendedor.atualizar_vendedor(vendedor_id, **kwargs)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Vendedor atualizado: {vendedor_id}", nivel='INFO')
             return vendedor, sucesso
         except Exception as e:
@@ -306,6 +313,7 @@ class HierarquiaOrganizacionalService:
             
             grupo, sucesso = GrupoEconomico.criar_grupo_economico(nome, vendedor_id)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Grupo criado: {grupo.id} - {grupo.nome}", nivel='INFO')
             return grupo, sucesso
         except Exception as e:
@@ -319,6 +327,7 @@ class HierarquiaOrganizacionalService:
         try:
             grupo, sucesso = GrupoEconomico.atualizar_grupo_economico(grupo_id, **kwargs)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Grupo atualizado: {grupo_id}", nivel='INFO')
             return grupo, sucesso
         except Exception as e:
@@ -409,6 +418,7 @@ class HierarquiaOrganizacionalService:
             
             loja, sucesso = Loja.criar_loja(razao_social, grupo_economico_id, cnpj, canal_id, **kwargs)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Loja criada: {loja.id} - {loja.razao_social}", nivel='INFO')
             return loja, sucesso
         except Exception as e:
@@ -422,6 +432,7 @@ class HierarquiaOrganizacionalService:
         try:
             loja, sucesso = Loja.atualizar_loja(loja_id, **kwargs)
             if sucesso:
+                ArvoreHierarquiaService.invalidar()
                 registrar_log(cls.MODULO, f"Loja atualizada: {loja_id}", nivel='INFO')
             return loja, sucesso
         except Exception as e:
@@ -529,25 +540,10 @@ class HierarquiaOrganizacionalService:
             List[int]: Lista de IDs de grupos econômicos
         """
         try:
-            # Canal -> Regional -> Vendedor -> Grupo Econômico
-            # Buscar todas regionais do canal
-            regionais = Regional.objects.filter(canalId=canal_id)
-            regional_ids = [r.id for r in regionais]
-            
-            if not regional_ids:
-                return []
-            
-            # Buscar todos vendedores das regionais
-            vendedores = Vendedor.objects.filter(regionalId__in=regional_ids)
-            vendedor_ids = [v.id for v in vendedores]
-            
-            if not vendedor_ids:
-                return []
-            
-            # Buscar todos grupos dos vendedores
-            grupos = GrupoEconomico.objects.filter(vendedorId__in=vendedor_ids)
-            return [g.id for g in grupos]
-            
+            # Canal -> Regional -> Vendedor -> Grupo Econômico (árvore em cache)
+            arvore = ArvoreHierarquiaService.obter_arvore()
+            return [g.id for g in arvore.descendentes('canal', canal_id, 'grupo')]
+
         except Exception as e:
             registrar_log(cls.MODULO, f"Erro ao buscar grupos do canal {canal_id}: {str(e)}", nivel='ERROR')
             return []
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from wallclub_core.estr_organizacional.arvore import ArvoreHierarquia, ArvoreHierarquiaService
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                      'LOCATION': 'arvore-hierarquia-tests'}}
+
+
+def _arvore():
+    return ArvoreHierarquia(
+        canais=[(1, 'Canal A', 'marca_a'), (2, 'Canal B', 'marca_b')],
+        regionais=[(10, 'Norte', 1), (11, 'Sul', 1), (12, 'Órfã', 99)],
+        vendedores=[(20, 'Ana', 10), (21, 'Bruno', 11)],
+        grupos=[(30, 'Grupo X', 20), (31, 'Grupo Y', 21)],
+        lojas=[(40, 'Loja A', '111', 30, 1), (41, 'Loja B', '222', 31, 1),
+               (42, 'Loja C', '333', 30, 1), (43, 'Sem grupo', '444', None, None)],
+    )
+
+
+class ArvoreHierarquiaTest(SimpleTestCase):
+
+    def test_lojas_e_contagens_da_subarvore(self):
+        arvore = _arvore()
+        self.assertEqual(arvore.lojas_ids('canal', 1), (40, 42, 41))
+        self.assertEqual(arvore.lojas_ids('regional', '11'), (41,))
+        self.assertEqual(arvore.lojas_ids('canal', 2), ())
+        self.assertEqual(arvore.contagens('canal', 1),
+                         {'regional': 2, 'vendedor': 2, 'grupo': 2, 'loja': 3})
+        self.assertEqual(arvore.total('loja'), 4)
+
+    def test_ancestrais(self):
+        arvore = _arvore()
+        caminho = arvore.ancestrais('loja', 41)
+        self.assertEqual([caminho[t].id for t in ('grupo', 'vendedor', 'regional', 'canal')], [31, 21, 11, 1])
+        self.assertEqual(arvore.ancestrais('loja', 43),
+                         {'grupo': None, 'vendedor': None, 'regional': None, 'canal': None})
+        self.assertEqual(arvore.ancestrais('regional', 12), {'canal': None})
+
+    def test_descendentes_e_json_sob_demanda(self):
+        arvore = _arvore()
+        self.assertEqual([g.id for g in arvore.descendentes('canal', 1, 'grupo')], [30, 31])
+        self.assertEqual(arvore.descendentes('grupo', 30, 'canal'), [])
+        self.assertEqual([c['id'] for c in arvore.filhos_json()], [1, 2])
+        self.assertEqual(arvore.filhos_json('vendedor', 20),
+                         [{'tipo': 'grupo', 'id': 30, 'nome': 'Grupo X', 'total_lojas': 2, 'tem_filhos': True}])
+
+
+@override_settings(CACHES=LOCMEM)
+class ArvoreHierarquiaServiceTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        ArvoreHierarquiaService._memo = None
+
+    def test_carrega_uma_vez_por_versao(self):
+        with mock.patch.object(ArvoreHierarquiaService, 'carregar', side_effect=lambda: _arvore()) as carregar:
+            ArvoreHierarquiaService.obter_arvore()
+            ArvoreHierarquiaService.obter_arvore()
+            self.assertEqual(carregar.call_count, 1)
+
+            # Nova versão só é publicada no commit
+            with mock.patch('wallclub_core.estr_organizacional.arvore.transaction.on_commit',
+                            side_effect=lambda func: func()):
+                ArvoreHierarquiaService.invalidar()
+            ArvoreHierarquiaService.obter_arvore()
+            self.assertEqual(carregar.call_count, 2)
@@ -0,0 +1,258 @@
+"""
+Fila de saída de emails (email_outbox)
+
+EmailService.enviar_email grava a mensagem já renderizada e retorna - 2FA,
+reset de senha, exportações e notificações do antifraude não esperam o SMTP.
+A task wallclub_core.processar_email_outbox envia os pendentes:
+- em lotes, por uma única conexão SMTP/SES (get_connection + send_messages)
+- respeitando o limite de envio do provedor (LimitadorJanelaDeslizante)
+- com nova tentativa em backoff; após MAX_TENTATIVAS o email fica FALHA
+
+Mensagens idênticas (remetente, destinatários, assunto, corpo e anexos) dentro
+de JANELA_DEDUP são descartadas na entrada.
+"""
+
+import base64
+import hashlib
+import json
+import smtplib
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from wallclub_core.integracoes.models import EmailOutbox
+from wallclub_core.seguranca.rate_limiter import LimitadorJanelaDeslizante
+from wallclub_core.utilitarios.log_control import registrar_log
+
+
+class EmailOutboxService:
+    """Enfileiramento e envio em lote dos emails"""
+
+    MAX_TENTATIVAS = getattr(settings, 'EMAIL_OUTBOX_MAX_TENTATIVAS', 5)
+    # Atraso da n-ésima nova tentativa: ATRASO_BASE * 4^(n-1) -> 1min, 4min, 16min, 64min
+    ATRASO_BASE = 60
+    TAMANHO_LOTE = 100
+    # Tempo de uma execução da task (soft_time_limit 240s)
+    TEMPO_MAXIMO = 200
+    JANELA_DEDUP = getattr(settings, 'EMAIL_DEDUP_JANELA_SEGUNDOS', 300)
+    # Envios por janela do provedor: (máximo, janela em segundos) - SES: mensagens/s da conta
+    LIMITES_ENVIO = getattr(settings, 'EMAIL_LIMITES_ENVIO', [(14, 1)])
+
+    CHAVE_LOCK = 'email:outbox:processando'
+    # Agrupa os emails de uma rajada numa única execução da task
+    CHAVE_AGENDAMENTO = 'email:outbox:agendado'
+    INTERVALO_AGENDAMENTO = 1
+
+    # ------------------------------------------------------------------
+    # Entrada
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def enfileirar(cls, destinatarios: List[str], assunto: str, corpo_texto: str,
+                   corpo_html: Optional[str] = None, remetente: Optional[str] = None,
+                   anexos: Optional[List[Dict[str, Any]]] = None) -> Optional[int]:
+        """
+        Grava o email para envio assíncrono
+
+        Args:
+            anexos: [{'nome': 'file.csv', 'conteudo': bytes|str, 'tipo': 'text/csv'}]
+
+        Returns:
+            int: id em email_outbox, ou None se for duplicado de um email recente
+        """
+        remetente = remetente or settings.DEFAULT_FROM_EMAIL
+        destinatarios = list(destinatarios)
+        anexos_b64 = [
+            {
+                'nome': anexo['nome'],
+                'tipo': anexo.get('tipo', 'application/octet-stream'),
+                'conteudo_b64': base64.b64encode(
+                    anexo['conteudo'].encode('utf-8') if isinstance(anexo['conteudo'], str) else anexo['conteudo']
+                ).decode('ascii'),
+            }
+            for anexo in anexos or []
+        ] or None
+
+        chave = cls.chave_dedup(remetente, destinatarios, assunto, corpo_texto, corpo_html, anexos_b64)
+        chave_cache = f'email:dedup:{chave}'
+        if not cache.add(chave_cache, 1, timeout=cls.JANELA_DEDUP):
+            registrar_log('comum.integracoes', f"Email duplicado descartado: {assunto} -> {', '.join(destinatarios)}")
+            return None
+
+        try:
+            registro = EmailOutbox.objects.create(
+                chave_dedup=chave,
+                remetente=remetente,
+                destinatarios=destinatarios,
+                assunto=assunto[:512],
+                corpo_texto=corpo_texto,
+                corpo_html=corpo_html,
+                anexos=anexos_b64,
+            )
+        except Exception:
+            cache.delete(chave_cache)
+            raise
+
+        # Só onde há consumidor (Django); demais serviços deixam para o Celery Beat
+        if getattr(settings, 'EMAIL_OUTBOX_CONSUMIDOR', False):
+            transaction.on_commit(cls._agendar_processamento)
+        return registro.id
+
+    @staticmethod
+    def chave_dedup(remetente: str, destinatarios: List[str], assunto: str, corpo_texto: str,
+                    corpo_html: Optional[str], anexos_b64: Optional[List[Dict[str, str]]]) -> str:
+        conteudo = json.dumps(
+            [remetente, sorted(destinatarios), assunto, corpo_texto, corpo_html, anexos_b64],
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _agendar_processamento(cls):
+        if not cache.add(cls.CHAVE_AGENDAMENTO, 1, timeout=cls.INTERVALO_AGENDAMENTO):
+            return
+        try:
+            from wallclub_core.tasks import processar_email_outbox
+            processar_email_outbox.apply_async(countdown=cls.INTERVALO_AGENDAMENTO)
+        except Exception as e:
+            # Email já gravado: o Celery Beat envia na próxima execução
+            registrar_log('comum.integracoes', f'⚠️ Falha ao agendar envio de emails: {str(e)}', nivel='WARNING')
+
+    # ------------------------------------------------------------------
+    # Envio (task)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def processar_pendentes(cls, tempo_maximo: Optional[float] = None) -> Dict[str, int]:
+        """
+        Envia os pendentes, lote a lote, até esvaziar a fila ou esgotar
+        tempo_maximo (padrão: TEMPO_MAXIMO)
+
+        Returns:
+            dict: enviados, reagendados, falhas (esgotaram as tentativas)
+        """
+        resumo = {'enviados': 0, 'reagendados': 0, 'falhas': 0}
+
+        if not cache.add(cls.CHAVE_LOCK, 1, timeout=cls.TEMPO_MAXIMO + 100):
+            return resumo
+
+        limite = time.monotonic() + (tempo_maximo or cls.TEMPO_MAXIMO)
+        try:
+            while time.monotonic() < limite:
+                registros = list(
+                    EmailOutbox.objects
+                    .filter(status='PENDENTE')
+                    .filter(Q(proxima_tentativa__isnull=True) | Q(proxima_tentativa__lte=timezone.now()))
+                    .order_by('id')[:cls.TAMANHO_LOTE]
+                )
+                if not registros:
+                    break
+
+                enviados, falhas = cls.enviar_lote(registros)
+                if enviados:
+                    EmailOutbox.objects.filter(id__in=[r.id for r in enviados]).update(
+                        status='ENVIADO', enviado_em=timezone.now(), erro=None
+                    )
+                    resumo['enviados'] += len(enviados)
+                for registro, erro in falhas:
+                    if cls._registrar_falha(registro, erro):
+                        resumo['falhas'] += 1
+                    else:
+                        resumo['reagendados'] += 1
+        finally:
+            cache.delete(cls.CHAVE_LOCK)
+
+        if any(resumo.values()):
+            registrar_log('comum.integracoes', f"Fila de emails processada: {resumo}")
+        return resumo
+
+    @classmethod
+    def enviar_lote(cls, registros: List[EmailOutbox], conexao=None) -> Tuple[List[EmailOutbox], List[Tuple[EmailOutbox, Any]]]:
+        """
+        Envia os emails por uma única conexão (reaberta uma vez se o servidor desconectar)
+
+        Returns:
+            tuple: (registros enviados, [(registro, erro)] que falharam)
+        """
+        conexao = conexao or get_connection(fail_silently=False)
+        enviados = []
+        falhas = []
+        try:
+            conexao.open()
+            for registro in registros:
+                cls._aguardar_limite()
+                try:
+                    mensagem = cls._montar_mensagem(registro, conexao)
+                    try:
+                        aceitos = conexao.send_messages([mensagem])
+                    except smtplib.SMTPServerDisconnected:
+                        conexao.close()
+                        aceitos = conexao.send_messages([mensagem])
+                except Exception as e:
+                    falhas.append((registro, e))
+                    continue
+                if aceitos:
+                    enviados.append(registro)
+                else:
+                    falhas.append((registro, 'Servidor não aceitou a mensagem'))
+        except Exception as e:
+            # Falha ao conectar: o lote inteiro volta para nova tentativa
+            processados = {r.id for r in enviados} | {r.id for r, _ in falhas}
+            falhas.extend((r, e) for r in registros if r.id not in processados)
+        finally:
+            conexao.close()
+        return enviados, falhas
+
+    @staticmethod
+    def _montar_mensagem(registro: EmailOutbox, conexao) -> EmailMultiAlternatives:
+        mensagem = EmailMultiAlternatives(
+            subject=registro.assunto,
+            body=registro.corpo_texto,
+            from_email=registro.remetente,
+            to=registro.destinatarios,
+            connection=conexao,
+        )
+        if registro.corpo_html:
+            mensagem.attach_alternative(registro.corpo_html, 'text/html')
+        for anexo in registro.anexos or []:
+            mensagem.attach(anexo['nome'], base64.b64decode(anexo['conteudo_b64']), anexo['tipo'])
+        return mensagem
+
+    @classmethod
+    def _aguardar_limite(cls):
+        """Bloqueia até haver cota de envio no provedor"""
+        while True:
+            resultado = LimitadorJanelaDeslizante.verificar('email:envio', cls.LIMITES_ENVIO)
+            if resultado.permitido:
+                return
+            time.sleep(resultado.retry_after)
+
+    @classmethod
+    def _registrar_falha(cls, registro: EmailOutbox, erro: Any) -> bool:
+        """
+        Agenda nova tentativa ou marca o email como FALHA
+
+        Returns:
+            bool: True se esgotou as tentativas
+        """
+        tentativas = registro.tentativas + 1
+        mensagem = str(erro)[:500]
+
+        if tentativas >= cls.MAX_TENTATIVAS:
+            EmailOutbox.objects.filter(id=registro.id).update(status='FALHA', tentativas=tentativas, erro=mensagem)
+            registrar_log('comum.integracoes', f"❌ Email {registro.id} ({registro.assunto}) falhou após {tentativas} tentativas: {mensagem}", nivel='ERROR')
+            return True
+
+        atraso = cls.ATRASO_BASE * 4 ** (tentativas - 1)
+        EmailOutbox.objects.filter(id=registro.id).update(
+            tentativas=tentativas, erro=mensagem, proxima_tentativa=timezone.now() + timedelta(seconds=atraso)
+        )
+        registrar_log('comum.integracoes', f"⚠️ Email {registro.id} falhou (tentativa {tentativas}), nova tentativa em {atraso}s: {mensagem}", nivel='WARNING')
+        return False
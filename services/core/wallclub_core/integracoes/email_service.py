@@ -1,14 +1,21 @@
 """
 Serviço centralizado para envio de emails
 """
+from functools import lru_cache
 from django.core.mail import send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.template.loader import get_template, render_to_string
 from django.utils.html import strip_tags
 from typing import Dict, Any, List, Optional
 from wallclub_core.utilitarios.log_control import registrar_log
 
 
+@lru_cache(maxsize=128)
+def _template_compilado(template_html: str):
+    """Template carregado e compilado uma vez por processo"""
+    return get_template(template_html)
+
+
 class EmailService:
     """Serviço centralizado para envio de emails via AWS SES ou outro backend"""
 
@@ -21,11 +28,16 @@ class EmailService:
         mensagem_texto: str = None,
         remetente: str = None,
         fail_silently: bool = False,
-        anexos: List[Dict[str, Any]] = None
+        anexos: List[Dict[str, Any]] = None,
+        assincrono: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Envia email usando template HTML ou texto simples
 
+        Por padrão (EMAIL_OUTBOX_ATIVO) o email é gravado em email_outbox e
+        enviado em lote pela task wallclub_core.processar_email_outbox; se a
+        gravação falhar, envia direto.
+
         Args:
             destinatarios: Lista de emails destino
             assunto: Assunto do email
@@ -35,6 +47,7 @@ class EmailService:
             remetente: Email remetente (usa DEFAULT_FROM_EMAIL se None)
             fail_silently: Se True, não lança exceção em caso de erro
             anexos: Lista de anexos [{'nome': 'file.csv', 'conteudo': bytes, 'tipo': 'text/csv'}]
+            assincrono: False força o envio imediato (padrão: settings EMAIL_OUTBOX_ATIVO)
 
         Returns:
             Dict com sucesso e mensagem
@@ -46,7 +59,7 @@ class EmailService:
 
             # Preparar mensagens
             if template_html and template_context:
-                html_message = render_to_string(template_html, template_context)
+                html_message = EmailService._renderizar(template_html, template_context)
                 plain_message = strip_tags(html_message)
             elif mensagem_texto:
                 plain_message = mensagem_texto
@@ -54,6 +67,15 @@ class EmailService:
             else:
                 raise ValueError("Deve fornecer template_html+context ou mensagem_texto")
 
+            if assincrono is None:
+                assincrono = getattr(settings, 'EMAIL_OUTBOX_ATIVO', True)
+            if assincrono:
+                resultado = EmailService._enfileirar(
+                    destinatarios, assunto, plain_message, html_message, remetente, anexos
+                )
+                if resultado is not None:
+                    return resultado
+
             # Log antes de enviar
             registrar_log(
                 'comum.integracoes',
@@ -144,6 +166,51 @@ class EmailService:
                 'mensagem': f'Erro ao enviar email: {str(e)}'
             }
 
+    @staticmethod
+    def _renderizar(template_html: str, template_context: Dict[str, Any]) -> str:
+        """Renderiza com o template em cache (em DEBUG relê o arquivo a cada envio)"""
+        if settings.DEBUG:
+            return render_to_string(template_html, template_context)
+        return _template_compilado(template_html).render(template_context)
+
+    @staticmethod
+    def _enfileirar(destinatarios, assunto, plain_message, html_message, remetente, anexos) -> Optional[Dict[str, Any]]:
+        """
+        Grava na fila de saída
+
+        Returns:
+            Dict de retorno do enviar_email, ou None se a fila falhou (envio direto)
+        """
+        from wallclub_core.integracoes.email_outbox import EmailOutboxService
+
+        try:
+            outbox_id = EmailOutboxService.enfileirar(
+                destinatarios, assunto, plain_message,
+                corpo_html=html_message, remetente=remetente, anexos=anexos
+            )
+        except Exception as e:
+            registrar_log(
+                'comum.integracoes',
+                f"⚠️ Falha ao enfileirar email, enviando direto: {str(e)}",
+                nivel='WARNING'
+            )
+            return None
+
+        if outbox_id is None:
+            return {
+                'sucesso': True,
+                'mensagem': 'Email idêntico já enviado recentemente'
+            }
+        registrar_log(
+            'comum.integracoes',
+            f"Email enfileirado ({outbox_id}): {assunto} -> {', '.join(destinatarios)}",
+            nivel='DEBUG'
+        )
+        return {
+            'sucesso': True,
+            'mensagem': f'Email enfileirado para {len(destinatarios)} destinatário(s)'
+        }
+
     @staticmethod
     def enviar_email_simples(
         destinatario: str,
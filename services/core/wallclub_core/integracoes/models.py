@@ -64,3 +64,45 @@ class TemplateEnvioMsg(models.Model):
             mensagem_formatada = mensagem_formatada.replace(placeholder, str(value))
         
         return mensagem_formatada
+
+
+class EmailOutbox(models.Model):
+    """
+    Fila de saída de emails (EmailOutboxService)
+
+    O remetente grava a mensagem já renderizada e segue; a task
+    wallclub_core.processar_email_outbox envia os pendentes em lote por uma
+    única conexão SMTP/SES.
+    """
+
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('ENVIADO', 'Enviado'),
+        ('FALHA', 'Falha'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    chave_dedup = models.CharField(max_length=64, help_text='sha256 de remetente + destinatários + assunto + corpo')
+    remetente = models.CharField(max_length=256)
+    destinatarios = models.JSONField()
+    assunto = models.CharField(max_length=512)
+    corpo_texto = models.TextField()
+    corpo_html = models.TextField(null=True, blank=True)
+    anexos = models.JSONField(null=True, blank=True, help_text='[{"nome", "tipo", "conteudo_b64"}]')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDENTE')
+    tentativas = models.IntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(null=True, blank=True)
+    erro = models.CharField(max_length=500, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='idx_email_outbox_status_id'),
+        ]
+        verbose_name = 'Email na Fila'
+        verbose_name_plural = 'Emails na Fila'
+
+    def __str__(self):
+        return f"{self.assunto} ({self.status})"
@@ -0,0 +1,85 @@
+"""
+Benchmark do calendário pré-computado de dias úteis.
+
+Compara o cálculo legado (strptime + passo dia-a-dia) com as tabelas do
+CalendarioDiasUteis para N parcelas sintéticas.
+
+Uso:
+    python manage.py benchmark_calendario
+    python manage.py benchmark_calendario --parcelas 1000000 --max-parcelas 12
+"""
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from wallclub_core.utilitarios.calendario import CalendarioDiasUteis
+
+
+def _legado_proxima_sexta(data_str):
+    data_obj = datetime.strptime(data_str, '%d/%m/%Y')
+    while data_obj.weekday() != 4:
+        data_obj += timedelta(days=1)
+    return data_obj.strftime('%d/%m/%Y')
+
+
+def _legado_liquidacao_parcela(data_str, parcela):
+    data_obj = datetime.strptime(data_str, '%d/%m/%Y') + timedelta(days=30 * parcela)
+    while data_obj.weekday() >= 5:
+        data_obj += timedelta(days=1)
+    return data_obj.date()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de datas de liquidação: legado vs calendário pré-computado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parcelas', type=int, default=1_000_000,
+                            help='Quantidade de parcelas simuladas (padrão: 1.000.000)')
+        parser.add_argument('--max-parcelas', type=int, default=12,
+                            help='Número máximo de parcelas por transação (padrão: 12)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        total = options['parcelas']
+        max_parcelas = options['max_parcelas']
+        rnd = random.Random(options['seed'])
+
+        ano_atual = date.today().year
+        inicio = date(ano_atual - 1, 1, 1).toordinal()
+        datas = [date.fromordinal(inicio + rnd.randrange(730)).strftime('%d/%m/%Y') for _ in range(total)]
+        parcelas = [rnd.randint(1, max_parcelas) for _ in range(total)]
+
+        t0 = time.perf_counter()
+        calendario = CalendarioDiasUteis(ano_atual - 5, ano_atual + 10)
+        t_montagem = time.perf_counter() - t0
+        self.stdout.write(f'Montagem do calendário: {t_montagem * 1000:.1f} ms')
+
+        t0 = time.perf_counter()
+        legado = [_legado_liquidacao_parcela(d, p) for d, p in zip(datas, parcelas)]
+        legado_sextas = [_legado_proxima_sexta(d) for d in datas]
+        t_legado = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        unitario = [calendario.data_liquidacao_parcela(d, p) for d, p in zip(datas, parcelas)]
+        t_unitario = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        lote = calendario.datas_liquidacao_parcelas(datas, parcelas)
+        sextas = calendario.proximas_sextas_feiras(datas)
+        t_lote = time.perf_counter() - t0
+
+        divergencias = sum(1 for a, b in zip(legado, lote) if a != b)
+        divergencias += sum(1 for a, b in zip(legado_sextas, sextas) if a != b.strftime('%d/%m/%Y'))
+        divergencias += sum(1 for a, b in zip(unitario, lote) if a != b)
+
+        self.stdout.write(f'Parcelas: {total:,}')
+        self.stdout.write(f'Legado (liquidação + sexta): {t_legado:.2f}s ({total / t_legado:,.0f}/s)')
+        self.stdout.write(f'Calendário unitário (liquidação): {t_unitario:.2f}s ({total / t_unitario:,.0f}/s)')
+        self.stdout.write(f'Calendário lote (liquidação + sexta): {t_lote:.2f}s ({total / t_lote:,.0f}/s)')
+
+        if divergencias:
+            self.stdout.write(self.style.ERROR(f'❌ {divergencias} divergências em relação ao legado'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Resultados idênticos ao cálculo legado'))
@@ -0,0 +1,135 @@
+"""
+Benchmark da inicialização (cold start) do ConfigManager por container.
+
+Para cada container, cria um ConfigManager novo e executa as leituras que o
+settings faz no boot, seguidas de --requisicoes leituras em tempo de
+requisição (get_bureau_config). Compara:
+
+- sem_cache: AWS_SECRETS_CACHE_TTL=0, um get_secret_value por leitura (fluxo anterior)
+- cache: batch_get_secret_value na inicialização e leituras do cache
+
+Conta as chamadas ao Secrets Manager. Por padrão usa o AWS real (credenciais
+do ambiente); com --latencia-ms usa um Secrets Manager simulado em memória
+com essa latência por chamada.
+
+Uso:
+    python manage.py benchmark_config_manager
+    python manage.py benchmark_config_manager --latencia-ms 40 --inicializacoes 20
+"""
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+
+from wallclub_core.utilitarios.config_manager import ConfigManager
+
+# Leituras feitas pelo settings de cada container no boot
+BOOT_DJANGO = ('load_own_credentials', 'get_database_config', 'get_pinbank_config',
+               'get_email_config', 'get_riskengine_credentials')
+CONTAINERS = {
+    'wallclub-portais': BOOT_DJANGO,
+    'wallclub-pos': BOOT_DJANGO,
+    'wallclub-apis': BOOT_DJANGO,
+    'wallclub-celery-worker': BOOT_DJANGO,
+    'wallclub-riskengine': ('get_database_config', 'get_maxmind_config'),
+}
+
+
+class _ClienteContador:
+    """Repassa as chamadas ao cliente do Secrets Manager, contando-as"""
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+        self.chamadas = 0
+
+    def __getattr__(self, nome):
+        metodo = getattr(self._cliente, nome)
+
+        def chamar(*args, **kwargs):
+            self.chamadas += 1
+            return metodo(*args, **kwargs)
+        return chamar
+
+
+class _SecretsManagerSimulado:
+    """Secrets Manager em memória com latência fixa por chamada"""
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.valor = json.dumps({
+            'DB_USER_PYTHON': 'benchmark', 'DB_PASS_PYTHON': 'benchmark', 'DB_HOST': 'localhost',
+            'OWN_CORE_ID': 'benchmark-core-id', 'OWN_SECRET': 'benchmark', 'OWN_SCOPE': 'benchmark',
+        })
+
+    def get_secret_value(self, SecretId):
+        time.sleep(self.latencia)
+        return {'Name': SecretId, 'SecretString': self.valor}
+
+    def batch_get_secret_value(self, SecretIdList, NextToken=None):
+        time.sleep(self.latencia)
+        return {'SecretValues': [{'Name': nome, 'SecretString': self.valor} for nome in SecretIdList]}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de cold start do ConfigManager por container: sem cache vs cache com carga em lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicializacoes', type=int, default=10, help='Inicializações por cenário (padrão: 10)')
+        parser.add_argument('--requisicoes', type=int, default=20,
+                            help='Leituras em tempo de requisição após o boot (padrão: 20)')
+        parser.add_argument('--latencia-ms', type=float, default=0,
+                            help='Usa Secrets Manager simulado com esta latência (padrão: 0 = AWS real)')
+
+    @staticmethod
+    def _cliente_aws():
+        """Cliente boto3 criado como no ConfigManager (None se indisponível)"""
+        with mock.patch.dict(os.environ, {'AWS_SECRETS_CACHE_TTL': '0'}):
+            return ConfigManager()._secrets_client
+
+    def handle(self, *args, **options):
+        if options['latencia_ms']:
+            cliente = _SecretsManagerSimulado(options['latencia_ms'] / 1000)
+            self.stdout.write(f"Secrets Manager simulado ({options['latencia_ms']:.0f}ms por chamada)")
+        else:
+            cliente = self._cliente_aws()
+            if cliente is None:
+                self.stdout.write(self.style.ERROR('Cliente AWS indisponível (boto3/credenciais); use --latencia-ms'))
+                return
+            self.stdout.write('Secrets Manager AWS')
+
+        for container, leituras in CONTAINERS.items():
+            resultados = {}
+            for cenario, ttl in (('sem_cache', '0'), ('cache', os.getenv('AWS_SECRETS_CACHE_TTL', '900'))):
+                tempos_boot, tempos_requisicoes, chamadas = [], [], []
+                for _ in range(options['inicializacoes']):
+                    contador = _ClienteContador(cliente)
+                    # load_own_credentials grava no os.environ e imprime: restaurados/descartados
+                    with mock.patch.dict(os.environ, {'AWS_SECRETS_CACHE_TTL': ttl}), \
+                            contextlib.redirect_stdout(io.StringIO()):
+                        inicio = time.perf_counter()
+                        config = ConfigManager(secrets_client=contador)
+                        for leitura in leituras:
+                            getattr(config, leitura)()
+                        tempos_boot.append((time.perf_counter() - inicio) * 1000)
+
+                        inicio = time.perf_counter()
+                        for _ in range(options['requisicoes']):
+                            config.get_bureau_config()
+                        tempos_requisicoes.append((time.perf_counter() - inicio) * 1000)
+                    chamadas.append(contador.chamadas)
+
+                resultados[cenario] = statistics.median(tempos_boot)
+                self.stdout.write(
+                    f'{container:24s} {cenario:9s} boot mediana {statistics.median(tempos_boot):8.1f}ms  '
+                    f'requisições {statistics.median(tempos_requisicoes):8.1f}ms  '
+                    f'chamadas AWS {max(chamadas)}'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"{container:24s} ganho no boot: {resultados['sem_cache'] / max(resultados['cache'], 1e-6):.1f}x"
+            ))
+
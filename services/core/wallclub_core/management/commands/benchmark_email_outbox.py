@@ -0,0 +1,116 @@
+"""
+Benchmark do envio de emails: uma conexão SMTP por mensagem vs lote da fila.
+
+Sobe um servidor SMTP local que só conta as mensagens (aiosmtpd) e aponta o
+backend SMTP do Django para ele. Compara, em mensagens/segundo:
+
+- por_mensagem: send_mail() por email (fluxo anterior do EmailService:
+  conecta, EHLO, envia, QUIT a cada mensagem)
+- lote: EmailOutboxService.enviar_lote em lotes de TAMANHO_LOTE (uma conexão
+  por lote, send_messages), sem o limite do provedor ou com --limite-por-segundo
+
+Os registros da fila são montados em memória (nada é gravado no banco).
+Requer aiosmtpd (pip install aiosmtpd).
+
+Uso:
+    python manage.py benchmark_email_outbox
+    python manage.py benchmark_email_outbox --mensagens 2000 --limite-por-segundo 14
+"""
+import socket
+import threading
+import time
+from unittest import mock
+
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from wallclub_core.integracoes.email_outbox import EmailOutboxService
+from wallclub_core.integracoes.models import EmailOutbox
+
+
+class _Contador:
+    """Handler aiosmtpd: aceita e descarta, contando as mensagens"""
+
+    def __init__(self):
+        self.total = 0
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            self.total += 1
+        return '250 OK'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de envio de emails: conexão por mensagem vs lote da fila (servidor SMTP local)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mensagens', type=int, default=500, help='Emails por cenário (padrão: 500)')
+        parser.add_argument('--limite-por-segundo', type=int, default=0,
+                            help='Limite de envio no cenário lote (padrão: 0 = sem limite)')
+
+    def handle(self, *args, **options):
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise CommandError('aiosmtpd não instalado (pip install aiosmtpd)')
+
+        total = options['mensagens']
+        contador = _Contador()
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            porta = s.getsockname()[1]
+        servidor = Controller(contador, hostname='127.0.0.1', port=porta)
+        servidor.start()
+
+        smtp_local = dict(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=porta,
+            EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        )
+        corpo = 'Seu código de verificação é 123456.\n' * 5
+        html = f'<html><body><p>{corpo}</p></body></html>'
+
+        try:
+            with override_settings(**smtp_local):
+                # Cenário 1: conexão nova por mensagem
+                contador.total = 0
+                inicio = time.perf_counter()
+                for i in range(total):
+                    send_mail(f'Benchmark {i}', corpo, 'noreply@wallclub.com.br',
+                              [f'bench{i}@example.com'], html_message=html)
+                duracao_individual = time.perf_counter() - inicio
+                recebidas_individual = contador.total
+
+                # Cenário 2: lotes da fila, uma conexão por lote
+                registros = [
+                    EmailOutbox(id=i, remetente='noreply@wallclub.com.br', destinatarios=[f'bench{i}@example.com'],
+                                assunto=f'Benchmark {i}', corpo_texto=corpo, corpo_html=html, tentativas=0)
+                    for i in range(total)
+                ]
+                limites = [(options['limite_por_segundo'], 1)] if options['limite_por_segundo'] else None
+                contador.total = 0
+                falhas = []
+                inicio = time.perf_counter()
+                sem_limite = mock.patch.object(EmailOutboxService, '_aguardar_limite')
+                with mock.patch.object(EmailOutboxService, 'LIMITES_ENVIO', limites) if limites else sem_limite:
+                    for i in range(0, total, EmailOutboxService.TAMANHO_LOTE):
+                        _, falhas_lote = EmailOutboxService.enviar_lote(registros[i:i + EmailOutboxService.TAMANHO_LOTE])
+                        falhas.extend(falhas_lote)
+                duracao_lote = time.perf_counter() - inicio
+                recebidas_lote = contador.total
+        finally:
+            servidor.stop()
+
+        self.stdout.write(f'por_mensagem: {recebidas_individual}/{total} em {duracao_individual:.2f}s '
+                          f'= {total / duracao_individual:8.1f} msg/s')
+        self.stdout.write(f'lote        : {recebidas_lote}/{total} em {duracao_lote:.2f}s '
+                          f'= {total / duracao_lote:8.1f} msg/s'
+                          + (f" (limite {options['limite_por_segundo']}/s)" if limites else ''))
+
+        if falhas or recebidas_individual != total or recebidas_lote != total:
+            self.stdout.write(self.style.ERROR(f'Mensagens perdidas ou com falha: {len(falhas)} falhas no lote'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Ganho do lote: {duracao_individual / duracao_lote:.1f}x'))
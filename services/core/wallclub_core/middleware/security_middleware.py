@@ -2,16 +2,14 @@
 Middleware de segurança para APIs
 Rate limiting, validação de requisições e logging
 """
-import json
-import time
 from django.http import JsonResponse
-from django.core.cache import cache
 from django.conf import settings
+from wallclub_core.seguranca.rate_limiter import LimitadorJanelaDeslizante
 from wallclub_core.utilitarios.log_control import registrar_log
 
 
 class RateLimiter:
-    """Gerenciador de rate limiting usando Redis"""
+    """Rate limiting por cliente e path (janela deslizante atômica no Redis)"""
 
     @classmethod
     def _get_rate_limits_config(cls):
@@ -69,32 +67,15 @@ class RateLimiter:
             max_requests = limit_config['requests']
             window_seconds = limit_config['window']
 
-            # Chave no cache
-            cache_key = f"rate_limit:{identifier}:{path}"
-            ttl_key = f"{cache_key}:ttl"
-
-            # Obter contador atual
-            current_count = cache.get(cache_key, 0)
-
-            if current_count >= max_requests:
-                # Limite excedido - calcular tempo restante
-                window_end = cache.get(ttl_key, 0)
-                retry_after = max(1, int(window_end - time.time()))
+            resultado = LimitadorJanelaDeslizante.verificar(
+                f"api:{identifier}:{path}", [(max_requests, window_seconds)]
+            )
 
+            if not resultado.permitido:
                 registrar_log('comum.middleware',
-                             f"Rate limit excedido - IP: {identifier}, Path: {path}, Count: {current_count}/{max_requests}",
+                             f"Rate limit excedido - IP: {identifier}, Path: {path}, Count: {resultado.contagens[0]}/{max_requests}",
                              nivel='WARNING')
-                return False, retry_after
-
-            # Incrementar contador
-            if current_count == 0:
-                # Primeiro request na janela - criar contador e timestamp de expiração
-                window_end = time.time() + window_seconds
-                cache.set(cache_key, 1, timeout=window_seconds)
-                cache.set(ttl_key, window_end, timeout=window_seconds)
-            else:
-                # Incrementar contador existente
-                cache.incr(cache_key)
+                return False, resultado.retry_after
 
             return True, 0
 
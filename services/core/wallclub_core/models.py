@@ -54,3 +54,33 @@ class AuditoriaValidacaoSenha(models.Model):
     
     def __str__(self):
         return f"CPF {self.cpf} - {'Sucesso' if self.sucesso else 'Falha'} - {self.timestamp}"
+
+
+class AuditoriaLoginMinuto(models.Model):
+    """
+    Resumo por minuto das tentativas de login (CPF x IP)
+    Base dos relatórios de auditoria - gravado junto com o histórico, em lote
+    """
+    id = models.BigAutoField(primary_key=True)
+    minuto = models.DateTimeField()
+    cpf = models.CharField(max_length=14)
+    ip_address = models.CharField(max_length=45)
+    falhas = models.IntegerField(default=0)
+    sucessos = models.IntegerField(default=0)
+    ultima_tentativa = models.DateTimeField()
+    ultimo_sucesso = models.BooleanField(default=False)  # resultado da última tentativa do minuto
+
+    class Meta:
+        db_table = 'auditoria_login_minuto'
+        verbose_name = 'Auditoria Login por Minuto'
+        verbose_name_plural = 'Auditoria Login por Minuto'
+        constraints = [
+            models.UniqueConstraint(fields=['minuto', 'cpf', 'ip_address'], name='uk_auditoria_login_minuto'),
+        ]
+        indexes = [
+            models.Index(fields=['cpf', 'minuto'], name='idx_auditoria_login_cpf'),
+            models.Index(fields=['ip_address', 'minuto'], name='idx_auditoria_login_ip'),
+        ]
+
+    def __str__(self):
+        return f"{self.minuto} CPF {self.cpf} IP {self.ip_address}: {self.falhas} falhas, {self.sucessos} sucessos"
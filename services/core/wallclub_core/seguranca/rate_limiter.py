@@ -0,0 +1,180 @@
+"""
+Primitiva de rate limiting por janela deslizante (sliding-window log)
+
+Uma chave = um ZSET com o timestamp (ms) de cada requisição admitida.
+Todas as janelas da chave (ex: minuto + hora) são verificadas e a requisição
+é registrada em um único EVALSHA - sem corrida entre leitura e incremento.
+
+Sem Redis (LocMemCache em dev/testes) o mesmo algoritmo roda no cache Django
+sob um lock do processo.
+"""
+import bisect
+import threading
+import time
+import uuid
+from collections import namedtuple
+from typing import List, Sequence, Tuple
+
+from django.core.cache import cache
+
+PREFIXO_CHAVE = 'rl'
+
+# (permitido, retry_after em segundos, contagens por janela antes desta requisição)
+ResultadoLimite = namedtuple('ResultadoLimite', ['permitido', 'retry_after', 'contagens'])
+
+# ARGV: agora_ms, membro, limite_1, janela_ms_1, limite_2, janela_ms_2, ...
+# Retorno: {permitido, retry_ms, contagem_1, contagem_2, ...}
+_SCRIPT_LUA = """
+local chave = KEYS[1]
+local agora = tonumber(ARGV[1])
+local membro = ARGV[2]
+local total = (#ARGV - 2) / 2
+
+local maior_janela = 0
+for i = 1, total do
+    local janela = tonumber(ARGV[2 + 2 * i])
+    if janela > maior_janela then maior_janela = janela end
+end
+
+redis.call('ZREMRANGEBYSCORE', chave, '-inf', agora - maior_janela)
+
+local permitido = 1
+local retry = 0
+local resultado = {0, 0}
+for i = 1, total do
+    local limite = tonumber(ARGV[1 + 2 * i])
+    local janela = tonumber(ARGV[2 + 2 * i])
+    local inicio = string.format('(%d', agora - janela)
+    local contagem = redis.call('ZCOUNT', chave, inicio, '+inf')
+    resultado[2 + i] = contagem
+    if contagem >= limite then
+        permitido = 0
+        -- Entrada que precisa expirar para a contagem voltar abaixo do limite
+        local saida = redis.call('ZRANGEBYSCORE', chave, inicio, '+inf',
+                                 'WITHSCORES', 'LIMIT', contagem - limite, 1)
+        local espera = janela
+        if saida[2] then espera = tonumber(saida[2]) + janela - agora end
+        if espera > retry then retry = espera end
+    end
+end
+
+if permitido == 1 then
+    redis.call('ZADD', chave, agora, membro)
+    redis.call('PEXPIRE', chave, maior_janela)
+end
+
+resultado[1] = permitido
+resultado[2] = retry
+return resultado
+"""
+
+_lock_local = threading.Lock()
+_script = None
+
+
+class LimitadorJanelaDeslizante:
+    """
+    Limitador compartilhado por POS, login/2FA e middleware de APIs.
+
+    Uso:
+        resultado = LimitadorJanelaDeslizante.verificar(
+            f"pos:terminal:{terminal_id}", [(50, 60), (500, 3600)]
+        )
+        if not resultado.permitido:
+            ... resultado.retry_after ...
+    """
+
+    @classmethod
+    def verificar(cls, chave: str, limites: Sequence[Tuple[int, int]]) -> ResultadoLimite:
+        """
+        Verifica todas as janelas e, se nenhuma estourou, registra a requisição.
+
+        Args:
+            chave: identificador lógico (sem prefixo)
+            limites: lista de (max_requisicoes, janela_segundos)
+
+        Returns:
+            ResultadoLimite(permitido, retry_after, contagens)
+        """
+        limites = [(int(maximo), int(janela)) for maximo, janela in limites]
+        agora_ms = int(time.time() * 1000)
+        cliente = cls._cliente_redis()
+
+        if cliente is not None:
+            permitido, retry_ms, contagens = cls._verificar_redis(cliente, chave, limites, agora_ms)
+        else:
+            permitido, retry_ms, contagens = cls._verificar_local(chave, limites, agora_ms)
+
+        retry_after = 0 if permitido else max(1, -(-retry_ms // 1000))
+        return ResultadoLimite(bool(permitido), retry_after, contagens)
+
+    @classmethod
+    def resetar(cls, *chaves: str):
+        """Descarta o histórico das chaves (ex: após login bem-sucedido)"""
+        cache.delete_many([cls._chave(chave) for chave in chaves])
+
+    # ------------------------------------------------------------------
+    # Backends
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _chave(chave: str) -> str:
+        return f"{PREFIXO_CHAVE}:{chave}"
+
+    @staticmethod
+    def _cliente_redis():
+        """
+        Cliente redis-py do cache default (RedisCache do Django ou django-redis).
+        None para backends sem Redis (LocMemCache).
+        """
+        backend = getattr(cache, '_cache', None)
+        if backend is not None and hasattr(backend, 'get_client'):
+            return backend.get_client(write=True)
+        client = getattr(cache, 'client', None)
+        if client is not None and hasattr(client, 'get_client'):
+            return client.get_client(write=True)
+        return None
+
+    @classmethod
+    def _verificar_redis(cls, cliente, chave: str, limites: List[Tuple[int, int]],
+                         agora_ms: int) -> Tuple[int, int, List[int]]:
+        global _script
+        if _script is None:
+            # Script usa EVALSHA e recarrega o código em NOSCRIPT
+            _script = cliente.register_script(_SCRIPT_LUA)
+
+        argumentos = [agora_ms, f"{agora_ms}-{uuid.uuid4().hex[:12]}"]
+        for maximo, janela in limites:
+            argumentos.extend([maximo, janela * 1000])
+
+        resposta = _script(keys=[cache.make_key(cls._chave(chave))], args=argumentos, client=cliente)
+        return int(resposta[0]), int(resposta[1]), [int(c) for c in resposta[2:]]
+
+    @classmethod
+    def _verificar_local(cls, chave: str, limites: List[Tuple[int, int]],
+                         agora_ms: int) -> Tuple[int, int, List[int]]:
+        chave_cache = cls._chave(chave)
+        maior_janela = max(janela for _, janela in limites) * 1000
+
+        with _lock_local:
+            registros = [t for t in cache.get(chave_cache, []) if t > agora_ms - maior_janela]
+
+            permitido = 1
+            retry_ms = 0
+            contagens = []
+            for maximo, janela in limites:
+                janela_ms = janela * 1000
+                na_janela = [t for t in registros if t > agora_ms - janela_ms]
+                contagens.append(len(na_janela))
+                if len(na_janela) >= maximo:
+                    permitido = 0
+                    saida = na_janela[len(na_janela) - maximo] if maximo > 0 else None
+                    espera = saida + janela_ms - agora_ms if saida is not None else janela_ms
+                    retry_ms = max(retry_ms, espera)
+
+            if permitido:
+                bisect.insort(registros, agora_ms)
+                cache.set(chave_cache, registros, timeout=-(-maior_janela // 1000))
+
+        return permitido, retry_ms, contagens
+
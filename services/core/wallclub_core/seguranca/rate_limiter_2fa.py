@@ -3,7 +3,7 @@ Rate Limiter específico para Login e 2FA
 Controles por CPF, IP e Device Fingerprint
 """
 from django.core.cache import cache
-from datetime import datetime, timedelta
+from wallclub_core.seguranca.rate_limiter import LimitadorJanelaDeslizante
 from wallclub_core.utilitarios.log_control import registrar_log
 
 
@@ -33,29 +33,23 @@ class Login2FARateLimiter:
         Returns:
             tuple: (allowed: bool, attempts_remaining: int, retry_after: int)
         """
-        cache_key = f"login_cpf:{cpf}"
-        attempts = cache.get(cache_key, 0)
+        resultado = LimitadorJanelaDeslizante.verificar(
+            f"login_cpf:{cpf}", [(cls.MAX_LOGIN_ATTEMPTS_CPF, cls.LOGIN_BLOCK_DURATION)]
+        )
+        attempts = resultado.contagens[0]
 
-        if attempts >= cls.MAX_LOGIN_ATTEMPTS_CPF:
+        if not resultado.permitido:
             registrar_log('comum.seguranca',
                 f"Login bloqueado por rate limit - CPF: {cpf}, tentativas: {attempts}",
                 nivel='WARNING')
-            return False, 0, cls.LOGIN_BLOCK_DURATION
+            return False, 0, resultado.retry_after
 
-        # Incrementar contador
-        if attempts == 0:
-            cache.set(cache_key, 1, timeout=cls.LOGIN_BLOCK_DURATION)
-            registrar_log('comum.seguranca',
-                f"Rate limiter iniciado: CPF={cpf[:3]}***, tentativas=1/{cls.MAX_LOGIN_ATTEMPTS_CPF}",
-                nivel='DEBUG')
-        else:
-            cache.incr(cache_key)
-            new_attempts = attempts + 1
-            registrar_log('comum.seguranca',
-                f"Rate limiter incrementado: CPF={cpf[:3]}***, tentativas={new_attempts}/{cls.MAX_LOGIN_ATTEMPTS_CPF}",
-                nivel='WARNING' if new_attempts >= 3 else 'DEBUG')
+        new_attempts = attempts + 1
+        registrar_log('comum.seguranca',
+            f"Rate limiter: CPF={cpf[:3]}***, tentativas={new_attempts}/{cls.MAX_LOGIN_ATTEMPTS_CPF}",
+            nivel='WARNING' if new_attempts >= 3 else 'DEBUG')
 
-        remaining = cls.MAX_LOGIN_ATTEMPTS_CPF - (attempts + 1)
+        remaining = cls.MAX_LOGIN_ATTEMPTS_CPF - new_attempts
         return True, remaining, 0
 
     @classmethod
@@ -66,20 +60,15 @@ class Login2FARateLimiter:
         Returns:
             tuple: (allowed: bool, retry_after: int)
         """
-        cache_key = f"login_ip:{ip_address}"
-        attempts = cache.get(cache_key, 0)
+        resultado = LimitadorJanelaDeslizante.verificar(
+            f"login_ip:{ip_address}", [(cls.MAX_LOGIN_ATTEMPTS_IP, cls.LOGIN_BLOCK_DURATION)]
+        )
 
-        if attempts >= cls.MAX_LOGIN_ATTEMPTS_IP:
+        if not resultado.permitido:
             registrar_log('comum.seguranca',
-                f"Login bloqueado por rate limit - IP: {ip_address}, tentativas: {attempts}",
+                f"Login bloqueado por rate limit - IP: {ip_address}, tentativas: {resultado.contagens[0]}",
                 nivel='WARNING')
-            return False, cls.LOGIN_BLOCK_DURATION
-
-        # Incrementar contador
-        if attempts == 0:
-            cache.set(cache_key, 1, timeout=cls.LOGIN_BLOCK_DURATION)
-        else:
-            cache.incr(cache_key)
+            return False, resultado.retry_after
 
         return True, 0
 
@@ -117,17 +106,12 @@ class Login2FARateLimiter:
         Returns:
             tuple: (allowed: bool, retry_after: int)
         """
-        cache_key = f"2fa_cooldown:{cliente_id}"
-        last_request = cache.get(cache_key)
-
-        if last_request:
-            elapsed = (datetime.now() - last_request).total_seconds()
-            if elapsed < cls.OTP_COOLDOWN:
-                retry_after = int(cls.OTP_COOLDOWN - elapsed)
-                return False, retry_after
-
-        # Registrar nova solicitação
-        cache.set(cache_key, datetime.now(), timeout=cls.OTP_COOLDOWN)
+        # Cooldown = no máximo 1 solicitação na janela de OTP_COOLDOWN segundos
+        resultado = LimitadorJanelaDeslizante.verificar(
+            f"2fa_cooldown:{cliente_id}", [(1, cls.OTP_COOLDOWN)]
+        )
+        if not resultado.permitido:
+            return False, resultado.retry_after
         return True, 0
 
     @classmethod
@@ -138,22 +122,17 @@ class Login2FARateLimiter:
         Returns:
             tuple: (allowed: bool, requests_remaining: int)
         """
-        cache_key = f"2fa_requests:{cliente_id}"
-        requests = cache.get(cache_key, 0)
+        resultado = LimitadorJanelaDeslizante.verificar(
+            f"2fa_requests:{cliente_id}", [(cls.MAX_2FA_REQUESTS, 1800)]  # 30 min
+        )
 
-        if requests >= cls.MAX_2FA_REQUESTS:
+        if not resultado.permitido:
             registrar_log('comum.seguranca',
                 f"Limite de solicitações 2FA atingido - Cliente: {cliente_id}",
                 nivel='WARNING')
             return False, 0
 
-        # Incrementar contador (expira em 30 min)
-        if requests == 0:
-            cache.set(cache_key, 1, timeout=1800)
-        else:
-            cache.incr(cache_key)
-
-        remaining = cls.MAX_2FA_REQUESTS - (requests + 1)
+        remaining = cls.MAX_2FA_REQUESTS - (resultado.contagens[0] + 1)
         return True, remaining
 
     @classmethod
@@ -164,29 +143,23 @@ class Login2FARateLimiter:
         Returns:
             tuple: (allowed: bool, attempts_remaining: int)
         """
-        cache_key = f"2fa_validations:{cliente_id}"
-        attempts = cache.get(cache_key, 0)
+        resultado = LimitadorJanelaDeslizante.verificar(
+            f"2fa_validations:{cliente_id}", [(cls.MAX_2FA_VALIDATIONS, 3600)]  # 1 hora
+        )
 
-        if attempts >= cls.MAX_2FA_VALIDATIONS:
+        if not resultado.permitido:
             registrar_log('comum.seguranca',
                 f"Limite de validações 2FA atingido - Cliente: {cliente_id}",
                 nivel='WARNING')
             return False, 0
 
-        # Incrementar contador
-        if attempts == 0:
-            cache.set(cache_key, 1, timeout=3600)  # 1 hora
-        else:
-            cache.incr(cache_key)
-
-        remaining = cls.MAX_2FA_VALIDATIONS - (attempts + 1)
+        remaining = cls.MAX_2FA_VALIDATIONS - (resultado.contagens[0] + 1)
         return True, remaining
 
     @classmethod
     def reset_login_attempts(cls, cpf: str):
         """Reseta tentativas de login após sucesso"""
-        cache_key = f"login_cpf:{cpf}"
-        cache.delete(cache_key)
+        LimitadorJanelaDeslizante.resetar(f"login_cpf:{cpf}")
         registrar_log('comum.seguranca',
             f"Rate limiter resetado para CPF: {cpf[:3]}***",
             nivel='DEBUG')
@@ -194,5 +167,4 @@ class Login2FARateLimiter:
     @classmethod
     def reset_2fa_session(cls, cliente_id: int):
         """Reseta contadores de 2FA após login bem-sucedido"""
-        cache.delete(f"2fa_requests:{cliente_id}")
-        cache.delete(f"2fa_cooldown:{cliente_id}")
+        LimitadorJanelaDeslizante.resetar(f"2fa_requests:{cliente_id}", f"2fa_cooldown:{cliente_id}")
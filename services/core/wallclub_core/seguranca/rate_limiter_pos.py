@@ -5,8 +5,8 @@ Implementa rate limiting por terminal_id além do IP
 from functools import wraps
 from django.http import JsonResponse
 from django.core.cache import cache
+from wallclub_core.seguranca.rate_limiter import LimitadorJanelaDeslizante
 from wallclub_core.utilitarios.log_control import registrar_log
-import time
 
 
 class POSRateLimiter:
@@ -45,46 +45,26 @@ class POSRateLimiter:
         try:
             limits = cls.TERMINAL_LIMITS.get(endpoint_type, cls.TERMINAL_LIMITS['default'])
 
-            # Verificar limite por minuto
-            minute_key = f"pos_rate_limit:terminal:{terminal_id}:minute"
-            minute_count = cache.get(minute_key, 0)
-
-            if minute_count >= limits['requests_per_minute']:
-                retry_after = cache.ttl(minute_key) or 60
-                message = f"Terminal {terminal_id} excedeu limite de {limits['requests_per_minute']} requisições/minuto"
+            # Minuto e hora verificados (e registrados) atomicamente
+            resultado = LimitadorJanelaDeslizante.verificar(
+                f"pos:terminal:{terminal_id}",
+                [(limits['requests_per_minute'], 60), (limits['requests_per_hour'], 3600)]
+            )
+
+            if not resultado.permitido:
+                minute_count, hour_count = resultado.contagens
+                if minute_count >= limits['requests_per_minute']:
+                    message = f"Terminal {terminal_id} excedeu limite de {limits['requests_per_minute']} requisições/minuto"
+                    detalhe = f"Count: {minute_count}/{limits['requests_per_minute']}/min"
+                else:
+                    message = f"Terminal {terminal_id} excedeu limite de {limits['requests_per_hour']} requisições/hora"
+                    detalhe = f"Count: {hour_count}/{limits['requests_per_hour']}/hora"
 
                 registrar_log('seguranca.rate_limit',
-                             f"Rate limit TERMINAL excedido - Terminal: {terminal_id}, "
-                             f"Count: {minute_count}/{limits['requests_per_minute']}/min",
+                             f"Rate limit TERMINAL excedido - Terminal: {terminal_id}, {detalhe}",
                              nivel='WARNING')
 
-                return False, retry_after, message
-
-            # Verificar limite por hora
-            hour_key = f"pos_rate_limit:terminal:{terminal_id}:hour"
-            hour_count = cache.get(hour_key, 0)
-
-            if hour_count >= limits['requests_per_hour']:
-                retry_after = cache.ttl(hour_key) or 3600
-                message = f"Terminal {terminal_id} excedeu limite de {limits['requests_per_hour']} requisições/hora"
-
-                registrar_log('seguranca.rate_limit',
-                             f"Rate limit TERMINAL excedido - Terminal: {terminal_id}, "
-                             f"Count: {hour_count}/{limits['requests_per_hour']}/hora",
-                             nivel='WARNING')
-
-                return False, retry_after, message
-
-            # Incrementar contadores
-            if minute_count == 0:
-                cache.set(minute_key, 1, timeout=60)
-            else:
-                cache.incr(minute_key)
-
-            if hour_count == 0:
-                cache.set(hour_key, 1, timeout=3600)
-            else:
-                cache.incr(hour_key)
+                return False, resultado.retry_after, message
 
             return True, 0, None
 
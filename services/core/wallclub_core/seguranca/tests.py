@@ -0,0 +1,89 @@
+import os
+import threading
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from wallclub_core.seguranca.rate_limiter import LimitadorJanelaDeslizante
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                      'LOCATION': 'rate-limiter-tests'}}
+REDIS_URL = os.getenv('RATE_LIMITER_TEST_REDIS_URL')
+
+
+def _disparar(chave, limites, threads=20, por_thread=25):
+    """Dispara threads * por_thread verificações simultâneas e retorna quantas passaram"""
+    admitidas = []
+    barreira = threading.Barrier(threads)
+
+    def worker():
+        barreira.wait()
+        for _ in range(por_thread):
+            if LimitadorJanelaDeslizante.verificar(chave, limites).permitido:
+                admitidas.append(1)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return len(admitidas)
+
+
+@override_settings(CACHES=LOCMEM)
+class LimitadorJanelaDeslizanteTest(SimpleTestCase):
+    """Limitador no fallback local (LocMemCache)"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concorrencia_admite_exatamente_o_limite(self):
+        admitidas = _disparar('teste:concorrencia', [(50, 60), (500, 3600)])
+        self.assertEqual(admitidas, 50)
+
+    def test_janela_maior_mais_restritiva(self):
+        admitidas = _disparar('teste:hora', [(1000, 60), (30, 3600)])
+        self.assertEqual(admitidas, 30)
+
+    def test_janela_desliza(self):
+        with mock.patch('wallclub_core.seguranca.rate_limiter.time.time') as relogio:
+            relogio.return_value = 1000.0
+            for _ in range(3):
+                self.assertTrue(LimitadorJanelaDeslizante.verificar('teste:desliza', [(3, 60)]).permitido)
+
+            relogio.return_value = 1030.0
+            resultado = LimitadorJanelaDeslizante.verificar('teste:desliza', [(3, 60)])
+            self.assertFalse(resultado.permitido)
+            self.assertEqual(resultado.retry_after, 30)
+            self.assertEqual(resultado.contagens, [3])
+
+            relogio.return_value = 1060.001
+            self.assertTrue(LimitadorJanelaDeslizante.verificar('teste:desliza', [(3, 60)]).permitido)
+
+    def test_resetar(self):
+        for _ in range(2):
+            LimitadorJanelaDeslizante.verificar('teste:reset', [(2, 60)])
+        self.assertFalse(LimitadorJanelaDeslizante.verificar('teste:reset', [(2, 60)]).permitido)
+
+        LimitadorJanelaDeslizante.resetar('teste:reset')
+        self.assertTrue(LimitadorJanelaDeslizante.verificar('teste:reset', [(2, 60)]).permitido)
+
+
+@skipUnless(REDIS_URL, 'RATE_LIMITER_TEST_REDIS_URL não definido')
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                       'LOCATION': REDIS_URL or '',
+                                       'KEY_PREFIX': 'rate-limiter-tests'}})
+class LimitadorJanelaDeslizanteRedisTest(SimpleTestCase):
+    """Mesmas garantias via script Lua (um EVALSHA por verificação)"""
+
+    def setUp(self):
+        LimitadorJanelaDeslizante.resetar('teste:concorrencia', 'teste:hora')
+
+    def test_concorrencia_admite_exatamente_o_limite(self):
+        admitidas = _disparar('teste:concorrencia', [(50, 60), (500, 3600)])
+        self.assertEqual(admitidas, 50)
+
+    def test_janela_maior_mais_restritiva(self):
+        admitidas = _disparar('teste:hora', [(1000, 60), (30, 3600)])
+        self.assertEqual(admitidas, 30)
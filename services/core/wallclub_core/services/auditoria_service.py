@@ -5,7 +5,8 @@ Unifica auditoria de autenticação, transações, usuários, configurações e
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any
 from django.core.cache import cache
-from django.db import models
+from django.db import connection, models, transaction
+from wallclub_core.seguranca.rate_limiter import LimitadorJanelaDeslizante
 from wallclub_core.utilitarios.log_control import registrar_log
 
 
@@ -19,6 +20,12 @@ class AuditoriaService:
     - Usuários e permissões (criação, edição, remoção, mudança perfil)
     - Configurações (parâmetros, regras antifraude)
     - Dados sensíveis (CPF, email, telefone, senha)
+
+    Tentativas de login: falhas contadas por CPF e por IP no limitador de
+    janela deslizante (Redis, sem consulta ao banco); o histórico e o resumo
+    por minuto (auditoria_login_minuto) que responde os relatórios são
+    gravados pelo login do app (LoginPersistentService, em lote pela fila
+    apps.cliente.gravar_tentativas_login) ou por registrar_tentativa_login.
     """
     
     # Configurações de detecção de ataques
@@ -35,7 +42,7 @@ class AuditoriaService:
                                   canal_id: int, endpoint: str,
                                   cliente_id: Optional[int] = None,
                                   user_agent: Optional[str] = None,
-                                  motivo_falha: Optional[str] = None) -> Optional[object]:
+                                  motivo_falha: Optional[str] = None) -> Optional[Dict]:
         """
         Registra tentativa de login/validação de senha
         
@@ -50,23 +57,22 @@ class AuditoriaService:
             motivo_falha: Motivo da falha se houver
         
         Returns:
-            Registro de auditoria criado
+            Dict da tentativa gravada
         """
         try:
-            from wallclub_core.models import AuditoriaValidacaoSenha
-            
             cpf_limpo = ''.join(filter(str.isdigit, cpf))
             
-            auditoria = AuditoriaValidacaoSenha.objects.create(
-                cliente_id=cliente_id,
-                cpf=cpf_limpo,
-                sucesso=sucesso,
-                ip_address=ip_address,
-                user_agent=user_agent or '',
-                canal_id=canal_id,
-                endpoint=endpoint,
-                motivo_falha=motivo_falha
-            )
+            tentativa = {
+                'cliente_id': cliente_id,
+                'cpf': cpf_limpo,
+                'sucesso': sucesso,
+                'ip_address': ip_address,
+                'user_agent': user_agent or '',
+                'canal_id': canal_id,
+                'endpoint': endpoint,
+                'motivo_falha': motivo_falha,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f'),
+            }
             
             # NOTA: Incremento de failed_attempts removido daqui para evitar duplicação
             # O código de login já chama cliente_auth.record_failed_attempt() explicitamente
@@ -75,7 +81,8 @@ class AuditoriaService:
             if not sucesso:
                 cls._verificar_e_bloquear(cpf_limpo, ip_address, cliente_id)
             
-            return auditoria
+            cls._gravar_tentativas([tentativa])
+            return tentativa
             
         except Exception as e:
             registrar_log('auditoria.login', f"Erro ao registrar auditoria login: {str(e)}", nivel='ERROR')
@@ -83,45 +90,79 @@ class AuditoriaService:
     
     @classmethod
     def _verificar_e_bloquear(cls, cpf: str, ip_address: str, cliente_id: Optional[int] = None):
-        """Verifica se deve bloquear CPF ou IP por excesso de tentativas"""
+        """
+        Conta a falha por CPF e por IP e bloqueia ao atingir MAX_TENTATIVAS_FALHAS
+        na janela (ZSET por chave limitado ao máximo - rajadas não crescem o contador)
+        """
         try:
-            from wallclub_core.models import AuditoriaValidacaoSenha
-            
-            janela_inicio = datetime.now() - timedelta(minutes=cls.JANELA_TEMPO_MINUTOS)
-            
-            # Contar falhas por CPF
-            tentativas_cpf = AuditoriaValidacaoSenha.objects.filter(
-                cpf=cpf,
-                sucesso=False,
-                timestamp__gte=janela_inicio
-            ).count()
-            
-            # Contar falhas por IP
-            tentativas_ip = AuditoriaValidacaoSenha.objects.filter(
-                ip_address=ip_address,
-                sucesso=False,
-                timestamp__gte=janela_inicio
-            ).count()
-            
-            # Bloquear CPF
-            if tentativas_cpf >= cls.MAX_TENTATIVAS_FALHAS:
-                cache_key = f"blocked_cpf:{cpf}"
-                cache.set(cache_key, True, timeout=cls.TEMPO_BLOQUEIO_MINUTOS * 60)
-                registrar_log('auditoria.login', 
-                             f"CPF bloqueado: {cpf} ({tentativas_cpf} tentativas)",
-                             nivel='WARNING')
-            
-            # Bloquear IP
-            if tentativas_ip >= cls.MAX_TENTATIVAS_FALHAS:
-                cache_key = f"blocked_ip:{ip_address}"
-                cache.set(cache_key, True, timeout=cls.TEMPO_BLOQUEIO_MINUTOS * 60)
-                registrar_log('auditoria.login', 
-                             f"IP bloqueado: {ip_address} ({tentativas_ip} tentativas)",
-                             nivel='WARNING')
+            janela = [(cls.MAX_TENTATIVAS_FALHAS, cls.JANELA_TEMPO_MINUTOS * 60)]
+            
+            for tipo, valor, descricao in (('cpf', cpf, 'CPF'), ('ip', ip_address, 'IP')):
+                resultado = LimitadorJanelaDeslizante.verificar(f"auditoria:falhas:{tipo}:{valor}", janela)
+                tentativas = resultado.contagens[0] + (1 if resultado.permitido else 0)
+                if tentativas >= cls.MAX_TENTATIVAS_FALHAS:
+                    cache_key = f"blocked_{tipo}:{valor}"
+                    cache.set(cache_key, True, timeout=cls.TEMPO_BLOQUEIO_MINUTOS * 60)
+                    registrar_log('auditoria.login', 
+                                 f"{descricao} bloqueado: {valor} ({tentativas} tentativas)",
+                                 nivel='WARNING')
                 
         except Exception as e:
             registrar_log('auditoria.login', f"Erro ao verificar bloqueio: {str(e)}", nivel='ERROR')
     
+    @classmethod
+    def _gravar_tentativas(cls, tentativas: List[Dict]):
+        """INSERT em lote do histórico (preserva o horário da tentativa) + resumo por minuto"""
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO cliente_auditoria_validacao_senha
+                    (cliente_id, cpf, sucesso, ip_address, user_agent, canal_id,
+                     endpoint, motivo_falha, timestamp)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, [
+                (t['cliente_id'], t['cpf'], t['sucesso'], t['ip_address'], t['user_agent'],
+                 t['canal_id'], t['endpoint'], t['motivo_falha'], t['timestamp'])
+                for t in tentativas
+            ])
+            cls.registrar_resumo_minuto(cursor, tentativas)
+    
+    @staticmethod
+    def registrar_resumo_minuto(cursor, tentativas: List[Dict]):
+        """
+        Acumula as tentativas em auditoria_login_minuto (uma linha por minuto, CPF e IP)
+        
+        Chamado na mesma transação do INSERT do histórico - também pelo login
+        (LoginPersistentService), que grava na mesma tabela.
+        
+        Args:
+            tentativas: dicts com cpf, ip_address, sucesso e timestamp ('%Y-%m-%d %H:%M:%S.%f')
+        """
+        resumo = {}
+        for t in tentativas:
+            chave = (t['timestamp'][:16] + ':00', t['cpf'], t['ip_address'])
+            linha = resumo.setdefault(chave, [0, 0, t['timestamp'], bool(t['sucesso'])])
+            linha[1 if t['sucesso'] else 0] += 1
+            if t['timestamp'] >= linha[2]:
+                linha[2], linha[3] = t['timestamp'], bool(t['sucesso'])
+        if not resumo:
+            return
+        
+        # ultimo_sucesso antes de ultima_tentativa: o MySQL aplica as atribuições em ordem
+        cursor.executemany("""
+            INSERT INTO auditoria_login_minuto
+                (minuto, cpf, ip_address, falhas, sucessos, ultima_tentativa, ultimo_sucesso)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                falhas = falhas + VALUES(falhas),
+                sucessos = sucessos + VALUES(sucessos),
+                ultimo_sucesso = IF(VALUES(ultima_tentativa) >= ultima_tentativa,
+                                    VALUES(ultimo_sucesso), ultimo_sucesso),
+                ultima_tentativa = GREATEST(ultima_tentativa, VALUES(ultima_tentativa))
+        """, [
+            (minuto, cpf, ip, falhas, sucessos, ultima, ultimo_sucesso)
+            for (minuto, cpf, ip), (falhas, sucessos, ultima, ultimo_sucesso) in resumo.items()
+        ])
+    
     @classmethod
     def verificar_bloqueio(cls, cpf: Optional[str] = None, 
                           ip_address: Optional[str] = None) -> tuple:
@@ -366,7 +407,7 @@ class AuditoriaService:
     @classmethod
     def obter_estatisticas_cpf(cls, cpf: str, dias: int = 7) -> Optional[Dict]:
         """
-        Obtém estatísticas de tentativas para um CPF
+        Obtém estatísticas de tentativas para um CPF (resumo por minuto)
         
         Args:
             cpf: CPF a consultar
@@ -376,21 +417,26 @@ class AuditoriaService:
             Dict com estatísticas do CPF
         """
         try:
-            from wallclub_core.models import AuditoriaValidacaoSenha
+            from wallclub_core.models import AuditoriaLoginMinuto
+            from django.db.models import Count, Sum
             
             cpf_limpo = ''.join(filter(str.isdigit, cpf))
-            data_inicio = datetime.now() - timedelta(days=dias)
+            data_inicio = (datetime.now() - timedelta(days=dias)).replace(second=0, microsecond=0)
             
-            tentativas = AuditoriaValidacaoSenha.objects.filter(
+            minutos = AuditoriaLoginMinuto.objects.filter(
                 cpf=cpf_limpo,
-                timestamp__gte=data_inicio
+                minuto__gte=data_inicio
             )
             
-            total = tentativas.count()
-            sucessos = tentativas.filter(sucesso=True).count()
-            falhas = tentativas.filter(sucesso=False).count()
-            ips_diferentes = tentativas.values('ip_address').distinct().count()
-            ultima = tentativas.order_by('-timestamp').first()
+            resumo = minutos.aggregate(
+                sucessos=Sum('sucessos'),
+                falhas=Sum('falhas'),
+                ips_diferentes=Count('ip_address', distinct=True)
+            )
+            sucessos = resumo['sucessos'] or 0
+            falhas = resumo['falhas'] or 0
+            total = sucessos + falhas
+            ultima = minutos.order_by('-ultima_tentativa').values('ultima_tentativa', 'ultimo_sucesso').first()
             
             return {
                 'cpf': cpf_limpo,
@@ -398,9 +444,9 @@ class AuditoriaService:
                 'sucessos': sucessos,
                 'falhas': falhas,
                 'taxa_sucesso': round((sucessos / total * 100) if total > 0 else 0, 2),
-                'ips_diferentes': ips_diferentes,
-                'ultima_tentativa': ultima.timestamp if ultima else None,
-                'ultima_sucesso': ultima.sucesso if ultima else None
+                'ips_diferentes': resumo['ips_diferentes'],
+                'ultima_tentativa': ultima['ultima_tentativa'] if ultima else None,
+                'ultima_sucesso': ultima['ultimo_sucesso'] if ultima else None
             }
             
         except Exception as e:
@@ -410,7 +456,7 @@ class AuditoriaService:
     @classmethod
     def obter_tentativas_suspeitas(cls, horas: int = 24, limite: int = 10) -> Optional[Dict]:
         """
-        Obtém CPFs/IPs com padrão suspeito de tentativas
+        Obtém CPFs/IPs com padrão suspeito de tentativas (resumo por minuto)
         
         Args:
             horas: Janela de tempo em horas
@@ -420,27 +466,22 @@ class AuditoriaService:
             Dict com CPFs e IPs suspeitos
         """
         try:
-            from wallclub_core.models import AuditoriaValidacaoSenha
-            from django.db.models import Count
+            from wallclub_core.models import AuditoriaLoginMinuto
+            from django.db.models import Sum
             
-            data_inicio = datetime.now() - timedelta(hours=horas)
+            data_inicio = (datetime.now() - timedelta(hours=horas)).replace(second=0, microsecond=0)
+            minutos = AuditoriaLoginMinuto.objects.filter(minuto__gte=data_inicio, falhas__gt=0)
             
             # CPFs com mais falhas
-            cpfs_suspeitos = AuditoriaValidacaoSenha.objects.filter(
-                timestamp__gte=data_inicio,
-                sucesso=False
-            ).values('cpf').annotate(
-                total=Count('id')
+            cpfs_suspeitos = minutos.values('cpf').annotate(
+                total=Sum('falhas')
             ).filter(
                 total__gte=cls.MAX_TENTATIVAS_FALHAS
             ).order_by('-total')[:limite]
             
             # IPs com mais falhas
-            ips_suspeitos = AuditoriaValidacaoSenha.objects.filter(
-                timestamp__gte=data_inicio,
-                sucesso=False
-            ).values('ip_address').annotate(
-                total=Count('id')
+            ips_suspeitos = minutos.values('ip_address').annotate(
+                total=Sum('falhas')
             ).filter(
                 total__gte=cls.MAX_TENTATIVAS_FALHAS
             ).order_by('-total')[:limite]
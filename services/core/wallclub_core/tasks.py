@@ -0,0 +1,19 @@
+"""
+Tasks Celery do wallclub_core
+"""
+from celery import shared_task
+
+
+@shared_task(name='wallclub_core.processar_email_outbox', soft_time_limit=240, time_limit=300)
+def processar_email_outbox():
+    """
+    Envia os emails pendentes de email_outbox em lote (uma conexão SMTP por lote)
+
+    Execução: agendada por EmailService.enviar_email ao enfileirar (agrupando a
+    rajada) e a cada minuto via Celery Beat (novas tentativas e emails gravados
+    por serviços sem consumidor, como o riskengine)
+    """
+    from wallclub_core.integracoes.email_outbox import EmailOutboxService
+
+    return EmailOutboxService.processar_pendentes()
+
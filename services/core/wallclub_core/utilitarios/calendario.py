@@ -0,0 +1,297 @@
+"""
+Calendário pré-computado de dias úteis e datas de liquidação.
+
+Substitui o passo dia-a-dia de proxima_sexta_feira/proximo_dia_util por tabelas
+indexadas pelo ordinal da data, montadas uma única vez por processo.
+Datas fora do intervalo carregado caem no cálculo direto (mesmo resultado, sem O(1)).
+"""
+import threading
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Set, Union
+
+DataEntrada = Union[str, date, datetime]
+
+SEXTA_FEIRA = 4
+PRAZO_PARCELA_DIAS = 30
+
+
+def calcular_pascoa(ano: int) -> date:
+    """
+    Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher).
+    """
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados_nacionais(ano: int) -> Set[date]:
+    """
+    Feriados nacionais e pontos facultativos bancários (Carnaval, Corpus Christi).
+    """
+    pascoa = calcular_pascoa(ano)
+    feriados = {
+        date(ano, 1, 1),    # Confraternização Universal
+        date(ano, 4, 21),   # Tiradentes
+        date(ano, 5, 1),    # Dia do Trabalho
+        date(ano, 9, 7),    # Independência
+        date(ano, 10, 12),  # Nossa Senhora Aparecida
+        date(ano, 11, 2),   # Finados
+        date(ano, 11, 15),  # Proclamação da República
+        date(ano, 12, 25),  # Natal
+        pascoa - timedelta(days=48),  # Carnaval (segunda)
+        pascoa - timedelta(days=47),  # Carnaval (terça)
+        pascoa - timedelta(days=2),   # Sexta-feira Santa
+        pascoa + timedelta(days=60),  # Corpus Christi
+    }
+    if ano >= 2024:
+        feriados.add(date(ano, 11, 20))  # Consciência Negra (Lei 14.759/2023)
+    return feriados
+
+
+def converter_data(valor: DataEntrada) -> date:
+    """
+    Converte 'dd/mm/yyyy', 'yyyy-mm-dd[...]', date ou datetime para date.
+    """
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if len(valor) >= 10 and valor[2] == '/':
+        return date(int(valor[6:10]), int(valor[3:5]), int(valor[0:2]))
+    if len(valor) >= 10 and valor[4] == '-':
+        return date(int(valor[0:4]), int(valor[5:7]), int(valor[8:10]))
+    return datetime.strptime(valor, '%d/%m/%Y').date()
+
+
+def converter_data_ou_nula(valor: Optional[DataEntrada]) -> Optional[date]:
+    """
+    converter_data tolerante a vazio/inválido (campos texto como var45):
+    aceita também 'yyyymmdd'; retorna None quando não há data válida.
+    """
+    if valor is None or valor == '':
+        return None
+    try:
+        if isinstance(valor, str) and len(valor.strip()) == 8 and valor.strip().isdigit():
+            return datetime.strptime(valor.strip(), '%Y%m%d').date()
+        return converter_data(valor.strip() if isinstance(valor, str) else valor)
+    except (ValueError, IndexError):
+        return None
+
+
+class CalendarioDiasUteis:
+    """
+    Tabela de dias úteis para um intervalo de anos.
+
+    Para cada dia do intervalo guarda (como offset em dias):
+    - o próximo dia útil estritamente posterior;
+    - o primeiro dia útil igual ou posterior;
+    - a primeira sexta-feira igual ou posterior.
+    """
+
+    def __init__(self, ano_inicial: int, ano_final: int,
+                 feriados: Optional[Iterable[date]] = None):
+        if ano_final < ano_inicial:
+            raise ValueError("ano_final deve ser maior ou igual a ano_inicial")
+
+        self.ano_inicial = ano_inicial
+        self.ano_final = ano_final
+        self.feriados = frozenset(feriados or ())
+
+        self._inicio = date(ano_inicial, 1, 1)
+        self._base = self._inicio.toordinal()
+        # Margem no fim para que os "próximos" do último dia ainda caiam na tabela
+        fim = date(ano_final, 12, 31) + timedelta(days=31)
+        total = fim.toordinal() - self._base + 1
+        self._limite = date(ano_final, 12, 31).toordinal() - self._base
+
+        eh_util = bytearray(total)
+        for i in range(total):
+            dia = self._inicio + timedelta(days=i)
+            eh_util[i] = dia.weekday() < 5 and dia not in self.feriados
+        self._eh_util = bytes(eh_util)
+
+        util_ou_proximo = [0] * total
+        proximo_util = [0] * total
+        proxima_sexta = [0] * total
+        prox_util = total
+        prox_sexta = total
+        for i in range(total - 1, -1, -1):
+            proximo_util[i] = prox_util
+            if eh_util[i]:
+                prox_util = i
+            util_ou_proximo[i] = prox_util
+            if (self._inicio + timedelta(days=i)).weekday() == SEXTA_FEIRA:
+                prox_sexta = i
+            proxima_sexta[i] = prox_sexta
+
+        self._util_ou_proximo = util_ou_proximo
+        self._proximo_util = proximo_util
+        self._proxima_sexta = proxima_sexta
+
+    # ------------------------------------------------------------------
+    # Indexação
+    # ------------------------------------------------------------------
+
+    def _indice(self, dia: date) -> Optional[int]:
+        indice = dia.toordinal() - self._base
+        if 0 <= indice <= self._limite:
+            return indice
+        return None
+
+    def _data(self, indice: int) -> date:
+        return date.fromordinal(self._base + indice)
+
+    # ------------------------------------------------------------------
+    # Consultas unitárias
+    # ------------------------------------------------------------------
+
+    def eh_dia_util(self, valor: DataEntrada) -> bool:
+        dia = converter_data(valor)
+        indice = self._indice(dia)
+        if indice is None:
+            return dia.weekday() < 5 and dia not in self.feriados
+        return bool(self._eh_util[indice])
+
+    def eh_feriado(self, valor: DataEntrada) -> bool:
+        return converter_data(valor) in self.feriados
+
+    def proximo_dia_util(self, valor: DataEntrada) -> date:
+        """Primeiro dia útil estritamente posterior à data."""
+        dia = converter_data(valor)
+        indice = self._indice(dia)
+        if indice is None:
+            return self._ajustar_dia_util(dia + timedelta(days=1))
+        return self._data(self._proximo_util[indice])
+
+    def dia_util_ou_proximo(self, valor: DataEntrada) -> date:
+        """A própria data se for útil, senão o próximo dia útil."""
+        dia = converter_data(valor)
+        indice = self._indice(dia)
+        if indice is None:
+            return self._ajustar_dia_util(dia)
+        return self._data(self._util_ou_proximo[indice])
+
+    def proxima_sexta_feira(self, valor: DataEntrada) -> date:
+        """Primeira sexta-feira igual ou posterior à data."""
+        dia = converter_data(valor)
+        indice = self._indice(dia)
+        if indice is None:
+            return dia + timedelta(days=(SEXTA_FEIRA - dia.weekday()) % 7)
+        return self._data(self._proxima_sexta[indice])
+
+    def data_liquidacao_parcela(self, valor: DataEntrada, numero_parcela: int,
+                                prazo_dias: int = PRAZO_PARCELA_DIAS) -> date:
+        """
+        Data de liquidação da parcela N: data + N * prazo_dias, ajustada para dia útil.
+        """
+        dia = converter_data(valor)
+        indice = self._indice(dia)
+        deslocamento = numero_parcela * prazo_dias
+        if indice is not None and indice + deslocamento <= self._limite:
+            return self._data(self._util_ou_proximo[indice + deslocamento])
+        return self.dia_util_ou_proximo(dia + timedelta(days=deslocamento))
+
+    def _ajustar_dia_util(self, dia: date) -> date:
+        while dia.weekday() >= 5 or dia in self.feriados:
+            dia += timedelta(days=1)
+        return dia
+
+    # ------------------------------------------------------------------
+    # Versões em lote
+    # ------------------------------------------------------------------
+
+    def _indices(self, valores: Iterable[DataEntrada]) -> List[Optional[int]]:
+        base = self._base
+        limite = self._limite
+        indices = []
+        for valor in valores:
+            indice = converter_data(valor).toordinal() - base
+            indices.append(indice if 0 <= indice <= limite else None)
+        return indices
+
+    def proximos_dias_uteis(self, valores: Iterable[DataEntrada]) -> List[date]:
+        valores = list(valores)
+        tabela = self._proximo_util
+        return [
+            self._data(tabela[i]) if i is not None else self.proximo_dia_util(v)
+            for i, v in zip(self._indices(valores), valores)
+        ]
+
+    def proximas_sextas_feiras(self, valores: Iterable[DataEntrada]) -> List[date]:
+        valores = list(valores)
+        tabela = self._proxima_sexta
+        return [
+            self._data(tabela[i]) if i is not None else self.proxima_sexta_feira(v)
+            for i, v in zip(self._indices(valores), valores)
+        ]
+
+    def datas_liquidacao_parcelas(self, valores: Iterable[DataEntrada],
+                                  numeros_parcela: Iterable[int],
+                                  prazo_dias: int = PRAZO_PARCELA_DIAS) -> List[date]:
+        """
+        Versão em lote de data_liquidacao_parcela (listas pareadas data x parcela).
+        """
+        valores = list(valores)
+        tabela = self._util_ou_proximo
+        limite = self._limite
+        base = self._base
+        resultado = []
+        for indice, valor, parcela in zip(self._indices(valores), valores, numeros_parcela):
+            if indice is not None:
+                destino = indice + parcela * prazo_dias
+                if destino <= limite:
+                    resultado.append(date.fromordinal(base + tabela[destino]))
+                    continue
+            resultado.append(self.data_liquidacao_parcela(valor, parcela, prazo_dias))
+        return resultado
+
+
+_calendario_padrao: Optional[CalendarioDiasUteis] = None
+_calendario_lock = threading.Lock()
+
+
+def obter_calendario() -> CalendarioDiasUteis:
+    """
+    Calendário padrão do processo, montado na primeira chamada.
+
+    Configurável via settings:
+    - CALENDARIO_ANO_INICIAL / CALENDARIO_ANO_FINAL (padrão: ano atual -5 / +10)
+    - CALENDARIO_FERIADOS_NACIONAIS (padrão False: só fins de semana, regra legada PHP)
+    - CALENDARIO_FERIADOS_EXTRAS: lista de datas 'yyyy-mm-dd' (feriados locais)
+    """
+    global _calendario_padrao
+    if _calendario_padrao is None:
+        with _calendario_lock:
+            if _calendario_padrao is None:
+                ano_atual = date.today().year
+                try:
+                    from django.conf import settings
+                    ano_inicial = getattr(settings, 'CALENDARIO_ANO_INICIAL', ano_atual - 5)
+                    ano_final = getattr(settings, 'CALENDARIO_ANO_FINAL', ano_atual + 10)
+                    usar_nacionais = getattr(settings, 'CALENDARIO_FERIADOS_NACIONAIS', False)
+                    extras = getattr(settings, 'CALENDARIO_FERIADOS_EXTRAS', [])
+                except Exception:
+                    ano_inicial, ano_final, usar_nacionais, extras = ano_atual - 5, ano_atual + 10, False, []
+
+                feriados = {converter_data(d) for d in extras}
+                if usar_nacionais:
+                    for ano in range(ano_inicial, ano_final + 2):
+                        feriados |= feriados_nacionais(ano)
+
+                _calendario_padrao = CalendarioDiasUteis(ano_inicial, ano_final, feriados)
+    return _calendario_padrao
+
+
+def redefinir_calendario():
+    """Descarta o calendário padrão (ex: após mudar feriados em settings)."""
+    global _calendario_padrao
+    with _calendario_lock:
+        _calendario_padrao = None
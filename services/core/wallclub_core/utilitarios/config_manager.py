@@ -4,11 +4,23 @@ ConfigManager - Gerenciador de configurações híbridas para WallClub Django
 Gerencia configurações usando AWS Secrets Manager para desenvolvimento e produção.
 - Desenvolvimento: usa secret 'wall/dev/db'
 - Produção: usa secret 'wall/prod/db'
+
+Secrets ficam em cache em memória (AWS_SECRETS_CACHE_TTL, padrão 900s, com
+jitter para os workers não expirarem juntos):
+- na inicialização, um único batch_get_secret_value carrega os secrets do
+  ambiente (AWS_SECRETS_PRELOAD, separados por vírgula)
+- a partir de FRACAO_REFRESH do TTL o valor em cache é devolvido e uma thread
+  busca o novo (refresh-ahead): a requisição não espera o AWS
+- se o AWS falhar após a expiração, o último valor continua valendo
+  (stale-if-error) e nova tentativa só após ATRASO_APOS_ERRO
+AWS_SECRETS_CACHE_TTL=0 desliga o cache (uma chamada ao AWS por leitura).
 """
 import json
 import os
-import boto3
-from typing import Any, Dict
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
 from wallclub_core.utilitarios.log_control import registrar_log
 
 class ConfigManager:
@@ -16,13 +28,36 @@ class ConfigManager:
     Gerenciador de configurações que usa AWS Secrets Manager
     """
 
-    def __init__(self):
+    # Refresh em background a partir desta fração do TTL
+    FRACAO_REFRESH = 0.8
+    # Variação aleatória do TTL (+/-)
+    JITTER = 0.1
+    # Após falha do AWS, segundos até nova tentativa (servindo o valor antigo)
+    ATRASO_APOS_ERRO = 30
+    # Refresh em background considerado perdido após este tempo (ex: fork do gunicorn)
+    TEMPO_MAXIMO_REFRESH = 60
+
+    def __init__(self, secrets_client=None):
         self.is_production = self._detect_production_environment()
         self._aws_session = None
         self._secrets_client = None
 
-        # Inicializar cliente AWS sempre (desenvolvimento e produção usam AWS Secrets)
-        self._initialize_aws_clients()
+        self._cache_ttl = int(os.getenv('AWS_SECRETS_CACHE_TTL', '900'))
+        # secret_name -> {'valor', 'atualizar_em', 'expira_em'} (time.monotonic)
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        # secret_name -> início do refresh em background
+        self._atualizando: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # (secret_string, dict) do secret do ambiente já decodificado
+        self._snapshot = None
+
+        if secrets_client is not None:
+            self._secrets_client = secrets_client
+        else:
+            # Inicializar cliente AWS sempre (desenvolvimento e produção usam AWS Secrets)
+            self._initialize_aws_clients()
+
+        self._preload_secrets()
 
     def _detect_production_environment(self) -> bool:
         """
@@ -45,6 +80,8 @@ class ConfigManager:
         Inicializa clientes AWS
         """
         try:
+            import boto3
+
             # Usar região us-east-1 como padrão
             region = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
 
@@ -58,7 +95,7 @@ class ConfigManager:
 
     def get_secret(self, secret_name: str, default: Any = None) -> Any:
         """
-        Busca um secret do AWS Secrets Manager
+        Busca um secret do AWS Secrets Manager (com cache em memória)
 
         Args:
             secret_name: Nome do secret (ex: 'wall/dev/db' ou 'wall/prod/db')
@@ -72,22 +109,126 @@ class ConfigManager:
                 # Log removido - pode ocorrer durante inicialização Django
                 return default
 
-            response = self._secrets_client.get_secret_value(SecretId=secret_name)
-            return response['SecretString']
+            if self._cache_ttl <= 0:
+                return self._buscar_secret(secret_name)
+
+            entrada = self._cache.get(secret_name)
+            agora = time.monotonic()
+            if entrada and agora < entrada['expira_em']:
+                if agora >= entrada['atualizar_em']:
+                    self._atualizar_em_background(secret_name)
+                return entrada['valor']
+
+            with self._lock:
+                # Outra thread pode ter buscado enquanto esta esperava o lock
+                entrada = self._cache.get(secret_name)
+                agora = time.monotonic()
+                if entrada and agora < entrada['expira_em']:
+                    return entrada['valor']
+                try:
+                    valor = self._buscar_secret(secret_name)
+                except Exception:
+                    if not entrada:
+                        raise
+                    # stale-if-error: mantém o último valor até a próxima tentativa
+                    entrada['atualizar_em'] = entrada['expira_em'] = agora + self.ATRASO_APOS_ERRO
+                    return entrada['valor']
+                self._guardar(secret_name, valor)
+                return valor
 
         except Exception as e:
             # Log removido - pode ocorrer durante inicialização Django
             return default
 
+    def preload_secrets(self, secret_names: Iterable[str]) -> int:
+        """
+        Carrega vários secrets no cache com batch_get_secret_value (uma chamada
+        por página de 20). Secrets que falharem ficam para a primeira leitura.
+
+        Returns:
+            int: quantidade de secrets carregados
+        """
+        nomes = [nome for nome in dict.fromkeys(secret_names) if nome]
+        if not nomes or not self._secrets_client or self._cache_ttl <= 0:
+            return 0
+
+        carregados = 0
+        try:
+            for i in range(0, len(nomes), 20):
+                kwargs = {'SecretIdList': nomes[i:i + 20]}
+                while True:
+                    response = self._secrets_client.batch_get_secret_value(**kwargs)
+                    for secret in response.get('SecretValues', []):
+                        if 'SecretString' in secret:
+                            self._guardar(secret['Name'], secret['SecretString'])
+                            carregados += 1
+                    if not response.get('NextToken'):
+                        break
+                    kwargs['NextToken'] = response['NextToken']
+        except Exception:
+            # boto3 antigo ou sem permissão BatchGetSecretValue: leitura individual
+            for nome in nomes:
+                if nome not in self._cache and self.get_secret(nome) is not None:
+                    carregados += 1
+        return carregados
+
+    def _preload_secrets(self):
+        nomes = os.getenv('AWS_SECRETS_PRELOAD', '')
+        self.preload_secrets([nome.strip() for nome in nomes.split(',')] if nomes else [self._get_secret_name()])
+
+    def _buscar_secret(self, secret_name: str) -> Any:
+        response = self._secrets_client.get_secret_value(SecretId=secret_name)
+        return response['SecretString']
+
+    def _guardar(self, secret_name: str, valor: Any):
+        ttl = self._cache_ttl * random.uniform(1 - self.JITTER, 1 + self.JITTER)
+        agora = time.monotonic()
+        self._cache[secret_name] = {
+            'valor': valor,
+            'atualizar_em': agora + ttl * self.FRACAO_REFRESH,
+            'expira_em': agora + ttl,
+        }
+
+    def _atualizar_em_background(self, secret_name: str):
+        """Dispara no máximo um refresh por secret"""
+        with self._lock:
+            inicio = self._atualizando.get(secret_name)
+            if inicio is not None and time.monotonic() - inicio < self.TEMPO_MAXIMO_REFRESH:
+                return
+            self._atualizando[secret_name] = time.monotonic()
+        threading.Thread(target=self._atualizar, args=(secret_name,), daemon=True,
+                         name=f'config-manager-refresh-{secret_name}').start()
+
+    def _atualizar(self, secret_name: str):
+        try:
+            self._guardar(secret_name, self._buscar_secret(secret_name))
+        except Exception as e:
+            # Mantém o valor atual até expirar; a leitura seguinte tenta de novo
+            registrar_log('comum.utilitarios', f"⚠️ ConfigManager: falha ao atualizar secret {secret_name}: {str(e)}", nivel='WARNING')
+        finally:
+            self._atualizando.pop(secret_name, None)
+
+    def _obter_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Secret do ambiente decodificado; o JSON só é lido de novo quando o valor muda
+        """
+        secret_string = self.get_secret(self._get_secret_name())
+        if not secret_string:
+            return None
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] != secret_string:
+            snapshot = (secret_string, json.loads(secret_string))
+            self._snapshot = snapshot
+        return snapshot[1]
+
     def get_database_config(self) -> Dict[str, Any]:
         """
         Obtém configurações do banco de dados do AWS Secret ou ENV vars (fallback)
         """
         try:
-            secret_string = self.get_secret(self._get_secret_name())
+            secrets = self._obter_snapshot()
 
-            if secret_string:
-                secrets = json.loads(secret_string)
+            if secrets:
 
                 # Configuração do Django para MySQL usando chaves do secret
                 config = {
@@ -132,12 +273,10 @@ class ConfigManager:
         Obtém configurações do Bureau de Crédito do AWS Secret
         """
         try:
-            secret_string = self.get_secret(self._get_secret_name())
-            if not secret_string:
+            secrets = self._obter_snapshot()
+            if not secrets:
                 return {}
 
-            secrets = json.loads(secret_string)
-
             config = {
                 'url': secrets.get('BUREAU_URL'),
                 'access_token': secrets.get('BUREAU_ACCESS_TOKEN'),
@@ -155,12 +294,10 @@ class ConfigManager:
         Obtém configurações do Pinbank do AWS Secret
         """
         try:
-            secret_string = self.get_secret(self._get_secret_name())
-            if not secret_string:
+            secrets = self._obter_snapshot()
+            if not secrets:
                 return {}
 
-            secrets = json.loads(secret_string)
-
             config = {
                 'url': secrets.get('PINBANK_URL'),
                 'username': secrets.get('PINBANK_WALL_USERNAME'),
@@ -178,12 +315,10 @@ class ConfigManager:
         Obtém configurações de email do AWS Secret
         """
         try:
-            secret_string = self.get_secret(self._get_secret_name())
-            if not secret_string:
+            secrets = self._obter_snapshot()
+            if not secrets:
                 return {}
 
-            secrets = json.loads(secret_string)
-
             config = {
                 'host': secrets.get('MAILSERVER_URL'),
                 'user': secrets.get('MAILSERVER_USERNAME'),
@@ -201,12 +336,10 @@ class ConfigManager:
         Obtém configurações do MaxMind minFraud do AWS Secret
         """
         try:
-            secret_string = self.get_secret(self._get_secret_name())
-            if not secret_string:
+            secrets = self._obter_snapshot()
+            if not secrets:
                 return {}
 
-            secrets = json.loads(secret_string)
-
             config = {
                 'account_id': secrets.get('MAXMIND_ACCOUNT_ID'),
                 'license_key': secrets.get('MAXMIND_LICENSE_KEY'),
@@ -227,12 +360,10 @@ class ConfigManager:
         - internal: Uso interno geral (wallclub_django_internal)
         """
         try:
-            secret_string = self.get_secret(self._get_secret_name())
-            if not secret_string:
+            secrets = self._obter_snapshot()
+            if not secrets:
                 return {}
 
-            secrets = json.loads(secret_string)
-
             return {
                 'admin_client_id': secrets.get('RISK_ENGINE_ADMIN_CLIENT_ID', 'wallclub-django'),
                 'admin_client_secret': secrets.get('RISK_ENGINE_ADMIN_CLIENT_SECRET', ''),
@@ -251,13 +382,11 @@ class ConfigManager:
         Carrega credenciais Own do Secrets Manager e seta como variáveis de ambiente
         """
         try:
-            secret_string = self.get_secret(self._get_secret_name())
-            if not secret_string:
+            secrets = self._obter_snapshot()
+            if not secrets:
                 print("⚠️ ConfigManager: Secret string vazio, credenciais Own não carregadas")
                 return
 
-            secrets = json.loads(secret_string)
-
             # Setar credenciais Own como variáveis de ambiente
             if 'OWN_CORE_ID' in secrets:
                 os.environ['OWN_CORE_ID'] = secrets['OWN_CORE_ID']
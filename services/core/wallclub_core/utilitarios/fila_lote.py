@@ -0,0 +1,70 @@
+"""
+Fila Redis (LIST) drenada em lotes por task Celery
+
+Produtores fazem RPUSH de itens JSON na fila. O drenador move um lote para
+<fila>:processando (LRANGE + RPUSH + LTRIM em um único EVALSHA) e só apaga a
+lista de processamento depois que a gravação terminou - falha no INSERT (ou
+worker derrubado no meio) deixa o lote lá e a próxima execução grava de novo
+antes de mover itens novos.
+"""
+import json
+from typing import Callable, Dict, List
+
+from django.core.cache import cache
+
+# KEYS[1]: fila, KEYS[2]: processando; ARGV[1]: tamanho do lote
+# Retorno: lote pendente de uma execução anterior ou o próximo lote da fila
+_SCRIPT_LUA = """
+local itens = redis.call('LRANGE', KEYS[2], 0, -1)
+if #itens > 0 then return itens end
+
+itens = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #itens > 0 then
+    redis.call('RPUSH', KEYS[2], unpack(itens))
+    redis.call('LTRIM', KEYS[1], #itens, -1)
+end
+return itens
+"""
+
+_script = None
+
+
+def drenar_fila(cliente_redis, chave: str, gravar: Callable[[List[Dict]], None], tamanho_lote: int) -> int:
+    """
+    Grava a fila em lotes de até tamanho_lote itens
+
+    Um drenador por vez (lock <chave>:lock no cache); exceção de gravar
+    interrompe a drenagem e é propagada, com o lote preservado para a
+    próxima execução.
+
+    Args:
+        cliente_redis: cliente redis-py (LimitadorJanelaDeslizante._cliente_redis)
+        chave: chave da fila, sem o prefixo do cache
+        gravar: recebe os itens decodificados e grava o lote (em uma transação)
+        tamanho_lote: máximo de itens por chamada de gravar
+
+    Returns:
+        int: total de itens gravados
+    """
+    global _script
+    if _script is None:
+        _script = cliente_redis.register_script(_SCRIPT_LUA)
+
+    chave_lock = f"{chave}:lock"
+    if not cache.add(chave_lock, 1, timeout=300):
+        return 0
+
+    total = 0
+    try:
+        fila = cache.make_key(chave)
+        processando = cache.make_key(f"{chave}:processando")
+        while True:
+            itens = _script(keys=[fila, processando], args=[tamanho_lote], client=cliente_redis)
+            if not itens:
+                break
+            gravar([json.loads(item) for item in itens])
+            cliente_redis.delete(processando)
+            total += len(itens)
+    finally:
+        cache.delete(chave_lock)
+    return total
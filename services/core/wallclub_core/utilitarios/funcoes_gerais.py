@@ -2,7 +2,8 @@
 Funções gerais importadas do sistema PHP original
 """
 import math
-from datetime import datetime, timedelta
+
+from wallclub_core.utilitarios.calendario import obter_calendario
 
 
 def calcular_juros_compostos(i, P, V, n):
@@ -146,21 +147,13 @@ def proxima_sexta_feira(data_str):
     Returns:
         str: Data da próxima sexta-feira no formato 'dd/mm/yyyy'
     """
-    # Converter a data de entrada para um objeto datetime
-    data_obj = datetime.strptime(data_str, '%d/%m/%Y')
-
-    # Encontrar o próximo dia que é sexta-feira
-    # weekday() retorna 0=segunda, 1=terça, ..., 4=sexta, 5=sábado, 6=domingo
-    while data_obj.weekday() != 4:  # 4 = sexta-feira
-        data_obj += timedelta(days=1)
-
-    # Retornar a data da próxima sexta-feira no formato dd/mm/yyyy
-    return data_obj.strftime('%d/%m/%Y')
+    return obter_calendario().proxima_sexta_feira(data_str).strftime('%d/%m/%Y')
 
 
 def proximo_dia_util(data_str):
     """
-    Encontra o próximo dia útil (segunda a sexta) a partir de uma data
+    Encontra o próximo dia útil (segunda a sexta) a partir de uma data.
+    Feriados só são considerados se configurados no calendário (ver calendario.obter_calendario)
     
     Args:
         data_str (str): Data no formato 'dd/mm/yyyy'
@@ -168,15 +161,4 @@ def proximo_dia_util(data_str):
     Returns:
         str: Data do próximo dia útil no formato 'dd/mm/yyyy'
     """
-    # Converter a data de entrada para um objeto datetime
-    data_obj = datetime.strptime(data_str, '%d/%m/%Y')
-    
-    # Avançar 1 dia
-    data_obj += timedelta(days=1)
-    
-    # Pular finais de semana (sábado=5, domingo=6)
-    while data_obj.weekday() >= 5:
-        data_obj += timedelta(days=1)
-    
-    # Retornar o próximo dia útil no formato dd/mm/yyyy
-    return data_obj.strftime('%d/%m/%Y')
+    return obter_calendario().proximo_dia_util(data_str).strftime('%d/%m/%Y')
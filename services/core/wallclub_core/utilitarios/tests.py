@@ -0,0 +1,106 @@
+import json
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from wallclub_core.utilitarios.config_manager import ConfigManager
+
+SECRET = 'wall/dev/db'
+
+
+class _SecretsManagerFalso:
+    """Backend local do Secrets Manager que conta as chamadas"""
+
+    def __init__(self, valores):
+        self.valores = dict(valores)
+        self.chamadas = {'get_secret_value': 0, 'batch_get_secret_value': 0}
+        self.falhar = False
+        self.buscou = threading.Event()
+
+    def get_secret_value(self, SecretId):
+        self.chamadas['get_secret_value'] += 1
+        self.buscou.set()
+        if self.falhar:
+            raise ConnectionError('AWS indisponível')
+        return {'Name': SecretId, 'SecretString': self.valores[SecretId]}
+
+    def batch_get_secret_value(self, SecretIdList, NextToken=None):
+        self.chamadas['batch_get_secret_value'] += 1
+        if self.falhar:
+            raise ConnectionError('AWS indisponível')
+        return {
+            'SecretValues': [{'Name': nome, 'SecretString': self.valores[nome]}
+                             for nome in SecretIdList if nome in self.valores],
+            'Errors': [],
+        }
+
+
+@mock.patch.dict('os.environ', {'ENVIRONMENT': 'development', 'AWS_SECRETS_CACHE_TTL': '100'})
+class ConfigManagerCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.backend = _SecretsManagerFalso({SECRET: json.dumps({
+            'DB_USER_PYTHON': 'wall', 'DB_PASS_PYTHON': 'x', 'DB_HOST': 'db',
+            'PINBANK_URL': 'https://pinbank', 'MAILSERVER_URL': 'smtp', 'MAXMIND_ACCOUNT_ID': '1',
+        })})
+        relogio = mock.patch('wallclub_core.utilitarios.config_manager.time.monotonic', return_value=1000.0)
+        self.relogio = relogio.start()
+        self.addCleanup(relogio.stop)
+
+    def test_inicializacao_em_lote_sem_chamadas_por_leitura(self):
+        config = ConfigManager(secrets_client=self.backend)
+        for _ in range(10):
+            self.assertEqual(config.get_database_config()['HOST'], 'db')
+            self.assertEqual(config.get_pinbank_config()['url'], 'https://pinbank')
+            config.get_email_config()
+            config.get_maxmind_config()
+            config.get_riskengine_credentials()
+
+        self.assertEqual(self.backend.chamadas, {'get_secret_value': 0, 'batch_get_secret_value': 1})
+
+    def test_refresh_ahead_em_background(self):
+        config = ConfigManager(secrets_client=self.backend)
+        self.backend.valores[SECRET] = json.dumps({'DB_HOST': 'novo'})
+
+        # TTL 100s +/- 10%: refresh entre 72s e 88s, expiração entre 90s e 110s
+        self.relogio.return_value = 1000.0 + 89
+        self.assertEqual(json.loads(config.get_secret(SECRET))['DB_HOST'], 'db')
+        self.assertTrue(self.backend.buscou.wait(2))
+        for _ in range(50):
+            if config._atualizando.get(SECRET) is None:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertEqual(json.loads(config.get_secret(SECRET))['DB_HOST'], 'novo')
+        self.assertEqual(self.backend.chamadas['get_secret_value'], 1)
+
+    def test_stale_if_error(self):
+        config = ConfigManager(secrets_client=self.backend)
+        self.backend.falhar = True
+
+        self.relogio.return_value = 1000.0 + 500
+        self.assertEqual(config.get_database_config()['HOST'], 'db')
+        self.assertEqual(self.backend.chamadas['get_secret_value'], 1)
+
+        # Dentro de ATRASO_APOS_ERRO não insiste no AWS
+        self.relogio.return_value += ConfigManager.ATRASO_APOS_ERRO - 1
+        config.get_database_config()
+        self.assertEqual(self.backend.chamadas['get_secret_value'], 1)
+
+    def test_ttl_zero_desliga_cache(self):
+        with mock.patch.dict('os.environ', {'AWS_SECRETS_CACHE_TTL': '0'}):
+            config = ConfigManager(secrets_client=self.backend)
+        for _ in range(3):
+            config.get_pinbank_config()
+        self.assertEqual(self.backend.chamadas, {'get_secret_value': 3, 'batch_get_secret_value': 0})
+
+    def test_lote_indisponivel_usa_leitura_individual(self):
+        def sem_lote(**kwargs):
+            # boto3 < 1.34 ou IAM sem secretsmanager:BatchGetSecretValue
+            raise AttributeError('batch_get_secret_value')
+
+        self.backend.batch_get_secret_value = sem_lote
+        config = ConfigManager(secrets_client=self.backend)
+        config.get_database_config()
+        self.assertEqual(self.backend.chamadas['get_secret_value'], 1)
@@ -0,0 +1,185 @@
+"""
+Benchmark da carga de transações Own por janelas contra um servidor Own local.
+
+O servidor local responde /v2/auth (contando tokens emitidos) e
+/transacoes/v2/buscaTransacoesGerais com latência configurável. Carrega o mesmo
+período/CNPJs contra o banco configurado (MySQL - ON DUPLICATE KEY UPDATE).
+Compara:
+
+- serial: um dia por vez por CNPJ, buscar_transacoes_gerais + salvar_transacao
+  por registro (fluxo anterior)
+- janelas: CargaJanelasOwnService (janelas em paralelo, token compartilhado,
+  upsert em lote + checkpoint)
+- retomada: mesmo período de novo - janelas concluídas não são consultadas
+
+Registros de teste (identificadorTransacao BENCH...) e checkpoints removidos ao final.
+
+Uso:
+    python manage.py benchmark_carga_own
+    python manage.py benchmark_carga_own --cnpjs 10 --dias 30 --transacoes 50 --latencia-api-ms 400
+"""
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from adquirente_own.cargas_own.models import OwnCargaJanela, OwnExtratoTransacoes
+from adquirente_own.cargas_own.services_carga_extrato_pos import CargaExtratoOwnService
+from adquirente_own.cargas_own.services_carga_janelas import CargaJanelasOwnService
+from adquirente_own.services import OwnService
+from adquirente_own.services_credenciais import CredenciaisOwnService
+
+
+class ServidorOwnLocal:
+    """Stub dos endpoints de autenticação e buscaTransacoesGerais"""
+
+    def __init__(self, prefixo, transacoes_por_janela, latencia):
+        self.prefixo = prefixo
+        self.transacoes_por_janela = transacoes_por_janela
+        self.latencia = latencia
+        self.tokens = 0
+        self.consultas = 0
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if self.path == '/v2/auth':
+                    resposta = servidor.token()
+                elif self.path == '/transacoes/v2/buscaTransacoesGerais':
+                    time.sleep(servidor.latencia)
+                    resposta = servidor.transacoes(json.loads(corpo))
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                dados = json.dumps(resposta).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def token(self):
+        with self._lock:
+            self.tokens += 1
+        return {'access_token': uuid.uuid4().hex, 'token_type': 'Bearer', 'expires_in': 300}
+
+    def transacoes(self, payload):
+        with self._lock:
+            self.consultas += 1
+        doc = payload.get('docParceiro', '')
+        dia = payload['dataInicial'][:10]
+        return [
+            {
+                'identificadorTransacao': f'{self.prefixo}{doc[-4:]}{dia.replace("-", "")}{i:05d}',
+                'cnpjCpfCliente': payload['cnpjCliente'], 'cnpjCpfParceiro': doc,
+                'data': f'{dia}T10:00:00', 'numeroSerieEquipamento': 'SN0001', 'valor': 100.0,
+                'quantidadeParcelas': 1, 'mdr': 2.5, 'statusTransacao': 'APROVADA', 'bandeira': 'VISA',
+                'modalidade': 'CREDITO A VISTA', 'codigoAutorizacao': f'{i:06d}', 'numeroCartao': '411111******1111',
+                'codigoTransacao': str(i),
+                'parcelas': [{
+                    'parcelaId': i, 'statusPagamento': 'PENDENTE', 'dataHoraTransacao': f'{dia}T10:00:00',
+                    'mdr': 2.5, 'numeroParcela': 1, 'valorParcela': 100.0, 'dataPrevistaPagamento': dia,
+                }],
+            }
+            for i in range(self.transacoes_por_janela)
+        ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark da carga Own: dias em série vs janelas em paralelo com checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cnpjs', type=int, default=5, help='Lojas (docParceiro) simuladas (padrão: 5)')
+        parser.add_argument('--dias', type=int, default=14, help='Dias do período (padrão: 14)')
+        parser.add_argument('--transacoes', type=int, default=20, help='Transações por loja/dia (padrão: 20)')
+        parser.add_argument('--latencia-api-ms', type=float, default=200.0,
+                            help='Tempo de resposta simulado da Own por consulta (padrão: 200)')
+
+    def handle(self, *args, **options):
+        execucao = uuid.uuid4().hex[:6]
+        prefixo = f'BENCH{execucao}'
+        cnpjs = [f'99{execucao[:4]}{i:08d}'[:14] for i in range(options['cnpjs'])]
+        data_final = datetime(2026, 1, 1) + timedelta(days=options['dias']) - timedelta(minutes=1)
+        data_inicial = datetime(2026, 1, 1)
+        credenciais = {'client_id': f'benchmark-{execucao}', 'client_secret': 'benchmark', 'scope': 'benchmark'}
+
+        servidor = ServidorOwnLocal(prefixo, options['transacoes'], options['latencia_api_ms'] / 1000)
+        resultados = {}
+        try:
+            with servidor, \
+                    mock.patch.multiple(OwnService, AUTH_URL_TEST=f'{servidor.url}/v2/auth',
+                                        AUTH_URL_LIVE=f'{servidor.url}/v2/auth',
+                                        BASE_URL_TEST=servidor.url, BASE_URL_LIVE=servidor.url), \
+                    mock.patch.object(CredenciaisOwnService, 'obter_credenciais_core', return_value=credenciais):
+                for cenario in ('serial', 'janelas', 'retomada'):
+                    if cenario == 'janelas':
+                        self._limpar(prefixo, cnpjs)
+                    cache.delete(f"own_oauth_token_{credenciais['client_id']}")
+                    tokens, consultas = servidor.tokens, servidor.consultas
+                    inicio = time.perf_counter()
+                    if cenario == 'serial':
+                        gravados = self._carga_serial(cnpjs, data_inicial, options['dias'])
+                    else:
+                        resultado = CargaJanelasOwnService().executar(data_inicial, data_final, cnpjs=cnpjs)
+                        gravados = resultado['total_registros']
+                    duracao = time.perf_counter() - inicio
+                    resultados[cenario] = (duracao, gravados, servidor.consultas - consultas, servidor.tokens - tokens)
+        finally:
+            self._limpar(prefixo, cnpjs)
+
+        base = resultados['serial'][0]
+        for cenario, (duracao, gravados, consultas, tokens) in resultados.items():
+            self.stdout.write(
+                f'{cenario:<9} {duracao:8.2f}s  registros={gravados:7d} ({gravados / duracao:9.1f}/s)  '
+                f'consultas={consultas:5d}  tokens={tokens:3d}  ({base / duracao:.1f}x)'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _limpar(prefixo, cnpjs):
+        OwnExtratoTransacoes.objects.filter(identificadorTransacao__startswith=prefixo).delete()
+        OwnCargaJanela.objects.filter(doc_parceiro__in=cnpjs).delete()
+
+    @staticmethod
+    def _carga_serial(cnpjs, data_inicial, dias) -> int:
+        """Fluxo anterior: uma consulta por loja/dia em série, update_or_create por transação"""
+        service = CargaExtratoOwnService()
+        gravados = 0
+        for doc_parceiro in cnpjs:
+            for dia in range(dias):
+                inicio = data_inicial + timedelta(days=dia)
+                result = service.buscar_transacoes_gerais(
+                    cnpj_cliente=CargaJanelasOwnService.CNPJ_WALLCLUB,
+                    doc_parceiro=doc_parceiro,
+                    data_inicial=inicio,
+                    data_final=inicio + timedelta(days=1) - timedelta(minutes=1)
+                )
+                for transacao_data in result.get('transacoes', []):
+                    service.salvar_transacao(transacao_data)
+                    gravados += 1
+        return gravados
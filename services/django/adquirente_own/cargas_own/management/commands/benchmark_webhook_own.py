@@ -0,0 +1,200 @@
+"""
+Teste de carga do webhook de transações Own: vazão de aceite com processamento lento.
+
+Clientes concorrentes enviam webhooks de transação (várias lojas) contra o banco
+configurado (MySQL - INSERT IGNORE). Para cada latência de processamento
+simulada (tempo de aplicar um evento), compara:
+
+- sincrono: fluxo anterior na requisição - exists() + create em transação
+  atômica, com a latência dentro da transação
+- fila: views_webhook.webhook_transacao (INSERT IGNORE do evento bruto e 200),
+  com um consumidor FilaWebhookOwnService.processar_pendentes em paralelo
+  aplicando os eventos com a latência simulada
+
+A vazão de aceite da fila deve ficar estável com a latência; a do fluxo
+síncrono cai na proporção. Também mostra em quanto tempo o consumidor drena a
+fila após o fim da rajada.
+
+Registros de teste (identificadorTransacao BENCH...) removidos ao final.
+
+Uso:
+    python manage.py benchmark_webhook_own
+    python manage.py benchmark_webhook_own --requisicoes 5000 --clientes 32 --latencia-processamento-ms 0 20 100
+"""
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import JsonResponse
+from django.test import RequestFactory
+
+from adquirente_own import views_webhook
+from adquirente_own.cargas_own.models import OwnExtratoTransacoes, OwnWebhookEvento
+from adquirente_own.services_webhook_fila import FilaWebhookOwnService, _parse_data_own
+
+
+class Command(BaseCommand):
+    help = 'Teste de carga: aceite de webhooks Own síncrono vs fila com processamento lento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requisicoes', type=int, default=2000, help='Webhooks por cenário (padrão: 2000)')
+        parser.add_argument('--clientes', type=int, default=16, help='Envios simultâneos (padrão: 16)')
+        parser.add_argument('--lojas', type=int, default=20, help='Lojas (docParceiro) distintas (padrão: 20)')
+        parser.add_argument('--latencia-processamento-ms', type=float, nargs='+', default=[0.0, 20.0, 100.0],
+                            help='Tempos de processamento por evento simulados (padrão: 0 20 100)')
+
+    def handle(self, *args, **options):
+        self.prefixo = f'BENCH{uuid.uuid4().hex[:8]}'
+        self.sequencia = count()
+        self.lojas = [f'99{i:012d}' for i in range(options['lojas'])]
+        fabrica = RequestFactory()
+
+        linhas = []
+        try:
+            for latencia_ms in options['latencia_processamento_ms']:
+                latencia = latencia_ms / 1000
+                resultado = {}
+                for cenario in ('sincrono', 'fila'):
+                    requisicoes = [
+                        fabrica.post('/webhook/own/transacao/', data=json.dumps(self._payload()),
+                                     content_type='application/json')
+                        for _ in range(options['requisicoes'])
+                    ]
+                    if cenario == 'sincrono':
+                        aceitos_s, p95, erros = self._disparar(
+                            lambda request: self._webhook_sincrono(request, latencia), requisicoes, options['clientes']
+                        )
+                        resultado[cenario] = (aceitos_s, p95, None, erros)
+                    else:
+                        resultado[cenario] = self._cenario_fila(requisicoes, options['clientes'], latencia)
+                linhas.append((latencia_ms, resultado))
+        finally:
+            self._limpar()
+
+        for latencia_ms, resultado in linhas:
+            sincrono, fila = resultado['sincrono'], resultado['fila']
+            self.stdout.write(
+                f'processamento {latencia_ms:6.1f}ms | sincrono {sincrono[0]:8.1f} aceitos/s  p95 {sincrono[1]:7.1f}ms '
+                f'| fila {fila[0]:8.1f} aceitos/s  p95 {fila[1]:7.1f}ms  drenada em {fila[2]:6.2f}s'
+            )
+        if any(resultado[cenario][3] for _, resultado in linhas for cenario in resultado):
+            self.stdout.write(self.style.ERROR('Houve respostas com erro - ver log adquirente_own'))
+            return
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    def _payload(self):
+        i = next(self.sequencia)
+        return {
+            'identificadorTransacao': f'{self.prefixo}{i:09d}',
+            'tipoTransacao': 'VENDA CONFIRMADA',
+            'cnpjCliente': '54430621000134',
+            'docParceiro': self.lojas[i % len(self.lojas)],
+            'valor': 60,
+            'quantidadeParcela': '1',
+            'bandeira': 'MASTERCARD',
+            'modalide': 'DEBITO',
+            'mdr': 0.83,
+            'data': '19/10/2026 10:00:00',
+            'cartao': '550209******6512',
+            'numeroSerie': '6M086053',
+            'contrato': '029-227-58',
+        }
+
+    @staticmethod
+    def _disparar(view, requisicoes, clientes):
+        """Envia as requisições com N clientes; retorna (aceitos/s, p95 ms, erros)"""
+        tempos = []
+        erros = []
+        partes = [requisicoes[i::clientes] for i in range(clientes)]
+
+        def cliente(parte):
+            try:
+                for request in parte:
+                    inicio = time.perf_counter()
+                    resposta = view(request)
+                    tempos.append(time.perf_counter() - inicio)
+                    if resposta.status_code != 200:
+                        erros.append(resposta.status_code)
+            finally:
+                connection.close()
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clientes) as executor:
+            list(executor.map(cliente, partes))
+        duracao = time.perf_counter() - inicio
+
+        tempos.sort()
+        p95 = tempos[int(len(tempos) * 0.95) - 1] * 1000 if tempos else 0.0
+        return len(requisicoes) / duracao, p95, len(erros)
+
+    def _cenario_fila(self, requisicoes, clientes, latencia):
+        converter = FilaWebhookOwnService._converter.__func__
+        parar = threading.Event()
+
+        def converter_lento(cls, evento, existentes):
+            time.sleep(latencia)
+            return converter(cls, evento, existentes)
+
+        def consumidor():
+            try:
+                while True:
+                    resumo = FilaWebhookOwnService.processar_pendentes(tempo_maximo=1)
+                    if not resumo['processados'] and not resumo['reagendados']:
+                        if parar.is_set():
+                            return
+                        time.sleep(0.05)
+            finally:
+                connection.close()
+
+        with mock.patch.object(FilaWebhookOwnService, '_agendar_processamento'), \
+                mock.patch.object(FilaWebhookOwnService, '_converter', classmethod(converter_lento)):
+            thread = threading.Thread(target=consumidor, daemon=True)
+            thread.start()
+            aceitos_s, p95, erros = self._disparar(views_webhook.webhook_transacao, requisicoes, clientes)
+            fim_rajada = time.perf_counter()
+            parar.set()
+            thread.join()
+            drenagem = time.perf_counter() - fim_rajada
+
+        pendentes = OwnWebhookEvento.objects.filter(
+            evento_id__startswith=f'transacao:{self.prefixo}', status='PENDENTE'
+        ).count()
+        return aceitos_s, p95, drenagem, erros + pendentes
+
+    @staticmethod
+    def _webhook_sincrono(request, latencia):
+        """Fluxo anterior: verificação e gravação dentro da requisição"""
+        payload = json.loads(request.body.decode('utf-8'))
+        identificador = payload['identificadorTransacao']
+        if OwnExtratoTransacoes.objects.filter(identificadorTransacao=identificador).exists():
+            return JsonResponse({'sucesso': True, 'mensagem': 'Transação já processada'}, status=200)
+        with transaction.atomic():
+            time.sleep(latencia)
+            OwnExtratoTransacoes.objects.create(
+                identificadorTransacao=identificador,
+                cnpjCpfCliente=payload['cnpjCliente'],
+                cnpjCpfParceiro=payload['docParceiro'],
+                data=_parse_data_own(payload['data']),
+                valor=payload['valor'],
+                quantidadeParcelas=int(payload['quantidadeParcela']),
+                mdr=payload['mdr'],
+                statusTransacao=payload['tipoTransacao'],
+                bandeira=payload['bandeira'],
+                modalidade=payload['modalide'],
+                numeroCartao=payload['cartao'],
+                numeroSerieEquipamento=payload['numeroSerie'],
+                codigoAutorizacao=payload['contrato'],
+            )
+        return JsonResponse({'sucesso': True, 'mensagem': 'Transação recebida com sucesso'}, status=200)
+
+    def _limpar(self):
+        OwnExtratoTransacoes.objects.filter(identificadorTransacao__startswith=self.prefixo).delete()
+        OwnWebhookEvento.objects.filter(evento_id__startswith=f'transacao:{self.prefixo}').delete()
@@ -0,0 +1,80 @@
+"""
+Management command para carga Own Financial por janelas (backfill)
+Janelas consultadas em paralelo com checkpoint: reexecutar o mesmo período
+retoma só as janelas não concluídas.
+
+Uso:
+    python manage.py carga_janelas_own --data-inicial=2025-01-01 --data-final=2025-03-31
+    python manage.py carga_janelas_own --tipo=liquidacoes --data-inicial=2025-01-01 --data-final=2025-01-31
+    python manage.py carga_janelas_own --cnpj=00000000000000 --data-inicial=2025-01-01 --data-final=2025-01-31 --janela-horas=6
+"""
+
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from adquirente_own.cargas_own.services_carga_janelas import CargaJanelasOwnService
+
+
+class Command(BaseCommand):
+    help = 'Executa carga Own Financial por janelas de data, em paralelo e com retomada'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipo',
+            choices=[CargaJanelasOwnService.TIPO_TRANSACOES, CargaJanelasOwnService.TIPO_LIQUIDACOES],
+            default=CargaJanelasOwnService.TIPO_TRANSACOES,
+            help='transacoes (padrão) ou liquidacoes'
+        )
+        parser.add_argument('--data-inicial', type=str, required=True, help='Data inicial (YYYY-MM-DD)')
+        parser.add_argument('--data-final', type=str, required=True, help='Data final (YYYY-MM-DD)')
+        parser.add_argument(
+            '--cnpj',
+            action='append',
+            help='CNPJ da loja (transações) ou do cliente (liquidações); repetir para vários. '
+                 'Padrão: lojas OWN aprovadas / credenciais ativas'
+        )
+        parser.add_argument('--janela-horas', type=int, default=24, help='Duração de cada janela de transações (padrão: 24)')
+        parser.add_argument('--reprocessar', action='store_true', help='Consulta também janelas já concluídas')
+
+    def handle(self, *args, **options):
+        service = CargaJanelasOwnService(options['tipo'])
+
+        data_inicial = datetime.strptime(options['data_inicial'], '%Y-%m-%d')
+        data_final = datetime.strptime(options['data_final'], '%Y-%m-%d').replace(hour=23, minute=59)
+
+        cnpjs = options.get('cnpj') or self._cnpjs_padrao(options['tipo'])
+        if not cnpjs:
+            self.stdout.write(self.style.WARNING('⚠️  Nenhum CNPJ para processar'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🔄 Carga {options["tipo"]}: {len(cnpjs)} CNPJ(s), {data_inicial.date()} a {data_final.date()}'
+        ))
+
+        resultado = service.executar(
+            data_inicial,
+            data_final,
+            cnpjs=cnpjs,
+            tamanho=timedelta(hours=options['janela_horas']),
+            reprocessar=options['reprocessar']
+        )
+
+        estilo = self.style.SUCCESS if resultado['sucesso'] else self.style.WARNING
+        self.stdout.write(estilo('✅ Carga concluída!' if resultado['sucesso'] else '⚠️  Carga concluída com erros (reexecute para retomar)'))
+        self.stdout.write(f'   Janelas: {resultado["total_janelas"]} ({resultado["janelas_puladas"]} já concluídas, {resultado["janelas_erro"]} com erro)')
+        self.stdout.write(f'   Registros gravados: {resultado["total_registros"]}')
+
+    @staticmethod
+    def _cnpjs_padrao(tipo):
+        if tipo == CargaJanelasOwnService.TIPO_LIQUIDACOES:
+            from adquirente_own.cargas_own.models import CredenciaisExtratoContaOwn
+            return list(CredenciaisExtratoContaOwn.objects.filter(ativo=True).values_list('cnpj_white_label', flat=True))
+
+        from adquirente_own.models_cadastro import LojaOwn
+        from wallclub_core.estr_organizacional.loja import Loja
+
+        lojas_own_ids = LojaOwn.objects.filter(
+            status_credenciamento='APROVADO',
+            sincronizado=True
+        ).values_list('loja_id', flat=True)
+        # Sem lojas aprovadas: todas as transações do WallClub (sem filtro de loja)
+        return list(Loja.objects.filter(id__in=lojas_own_ids).values_list('cnpj', flat=True)) or [None]
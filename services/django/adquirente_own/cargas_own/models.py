@@ -109,6 +109,107 @@ class OwnLiquidacoes(models.Model):
         return f"Liquidação {self.lancamentoId} - R$ {self.valor}"
 
 
+class OwnCargaJanela(models.Model):
+    """
+    Checkpoint da carga Own por janela de data (CargaJanelasOwnService)
+
+    Uma linha por (tipo, cnpjCliente, docParceiro, início, fim). Janela CONCLUIDA
+    é gravada na mesma transação dos registros: carga interrompida retoma só
+    as janelas pendentes.
+    """
+
+    STATUS_CHOICES = [
+        ('CONCLUIDA', 'Concluída'),
+        ('ERRO', 'Erro'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    tipo = models.CharField(max_length=20, help_text='transacoes ou liquidacoes')
+    cnpj_cliente = models.CharField(max_length=14)
+    doc_parceiro = models.CharField(max_length=14, default='', blank=True)
+    inicio = models.DateTimeField()
+    fim = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    total_registros = models.IntegerField(default=0)
+    tentativas = models.IntegerField(default=0)
+    erro = models.CharField(max_length=500, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'adquirente_own'
+        db_table = 'ownCargaJanelas'
+        verbose_name = 'Janela de Carga Own'
+        verbose_name_plural = 'Janelas de Carga Own'
+        unique_together = ('tipo', 'cnpj_cliente', 'doc_parceiro', 'inicio', 'fim')
+
+    def __str__(self):
+        return f"{self.tipo} {self.cnpj_cliente}/{self.doc_parceiro} {self.inicio} - {self.fim}: {self.status}"
+
+
+class OwnWebhookEvento(models.Model):
+    """
+    Evento bruto recebido pelos webhooks de transação/liquidação
+
+    Gravado com INSERT IGNORE pela view (evento_id único = deduplicação) e
+    aplicado depois pela task adquirente_own.processar_webhooks, em ordem de
+    chegada por loja (doc_parceiro).
+    """
+
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('PROCESSADO', 'Processado'),
+        ('FALHA', 'Falha (ver ownWebhookEventosFalhos)'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    evento_id = models.CharField(max_length=80, unique=True, help_text='transacao:<identificador> ou liquidacao:<lancamentoId>')
+    tipo = models.CharField(max_length=20, help_text='transacao ou liquidacao')
+    doc_parceiro = models.CharField(max_length=20, default='', blank=True)
+    payload = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDENTE')
+    tentativas = models.IntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(null=True, blank=True)
+    erro = models.CharField(max_length=500, null=True, blank=True)
+    recebido_em = models.DateTimeField()
+    processado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'adquirente_own'
+        db_table = 'ownWebhookEventos'
+        verbose_name = 'Evento de Webhook Own'
+        verbose_name_plural = 'Eventos de Webhook Own'
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.evento_id}: {self.status}"
+
+
+class OwnWebhookEventoFalho(models.Model):
+    """Dead-letter: eventos de webhook que esgotaram as tentativas de processamento"""
+
+    id = models.BigAutoField(primary_key=True)
+    evento_id = models.CharField(max_length=80, unique=True)
+    tipo = models.CharField(max_length=20)
+    doc_parceiro = models.CharField(max_length=20, default='', blank=True)
+    payload = models.TextField()
+    tentativas = models.IntegerField()
+    erro = models.CharField(max_length=500, null=True, blank=True)
+    recebido_em = models.DateTimeField()
+    falhou_em = models.DateTimeField()
+
+    class Meta:
+        app_label = 'adquirente_own'
+        db_table = 'ownWebhookEventosFalhos'
+        verbose_name = 'Evento de Webhook Own com Falha'
+        verbose_name_plural = 'Eventos de Webhook Own com Falha'
+
+    def __str__(self):
+        return f"{self.evento_id}: {self.erro}"
+
+
 class CredenciaisExtratoContaOwn(models.Model):
     """
     Credenciais OAuth 2.0 do cliente White Label (WallClub)
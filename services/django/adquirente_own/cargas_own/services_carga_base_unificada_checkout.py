@@ -13,6 +13,7 @@ Similar ao Pinbank, mas para transações OWN:
 from typing import Dict, Any
 from django.db import connection, transaction
 from wallclub_core.utilitarios.log_control import registrar_log
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
 
 
 class CargaBaseUnificadaCheckoutOwnService:
@@ -27,6 +28,10 @@ class CargaBaseUnificadaCheckoutOwnService:
     def __init__(self):
         from parametros_wallclub.calculadora_base_unificada import CalculadoraBaseUnificada
         self.calculadora = CalculadoraBaseUnificada()
+        # NSUs gravados na execução (para atualizar o resumo diário do portal) e
+        # buckets (vendas, recebimento) das linhas atualizadas, lidos antes do UPDATE
+        self.nsus_alterados = set()
+        self.buckets_anteriores = (set(), set())
 
     def carregar_valores_primarios(self, limite: int = None, nsu: str = None) -> int:
         """
@@ -206,8 +211,23 @@ class CargaBaseUnificadaCheckoutOwnService:
                     continue
 
         registrar_log('own.cargas_own', f"✅ Carga concluída: {total_processadas} transações processadas")
+        self._atualizar_resumo_diario()
         return total_processadas
 
+    def _atualizar_resumo_diario(self):
+        """Recalcula os agregados diários afetados pelos NSUs gravados nesta execução"""
+        if not self.nsus_alterados:
+            return
+        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+        ResumoDiarioService.atualizar_por_nsus(self.nsus_alterados, self.buckets_anteriores)
+        self.nsus_alterados.clear()
+        self.buckets_anteriores = (set(), set())
+
+    def _guardar_buckets_anteriores(self, nsus):
+        """Buckets do resumo diário em que as linhas estão antes do upsert"""
+        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+        ResumoDiarioService.buckets_por_nsus(nsus, self.buckets_anteriores)
+
     def _inserir_base_unificada(self, variaveis: Dict[str, Any]):
         """
         Insere registro na base_transacoes_unificadas
@@ -248,6 +268,11 @@ class CargaBaseUnificadaCheckoutOwnService:
         if not campos:
             return
 
+        # Data de pagamento tipada (var45 DD/MM/YYYY): filtros por intervalo usam índice
+        if 'var45' in campos:
+            campos.append('data_pagamento')
+            valores.append(converter_data_ou_nula(valores[campos.index('var45')]))
+
         campos_str = ', '.join(campos)
         placeholders = ', '.join(['%s'] * len(valores))
 
@@ -261,9 +286,14 @@ class CargaBaseUnificadaCheckoutOwnService:
             ON DUPLICATE KEY UPDATE {update_clause}
         """
 
+        if variaveis.get(9):
+            self._guardar_buckets_anteriores([variaveis.get(9)])
         with connection.cursor() as cursor:
             cursor.execute(sql, valores)
 
+        if variaveis.get(9):
+            self.nsus_alterados.add(str(variaveis.get(9)))
+
     def executar_carga_diaria(self) -> Dict[str, Any]:
         """
         Executa carga diária de transações OWN checkout
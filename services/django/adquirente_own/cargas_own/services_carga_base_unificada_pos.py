@@ -11,6 +11,7 @@ from datetime import datetime
 from django.db import connection, transaction
 from adquirente_own.cargas_own.models import OwnExtratoTransacoes
 from wallclub_core.utilitarios.log_control import registrar_log
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
 
 
 class CargaBaseUnificadaOwnService:
@@ -23,6 +24,8 @@ class CargaBaseUnificadaOwnService:
     def __init__(self):
         from parametros_wallclub.calculadora_base_unificada import CalculadoraBaseUnificada
         self.calculadora = CalculadoraBaseUnificada()
+        # NSUs gravados na execução (para atualizar o resumo diário do portal)
+        self.nsus_alterados = set()
 
     def carregar_valores_primarios(self, limite: int = None, identificador: str = None) -> int:
         """
@@ -244,8 +247,17 @@ class CargaBaseUnificadaOwnService:
                 registrar_log('adquirente_own.cargas_own', f"Último lote {numero_lote} commitado com sucesso ({len(lote_atual)} registros processados)")
 
         registrar_log('adquirente_own.cargas_own', f"Carga de valores primários Own finalizada. Registros processados: {registros_processados}")
+        self._atualizar_resumo_diario()
         return registros_processados
 
+    def _atualizar_resumo_diario(self):
+        """Recalcula os agregados diários afetados pelos NSUs gravados nesta execução"""
+        if not self.nsus_alterados:
+            return
+        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+        ResumoDiarioService.atualizar_por_nsus(self.nsus_alterados)
+        self.nsus_alterados.clear()
+
     def _inserir_valores_base_gestao(self, valores: Dict[int, Any], linha: Dict[str, Any]) -> bool:
         """
         Insere valores na base_transacoes_unificadas
@@ -294,6 +306,9 @@ class CargaBaseUnificadaOwnService:
                     else:
                         dados_insert[campo_nome] = valor
 
+            # Data de pagamento tipada (var45 DD/MM/YYYY): filtros por intervalo usam índice
+            dados_insert['data_pagamento'] = converter_data_ou_nula(dados_insert.get('var45'))
+
             # Inserir em base_transacoes_unificadas
             with connection.cursor() as cursor:
                 campos = list(dados_insert.keys())
@@ -306,6 +321,7 @@ class CargaBaseUnificadaOwnService:
                 
                 registrar_log('adquirente_own.cargas_own', f'✅ base_transacoes_unificadas inserida - NSU: {nsu}')
 
+            self.nsus_alterados.add(str(nsu))
             return True
 
         except Exception as e:
@@ -4,6 +4,7 @@ Endpoint: POST /agilli/transacoes/v2/buscaTransacoesGerais
 Equivalente ao services_carga_extrato_pos.py do Pinbank
 """
 
+import json
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 from django.db import transaction
@@ -117,27 +118,7 @@ class CargaExtratoOwnService:
         # Verificar se já existe
         transacao_obj, created = OwnExtratoTransacoes.objects.update_or_create(
             identificadorTransacao=identificador,
-            defaults={
-                'cnpjCpfCliente': transacao_data.get('cnpjCpfCliente'),
-                'cnpjCpfParceiro': transacao_data.get('cnpjCpfParceiro'),
-                'data': datetime.fromisoformat(transacao_data['data'].replace('T', ' ')),
-                'numeroSerieEquipamento': transacao_data.get('numeroSerieEquipamento'),
-                'valor': transacao_data.get('valor', 0),  # API já retorna em reais
-                'quantidadeParcelas': transacao_data.get('quantidadeParcelas', 1),
-                'mdr': transacao_data.get('mdr'),
-                'valorAntecipacaoTotal': transacao_data.get('valorAntecipacaoTotal'),
-                'taxaAntecipacaoTotal': transacao_data.get('taxaAntecipacaoTotal'),
-                'statusTransacao': transacao_data.get('statusTransacao'),
-                'bandeira': transacao_data.get('bandeira'),
-                'modalidade': transacao_data.get('modalidade'),
-                'codigoAutorizacao': transacao_data.get('codigoAutorizacao'),
-                'numeroCartao': transacao_data.get('numeroCartao'),
-                'codigoTransacao': transacao_data.get('codigoTransacao'),
-                'transClienteId': transacao_data.get('transClienteId'),
-                'dataCancelamento': datetime.fromisoformat(transacao_data['dataCancelamento'].replace('T', ' ')) if transacao_data.get('dataCancelamento') else None,
-                'lido': False,
-                'processado': False
-            }
+            defaults=self.campos_transacao(transacao_data)
         )
 
         # Processar parcelas se existirem
@@ -152,6 +133,51 @@ class CargaExtratoOwnService:
 
         return transacao_obj
 
+    @staticmethod
+    def campos_transacao(transacao_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Colunas de ownExtratoTransacoes a partir da transação da API (exceto parcela)"""
+        return {
+            'cnpjCpfCliente': transacao_data.get('cnpjCpfCliente'),
+            'cnpjCpfParceiro': transacao_data.get('cnpjCpfParceiro'),
+            'data': datetime.fromisoformat(transacao_data['data'].replace('T', ' ')),
+            'numeroSerieEquipamento': transacao_data.get('numeroSerieEquipamento'),
+            'valor': transacao_data.get('valor', 0),  # API já retorna em reais
+            'quantidadeParcelas': transacao_data.get('quantidadeParcelas', 1),
+            'mdr': transacao_data.get('mdr'),
+            'valorAntecipacaoTotal': transacao_data.get('valorAntecipacaoTotal'),
+            'taxaAntecipacaoTotal': transacao_data.get('taxaAntecipacaoTotal'),
+            'statusTransacao': transacao_data.get('statusTransacao'),
+            'bandeira': transacao_data.get('bandeira'),
+            'modalidade': transacao_data.get('modalidade'),
+            'codigoAutorizacao': transacao_data.get('codigoAutorizacao'),
+            'numeroCartao': transacao_data.get('numeroCartao'),
+            'codigoTransacao': transacao_data.get('codigoTransacao'),
+            'transClienteId': transacao_data.get('transClienteId'),
+            'dataCancelamento': datetime.fromisoformat(transacao_data['dataCancelamento'].replace('T', ' ')) if transacao_data.get('dataCancelamento') else None,
+            'lido': False,
+            'processado': False
+        }
+
+    @staticmethod
+    def campos_parcela(parcela: Dict[str, Any]) -> Dict[str, Any]:
+        """Colunas de parcela de ownExtratoTransacoes (primeira parcela da transação)"""
+        return {
+            'parcelaId': parcela.get('parcelaId'),
+            'statusPagamento': parcela.get('statusPagamento'),
+            'dataHoraTransacao': datetime.fromisoformat(parcela['dataHoraTransacao'].replace('T', ' ')) if parcela.get('dataHoraTransacao') else None,
+            'mdrParcela': parcela.get('mdr'),  # API já retorna em reais
+            'numeroParcela': parcela.get('numeroParcela'),
+            'valorParcela': parcela.get('valorParcela'),  # API já retorna em reais
+            'dataPagamentoPrevista': datetime.strptime(parcela['dataPrevistaPagamento'], '%Y-%m-%d').date() if parcela.get('dataPrevistaPagamento') else None,
+            'dataPagamentoReal': datetime.strptime(parcela['dataPagamentoReal'], '%Y-%m-%d').date() if parcela.get('dataPagamentoReal') else None,
+            'valorAntecipado': parcela.get('valorAntecipado'),  # API já retorna em reais
+            'taxaAntecipada': parcela.get('taxaAntecipada'),
+            'antecipado': parcela.get('antecipado'),
+            'numeroTitulo': parcela.get('numeroTitulo'),
+            'detalheEfeito': json.dumps(parcela.get('detalheEfeito')) if parcela.get('detalheEfeito') else None,
+            'detalheAntecipacao': json.dumps(parcela.get('detalheAntecipacao')) if parcela.get('detalheAntecipacao') else None,
+        }
+
     def _processar_parcelas(self, transacao_obj: OwnExtratoTransacoes, parcelas: List[Dict]):
         """
         Processa parcelas da transação
@@ -165,22 +191,8 @@ class CargaExtratoOwnService:
 
         registrar_log('adquirente_own.cargas_own', f'🔍 Primeira parcela: {primeira_parcela}')
 
-        import json as json_lib
-
-        transacao_obj.parcelaId = primeira_parcela.get('parcelaId')
-        transacao_obj.statusPagamento = primeira_parcela.get('statusPagamento')
-        transacao_obj.dataHoraTransacao = datetime.fromisoformat(primeira_parcela['dataHoraTransacao'].replace('T', ' ')) if primeira_parcela.get('dataHoraTransacao') else None
-        transacao_obj.mdrParcela = primeira_parcela.get('mdr')  # API já retorna em reais
-        transacao_obj.numeroParcela = primeira_parcela.get('numeroParcela')
-        transacao_obj.valorParcela = primeira_parcela.get('valorParcela')  # API já retorna em reais
-        transacao_obj.dataPagamentoPrevista = datetime.strptime(primeira_parcela['dataPrevistaPagamento'], '%Y-%m-%d').date() if primeira_parcela.get('dataPrevistaPagamento') else None
-        transacao_obj.dataPagamentoReal = datetime.strptime(primeira_parcela['dataPagamentoReal'], '%Y-%m-%d').date() if primeira_parcela.get('dataPagamentoReal') else None
-        transacao_obj.valorAntecipado = primeira_parcela.get('valorAntecipado')  # API já retorna em reais
-        transacao_obj.taxaAntecipada = primeira_parcela.get('taxaAntecipada')
-        transacao_obj.antecipado = primeira_parcela.get('antecipado')
-        transacao_obj.numeroTitulo = primeira_parcela.get('numeroTitulo')
-        transacao_obj.detalheEfeito = json_lib.dumps(primeira_parcela.get('detalheEfeito')) if primeira_parcela.get('detalheEfeito') else None
-        transacao_obj.detalheAntecipacao = json_lib.dumps(primeira_parcela.get('detalheAntecipacao')) if primeira_parcela.get('detalheAntecipacao') else None
+        for campo, valor in self.campos_parcela(primeira_parcela).items():
+            setattr(transacao_obj, campo, valor)
 
         transacao_obj.save()
 
@@ -0,0 +1,346 @@
+"""
+Carga Own Financial por janelas de data (backfill e double-check)
+
+O período é dividido em janelas por CNPJ, consultadas em paralelo:
+- no máximo MAX_CONCORRENCIA requisições simultâneas à Own no processo
+- no máximo LIMITE_POR_CNPJ janelas simultâneas do mesmo CNPJ
+- token OAuth compartilhado entre as threads (OwnService.obter_token_oauth:
+  cache + renovação antecipada, sem corrida de renovação)
+
+Cada janela é gravada com INSERT multi-linha ... ON DUPLICATE KEY UPDATE e
+registrada em ownCargaJanelas na mesma transação: uma carga interrompida
+recomeça só pelas janelas não concluídas.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from adquirente_own.services import OwnService
+from adquirente_own.services_credenciais import CredenciaisOwnService
+from adquirente_own.cargas_own.models import CredenciaisExtratoContaOwn, OwnCargaJanela
+from adquirente_own.cargas_own.services_carga_extrato_pos import CargaExtratoOwnService
+from adquirente_own.cargas_own.services_carga_liquidacoes import CargaLiquidacoesOwnService
+from wallclub_core.utilitarios.log_control import registrar_log
+
+# doc_parceiro '' = consulta sem filtro de loja
+Janela = namedtuple('Janela', ['cnpj_cliente', 'doc_parceiro', 'inicio', 'fim'])
+
+# Colunas na ordem dos dicionários usados por salvar_transacao/salvar_liquidacao
+COLUNAS_TRANSACAO = tuple(CargaExtratoOwnService.campos_transacao({'data': '2000-01-01T00:00:00'}))
+COLUNAS_PARCELA = tuple(CargaExtratoOwnService.campos_parcela({}))
+COLUNAS_LIQUIDACAO = tuple(CargaLiquidacoesOwnService.campos_liquidacao(
+    {'dataPagamentoPrevista': '01/01/2000', 'dataPagamentoReal': '01/01/2000'}))
+
+
+def _sql_upsert(tabela: str, chave: str, colunas: Sequence[str], linhas: int) -> str:
+    todas = ('created_at', 'updated_at', chave) + tuple(colunas)
+    linha = '(NOW(), NOW(), ' + ', '.join(['%s'] * (len(colunas) + 1)) + ')'
+    atualizacoes = ', '.join(f'{coluna} = VALUES({coluna})' for coluna in colunas)
+    return (
+        f"INSERT INTO {tabela} ({', '.join(todas)}) VALUES {', '.join([linha] * linhas)} "
+        f"ON DUPLICATE KEY UPDATE updated_at = NOW(), {atualizacoes}"
+    )
+
+
+class CargaJanelasOwnService:
+    """Consulta e grava transações ou liquidações Own por janelas, em paralelo"""
+
+    TIPO_TRANSACOES = 'transacoes'
+    TIPO_LIQUIDACOES = 'liquidacoes'
+
+    # cnpjCliente das consultas de transações (cliente White Label)
+    CNPJ_WALLCLUB = '54430621000134'
+
+    MAX_CONCORRENCIA = getattr(settings, 'OWN_CARGA_CONCORRENCIA', 8)
+    LIMITE_POR_CNPJ = getattr(settings, 'OWN_CARGA_LIMITE_CNPJ', 2)
+    TAMANHO_LOTE = 500
+    TENTATIVAS_RATE_LIMIT = 3
+
+    # Requisições simultâneas à Own no processo (todas as cargas em andamento)
+    _semaforo_global = threading.BoundedSemaphore(MAX_CONCORRENCIA)
+
+    def __init__(self, tipo: str = TIPO_TRANSACOES):
+        if tipo not in (self.TIPO_TRANSACOES, self.TIPO_LIQUIDACOES):
+            raise ValueError(f'Tipo de carga inválido: {tipo}')
+        self.tipo = tipo
+        self.own_service = OwnService(environment=CredenciaisOwnService.obter_environment())
+        self._semaforos_cnpj: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Janelas
+    # ------------------------------------------------------------------
+
+    def montar_janelas(self, data_inicial: datetime, data_final: datetime, cnpjs: Sequence[Optional[str]],
+                       tamanho: timedelta = timedelta(days=1)) -> List[Janela]:
+        """
+        Janelas [início, fim] por CNPJ, intercaladas entre CNPJs (um CNPJ com
+        muitas janelas não ocupa o pool inteiro esperando o próprio limite)
+
+        Transações: cnpjs = docParceiro das lojas (None = todas), cnpjCliente WallClub.
+        Liquidações: cnpjs = cnpjCliente das credenciais; uma janela por dia de pagamento.
+        """
+        if self.tipo == self.TIPO_LIQUIDACOES:
+            data_inicial = data_inicial.replace(hour=0, minute=0, second=0, microsecond=0)
+            tamanho = timedelta(days=1)
+
+        periodos = []
+        inicio = data_inicial
+        while inicio <= data_final:
+            # API trabalha em minutos com limites inclusivos
+            periodos.append((inicio, min(inicio + tamanho - timedelta(minutes=1), data_final)))
+            inicio += tamanho
+
+        janelas = []
+        for inicio, fim in periodos:
+            for cnpj in cnpjs:
+                if self.tipo == self.TIPO_LIQUIDACOES:
+                    janelas.append(Janela(cnpj, '', inicio, fim))
+                else:
+                    janelas.append(Janela(self.CNPJ_WALLCLUB, cnpj or '', inicio, fim))
+        return janelas
+
+    def _janelas_concluidas(self, janelas: List[Janela]) -> set:
+        if not janelas:
+            return set()
+        concluidas = OwnCargaJanela.objects.filter(
+            tipo=self.tipo,
+            status='CONCLUIDA',
+            cnpj_cliente__in={janela.cnpj_cliente for janela in janelas},
+            inicio__gte=min(janela.inicio for janela in janelas),
+            fim__lte=max(janela.fim for janela in janelas),
+        ).values_list('cnpj_cliente', 'doc_parceiro', 'inicio', 'fim')
+        return {Janela(*valores) for valores in concluidas}
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    def executar(self, data_inicial: datetime, data_final: datetime, cnpjs: Sequence[Optional[str]],
+                 tamanho: timedelta = timedelta(days=1), reprocessar: bool = False) -> Dict[str, Any]:
+        """
+        Consulta e grava todas as janelas do período
+
+        Args:
+            data_inicial / data_final: período (limites inclusivos)
+            cnpjs: ver montar_janelas
+            tamanho: duração de cada janela (transações)
+            reprocessar: consulta também janelas já concluídas (double-check de dados recentes)
+
+        Returns:
+            Dict com sucesso, janelas (total/puladas/erro) e registros gravados
+        """
+        janelas = self.montar_janelas(data_inicial, data_final, cnpjs, tamanho)
+        puladas = 0
+        if not reprocessar:
+            concluidas = self._janelas_concluidas(janelas)
+            puladas = sum(1 for janela in janelas if janela in concluidas)
+            janelas = [janela for janela in janelas if janela not in concluidas]
+
+        registrar_log('own.carga_janelas', f'🔄 Carga {self.tipo}: {len(janelas)} janelas pendentes, {puladas} já concluídas ({data_inicial} a {data_final})')
+
+        credenciais = self._credenciais({janela.cnpj_cliente for janela in janelas})
+
+        total_registros = 0
+        janelas_erro = 0
+        with ThreadPoolExecutor(max_workers=max(1, self.MAX_CONCORRENCIA), thread_name_prefix='carga_own') as executor:
+            futuros = [
+                executor.submit(self._processar_janela, janela, credenciais.get(janela.cnpj_cliente))
+                for janela in janelas
+            ]
+            for futuro in as_completed(futuros):
+                gravados = futuro.result()
+                if gravados is None:
+                    janelas_erro += 1
+                else:
+                    total_registros += gravados
+
+        registrar_log('own.carga_janelas', f'✅ Carga {self.tipo} concluída: {total_registros} registros, {janelas_erro} janelas com erro')
+
+        return {
+            'sucesso': janelas_erro == 0,
+            'total_janelas': len(janelas) + puladas,
+            'janelas_puladas': puladas,
+            'janelas_erro': janelas_erro,
+            'total_registros': total_registros
+        }
+
+    def _credenciais(self, cnpjs_cliente: set) -> Dict[str, Dict[str, str]]:
+        """Credenciais OAuth por cnpjCliente (transações: credenciais core do WallClub)"""
+        if self.tipo == self.TIPO_TRANSACOES:
+            core = CredenciaisOwnService().obter_credenciais_core()
+            return {cnpj: core for cnpj in cnpjs_cliente} if core else {}
+
+        return {
+            credencial.cnpj_white_label: {
+                'client_id': credencial.client_id,
+                'client_secret': credencial.client_secret,
+                'scope': credencial.scope,
+            }
+            for credencial in CredenciaisExtratoContaOwn.objects.filter(
+                cnpj_white_label__in=cnpjs_cliente, ativo=True)
+        }
+
+    def _semaforo_cnpj(self, cnpj: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaforo = self._semaforos_cnpj.get(cnpj)
+            if semaforo is None:
+                semaforo = threading.BoundedSemaphore(self.LIMITE_POR_CNPJ)
+                self._semaforos_cnpj[cnpj] = semaforo
+            return semaforo
+
+    def _processar_janela(self, janela: Janela, credenciais: Optional[Dict[str, str]]) -> Optional[int]:
+        """
+        Consulta + gravação de uma janela (executa numa thread do pool)
+
+        Returns:
+            int: registros gravados, None em caso de erro (janela fica pendente)
+        """
+        try:
+            if not credenciais:
+                raise Exception(f'Credenciais OWN não encontradas: {janela.cnpj_cliente}')
+
+            registros = self._consultar(janela, credenciais)
+
+            with transaction.atomic():
+                if self.tipo == self.TIPO_TRANSACOES:
+                    self._gravar_transacoes(registros)
+                else:
+                    self._gravar_liquidacoes(registros)
+                self._registrar_janela(janela, 'CONCLUIDA', total_registros=len(registros))
+
+            return len(registros)
+
+        except Exception as e:
+            registrar_log('own.carga_janelas', f'❌ Janela {janela.doc_parceiro or janela.cnpj_cliente} {janela.inicio} - {janela.fim}: {str(e)}', nivel='ERROR')
+            try:
+                self._registrar_janela(janela, 'ERRO', erro=str(e)[:500])
+            except Exception:
+                pass
+            return None
+        finally:
+            # Conexão do banco é por thread: não deixar aberta com o pool encerrado
+            connection.close()
+
+    def _consultar(self, janela: Janela, credenciais: Dict[str, str]) -> List[Dict[str, Any]]:
+        if self.tipo == self.TIPO_TRANSACOES:
+            requisicao = {
+                'method': 'POST',
+                'endpoint': '/transacoes/v2/buscaTransacoesGerais',
+                'data': {
+                    'cnpjCliente': janela.cnpj_cliente,
+                    'dataInicial': janela.inicio.strftime('%Y-%m-%d %H:%M'),
+                    'dataFinal': janela.fim.strftime('%Y-%m-%d %H:%M'),
+                }
+            }
+            if janela.doc_parceiro:
+                requisicao['data']['docParceiro'] = janela.doc_parceiro
+        else:
+            requisicao = {
+                'method': 'GET',
+                'endpoint': '/parceiro/v2/consultaLiquidacoes',
+                'params': {
+                    'dataPagamentoReal': janela.inicio.strftime('%Y-%m-%d'),
+                    'cnpjCliente': janela.cnpj_cliente,
+                }
+            }
+
+        for tentativa in range(1, self.TENTATIVAS_RATE_LIMIT + 1):
+            with self._semaforo_cnpj(janela.doc_parceiro or janela.cnpj_cliente), self._semaforo_global:
+                response = self.own_service.fazer_requisicao_autenticada(
+                    client_id=credenciais['client_id'],
+                    client_secret=credenciais['client_secret'],
+                    scope=credenciais['scope'],
+                    **requisicao
+                )
+            if response.get('codigo_erro') != 'RATE_LIMIT' or tentativa == self.TENTATIVAS_RATE_LIMIT:
+                break
+            # Espera fora dos semáforos: as demais janelas seguem
+            time.sleep(5 * tentativa)
+
+        if not response.get('sucesso'):
+            raise Exception(response.get('mensagem', 'Erro na consulta Own'))
+        return response.get('dados') or []
+
+    # ------------------------------------------------------------------
+    # Gravação em lote
+    # ------------------------------------------------------------------
+
+    def _executar_lotes(self, tabela: str, chave: str, colunas: Sequence[str], linhas: List[List[Any]]):
+        with connection.cursor() as cursor:
+            for inicio in range(0, len(linhas), self.TAMANHO_LOTE):
+                lote = linhas[inicio:inicio + self.TAMANHO_LOTE]
+                cursor.execute(_sql_upsert(tabela, chave, colunas, len(lote)),
+                               [valor for linha in lote for valor in linha])
+
+    def _gravar_transacoes(self, transacoes: List[Dict[str, Any]]):
+        """
+        Mesmo resultado de CargaExtratoOwnService.salvar_transacao por registro:
+        transações sem parcelas não sobrescrevem os dados de parcela já gravados
+        """
+        com_parcela = []
+        sem_parcela = []
+        for transacao_data in transacoes:
+            campos = CargaExtratoOwnService.campos_transacao(transacao_data)
+            linha = [transacao_data['identificadorTransacao']] + [campos[coluna] for coluna in COLUNAS_TRANSACAO]
+            if transacao_data.get('parcelas'):
+                parcela = CargaExtratoOwnService.campos_parcela(transacao_data['parcelas'][0])
+                com_parcela.append(linha + [parcela[coluna] for coluna in COLUNAS_PARCELA])
+            else:
+                sem_parcela.append(linha)
+
+        self._executar_lotes('ownExtratoTransacoes', 'identificadorTransacao',
+                             COLUNAS_TRANSACAO + COLUNAS_PARCELA, com_parcela)
+        self._executar_lotes('ownExtratoTransacoes', 'identificadorTransacao', COLUNAS_TRANSACAO, sem_parcela)
+
+    def _gravar_liquidacoes(self, liquidacoes: List[Dict[str, Any]]):
+        """
+        Upsert das liquidações + status de pagamento das transações em um UPDATE
+        (mesmo efeito de CargaLiquidacoesOwnService.atualizar_status_transacao por registro)
+        """
+        if not liquidacoes:
+            return
+
+        linhas = []
+        for liquidacao_data in liquidacoes:
+            campos = CargaLiquidacoesOwnService.campos_liquidacao(liquidacao_data)
+            linhas.append([liquidacao_data['lancamentoId']] + [campos[coluna] for coluna in COLUNAS_LIQUIDACAO])
+        self._executar_lotes('ownLiquidacoes', 'lancamentoId', COLUNAS_LIQUIDACAO, linhas)
+
+        lancamentos = [linha[0] for linha in linhas]
+        with connection.cursor() as cursor:
+            for inicio in range(0, len(lancamentos), self.TAMANHO_LOTE):
+                lote = lancamentos[inicio:inicio + self.TAMANHO_LOTE]
+                cursor.execute(f"""
+                    UPDATE ownExtratoTransacoes t
+                      JOIN ownLiquidacoes l ON l.identificadorTransacao = t.identificadorTransacao
+                       SET t.statusPagamento = l.statusPagamento,
+                           t.dataPagamentoReal = l.dataPagamentoReal,
+                           t.antecipado = l.antecipada,
+                           t.numeroTitulo = l.numeroTitulo,
+                           t.updated_at = NOW(),
+                           l.processado = 1
+                     WHERE l.lancamentoId IN ({', '.join(['%s'] * len(lote))})
+                """, lote)
+
+    def _registrar_janela(self, janela: Janela, status: str, total_registros: int = 0, erro: str = None):
+        checkpoint, _ = OwnCargaJanela.objects.get_or_create(
+            tipo=self.tipo,
+            cnpj_cliente=janela.cnpj_cliente,
+            doc_parceiro=janela.doc_parceiro,
+            inicio=janela.inicio,
+            fim=janela.fim,
+            defaults={'status': status}
+        )
+        checkpoint.status = status
+        checkpoint.total_registros = total_registros
+        checkpoint.tentativas += 1
+        checkpoint.erro = erro
+        checkpoint.save()
@@ -99,36 +99,10 @@ class CargaLiquidacoesOwnService:
         """
         lancamento_id = liquidacao_data['lancamentoId']
 
-        # Converter datas (formato DD/MM/YYYY)
-        data_pagamento_prevista = datetime.strptime(
-            liquidacao_data['dataPagamentoPrevista'],
-            '%d/%m/%Y'
-        ).date()
-
-        data_pagamento_real = datetime.strptime(
-            liquidacao_data['dataPagamentoReal'],
-            '%d/%m/%Y'
-        ).date()
-
         # Verificar se já existe
         liquidacao_obj, created = OwnLiquidacoes.objects.update_or_create(
             lancamentoId=lancamento_id,
-            defaults={
-                'statusPagamento': liquidacao_data.get('statusPagamento'),
-                'dataPagamentoPrevista': data_pagamento_prevista,
-                'numeroParcela': liquidacao_data.get('numeroParcela'),
-                'valor': liquidacao_data.get('valor', 0),
-                'dataPagamentoReal': data_pagamento_real,
-                'antecipada': liquidacao_data.get('antecipada', 'N'),
-                'identificadorTransacao': liquidacao_data.get('identificadorTransacao'),
-                'bandeira': liquidacao_data.get('bandeira'),
-                'modalidade': liquidacao_data.get('modalidade'),
-                'codigoCliente': liquidacao_data.get('codigoCliente', ''),
-                'docParceiro': liquidacao_data.get('docParceiro', ''),
-                'nsuTransacao': liquidacao_data.get('nsuTransacao', ''),
-                'numeroTitulo': liquidacao_data.get('numeroTitulo', ''),
-                'processado': False
-            }
+            defaults=self.campos_liquidacao(liquidacao_data)
         )
 
         action = 'criada' if created else 'atualizada'
@@ -136,6 +110,26 @@ class CargaLiquidacoesOwnService:
 
         return liquidacao_obj
 
+    @staticmethod
+    def campos_liquidacao(liquidacao_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Colunas de ownLiquidacoes a partir da liquidação da API (datas em DD/MM/YYYY)"""
+        return {
+            'statusPagamento': liquidacao_data.get('statusPagamento'),
+            'dataPagamentoPrevista': datetime.strptime(liquidacao_data['dataPagamentoPrevista'], '%d/%m/%Y').date(),
+            'numeroParcela': liquidacao_data.get('numeroParcela'),
+            'valor': liquidacao_data.get('valor', 0),
+            'dataPagamentoReal': datetime.strptime(liquidacao_data['dataPagamentoReal'], '%d/%m/%Y').date(),
+            'antecipada': liquidacao_data.get('antecipada', 'N'),
+            'identificadorTransacao': liquidacao_data.get('identificadorTransacao'),
+            'bandeira': liquidacao_data.get('bandeira'),
+            'modalidade': liquidacao_data.get('modalidade'),
+            'codigoCliente': liquidacao_data.get('codigoCliente', ''),
+            'docParceiro': liquidacao_data.get('docParceiro', ''),
+            'nsuTransacao': liquidacao_data.get('nsuTransacao', ''),
+            'numeroTitulo': liquidacao_data.get('numeroTitulo', ''),
+            'processado': False
+        }
+
     def atualizar_status_transacao(self, liquidacao: OwnLiquidacoes) -> bool:
         """
         Atualiza status da transação na BaseTransacoesGestao
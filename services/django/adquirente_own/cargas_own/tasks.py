@@ -99,49 +99,33 @@ def carga_transacoes_own_periodo(cnpj_cliente: str, data_inicial: str, data_fina
     """
     Carga de transações por período específico
 
+    Janelas diárias consultadas em paralelo, com checkpoint por janela
+    (reexecutar a task retoma só as janelas pendentes)
+
     Args:
-        cnpj_cliente: CNPJ do cliente
+        cnpj_cliente: CNPJ da loja (docParceiro)
         data_inicial: Data inicial (formato: YYYY-MM-DD)
         data_final: Data final (formato: YYYY-MM-DD)
     """
-    from adquirente_own.cargas_own.services_carga_extrato_pos import CargaExtratoOwnService
+    from adquirente_own.cargas_own.services_carga_janelas import CargaJanelasOwnService
 
     registrar_log('own.tasks', f'🚀 Carga período: {data_inicial} a {data_final}')
 
     try:
-        service = CargaExtratoOwnService()
+        service = CargaJanelasOwnService(CargaJanelasOwnService.TIPO_TRANSACOES)
 
-        # Converter strings para datetime
+        # Converter strings para datetime (dia final completo)
         dt_inicial = datetime.strptime(data_inicial, '%Y-%m-%d')
-        dt_final = datetime.strptime(data_final, '%Y-%m-%d')
-
-        # Buscar transações
-        result = service.buscar_transacoes_gerais(
-            cnpj_cliente=cnpj_cliente,
-            data_inicial=dt_inicial,
-            data_final=dt_final
-        )
-
-        if not result.get('sucesso'):
-            return {
-                'sucesso': False,
-                'mensagem': result.get('mensagem')
-            }
-
-        # Processar transações
-        total_processadas = 0
-        for transacao_data in result.get('transacoes', []):
-            transacao_obj = service.salvar_transacao(transacao_data)
-            if not transacao_obj.processado:
-                service.processar_para_base_gestao(transacao_obj)
-                total_processadas += 1
-
-        registrar_log('own.tasks', f'✅ Período processado: {total_processadas} transações')
+        dt_final = datetime.strptime(data_final, '%Y-%m-%d').replace(hour=23, minute=59)
+
+        resultado = service.executar(dt_inicial, dt_final, cnpjs=[cnpj_cliente])
+
+        registrar_log('own.tasks', f'✅ Período processado: {resultado["total_registros"]} transações')
 
         return {
-            'sucesso': True,
-            'total_transacoes': result.get('total', 0),
-            'total_processadas': total_processadas
+            'sucesso': resultado['sucesso'],
+            'total_transacoes': resultado['total_registros'],
+            'janelas_erro': resultado['janelas_erro']
         }
 
     except Exception as e:
@@ -159,44 +143,31 @@ def sincronizar_status_pagamentos_own():
     Executa a cada 6 horas
     """
     from adquirente_own.cargas_own.models import OwnExtratoTransacoes
-    from adquirente_own.cargas_own.services_carga_liquidacoes import CargaLiquidacoesOwnService
+    from adquirente_own.cargas_own.services_carga_janelas import CargaJanelasOwnService
 
     registrar_log('own.tasks', '🚀 Sincronizando status de pagamentos')
 
     try:
-        service = CargaLiquidacoesOwnService()
+        service = CargaJanelasOwnService(CargaJanelasOwnService.TIPO_LIQUIDACOES)
 
         # Buscar transações com pagamento pendente (últimos 30 dias)
         data_limite = datetime.now() - timedelta(days=30)
 
-        transacoes_pendentes = OwnExtratoTransacoes.objects.filter(
+        cnpjs = list(OwnExtratoTransacoes.objects.filter(
             data__gte=data_limite,
             statusPagamento__isnull=True
-        ).values_list('cnpjCpfCliente', flat=True).distinct()
-
-        total_sincronizadas = 0
+        ).values_list('cnpjCpfCliente', flat=True).distinct())
 
-        for cnpj in transacoes_pendentes:
-            # Consultar liquidações dos últimos 7 dias
-            for dias_atras in range(7):
-                data_consulta = datetime.now() - timedelta(days=dias_atras)
+        # Liquidações dos últimos 7 dias, todos os CNPJs em paralelo (dias
+        # recentes sempre reconsultados: status muda depois da janela concluída)
+        agora = datetime.now()
+        resultado = service.executar(agora - timedelta(days=6), agora, cnpjs=cnpjs, reprocessar=True)
 
-                result = service.consultar_liquidacoes(
-                    cnpj_cliente=cnpj,
-                    data_pagamento_real=data_consulta
-                )
-
-                if result.get('sucesso'):
-                    for liquidacao_data in result.get('liquidacoes', []):
-                        liquidacao_obj = service.salvar_liquidacao(liquidacao_data)
-                        if service.atualizar_status_transacao(liquidacao_obj):
-                            total_sincronizadas += 1
-
-        registrar_log('own.tasks', f'✅ Sincronização concluída: {total_sincronizadas} atualizações')
+        registrar_log('own.tasks', f'✅ Sincronização concluída: {resultado["total_registros"]} liquidações')
 
         return {
-            'sucesso': True,
-            'total_sincronizadas': total_sincronizadas
+            'sucesso': resultado['sucesso'],
+            'total_sincronizadas': resultado['total_registros']
         }
 
     except Exception as e:
@@ -241,3 +212,16 @@ def carga_base_unificada_checkout_own():
             'erro': str(e),
             'timestamp': datetime.now().isoformat()
         }
+
+
+@shared_task(name='adquirente_own.processar_webhooks', soft_time_limit=240, time_limit=300)
+def processar_webhooks_own():
+    """
+    Aplica os eventos de webhook (transação/liquidação) gravados em ownWebhookEventos
+
+    Execução: agendada pela view ao receber eventos novos (agrupando a rajada)
+    e a cada minuto via Celery Beat (novas tentativas e agendamentos perdidos)
+    """
+    from adquirente_own.services_webhook_fila import FilaWebhookOwnService
+
+    return FilaWebhookOwnService.processar_pendentes()
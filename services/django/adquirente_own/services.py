@@ -5,6 +5,7 @@ Autenticação OAuth 2.0 e utilitários
 
 import requests
 import json
+import time
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from django.conf import settings
@@ -25,6 +26,10 @@ class OwnService:
     ESITEF_URL_TEST = 'https://eu-test.oppwa.com'
     ESITEF_URL_LIVE = 'https://eu-prod.oppwa.com'
 
+    # Token OAuth: segundos antes da expiração em que sai do cache / fração da validade para renovar
+    TOKEN_MARGEM_EXPIRACAO = 30
+    TOKEN_FRACAO_RENOVACAO = 0.8
+
     def __init__(self, environment: str = 'LIVE'):
         """
         Inicializa o serviço Own
@@ -42,7 +47,9 @@ class OwnService:
         """
         Obtém access token via OAuth 2.0
         Token válido por 5 minutos (300s)
-        Cache por 4 minutos (margem de segurança)
+        Cache até TOKEN_MARGEM_EXPIRACAO antes de expirar, com renovação antecipada
+        a partir de TOKEN_FRACAO_RENOVACAO da validade: um único chamador renova
+        (lock no cache) enquanto os demais seguem com o token atual
 
         Args:
             client_id: Client ID da aplicação
@@ -56,8 +63,10 @@ class OwnService:
         token_cached = cache.get(cache_key)
 
         if token_cached:
-            registrar_log('adquirente_own', f'✅ Token OAuth em cache: {client_id[:10]}...')
-            return token_cached
+            if time.time() < token_cached.get('renovar_em', 0) or \
+                    not cache.add(f'{cache_key}:renovando', 1, timeout=10):
+                return token_cached
+            registrar_log('adquirente_own', f'🔄 Renovando token OAuth antecipadamente: {client_id[:10]}...')
 
         try:
             payload = {
@@ -78,8 +87,10 @@ class OwnService:
 
             data = response.json()
 
-            # Cache por 4 minutos (margem de segurança - token válido por 5min)
-            cache.set(cache_key, data, timeout=240)
+            validade = int(data.get('expires_in') or 300)
+            data['renovar_em'] = time.time() + validade * self.TOKEN_FRACAO_RENOVACAO
+            cache.set(cache_key, data, timeout=max(validade - self.TOKEN_MARGEM_EXPIRACAO, 30))
+            cache.delete(f'{cache_key}:renovando')
 
             registrar_log('adquirente_own', f'✅ Token OAuth obtido: expires_in={data.get("expires_in")}s')
 
@@ -87,12 +98,17 @@ class OwnService:
 
         except requests.exceptions.Timeout:
             registrar_log('adquirente_own', f'⏱️ Timeout ao obter token OAuth', nivel='ERROR')
+            if token_cached:
+                return token_cached
             return {
                 'sucesso': False,
                 'mensagem': 'Timeout na autenticação'
             }
         except requests.exceptions.RequestException as e:
             registrar_log('adquirente_own', f'❌ Erro ao obter token OAuth: {str(e)}', nivel='ERROR')
+            if token_cached:
+                # Renovação antecipada falhou: token atual ainda é válido
+                return token_cached
             return {
                 'sucesso': False,
                 'mensagem': f'Erro de autenticação: {str(e)}'
@@ -0,0 +1,377 @@
+"""
+Fila de eventos dos webhooks Own Financial (transação e liquidação)
+
+A view só grava o evento bruto em ownWebhookEventos com INSERT IGNORE
+(evento_id único: reenvio da Own não duplica) e responde 200. A aplicação
+nas tabelas de extrato fica com a task adquirente_own.processar_webhooks:
+- eventos de cada loja (doc_parceiro) aplicados em ordem de chegada, em lote
+  numa transação por loja
+- falha de um evento suspende os seguintes da mesma loja até a próxima
+  tentativa (backoff); as demais lojas seguem
+- após MAX_TENTATIVAS o evento vai para ownWebhookEventosFalhos (dead-letter)
+  e a loja é liberada
+"""
+
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+
+from adquirente_own.cargas_own.models import OwnExtratoTransacoes, OwnLiquidacoes
+from wallclub_core.utilitarios.log_control import registrar_log
+
+
+class FilaWebhookOwnService:
+    """Ingestão e processamento assíncrono dos webhooks de transação/liquidação"""
+
+    TIPO_TRANSACAO = 'transacao'
+    TIPO_LIQUIDACAO = 'liquidacao'
+
+    MAX_TENTATIVAS = getattr(settings, 'OWN_WEBHOOK_MAX_TENTATIVAS', 5)
+    # Atraso da n-ésima nova tentativa: ATRASO_BASE * 4^(n-1) -> 1min, 4min, 16min, 64min
+    ATRASO_BASE = 60
+    TAMANHO_LOTE = 1000
+    # Tempo de uma execução da task (soft_time_limit 240s)
+    TEMPO_MAXIMO = 200
+
+    CHAVE_LOCK = 'own:webhook:processando'
+    # Agrupa os eventos de uma rajada numa única execução da task
+    CHAVE_AGENDAMENTO = 'own:webhook:agendado'
+    INTERVALO_AGENDAMENTO = 2
+
+    # ------------------------------------------------------------------
+    # Ingestão (view)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def evento_id(cls, tipo: str, payload: Dict[str, Any]) -> str:
+        if tipo == cls.TIPO_TRANSACAO:
+            return f"{tipo}:{payload.get('identificadorTransacao')}"
+        return f"{tipo}:{payload.get('lancamentoId')}"
+
+    @classmethod
+    def registrar_eventos(cls, tipo: str, payloads: List[Dict[str, Any]]) -> int:
+        """
+        Grava os eventos brutos (INSERT IGNORE multi-linha)
+
+        Returns:
+            int: eventos novos (os demais já tinham sido recebidos)
+        """
+        if not payloads:
+            return 0
+
+        linhas = []
+        for payload in payloads:
+            linhas.extend([
+                cls.evento_id(tipo, payload),
+                tipo,
+                str(payload.get('docParceiro') or '')[:20],
+                json.dumps(payload, ensure_ascii=False, default=str),
+            ])
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT IGNORE INTO ownWebhookEventos "
+                "(evento_id, tipo, doc_parceiro, payload, status, tentativas, recebido_em) VALUES "
+                + ', '.join(["(%s, %s, %s, %s, 'PENDENTE', 0, NOW(6))"] * len(payloads)),
+                linhas
+            )
+            novos = cursor.rowcount
+
+        if novos:
+            transaction.on_commit(cls._agendar_processamento)
+        return novos
+
+    @classmethod
+    def _agendar_processamento(cls):
+        if not cache.add(cls.CHAVE_AGENDAMENTO, 1, timeout=cls.INTERVALO_AGENDAMENTO):
+            return
+        try:
+            from adquirente_own.cargas_own.tasks import processar_webhooks_own
+            processar_webhooks_own.apply_async(countdown=cls.INTERVALO_AGENDAMENTO)
+        except Exception as e:
+            # Evento já gravado: o Celery Beat processa na próxima execução
+            registrar_log('adquirente_own', f'⚠️ Falha ao agendar processamento de webhooks: {str(e)}', nivel='WARNING')
+
+    # ------------------------------------------------------------------
+    # Processamento (task)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def processar_pendentes(cls, tempo_maximo: Optional[float] = None) -> Dict[str, int]:
+        """
+        Aplica os eventos pendentes, lote a lote, até esvaziar a fila ou
+        esgotar tempo_maximo (padrão: TEMPO_MAXIMO)
+
+        Returns:
+            dict: processados, reagendados, falhas (enviados ao dead-letter)
+        """
+        resumo = {'processados': 0, 'reagendados': 0, 'falhas': 0}
+
+        # Um consumidor por vez garante a ordem por loja
+        if not cache.add(cls.CHAVE_LOCK, 1, timeout=cls.TEMPO_MAXIMO + 100):
+            return resumo
+
+        limite = time.monotonic() + (tempo_maximo or cls.TEMPO_MAXIMO)
+        try:
+            while time.monotonic() < limite:
+                eventos = cls._pendentes()
+                if not eventos:
+                    break
+
+                por_loja = OrderedDict()
+                for evento in eventos:
+                    por_loja.setdefault(evento['doc_parceiro'], []).append(evento)
+
+                antes = dict(resumo)
+                for doc_parceiro, eventos_loja in por_loja.items():
+                    try:
+                        resultado = cls._processar_loja(eventos_loja)
+                    except Exception as e:
+                        # Erro de banco fora dos eventos: lote inteiro volta na próxima execução
+                        registrar_log('adquirente_own', f'❌ Erro ao processar webhooks da loja {doc_parceiro}: {str(e)}', nivel='ERROR')
+                        continue
+                    for chave, valor in resultado.items():
+                        resumo[chave] += valor
+
+                if resumo == antes:
+                    break
+        finally:
+            cache.delete(cls.CHAVE_LOCK)
+
+        if any(resumo.values()):
+            registrar_log(
+                'adquirente_own',
+                f"✅ Webhooks processados: {resumo['processados']}, reagendados: {resumo['reagendados']}, "
+                f"dead-letter: {resumo['falhas']}"
+            )
+        return resumo
+
+    @classmethod
+    def _pendentes(cls) -> List[Dict[str, Any]]:
+        """
+        Eventos pendentes liberados, em ordem de chegada. Eventos de uma loja
+        que tem evento anterior aguardando nova tentativa ficam de fora.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT e.id, e.evento_id, e.tipo, e.doc_parceiro, e.payload, e.tentativas
+                FROM ownWebhookEventos e
+                WHERE e.status = 'PENDENTE'
+                  AND (e.proxima_tentativa IS NULL OR e.proxima_tentativa <= NOW(6))
+                  AND NOT EXISTS (
+                      SELECT 1 FROM ownWebhookEventos b
+                      WHERE b.status = 'PENDENTE'
+                        AND b.doc_parceiro = e.doc_parceiro
+                        AND b.id < e.id
+                        AND b.proxima_tentativa > NOW(6)
+                  )
+                ORDER BY e.id
+                LIMIT %s
+            """, [cls.TAMANHO_LOTE])
+            colunas = [coluna[0] for coluna in cursor.description]
+            return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+    @classmethod
+    def _processar_loja(cls, eventos: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Aplica os eventos de uma loja em ordem, numa transação"""
+        resumo = {'processados': 0, 'reagendados': 0, 'falhas': 0}
+        processados = []
+
+        with transaction.atomic():
+            existentes = cls._existentes(eventos)
+
+            # Conversão: o primeiro evento inválido que ainda tem tentativas interrompe a loja
+            aplicaveis = []
+            for evento in eventos:
+                try:
+                    aplicaveis.append((evento, cls._converter(evento, existentes)))
+                except Exception as e:
+                    if cls._registrar_falha(evento, e):
+                        resumo['falhas'] += 1
+                        continue
+                    resumo['reagendados'] += 1
+                    break
+
+            try:
+                with transaction.atomic():
+                    for modelo in (OwnExtratoTransacoes, OwnLiquidacoes):
+                        registros = [registro for _, registro in aplicaveis if isinstance(registro, modelo)]
+                        if registros:
+                            modelo.objects.bulk_create(registros, batch_size=500)
+                processados = [evento['id'] for evento, _ in aplicaveis]
+            except Exception:
+                # Isola o evento com problema
+                for evento, registro in aplicaveis:
+                    try:
+                        if registro is not None:
+                            with transaction.atomic():
+                                registro.save(force_insert=True)
+                    except IntegrityError:
+                        # Gravado pela carga Own entre a verificação e o INSERT
+                        pass
+                    except Exception as e:
+                        if cls._registrar_falha(evento, e):
+                            resumo['falhas'] += 1
+                            continue
+                        resumo['reagendados'] += 1
+                        break
+                    processados.append(evento['id'])
+
+            if processados:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "UPDATE ownWebhookEventos SET status = 'PROCESSADO', processado_em = NOW(6), erro = NULL "
+                        f"WHERE id IN ({', '.join(['%s'] * len(processados))})",
+                        processados
+                    )
+
+        resumo['processados'] = len(processados)
+        return resumo
+
+    @classmethod
+    def _existentes(cls, eventos: List[Dict[str, Any]]) -> set:
+        """evento_id dos eventos cujo registro já existe (webhook anterior ou carga Own)"""
+        identificadores = {}
+        lancamentos = {}
+        for evento in eventos:
+            chave = evento['evento_id'].split(':', 1)[1]
+            if evento['tipo'] == cls.TIPO_TRANSACAO:
+                identificadores[chave] = evento['evento_id']
+            elif chave.isdigit():
+                lancamentos[int(chave)] = evento['evento_id']
+
+        existentes = set()
+        if identificadores:
+            existentes.update(
+                identificadores[identificador] for identificador in OwnExtratoTransacoes.objects.filter(
+                    identificadorTransacao__in=list(identificadores)
+                ).values_list('identificadorTransacao', flat=True)
+            )
+        if lancamentos:
+            existentes.update(
+                lancamentos[lancamento_id] for lancamento_id in OwnLiquidacoes.objects.filter(
+                    lancamentoId__in=list(lancamentos)
+                ).values_list('lancamentoId', flat=True)
+            )
+        return existentes
+
+    @classmethod
+    def _converter(cls, evento: Dict[str, Any], existentes: set):
+        """Registro a gravar (None = já existe)"""
+        if evento['evento_id'] in existentes:
+            return None
+        payload = json.loads(evento['payload'])
+        if evento['tipo'] == cls.TIPO_TRANSACAO:
+            return OwnExtratoTransacoes(
+                identificadorTransacao=payload.get('identificadorTransacao'),
+                cnpjCpfCliente=payload.get('cnpjCliente'),
+                cnpjCpfParceiro=payload.get('docParceiro'),
+                data=_parse_data_own(payload.get('data')),
+                valor=Decimal(str(payload.get('valor'))),
+                quantidadeParcelas=int(payload.get('quantidadeParcela', 1)),
+                mdr=Decimal(str(payload.get('mdr', 0))),
+                statusTransacao=payload.get('tipoTransacao'),
+                bandeira=payload.get('bandeira'),
+                modalidade=payload.get('modalide', ''),
+                numeroCartao=payload.get('cartao'),
+                numeroSerieEquipamento=payload.get('numeroSerie'),
+                codigoAutorizacao=payload.get('contrato'),
+                lido=False,
+                processado=False
+            )
+        return OwnLiquidacoes(
+            lancamentoId=int(payload.get('lancamentoId')),
+            statusPagamento=payload.get('statusPagamento'),
+            dataPagamentoPrevista=_parse_data_br(payload.get('dataPagamentoPrevista')),
+            dataPagamentoReal=_parse_data_br(payload.get('dataPagamentoReal')),
+            numeroParcela=int(payload.get('numeroParcela')),
+            valor=Decimal(str(payload.get('valor'))),
+            antecipada=payload.get('antecipada', 'N'),
+            identificadorTransacao=payload.get('identificadorTransacao'),
+            bandeira=payload.get('bandeira'),
+            modalidade=payload.get('modalidade'),
+            codigoCliente=payload.get('codigoCliente'),
+            docParceiro=payload.get('docParceiro'),
+            nsuTransacao=payload.get('nsuTransacao'),
+            numeroTitulo=payload.get('numeroTitulo'),
+            processado=False
+        )
+
+    @classmethod
+    def _registrar_falha(cls, evento: Dict[str, Any], erro: Exception) -> bool:
+        """
+        Agenda nova tentativa ou move o evento para o dead-letter
+
+        Returns:
+            bool: True se o evento foi para ownWebhookEventosFalhos
+        """
+        tentativas = evento['tentativas'] + 1
+        mensagem = str(erro)[:500]
+
+        with connection.cursor() as cursor:
+            if tentativas >= cls.MAX_TENTATIVAS:
+                cursor.execute("""
+                    INSERT IGNORE INTO ownWebhookEventosFalhos
+                        (evento_id, tipo, doc_parceiro, payload, tentativas, erro, recebido_em, falhou_em)
+                    SELECT evento_id, tipo, doc_parceiro, payload, %s, %s, recebido_em, NOW(6)
+                    FROM ownWebhookEventos WHERE id = %s
+                """, [tentativas, mensagem, evento['id']])
+                cursor.execute(
+                    "UPDATE ownWebhookEventos SET status = 'FALHA', tentativas = %s, erro = %s WHERE id = %s",
+                    [tentativas, mensagem, evento['id']]
+                )
+                registrar_log('adquirente_own', f"❌ Webhook {evento['evento_id']} enviado ao dead-letter após {tentativas} tentativas: {mensagem}", nivel='ERROR')
+                return True
+
+            atraso = cls.ATRASO_BASE * 4 ** (tentativas - 1)
+            cursor.execute(
+                "UPDATE ownWebhookEventos SET tentativas = %s, erro = %s, "
+                "proxima_tentativa = NOW(6) + INTERVAL %s SECOND WHERE id = %s",
+                [tentativas, mensagem, atraso, evento['id']]
+            )
+        registrar_log('adquirente_own', f"⚠️ Webhook {evento['evento_id']} falhou (tentativa {tentativas}), nova tentativa em {atraso}s: {mensagem}", nivel='WARNING')
+        return False
+
+
+# =====================================================
+# Funções auxiliares
+# =====================================================
+
+def _parse_data_own(data_str):
+    """
+    Converte data do formato Own para datetime
+    Formato: "06/01/2025 20:57:25"
+    """
+    try:
+        return datetime.strptime(data_str, '%d/%m/%Y %H:%M:%S')
+    except ValueError:
+        # Tentar formato alternativo
+        try:
+            return datetime.strptime(data_str, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            registrar_log('adquirente_own', f'⚠️ Formato de data inválido: {data_str}', nivel='WARNING')
+            return datetime.now()
+
+
+def _parse_data_br(data_str):
+    """
+    Converte data do formato brasileiro para date
+    Formato: "10/04/25" ou "10/04/2025"
+    """
+    try:
+        # Tentar formato com ano de 2 dígitos
+        return datetime.strptime(data_str, '%d/%m/%y').date()
+    except ValueError:
+        try:
+            # Tentar formato com ano de 4 dígitos
+            return datetime.strptime(data_str, '%d/%m/%Y').date()
+        except ValueError:
+            registrar_log('adquirente_own', f'⚠️ Formato de data inválido: {data_str}', nivel='WARNING')
+            return datetime.now().date()
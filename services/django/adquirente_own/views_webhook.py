@@ -5,20 +5,20 @@ Webhooks disponíveis:
 1. Transações (vendas confirmadas/estornadas)
 2. Liquidações (pagamentos realizados)
 3. Cadastro de estabelecimentos (deferimento/indeferimento)
+
+Transações e liquidações: o evento é gravado em ownWebhookEventos e a resposta
+sai em seguida; o processamento é assíncrono (FilaWebhookOwnService).
 """
 
 import json
 import logging
-from datetime import datetime
-from decimal import Decimal
 
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.db import transaction
 
 from wallclub_core.utilitarios.log_control import registrar_log
-from adquirente_own.cargas_own.models import OwnExtratoTransacoes, OwnLiquidacoes
+from adquirente_own.services_webhook_fila import FilaWebhookOwnService
 
 logger = logging.getLogger('own.webhook')
 
@@ -71,32 +71,12 @@ def webhook_transacao(request):
                     'mensagem': f'Campo obrigatório ausente: {campo}'
                 }, status=400)
 
-        # Verificar se já existe
-        if OwnExtratoTransacoes.objects.filter(identificadorTransacao=identificador).exists():
-            registrar_log('adquirente_own', f'⚠️ Transação já existe: {identificador}', nivel='WARNING')
+        # Grava o evento bruto; aplicação no extrato fica com a task adquirente_own.processar_webhooks
+        if not FilaWebhookOwnService.registrar_eventos(FilaWebhookOwnService.TIPO_TRANSACAO, [payload]):
+            registrar_log('adquirente_own', f'⚠️ Transação já recebida: {identificador}', nivel='WARNING')
             return JsonResponse({'sucesso': True, 'mensagem': 'Transação já processada'}, status=200)
 
-        # Salvar transação
-        with transaction.atomic():
-            transacao = OwnExtratoTransacoes.objects.create(
-                identificadorTransacao=identificador,
-                cnpjCpfCliente=payload.get('cnpjCliente'),
-                cnpjCpfParceiro=payload.get('docParceiro'),
-                data=_parse_data_own(payload.get('data')),
-                valor=Decimal(str(payload.get('valor'))),
-                quantidadeParcelas=int(payload.get('quantidadeParcela', 1)),
-                mdr=Decimal(str(payload.get('mdr', 0))),
-                statusTransacao=payload.get('tipoTransacao'),
-                bandeira=payload.get('bandeira'),
-                modalidade=payload.get('modalide', ''),
-                numeroCartao=payload.get('cartao'),
-                numeroSerieEquipamento=payload.get('numeroSerie'),
-                codigoAutorizacao=payload.get('contrato'),
-                lido=False,
-                processado=False
-            )
-
-            registrar_log('adquirente_own', f'✅ Transação salva: {identificador} - R$ {payload.get("valor")}')
+        registrar_log('adquirente_own', f'✅ Transação enfileirada: {identificador} - R$ {payload.get("valor")}')
 
         return JsonResponse({
             'sucesso': True,
@@ -154,44 +134,18 @@ def webhook_liquidacao(request):
 
         registrar_log('adquirente_own', f'📥 Webhook liquidação recebido: {len(payload)} registros')
 
-        salvos = 0
-        duplicados = 0
-
+        validas = []
         for liquidacao_data in payload:
-            lancamento_id = liquidacao_data.get('lancamentoId')
-
-            # Verificar se já existe
-            if OwnLiquidacoes.objects.filter(lancamentoId=lancamento_id).exists():
-                duplicados += 1
+            if not isinstance(liquidacao_data, dict) or not liquidacao_data.get('lancamentoId'):
+                registrar_log('adquirente_own', f'❌ Liquidação sem lancamentoId ignorada: {liquidacao_data}', nivel='ERROR')
                 continue
+            validas.append(liquidacao_data)
 
-            # Salvar liquidação
-            try:
-                with transaction.atomic():
-                    OwnLiquidacoes.objects.create(
-                        lancamentoId=int(lancamento_id),
-                        statusPagamento=liquidacao_data.get('statusPagamento'),
-                        dataPagamentoPrevista=_parse_data_br(liquidacao_data.get('dataPagamentoPrevista')),
-                        dataPagamentoReal=_parse_data_br(liquidacao_data.get('dataPagamentoReal')),
-                        numeroParcela=int(liquidacao_data.get('numeroParcela')),
-                        valor=Decimal(str(liquidacao_data.get('valor'))),
-                        antecipada=liquidacao_data.get('antecipada', 'N'),
-                        identificadorTransacao=liquidacao_data.get('identificadorTransacao'),
-                        bandeira=liquidacao_data.get('bandeira'),
-                        modalidade=liquidacao_data.get('modalidade'),
-                        codigoCliente=liquidacao_data.get('codigoCliente'),
-                        docParceiro=liquidacao_data.get('docParceiro'),
-                        nsuTransacao=liquidacao_data.get('nsuTransacao'),
-                        numeroTitulo=liquidacao_data.get('numeroTitulo'),
-                        processado=False
-                    )
-                    salvos += 1
-
-            except Exception as e:
-                registrar_log('adquirente_own', f'❌ Erro ao salvar liquidação {lancamento_id}: {str(e)}', nivel='ERROR')
-                continue
+        # Grava os eventos brutos; aplicação fica com a task adquirente_own.processar_webhooks
+        salvos = FilaWebhookOwnService.registrar_eventos(FilaWebhookOwnService.TIPO_LIQUIDACAO, validas)
+        duplicados = len(validas) - salvos
 
-        registrar_log('adquirente_own', f'✅ Liquidações processadas: {salvos} salvos, {duplicados} duplicados')
+        registrar_log('adquirente_own', f'✅ Liquidações enfileiradas: {salvos} salvos, {duplicados} duplicados')
 
         return JsonResponse({
             'sucesso': True,
@@ -212,43 +166,6 @@ def webhook_liquidacao(request):
         }, status=500)
 
 
-# =====================================================
-# Funções auxiliares
-# =====================================================
-
-def _parse_data_own(data_str):
-    """
-    Converte data do formato Own para datetime
-    Formato: "06/01/2025 20:57:25"
-    """
-    try:
-        return datetime.strptime(data_str, '%d/%m/%Y %H:%M:%S')
-    except ValueError:
-        # Tentar formato alternativo
-        try:
-            return datetime.strptime(data_str, '%Y-%m-%d %H:%M:%S')
-        except ValueError:
-            registrar_log('adquirente_own', f'⚠️ Formato de data inválido: {data_str}', nivel='WARNING')
-            return datetime.now()
-
-
-def _parse_data_br(data_str):
-    """
-    Converte data do formato brasileiro para date
-    Formato: "10/04/25" ou "10/04/2025"
-    """
-    try:
-        # Tentar formato com ano de 2 dígitos
-        return datetime.strptime(data_str, '%d/%m/%y').date()
-    except ValueError:
-        try:
-            # Tentar formato com ano de 4 dígitos
-            return datetime.strptime(data_str, '%d/%m/%Y').date()
-        except ValueError:
-            registrar_log('adquirente_own', f'⚠️ Formato de data inválido: {data_str}', nivel='WARNING')
-            return datetime.now().date()
-
-
 @csrf_exempt
 @require_http_methods(["POST"])
 def webhook_credenciamento(request):
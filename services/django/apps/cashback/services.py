@@ -4,6 +4,7 @@ from django.db import transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from wallclub_core.utilitarios.log_control import registrar_log
+from apps.conta_digital.services_extrato import ExtratoService
 
 
 class CashbackService:
@@ -91,6 +92,7 @@ class CashbackService:
                 expira_em=data_expiracao,
                 movimentacao_id=movimentacao.id
             )
+            ExtratoService.registrar_cashback(cashback_uso)
             
             registrar_log(
                 'apps.cashback',
@@ -248,6 +250,7 @@ class CashbackService:
                 expira_em=data_expiracao,
                 movimentacao_id=movimentacao.id
             )
+            ExtratoService.registrar_cashback(cashback_uso)
             
             # Atualizar gasto mensal da regra
             regra.gasto_mes_atual += valor_cashback
@@ -375,6 +378,7 @@ class CashbackService:
             cashback.liberado_em = agora
             cashback.expira_em = agora + timedelta(days=periodo_expiracao) if periodo_expiracao > 0 else None
             cashback.save()
+            ExtratoService.registrar_cashback(cashback)
             
             registrar_log(
                 'apps.cashback',
@@ -417,6 +421,7 @@ class CashbackService:
             # Atualizar status
             cashback.status = 'EXPIRADO'
             cashback.save()
+            ExtratoService.registrar_cashback(cashback)
             
             registrar_log(
                 'apps.cashback',
@@ -425,13 +430,16 @@ class CashbackService:
             )
     
     @staticmethod
-    def estornar_cashback(transacao_tipo, transacao_id):
+    def estornar_cashback(transacao_tipo, transacao_id, cashback_ids=None):
         """
         Estorna cashback de uma transação estornada.
         
         Args:
             transacao_tipo: 'POS' ou 'CHECKOUT'
             transacao_id: ID da transação
+            cashback_ids: Restringe o estorno a estes CashbackUso (a mesma
+                          transacao_id pode vir de chaves diferentes: id de
+                          transactiondata_pos ou NSU no fluxo legado)
         """
         from apps.cashback.models import CashbackUso
         from apps.conta_digital.models import ContaDigital
@@ -443,6 +451,8 @@ class CashbackService:
                 transacao_id=transacao_id,
                 status__in=['RETIDO', 'LIBERADO']
             )
+            if cashback_ids is not None:
+                cashbacks = cashbacks.filter(id__in=cashback_ids)
             
             for cashback in cashbacks:
                 if cashback.status == 'RETIDO':
@@ -467,6 +477,7 @@ class CashbackService:
                 
                 cashback.status = 'ESTORNADO'
                 cashback.save()
+                ExtratoService.registrar_cashback(cashback)
                 
                 registrar_log(
                     'apps.cashback',
@@ -600,6 +611,7 @@ class CashbackService:
                 expira_em=data_expiracao,
                 movimentacao_id=movimentacao.id
             )
+            ExtratoService.registrar_cashback(cashback_uso)
             
             # Atualizar gasto mensal da regra
             regra.gasto_mes_atual += valor_cashback
@@ -0,0 +1,132 @@
+"""
+Benchmark de vazão do controle de tentativas de login (logins/s).
+
+Cada login do benchmark é: verificar_bloqueio + 1 tentativa falha +
+1 tentativa com sucesso, para clientes distintos. Roda contra o banco e o
+cache configurados, dentro de uma transação desfeita ao final (clientes
+de teste, histórico e contadores não persistem). Compara:
+
+- sincrono: cliente recarregado em cada etapa e histórico gravado a cada
+  tentativa (round-trips equivalentes ao fluxo anterior)
+- pipeline: contexto em uma query, contadores no hash Redis e histórico
+  enfileirado + gravado em lote (tempo do lote reportado à parte)
+
+Hash de senha (check_password) fica de fora: custo de CPU igual nos dois cenários.
+
+Uso:
+    python manage.py benchmark_login
+    python manage.py benchmark_login --logins 2000 --latencia-db-ms 1
+"""
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.cliente.models import Cliente
+from apps.cliente.services_login_persistent import LoginPersistentService
+
+CANAL_ID = 1
+PREFIXO_CPF = '999'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de logins/s: histórico síncrono vs pipeline com Redis e gravação em lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=500,
+                            help='Logins por cenário (padrão: 500)')
+        parser.add_argument('--latencia-db-ms', type=float, default=0.0,
+                            help='Latência extra simulada por query (padrão: 0)')
+
+    def handle(self, *args, **options):
+        total = options['logins']
+        self.latencia = options['latencia_db_ms'] / 1000
+        self.queries = 0
+
+        if LoginPersistentService._cliente_redis() is None:
+            self.stdout.write(self.style.WARNING(
+                'Cache sem Redis: pipeline grava o histórico de forma síncrona'))
+
+        cpfs = [f'{PREFIXO_CPF}{i:08d}' for i in range(total)]
+        resultados = {}
+        try:
+            with connection.execute_wrapper(self._round_trip), transaction.atomic():
+                clientes = self._criar_clientes(cpfs)
+                for cenario in ('sincrono', 'pipeline'):
+                    resultados[cenario] = self._executar(cenario, clientes)
+                transaction.set_rollback(True)
+        finally:
+            cache.delete_many([LoginPersistentService._chave_hash(cpf) for cpf in cpfs])
+
+        base = resultados['sincrono'][0]
+        for cenario, (logins_s, queries, lote_ms) in resultados.items():
+            self.stdout.write(
+                f'{cenario:<9} {logins_s:9.1f} logins/s  queries/login={queries:5.1f}  '
+                f'gravação em lote={lote_ms:8.1f} ms  ({logins_s / base:.1f}x)'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    def _round_trip(self, execute, sql, params, many, context):
+        self.queries += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        return execute(sql, params, many, context)
+
+    @staticmethod
+    def _criar_clientes(cpfs):
+        Cliente.objects.bulk_create([
+            Cliente(cpf=cpf, canal_id=CANAL_ID, hash_senha='benchmark', nome='Cliente Benchmark',
+                    celular='11999999999', cadastro_completo=True)
+            for cpf in cpfs
+        ])
+        return list(Cliente.objects.filter(cpf__in=cpfs, canal_id=CANAL_ID))
+
+    @contextmanager
+    def _modo_sincrono(self):
+        gravar = LoginPersistentService._gravar_tentativas
+
+        def enfileirar(tentativa):
+            tentativa['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            gravar([tentativa])
+
+        with mock.patch.object(LoginPersistentService, '_enfileirar_tentativa', side_effect=enfileirar):
+            yield
+
+    def _executar(self, cenario, clientes):
+        sincrono = cenario == 'sincrono'
+        cache.delete_many([LoginPersistentService._chave_hash(c.cpf) for c in clientes])
+
+        with self._modo_sincrono() if sincrono else mock.patch.object(
+                LoginPersistentService, 'TAMANHO_LOTE', len(clientes) * 3):
+            queries = self.queries
+            inicio = time.perf_counter()
+            for cliente in clientes:
+                if sincrono:
+                    # Cliente buscado novamente em cada etapa, como no fluxo anterior
+                    LoginPersistentService.verificar_bloqueio(cliente.cpf)
+                    LoginPersistentService.registrar_tentativa_falha(
+                        cliente.cpf, CANAL_ID, 'senha_incorreta', ip_address='10.0.0.1')
+                    LoginPersistentService.registrar_tentativa_sucesso(
+                        cliente.cpf, CANAL_ID, ip_address='10.0.0.1')
+                else:
+                    contexto = LoginPersistentService.carregar_cliente(cliente.cpf, CANAL_ID)
+                    LoginPersistentService.verificar_bloqueio(cliente.cpf, cliente=contexto)
+                    LoginPersistentService.registrar_tentativa_falha(
+                        cliente.cpf, CANAL_ID, 'senha_incorreta', ip_address='10.0.0.1', cliente=contexto)
+                    LoginPersistentService.registrar_tentativa_sucesso(
+                        cliente.cpf, CANAL_ID, ip_address='10.0.0.1', cliente=contexto)
+            duracao = time.perf_counter() - inicio
+            queries = self.queries - queries
+
+            inicio_lote = time.perf_counter()
+            gravadas = 0 if sincrono else LoginPersistentService.gravar_tentativas_pendentes()
+            lote_ms = (time.perf_counter() - inicio_lote) * 1000
+
+        if not sincrono and gravadas:
+            self.stdout.write(f'pipeline: {gravadas} tentativas gravadas em lote')
+        return len(clientes) / duracao, queries / len(clientes), lote_ms
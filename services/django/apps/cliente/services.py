@@ -328,7 +328,10 @@ class ClienteAuthService:
             # Verificar bloqueio por excesso de tentativas
             from apps.cliente.services_login_persistent import LoginPersistentService
             
-            bloqueio = LoginPersistentService.verificar_bloqueio(cpf_limpo)
+            # Cliente + estado de autenticação em uma query (reaproveitados no resto do fluxo)
+            cliente = LoginPersistentService.carregar_cliente(cpf_limpo, canal_id)
+            
+            bloqueio = LoginPersistentService.verificar_bloqueio(cpf_limpo, cliente=cliente)
             
             if bloqueio['bloqueado']:
                 tempo_minutos = bloqueio['tempo_restante_segundos'] // 60
@@ -365,24 +368,19 @@ class ClienteAuthService:
                     canal_id=canal_id,
                     motivo_falha='rate_limit_cpf',
                     ip_address=ip_address,
-                    user_agent=user_agent
+                    user_agent=user_agent,
+                    cliente=cliente
                 )
                 
                 # Notificar bloqueio de conta (se cliente existe)
                 try:
-                    cliente_bloqueado = Cliente.objects.filter(
-                        cpf=cpf_limpo,
-                        canal_id=canal_id,
-                        is_active=True
-                    ).first()
-                    
-                    if cliente_bloqueado:
+                    if cliente:
                         from wallclub_core.integracoes.notificacao_seguranca_service import NotificacaoSegurancaService
                         NotificacaoSegurancaService.notificar_bloqueio_conta(
-                            cliente_id=cliente_bloqueado.id,
-                            canal_id=cliente_bloqueado.canal_id,
-                            celular=cliente_bloqueado.celular,
-                            nome=cliente_bloqueado.nome
+                            cliente_id=cliente.id,
+                            canal_id=cliente.canal_id,
+                            celular=cliente.celular,
+                            nome=cliente.nome
                         )
                 except Exception as e:
                     registrar_log('apps.cliente',
@@ -420,16 +418,11 @@ class ClienteAuthService:
                 f"🔍 INICIANDO VALIDAÇÃO LOGIN: CPF={cpf_limpo[:3]}***, Canal={canal_id}, IP={ip_address or 'N/A'}",
                 nivel='INFO')
             
-            # Buscar cliente por CPF + canal_id
-            try:
-                cliente = Cliente.objects.get(
-                    cpf=cpf_limpo, 
-                    canal_id=canal_id, 
-                    is_active=True
-                )
+            # Cliente por CPF + canal_id (carregado no início do fluxo)
+            if cliente:
                 registrar_log('apps.cliente',
                     f"  ✓ Cliente encontrado: ID={cliente.id}", nivel='DEBUG')
-            except Cliente.DoesNotExist:
+            else:
                 registrar_log('apps.cliente',
                     f"  ✗ CPF não encontrado - REGISTRANDO TENTATIVA FALHA", nivel='WARNING')
                 # Registrar tentativa falha (CPF não existe)
@@ -437,7 +430,8 @@ class ClienteAuthService:
                     cpf=cpf_limpo,
                     canal_id=canal_id,
                     motivo_falha='cpf_invalido',
-                    ip_address=ip_address
+                    ip_address=ip_address,
+                    cliente=None
                 )
                 
                 registrar_log('apps.cliente', f"CPF não encontrado: {cpf_limpo[:3]}***")
@@ -470,7 +464,8 @@ class ClienteAuthService:
                     canal_id=canal_id,
                     motivo_falha='senha_incorreta',
                     ip_address=ip_address,
-                    user_agent=request.META.get('HTTP_USER_AGENT') if request else None
+                    user_agent=request.META.get('HTTP_USER_AGENT') if request else None,
+                    cliente=cliente
                 )
                 
                 registrar_log('apps.cliente', 
@@ -544,7 +539,8 @@ class ClienteAuthService:
                 cpf=cpf_limpo,
                 canal_id=canal_id,
                 ip_address=ip_address,
-                user_agent=request.META.get('HTTP_USER_AGENT') if request else None
+                user_agent=request.META.get('HTTP_USER_AGENT') if request else None,
+                cliente=cliente
             )
             
             # CRÍTICO: Resetar também o rate limiter do Redis
@@ -72,15 +72,15 @@ class ClienteAuth2FAService:
                 f"Verificando 2FA: cliente={cliente_id}, contexto={contexto}")
 
             # 0. Verificar BYPASS 2FA (clientes de teste Apple/Google)
+            # Cliente carregado uma vez e reaproveitado na geração do JWT
             from apps.cliente.models import Cliente
+            cliente_login = None
             try:
-                cliente_bypass = Cliente.objects.only('bypass_2fa', 'nome').get(id=cliente_id)
-                if getattr(cliente_bypass, 'bypass_2fa', False):
+                cliente_login = Cliente.objects.get(id=cliente_id)
+                if getattr(cliente_login, 'bypass_2fa', False):
                     # Cliente com bypass: gerar JWT diretamente
                     from apps.cliente.jwt_cliente import generate_cliente_jwt_token
                     
-                    cliente_completo = Cliente.objects.get(id=cliente_id)
-                    
                     class MockRequestBypass:
                         def __init__(self):
                             self.META = {
@@ -89,10 +89,10 @@ class ClienteAuth2FAService:
                             }
                     
                     mock_request = MockRequestBypass()
-                    jwt_data = generate_cliente_jwt_token(cliente_completo, request=mock_request)
+                    jwt_data = generate_cliente_jwt_token(cliente_login, request=mock_request)
                     
                     registrar_log('apps.cliente',
-                        f"⚠️ BYPASS 2FA ATIVADO: cliente={cliente_id} ({cliente_bypass.nome})", nivel='WARNING')
+                        f"⚠️ BYPASS 2FA ATIVADO: cliente={cliente_id} ({cliente_login.nome})", nivel='WARNING')
                     
                     return {
                         'necessario': False,
@@ -227,11 +227,10 @@ class ClienteAuth2FAService:
                 )
 
             # Gerar JWT
-            from apps.cliente.models import Cliente
             from apps.cliente.jwt_cliente import generate_cliente_jwt_token
 
             try:
-                cliente = Cliente.objects.get(id=cliente_id)
+                cliente = cliente_login or Cliente.objects.get(id=cliente_id)
 
                 # Criar objeto mock de request para passar metadados
                 class MockRequest:
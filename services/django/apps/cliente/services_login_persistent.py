@@ -1,187 +1,199 @@
 """
 Sistema de autenticação persistente com banco + Redis
 Substitui LoginAttemptControl (Redis-only)
+
+Caminho do login (poucos round-trips):
+- cliente + estado de autenticação em uma query (select_related)
+- contadores e bloqueio em um único hash Redis por CPF (login_tentativas:<cpf>),
+  atualizado atomicamente por script Lua
+- histórico (TentativaLogin) enfileirado e gravado em lote pela task
+  apps.cliente.gravar_tentativas_login; bloqueios continuam síncronos no banco
 """
-from datetime import datetime, timedelta
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
 from django.core.cache import cache
-from django.db import transaction
+from django.db import connection, transaction
 from apps.cliente.models import Cliente
-from apps.cliente.models_autenticacao import ClienteAutenticacao, TentativaLogin, Bloqueio
+from apps.cliente.models_autenticacao import ClienteAutenticacao, Bloqueio
+from wallclub_core.seguranca.rate_limiter import LimitadorJanelaDeslizante
+from wallclub_core.services.auditoria_service import AuditoriaService
+from wallclub_core.utilitarios.fila_lote import drenar_fila
 from wallclub_core.utilitarios.log_control import registrar_log
 
+# Marcador para "cliente não informado" (None = CPF sem cadastro)
+_NAO_INFORMADO = object()
+
+# KEYS[1]: hash do CPF
+# ARGV: agora_ms, depois (janela_ms, limite, bloqueio_ms, motivo) para 15min, 1h e 24h
+# Campos: c<i>/i<i> = contagem/início da janela i, bloqueado_ate (ms), motivo
+# Retorno: {c15min, c1h, c24h, bloqueado_ate, motivo}
+_SCRIPT_FALHA = """
+local chave = KEYS[1]
+local agora = tonumber(ARGV[1])
+local contagens = {}
+local maior = 0
+
+for i = 1, 3 do
+    local janela = tonumber(ARGV[2 + (i - 1) * 4])
+    local inicio = tonumber(redis.call('HGET', chave, 'i' .. i) or '0')
+    local contagem = tonumber(redis.call('HGET', chave, 'c' .. i) or '0')
+    if agora - inicio >= janela then
+        contagem = 0
+        inicio = agora
+    end
+    contagem = contagem + 1
+    redis.call('HSET', chave, 'c' .. i, contagem, 'i' .. i, inicio)
+    contagens[i] = contagem
+    if janela > maior then maior = janela end
+end
+
+local bloqueado_ate = tonumber(redis.call('HGET', chave, 'bloqueado_ate') or '0')
+local motivo = redis.call('HGET', chave, 'motivo') or ''
+local novo = 0
+for i = 3, 1, -1 do
+    local base = 2 + (i - 1) * 4
+    if novo == 0 and bloqueado_ate <= agora and contagens[i] >= tonumber(ARGV[base + 1]) then
+        local bloqueio = tonumber(ARGV[base + 2])
+        bloqueado_ate = agora + bloqueio
+        motivo = ARGV[base + 3]
+        redis.call('HSET', chave, 'bloqueado_ate', bloqueado_ate, 'motivo', motivo)
+        if bloqueio > maior then maior = bloqueio end
+        novo = 1
+    end
+end
+
+redis.call('PEXPIRE', chave, maior)
+return {contagens[1], contagens[2], contagens[3], bloqueado_ate, motivo, novo}
+"""
+
+_lock_local = threading.Lock()
+_script = None
+
 
 class LoginPersistentService:
     """
     Service para controle de tentativas e bloqueios com persistência
-    Arquitetura híbrida: Banco (fonte da verdade) + Redis (cache)
+    Arquitetura híbrida: Redis (contadores e bloqueio vigente) + Banco (bloqueios e histórico)
     """
-    
+
     # Limites de tentativas
     LIMIT_15MIN = 5
     LIMIT_1H = 10
     LIMIT_24H = 15
-    
+
     # Tempos de bloqueio
     BLOCK_15MIN = 900  # 15 minutos
     BLOCK_1H = 3600    # 1 hora
     BLOCK_24H = 86400  # 24 horas
-    
+
+    PREFIXO_HASH = 'login_tentativas'
+    CHAVE_FILA = 'login_tentativas:fila'
+    TAMANHO_LOTE = 500
+    ENDPOINT = '/api/v1/cliente/login/'
+
+    # ------------------------------------------------------------------
+    # Contexto do login
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def carregar_cliente(cpf, canal_id) -> Optional[Cliente]:
+        """
+        Cliente ativo com o estado de autenticação (cliente.autenticacao) na mesma query
+        """
+        return Cliente.objects.select_related('autenticacao').filter(
+            cpf=cpf, canal_id=canal_id, is_active=True
+        ).first()
+
+    @staticmethod
+    def _autenticacao(cliente) -> Optional[ClienteAutenticacao]:
+        if cliente is None:
+            return None
+        try:
+            return cliente.autenticacao
+        except ClienteAutenticacao.DoesNotExist:
+            return None
+
+    # ------------------------------------------------------------------
+    # Tentativas
+    # ------------------------------------------------------------------
+
     @classmethod
-    def registrar_tentativa_falha(cls, cpf, canal_id, motivo_falha, ip_address=None, user_agent=None, device_fingerprint=None):
+    def registrar_tentativa_falha(cls, cpf, canal_id, motivo_falha, ip_address=None, user_agent=None,
+                                  device_fingerprint=None, cliente=_NAO_INFORMADO):
         """
         Registra tentativa de login falha
         Retorna dict com bloqueio aplicado ou tentativas restantes
+
+        Args:
+            cliente: cliente já carregado por carregar_cliente (None = CPF sem cadastro);
+                     se omitido, é buscado
         """
-        # LOG CRÍTICO: Rastrear TODAS as chamadas
-        import traceback
-        stack_info = ''.join(traceback.format_stack()[-4:-1])  # Últimas 3 chamadas
-        
         registrar_log('apps.cliente',
-            f"🚨 TENTATIVA FALHA REGISTRADA: CPF={cpf[:3]}***, Canal={canal_id}, Motivo={motivo_falha}, IP={ip_address or 'N/A'}\nStack: {stack_info}",
+            f"🚨 TENTATIVA FALHA REGISTRADA: CPF={cpf[:3]}***, Canal={canal_id}, Motivo={motivo_falha}, IP={ip_address or 'N/A'}",
             nivel='WARNING')
-        
+
         try:
-            with transaction.atomic():
-                # Buscar cliente
-                try:
-                    cliente = Cliente.objects.get(cpf=cpf, canal_id=canal_id, is_active=True)
-                    registrar_log('apps.cliente',
-                        f"  Cliente encontrado: ID={cliente.id}", nivel='DEBUG')
-                except Cliente.DoesNotExist:
-                    cliente = None
-                    registrar_log('apps.cliente',
-                        f"  Cliente NÃO encontrado para CPF={cpf[:3]}***", nivel='DEBUG')
-                
-                # Buscar ou criar estado de autenticação
-                if cliente:
-                    autenticacao, created = ClienteAutenticacao.objects.get_or_create(
-                        cliente=cliente,
-                        defaults={
-                            'tentativas_15min': 0,
-                            'tentativas_1h': 0,
-                            'tentativas_24h': 0
-                        }
-                    )
-                else:
-                    # CPF não existe - não criar autenticacao mas registrar tentativa
-                    autenticacao = None
-                
-                # 1. Registrar tentativa no histórico
-                tentativa = TentativaLogin.objects.create(
-                    cliente=cliente,
-                    cpf=cpf,
-                    canal_id=canal_id,
-                    sucesso=False,
-                    motivo_falha=motivo_falha,
-                    ip_address=ip_address or '0.0.0.0',
-                    user_agent=user_agent or '',
-                    endpoint='/api/v1/cliente/login/',
-                    device_fingerprint=device_fingerprint,
-                    estava_bloqueado=autenticacao.esta_bloqueado() if autenticacao else False,
-                    tentativas_antes=autenticacao.tentativas_15min if autenticacao else 0
-                )
-                
-                if not autenticacao:
-                    # Cliente não existe, não atualizar contadores
-                    return {
-                        'bloqueado': False,
-                        'tentativas_15min': 0,
-                        'tentativas_1h': 0,
-                        'tentativas_24h': 0,
-                        'motivo': None
-                    }
-                
-                # 2. Atualizar contadores
-                antes_15min = autenticacao.tentativas_15min
-                antes_1h = autenticacao.tentativas_1h
-                antes_24h = autenticacao.tentativas_24h
-                
-                autenticacao.tentativas_15min += 1
-                autenticacao.tentativas_1h += 1
-                autenticacao.tentativas_24h += 1
-                autenticacao.ultima_tentativa_em = datetime.now()
-                if ip_address:
-                    autenticacao.ultimo_ip = ip_address
-                
-                registrar_log('apps.cliente',
-                    f"📊 CONTADORES INCREMENTADOS: 15min={antes_15min}→{autenticacao.tentativas_15min}, 1h={antes_1h}→{autenticacao.tentativas_1h}, 24h={antes_24h}→{autenticacao.tentativas_24h}",
-                    nivel='WARNING')
-                
-                # 3. Verificar se deve bloquear
-                bloqueado = False
-                motivo = None
-                tempo_bloqueio = 0
-                bloqueado_ate = None
-                
-                if autenticacao.tentativas_24h >= cls.LIMIT_24H:
-                    # 15 tentativas em 24h → Bloqueio 24 horas
-                    bloqueado = True
-                    motivo = "limite_24h_atingido"
-                    tempo_bloqueio = cls.BLOCK_24H
-                    bloqueado_ate = datetime.now() + timedelta(seconds=tempo_bloqueio)
-                    
-                    registrar_log('apps.cliente',
-                        f"🚨 BLOQUEIO 24h - CPF={cpf[:3]}*** ({autenticacao.tentativas_24h} tentativas em 24h)")
-                    
-                elif autenticacao.tentativas_1h >= cls.LIMIT_1H:
-                    # 10 tentativas em 1h → Bloqueio 1 hora
-                    bloqueado = True
-                    motivo = "limite_1h_atingido"
-                    tempo_bloqueio = cls.BLOCK_1H
-                    bloqueado_ate = datetime.now() + timedelta(seconds=tempo_bloqueio)
-                    
-                    registrar_log('apps.cliente',
-                        f"⚠️ BLOQUEIO 1h - CPF={cpf[:3]}*** ({autenticacao.tentativas_1h} tentativas em 1h)")
-                    
-                elif autenticacao.tentativas_15min >= cls.LIMIT_15MIN:
-                    # 5 tentativas em 15min → Bloqueio 15 minutos
-                    bloqueado = True
-                    motivo = "limite_15min_atingido"
-                    tempo_bloqueio = cls.BLOCK_15MIN
-                    bloqueado_ate = datetime.now() + timedelta(seconds=tempo_bloqueio)
-                    
-                    registrar_log('apps.cliente',
-                        f"⏱️ BLOQUEIO 15min - CPF={cpf[:3]}*** ({autenticacao.tentativas_15min} tentativas em 15min)")
-                
-                # 4. Aplicar bloqueio se necessário
-                if bloqueado:
-                    autenticacao.bloqueado = True
-                    autenticacao.bloqueado_ate = bloqueado_ate
-                    autenticacao.bloqueio_motivo = motivo
-                    
-                    # Registrar bloqueio no histórico
-                    bloqueio_obj = Bloqueio.objects.create(
-                        cliente=cliente,
-                        cpf=cpf,
-                        canal_id=canal_id,
-                        motivo=motivo,
-                        tentativas_antes_bloqueio=autenticacao.tentativas_15min,
-                        bloqueado_em=datetime.now(),
-                        bloqueado_ate=bloqueado_ate,
-                        tempo_bloqueio_segundos=tempo_bloqueio,
-                        ip_address=ip_address,
-                        ativo=True
-                    )
-                    
-                    # Marcar tentativa que gerou bloqueio
-                    tentativa.gerou_bloqueio = True
-                    tentativa.save()
-                    
-                    # Cache Redis
-                    cache.set(f"login_blocked:{cpf}", True, tempo_bloqueio)
-                
-                autenticacao.save()
-                
+            if cliente is _NAO_INFORMADO:
+                cliente = cls.carregar_cliente(cpf, canal_id)
+
+            tentativa = {
+                'cliente_id': cliente.id if cliente else None,
+                'cpf': cpf,
+                'canal_id': canal_id,
+                'sucesso': False,
+                'motivo_falha': motivo_falha,
+                'ip_address': ip_address or '0.0.0.0',
+                'user_agent': user_agent or '',
+                'device_fingerprint': device_fingerprint,
+                'estava_bloqueado': False,
+                'tentativas_antes': 0,
+                'gerou_bloqueio': False,
+            }
+
+            if not cliente:
+                # Cliente não existe: registrar tentativa, sem contadores
+                cls._enfileirar_tentativa(tentativa)
                 return {
-                    'bloqueado': bloqueado,
-                    'tentativas_15min': autenticacao.tentativas_15min,
-                    'tentativas_1h': autenticacao.tentativas_1h,
-                    'tentativas_24h': autenticacao.tentativas_24h,
-                    'motivo': motivo,
-                    'bloqueado_ate': bloqueado_ate,
-                    'bloqueio_obj': bloqueio_obj if bloqueado else None
+                    'bloqueado': False,
+                    'tentativas_15min': 0,
+                    'tentativas_1h': 0,
+                    'tentativas_24h': 0,
+                    'motivo': None
                 }
-                
+
+            # Contadores + decisão de bloqueio em uma operação atômica
+            estado = cls._incrementar_falha(cpf)
+            tentativa['tentativas_15min'] = estado['tentativas_15min']
+            tentativa['tentativas_1h'] = estado['tentativas_1h']
+            tentativa['tentativas_24h'] = estado['tentativas_24h']
+            tentativa['tentativas_antes'] = estado['tentativas_15min'] - 1
+
+            registrar_log('apps.cliente',
+                f"📊 CONTADORES: 15min={estado['tentativas_15min']}, 1h={estado['tentativas_1h']}, 24h={estado['tentativas_24h']}",
+                nivel='WARNING')
+
+            bloqueio_obj = None
+            if estado['novo_bloqueio']:
+                tentativa['gerou_bloqueio'] = True
+                bloqueio_obj = cls._persistir_bloqueio(cliente, cpf, canal_id, estado, ip_address)
+
+            cls._enfileirar_tentativa(tentativa)
+
+            bloqueado = estado['novo_bloqueio']
+            return {
+                'bloqueado': bloqueado,
+                'tentativas_15min': estado['tentativas_15min'],
+                'tentativas_1h': estado['tentativas_1h'],
+                'tentativas_24h': estado['tentativas_24h'],
+                'motivo': estado['motivo'] if bloqueado else None,
+                'bloqueado_ate': estado['bloqueado_ate'] if bloqueado else None,
+                'bloqueio_obj': bloqueio_obj
+            }
+
         except Exception as e:
             registrar_log('apps.cliente',
                 f"Erro ao registrar tentativa falha: {str(e)}", nivel='ERROR')
@@ -191,131 +203,165 @@ class LoginPersistentService:
                 'tentativas_1h': 0,
                 'tentativas_24h': 0
             }
-    
+
     @classmethod
-    def registrar_tentativa_sucesso(cls, cpf, canal_id, ip_address=None, user_agent=None, device_fingerprint=None):
+    def _persistir_bloqueio(cls, cliente, cpf, canal_id, estado, ip_address):
+        """Bloqueio é raro e consultado pelo admin: gravado na hora"""
+        tempo_bloqueio = {
+            'limite_24h_atingido': cls.BLOCK_24H,
+            'limite_1h_atingido': cls.BLOCK_1H,
+            'limite_15min_atingido': cls.BLOCK_15MIN,
+        }[estado['motivo']]
+        agora = datetime.now()
+
+        registrar_log('apps.cliente',
+            f"🚨 BLOQUEIO {estado['motivo']} - CPF={cpf[:3]}*** "
+            f"(15min={estado['tentativas_15min']}, 1h={estado['tentativas_1h']}, 24h={estado['tentativas_24h']})")
+
+        with transaction.atomic():
+            ClienteAutenticacao.objects.update_or_create(
+                cliente=cliente,
+                defaults={
+                    'bloqueado': True,
+                    'bloqueado_ate': estado['bloqueado_ate'],
+                    'bloqueio_motivo': estado['motivo'],
+                    'tentativas_15min': estado['tentativas_15min'],
+                    'tentativas_1h': estado['tentativas_1h'],
+                    'tentativas_24h': estado['tentativas_24h'],
+                    'ultima_tentativa_em': agora,
+                }
+            )
+            return Bloqueio.objects.create(
+                cliente=cliente,
+                cpf=cpf,
+                canal_id=canal_id,
+                motivo=estado['motivo'],
+                tentativas_antes_bloqueio=estado['tentativas_15min'],
+                bloqueado_em=agora,
+                bloqueado_ate=estado['bloqueado_ate'],
+                tempo_bloqueio_segundos=tempo_bloqueio,
+                ip_address=ip_address,
+                ativo=True
+            )
+
+    @classmethod
+    def registrar_tentativa_sucesso(cls, cpf, canal_id, ip_address=None, user_agent=None,
+                                    device_fingerprint=None, cliente=_NAO_INFORMADO):
         """
         Registra tentativa de login bem-sucedida
         Reseta contadores e desbloqueia
         """
-        # LOG CRÍTICO: Rastrear TODOS os logins bem-sucedidos
-        import traceback
-        stack_info = ''.join(traceback.format_stack()[-4:-1])  # Últimas 3 chamadas
-        
         registrar_log('apps.cliente',
-            f"✅ TENTATIVA SUCESSO REGISTRADA: CPF={cpf[:3]}***, Canal={canal_id}, IP={ip_address or 'N/A'}\nStack: {stack_info}",
+            f"✅ TENTATIVA SUCESSO REGISTRADA: CPF={cpf[:3]}***, Canal={canal_id}, IP={ip_address or 'N/A'}",
             nivel='INFO')
-        
+
         try:
-            with transaction.atomic():
-                # Buscar cliente
-                cliente = Cliente.objects.get(cpf=cpf, canal_id=canal_id, is_active=True)
-                registrar_log('apps.cliente',
-                    f"  Cliente encontrado: ID={cliente.id}", nivel='DEBUG')
-                
-                # Buscar autenticação
-                autenticacao, created = ClienteAutenticacao.objects.get_or_create(
-                    cliente=cliente,
-                    defaults={
-                        'tentativas_15min': 0,
-                        'tentativas_1h': 0,
-                        'tentativas_24h': 0
-                    }
-                )
-                
-                # 1. Registrar tentativa no histórico
-                TentativaLogin.objects.create(
-                    cliente=cliente,
-                    cpf=cpf,
-                    canal_id=canal_id,
-                    sucesso=True,
-                    motivo_falha=None,
-                    ip_address=ip_address or '0.0.0.0',
-                    user_agent=user_agent or '',
-                    endpoint='/api/v1/cliente/login/',
-                    device_fingerprint=device_fingerprint,
-                    estava_bloqueado=False,
-                    tentativas_antes=autenticacao.tentativas_15min
-                )
-                
-                # 2. Resetar contadores
-                antes_15min = autenticacao.tentativas_15min
-                antes_1h = autenticacao.tentativas_1h
-                antes_24h = autenticacao.tentativas_24h
-                antes_bloqueado = autenticacao.bloqueado
-                
-                autenticacao.resetar_tentativas()
-                autenticacao.ultima_tentativa_em = datetime.now()
-                autenticacao.ultimo_sucesso_em = datetime.now()
-                if ip_address:
-                    autenticacao.ultimo_ip = ip_address
-                autenticacao.save()
-                
-                registrar_log('apps.cliente',
-                    f"🔄 CONTADORES RESETADOS: 15min={antes_15min}→0, 1h={antes_1h}→0, 24h={antes_24h}→0, Bloqueado={antes_bloqueado}→False",
-                    nivel='INFO')
-                
-                # 3. Desbloquear bloqueios ativos
-                Bloqueio.objects.filter(
-                    cpf=cpf,
-                    ativo=True
-                ).update(
-                    ativo=False,
-                    desbloqueado_em=datetime.now(),
-                    desbloqueado_por='login_sucesso'
-                )
-                
-                # 4. Limpar cache Redis
-                cache.delete(f"login_blocked:{cpf}")
-                cache.delete(f"login_attempts_15min:{cpf}")
-                cache.delete(f"login_attempts_1h:{cpf}")
-                cache.delete(f"login_attempts_24h:{cpf}")
-                
-                registrar_log('apps.cliente',
-                    f"✅ Login sucesso - CPF={cpf[:3]}***, contadores resetados")
-                
+            if cliente is _NAO_INFORMADO:
+                cliente = cls.carregar_cliente(cpf, canal_id)
+            if not cliente:
+                raise Cliente.DoesNotExist()
+
+            autenticacao = cls._autenticacao(cliente)
+            tentativas_antes = autenticacao.tentativas_15min if autenticacao else 0
+
+            # 1. Contadores e bloqueio vigente (Redis)
+            cache.delete(cls._chave_hash(cpf))
+
+            # 2. Bloqueio ainda marcado no banco: desbloquear na hora
+            if autenticacao and autenticacao.bloqueado:
+                with transaction.atomic():
+                    ClienteAutenticacao.objects.filter(cliente_id=cliente.id).update(
+                        bloqueado=False, bloqueado_ate=None, bloqueio_motivo=None
+                    )
+                    Bloqueio.objects.filter(
+                        cpf=cpf,
+                        ativo=True
+                    ).update(
+                        ativo=False,
+                        desbloqueado_em=datetime.now(),
+                        desbloqueado_por='login_sucesso'
+                    )
+
+            # 3. Histórico + reset dos contadores no banco (em lote)
+            cls._enfileirar_tentativa({
+                'cliente_id': cliente.id,
+                'cpf': cpf,
+                'canal_id': canal_id,
+                'sucesso': True,
+                'motivo_falha': None,
+                'ip_address': ip_address or '0.0.0.0',
+                'user_agent': user_agent or '',
+                'device_fingerprint': device_fingerprint,
+                'estava_bloqueado': False,
+                'tentativas_antes': tentativas_antes,
+                'gerou_bloqueio': False,
+                'tentativas_15min': 0,
+                'tentativas_1h': 0,
+                'tentativas_24h': 0,
+            })
+
+            registrar_log('apps.cliente',
+                f"✅ Login sucesso - CPF={cpf[:3]}***, contadores resetados")
+
         except Cliente.DoesNotExist:
             registrar_log('apps.cliente',
                 f"Cliente não encontrado ao registrar sucesso: {cpf[:3]}***", nivel='WARNING')
         except Exception as e:
             registrar_log('apps.cliente',
                 f"Erro ao registrar tentativa sucesso: {str(e)}", nivel='ERROR')
-    
+
     @classmethod
-    def verificar_bloqueio(cls, cpf):
+    def verificar_bloqueio(cls, cpf, cliente=_NAO_INFORMADO):
         """
         Verifica se CPF está bloqueado
         Retorna dict com status e informações do bloqueio
+
+        Args:
+            cliente: cliente já carregado por carregar_cliente - evita a consulta ao banco
+                     quando o hash Redis não existe (ex: após restart do Redis)
         """
         try:
-            # 1. Verificar cache Redis (rápido)
-            if cache.get(f"login_blocked:{cpf}"):
+            agora = datetime.now()
+
+            # 1. Hash Redis (bloqueio vigente)
+            if cls._cliente_redis() is None:
+                estado = cache.get(cls._chave_hash(cpf)) or {}
+            else:
+                estado = cls._ler_hash_redis(cpf)
+
+            bloqueado_ate_ms = int(estado.get('bloqueado_ate') or 0)
+            if bloqueado_ate_ms > time.time() * 1000:
+                bloqueado_ate = datetime.fromtimestamp(bloqueado_ate_ms / 1000)
+                return {
+                    'bloqueado': True,
+                    'motivo': estado.get('motivo'),
+                    'bloqueado_ate': bloqueado_ate,
+                    'tempo_restante_segundos': int((bloqueado_ate - agora).total_seconds())
+                }
+
+            # 2. Banco (bloqueio gravado que o Redis perdeu)
+            if cliente is _NAO_INFORMADO:
+                autenticacao = ClienteAutenticacao.objects.filter(
+                    cliente__cpf=cpf,
+                    bloqueado=True,
+                    bloqueado_ate__gt=agora
+                ).first()
+            else:
+                autenticacao = cls._autenticacao(cliente)
+
+            if autenticacao and autenticacao.esta_bloqueado():
+                tempo_restante = (autenticacao.bloqueado_ate - agora).total_seconds()
+                cls._restaurar_bloqueio(cpf, autenticacao)
                 registrar_log('apps.cliente',
-                    f"Bloqueio encontrado no cache: {cpf[:3]}***")
-            
-            # 2. Verificar banco (fonte da verdade)
-            autenticacao = ClienteAutenticacao.objects.filter(
-                cliente__cpf=cpf,
-                bloqueado=True,
-                bloqueado_ate__gt=datetime.now()
-            ).select_related('cliente').first()
-            
-            if autenticacao:
-                tempo_restante = (autenticacao.bloqueado_ate - datetime.now()).total_seconds()
-                
-                # Reconstruir cache se não existir
-                if not cache.get(f"login_blocked:{cpf}"):
-                    cache.set(f"login_blocked:{cpf}", True, timeout=int(tempo_restante))
-                    registrar_log('apps.cliente',
-                        f"Cache Redis reconstruído para: {cpf[:3]}***")
-                
+                    f"Bloqueio restaurado no Redis para: {cpf[:3]}***")
+
                 return {
                     'bloqueado': True,
                     'motivo': autenticacao.bloqueio_motivo,
                     'bloqueado_ate': autenticacao.bloqueado_ate,
                     'tempo_restante_segundos': int(tempo_restante)
                 }
-            
+
             # Não está bloqueado
             return {
                 'bloqueado': False,
@@ -323,7 +369,7 @@ class LoginPersistentService:
                 'bloqueado_ate': None,
                 'tempo_restante_segundos': 0
             }
-            
+
         except Exception as e:
             registrar_log('apps.cliente',
                 f"Erro ao verificar bloqueio: {str(e)}", nivel='ERROR')
@@ -333,29 +379,215 @@ class LoginPersistentService:
                 'bloqueado_ate': None,
                 'tempo_restante_segundos': 0
             }
-    
+
     @classmethod
     def limpar_tentativas(cls, cpf):
         """
-        Limpa contadores de tentativas (usado após login com sucesso)
+        Limpa contadores de tentativas (usado após reset de senha)
         """
         try:
-            autenticacao = ClienteAutenticacao.objects.filter(
-                cliente__cpf=cpf
-            ).first()
-            
-            if autenticacao:
-                autenticacao.resetar_tentativas()
-                autenticacao.save()
-                
-                # Limpar cache
-                cache.delete(f"login_blocked:{cpf}")
-                cache.delete(f"login_attempts_15min:{cpf}")
-                cache.delete(f"login_attempts_1h:{cpf}")
-                cache.delete(f"login_attempts_24h:{cpf}")
-                
-                registrar_log('apps.cliente',
-                    f"Tentativas limpas: {cpf[:3]}***")
+            ClienteAutenticacao.objects.filter(cliente__cpf=cpf).update(
+                tentativas_15min=0, tentativas_1h=0, tentativas_24h=0,
+                bloqueado=False, bloqueado_ate=None, bloqueio_motivo=None
+            )
+            cache.delete(cls._chave_hash(cpf))
+
+            registrar_log('apps.cliente',
+                f"Tentativas limpas: {cpf[:3]}***")
         except Exception as e:
             registrar_log('apps.cliente',
                 f"Erro ao limpar tentativas: {str(e)}", nivel='ERROR')
+
+    # ------------------------------------------------------------------
+    # Hash de contadores
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _chave_hash(cls, cpf) -> str:
+        return f"{cls.PREFIXO_HASH}:{cpf}"
+
+    @staticmethod
+    def _cliente_redis():
+        return LimitadorJanelaDeslizante._cliente_redis()
+
+    @classmethod
+    def _argumentos_janelas(cls) -> List:
+        argumentos = []
+        for janela, limite, bloqueio, motivo in (
+            (900, cls.LIMIT_15MIN, cls.BLOCK_15MIN, 'limite_15min_atingido'),
+            (3600, cls.LIMIT_1H, cls.BLOCK_1H, 'limite_1h_atingido'),
+            (86400, cls.LIMIT_24H, cls.BLOCK_24H, 'limite_24h_atingido'),
+        ):
+            argumentos.extend([janela * 1000, limite, bloqueio * 1000, motivo])
+        return argumentos
+
+    @classmethod
+    def _incrementar_falha(cls, cpf) -> Dict:
+        agora_ms = int(time.time() * 1000)
+        cliente_redis = cls._cliente_redis()
+        if cliente_redis is not None:
+            global _script
+            if _script is None:
+                _script = cliente_redis.register_script(_SCRIPT_FALHA)
+            resposta = _script(keys=[cache.make_key(cls._chave_hash(cpf))],
+                               args=[agora_ms] + cls._argumentos_janelas(), client=cliente_redis)
+            c15, c1h, c24, bloqueado_ate_ms = (int(v) for v in resposta[:4])
+            motivo = resposta[4].decode() if isinstance(resposta[4], bytes) else resposta[4]
+            novo = bool(int(resposta[5]))
+        else:
+            c15, c1h, c24, bloqueado_ate_ms, motivo, novo = cls._incrementar_falha_local(cpf, agora_ms)
+
+        return {
+            'tentativas_15min': c15,
+            'tentativas_1h': c1h,
+            'tentativas_24h': c24,
+            'novo_bloqueio': novo,
+            'motivo': motivo or None,
+            'bloqueado_ate': datetime.fromtimestamp(bloqueado_ate_ms / 1000) if bloqueado_ate_ms else None,
+        }
+
+    @classmethod
+    def _incrementar_falha_local(cls, cpf, agora_ms):
+        """Mesmo algoritmo do script Lua, sobre o cache Django (LocMemCache em dev/testes)"""
+        args = cls._argumentos_janelas()
+        chave = cls._chave_hash(cpf)
+        with _lock_local:
+            estado = dict(cache.get(chave) or {})
+            contagens = []
+            maior = 0
+            for i in range(3):
+                janela = args[i * 4]
+                inicio = int(estado.get(f'i{i + 1}', 0))
+                contagem = int(estado.get(f'c{i + 1}', 0))
+                if agora_ms - inicio >= janela:
+                    contagem, inicio = 0, agora_ms
+                contagem += 1
+                estado[f'c{i + 1}'], estado[f'i{i + 1}'] = contagem, inicio
+                contagens.append(contagem)
+                maior = max(maior, janela)
+
+            bloqueado_ate = int(estado.get('bloqueado_ate', 0))
+            motivo = estado.get('motivo', '')
+            novo = False
+            for i in (2, 1, 0):
+                limite, bloqueio, motivo_janela = args[i * 4 + 1:i * 4 + 4]
+                if not novo and bloqueado_ate <= agora_ms and contagens[i] >= limite:
+                    bloqueado_ate, motivo, novo = agora_ms + bloqueio, motivo_janela, True
+                    estado['bloqueado_ate'], estado['motivo'] = bloqueado_ate, motivo
+                    maior = max(maior, bloqueio)
+
+            cache.set(chave, estado, timeout=maior // 1000)
+        return contagens[0], contagens[1], contagens[2], bloqueado_ate, motivo, novo
+
+    @classmethod
+    def _ler_hash_redis(cls, cpf) -> Dict:
+        valores = cls._cliente_redis().hmget(
+            cache.make_key(cls._chave_hash(cpf)), ['bloqueado_ate', 'motivo']
+        )
+        return {
+            'bloqueado_ate': valores[0],
+            'motivo': valores[1].decode() if isinstance(valores[1], bytes) else valores[1],
+        }
+
+    @classmethod
+    def _restaurar_bloqueio(cls, cpf, autenticacao):
+        bloqueado_ate_ms = int(autenticacao.bloqueado_ate.timestamp() * 1000)
+        ttl = max(1, int(autenticacao.bloqueado_ate.timestamp() - time.time()))
+        cliente_redis = cls._cliente_redis()
+        if cliente_redis is not None:
+            chave = cache.make_key(cls._chave_hash(cpf))
+            pipe = cliente_redis.pipeline()
+            pipe.hset(chave, mapping={'bloqueado_ate': bloqueado_ate_ms, 'motivo': autenticacao.bloqueio_motivo or ''})
+            pipe.expire(chave, ttl)
+            pipe.execute()
+        else:
+            with _lock_local:
+                estado = dict(cache.get(cls._chave_hash(cpf)) or {})
+                estado['bloqueado_ate'] = bloqueado_ate_ms
+                estado['motivo'] = autenticacao.bloqueio_motivo or ''
+                cache.set(cls._chave_hash(cpf), estado, timeout=ttl)
+
+    # ------------------------------------------------------------------
+    # Histórico em lote
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _enfileirar_tentativa(cls, tentativa: Dict):
+        tentativa['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        cliente_redis = cls._cliente_redis()
+        if cliente_redis is None:
+            # Sem Redis (dev/testes): grava direto
+            cls._gravar_tentativas([tentativa])
+            return
+
+        tamanho = cliente_redis.rpush(cache.make_key(cls.CHAVE_FILA), json.dumps(tentativa))
+        if tamanho == cls.TAMANHO_LOTE:
+            from apps.cliente.tasks import gravar_tentativas_login
+            gravar_tentativas_login.delay()
+
+    @classmethod
+    def gravar_tentativas_pendentes(cls) -> int:
+        """
+        Drena a fila de tentativas em lotes (executado pela task Celery)
+
+        Um drenador por vez preserva a ordem dos contadores por cliente; lote
+        cujo INSERT falha continua no Redis e é regravado na próxima execução
+
+        Returns:
+            int: total de tentativas gravadas
+        """
+        cliente_redis = cls._cliente_redis()
+        if cliente_redis is None:
+            return 0
+        return drenar_fila(cliente_redis, cls.CHAVE_FILA, cls._gravar_tentativas, cls.TAMANHO_LOTE)
+
+    @classmethod
+    def _gravar_tentativas(cls, tentativas: List[Dict]):
+        """
+        INSERT em lote do histórico (preserva o horário da tentativa), resumo
+        por minuto da auditoria e atualização dos contadores/última atividade
+        em cliente_autenticacao
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO cliente_auditoria_validacao_senha
+                    (cliente_id, cpf, canal_id, sucesso, motivo_falha, ip_address, user_agent,
+                     endpoint, device_fingerprint, estava_bloqueado, tentativas_antes,
+                     gerou_bloqueio, timestamp)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, [
+                (t['cliente_id'], t['cpf'], t['canal_id'], t['sucesso'], t['motivo_falha'],
+                 t['ip_address'], t['user_agent'], cls.ENDPOINT, t['device_fingerprint'],
+                 t['estava_bloqueado'], t['tentativas_antes'], t['gerou_bloqueio'], t['timestamp'])
+                for t in tentativas
+            ])
+            AuditoriaService.registrar_resumo_minuto(cursor, tentativas)
+
+            # Último estado de cada cliente no lote
+            ultimos = {}
+            for t in tentativas:
+                if t['cliente_id'] is not None:
+                    ultimos[t['cliente_id']] = t
+            if not ultimos:
+                return
+
+            cursor.executemany("""
+                INSERT INTO cliente_autenticacao
+                    (cliente_id, bloqueado, tentativas_15min, tentativas_1h, tentativas_24h,
+                     ultima_tentativa_em, ultimo_sucesso_em, ultimo_ip, created_at, updated_at)
+                VALUES (%s, 0, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+                ON DUPLICATE KEY UPDATE
+                    tentativas_15min = VALUES(tentativas_15min),
+                    tentativas_1h = VALUES(tentativas_1h),
+                    tentativas_24h = VALUES(tentativas_24h),
+                    ultima_tentativa_em = VALUES(ultima_tentativa_em),
+                    ultimo_sucesso_em = COALESCE(VALUES(ultimo_sucesso_em), ultimo_sucesso_em),
+                    ultimo_ip = COALESCE(VALUES(ultimo_ip), ultimo_ip),
+                    updated_at = NOW()
+            """, [
+                (cliente_id, t.get('tentativas_15min', 0), t.get('tentativas_1h', 0),
+                 t.get('tentativas_24h', 0), t['timestamp'],
+                 t['timestamp'] if t['sucesso'] else None,
+                 t['ip_address'] if t['ip_address'] != '0.0.0.0' else None)
+                for cliente_id, t in ultimos.items()
+            ])
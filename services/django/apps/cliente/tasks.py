@@ -0,0 +1,23 @@
+"""
+Celery tasks para clientes
+"""
+from celery import shared_task
+
+from wallclub_core.utilitarios.log_control import registrar_log
+
+
+@shared_task(name='apps.cliente.gravar_tentativas_login', soft_time_limit=240, time_limit=300)
+def gravar_tentativas_login():
+    """
+    Grava em lote o histórico de tentativas de login enfileirado no Redis
+    (cliente_auditoria_validacao_senha + contadores de cliente_autenticacao)
+
+    Execução: a cada minuto via Celery Beat e sempre que a fila atinge
+    LoginPersistentService.TAMANHO_LOTE
+    """
+    from apps.cliente.services_login_persistent import LoginPersistentService
+
+    total = LoginPersistentService.gravar_tentativas_pendentes()
+    if total:
+        registrar_log('apps.cliente', f"Tentativas de login gravadas: {total}")
+    return {'gravadas': total}
@@ -9,9 +9,26 @@ from django.utils.html import format_html
 from decimal import Decimal
 from .models import ContaDigital, TipoMovimentacao, MovimentacaoContaDigital, ConfiguracaoContaDigital
 from .services import ContaDigitalService
+from .services_referencia import ReferenciaContaDigitalService
 from wallclub_core.utilitarios.log_control import registrar_log
 
 
+class ReferenciaAdminMixin:
+    """Invalida o registro em memória (ReferenciaContaDigitalService) a cada alteração"""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        ReferenciaContaDigitalService.invalidar()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        ReferenciaContaDigitalService.invalidar()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        ReferenciaContaDigitalService.invalidar()
+
+
 @admin.register(ContaDigital)
 class ContaDigitalAdmin(admin.ModelAdmin):
     list_display = [
@@ -222,7 +239,7 @@ class ContaDigitalAdmin(admin.ModelAdmin):
 
 
 @admin.register(TipoMovimentacao)
-class TipoMovimentacaoAdmin(admin.ModelAdmin):
+class TipoMovimentacaoAdmin(ReferenciaAdminMixin, admin.ModelAdmin):
     list_display = [
         'codigo', 'nome', 'categoria', 'debita_saldo',
         'permite_estorno', 'visivel_extrato', 'ativo'
@@ -334,7 +351,7 @@ class MovimentacaoContaDigitalAdmin(admin.ModelAdmin):
 
 
 @admin.register(ConfiguracaoContaDigital)
-class ConfiguracaoContaDigitalAdmin(admin.ModelAdmin):
+class ConfiguracaoContaDigitalAdmin(ReferenciaAdminMixin, admin.ModelAdmin):
     list_display = [
         'canal_id', 'nome_canal', 'limite_diario_padrao',
         'limite_mensal_padrao', 'auto_criar_conta', 'ativo'
@@ -0,0 +1,127 @@
+"""
+Benchmark de queries por cashback creditado numa carga POS.
+
+Executa ContaDigitalService.creditar_cashback_transacao_pos para clientes
+distintos (metade sem conta digital, exercitando a criação automática com a
+configuração do canal) contra o banco configurado, dentro de uma transação
+desfeita ao final. Compara:
+
+- banco: tipo de movimentação e configuração do canal lidos do banco a cada operação
+- registro: ReferenciaContaDigitalService (memória do processo + chave de versão)
+
+Uso:
+    python manage.py benchmark_cashback_pos
+    python manage.py benchmark_cashback_pos --creditos 2000 --canal 1 --latencia-db-ms 1
+"""
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.cliente.models import Cliente
+from apps.conta_digital.models import ConfiguracaoContaDigital, ContaDigital, TipoMovimentacao
+from apps.conta_digital.services import ContaDigitalService
+from apps.conta_digital.services_referencia import ReferenciaContaDigitalService
+
+PREFIXO_CPF = '998'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de queries por cashback POS: referências do banco vs registro em memória'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--creditos', type=int, default=500,
+                            help='Créditos de cashback por cenário (padrão: 500)')
+        parser.add_argument('--canal', type=int, default=1,
+                            help='Canal dos clientes de teste (padrão: 1)')
+        parser.add_argument('--latencia-db-ms', type=float, default=0.0,
+                            help='Latência extra simulada por query (padrão: 0)')
+
+    def handle(self, *args, **options):
+        total = options['creditos']
+        self.canal_id = options['canal']
+        self.latencia = options['latencia_db_ms'] / 1000
+        self.queries = 0
+
+        resultados = {}
+        with connection.execute_wrapper(self._round_trip), transaction.atomic():
+            for cenario in ('banco', 'registro'):
+                clientes = self._preparar_clientes(cenario, total)
+                resultados[cenario] = self._executar(cenario, clientes)
+            transaction.set_rollback(True)
+        # Registro pode ter visto linhas desfeitas pelo rollback
+        ReferenciaContaDigitalService._memo = None
+
+        base = resultados['banco'][1]
+        for cenario, (creditos_s, queries, falhas) in resultados.items():
+            self.stdout.write(
+                f'{cenario:<9} {creditos_s:8.1f} créditos/s  queries/crédito={queries:5.2f}  '
+                f'falhas={falhas}  ({queries / base:.0%} das queries)'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    def _round_trip(self, execute, sql, params, many, context):
+        self.queries += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        return execute(sql, params, many, context)
+
+    def _preparar_clientes(self, cenario, total):
+        prefixo = f"{PREFIXO_CPF}{'01'[cenario == 'registro']}"
+        cpfs = [f'{prefixo}{i:07d}' for i in range(total)]
+        Cliente.objects.bulk_create([
+            Cliente(cpf=cpf, canal_id=self.canal_id, hash_senha='benchmark', nome='Cliente Benchmark',
+                    celular='11999999999', cadastro_completo=True)
+            for cpf in cpfs
+        ])
+        clientes = list(Cliente.objects.filter(cpf__in=cpfs, canal_id=self.canal_id).values_list('id', 'cpf'))
+        # Metade já com conta digital
+        ContaDigital.objects.bulk_create([
+            ContaDigital(cliente_id=cliente_id, canal_id=self.canal_id, cpf=cpf)
+            for cliente_id, cpf in clientes[::2]
+        ])
+        return [cliente_id for cliente_id, _ in clientes]
+
+    @staticmethod
+    def _patches_banco():
+        def configuracao_canal(canal_id):
+            return ConfiguracaoContaDigital.objects.filter(canal_id=canal_id).first()
+
+        return (
+            mock.patch.object(ReferenciaContaDigitalService, 'tipo_movimentacao',
+                              side_effect=lambda codigo: TipoMovimentacao.objects.get(codigo=codigo)),
+            mock.patch.object(ReferenciaContaDigitalService, 'configuracao_canal',
+                              side_effect=configuracao_canal),
+        )
+
+    def _executar(self, cenario, clientes):
+        patches = self._patches_banco() if cenario == 'banco' else ()
+        for patch in patches:
+            patch.start()
+        try:
+            if cenario == 'registro':
+                # Carga do registro (2 queries, uma vez por processo) fora da medição
+                ReferenciaContaDigitalService._memo = None
+                ReferenciaContaDigitalService.tipos_movimentacao()
+
+            falhas = 0
+            queries = self.queries
+            inicio = time.perf_counter()
+            for i, cliente_id in enumerate(clientes):
+                resultado = ContaDigitalService.creditar_cashback_transacao_pos(
+                    cliente_id, self.canal_id, Decimal('1.50'), f'BENCH{cenario}{i}', 'Benchmark'
+                )
+                if not resultado['sucesso']:
+                    falhas += 1
+                    if falhas == 1:
+                        self.stdout.write(self.style.ERROR(f"{cenario}: {resultado['mensagem']}"))
+            duracao = time.perf_counter() - inicio
+        finally:
+            for patch in patches:
+                patch.stop()
+
+        return len(clientes) / duracao, (self.queries - queries) / len(clientes), falhas
@@ -79,6 +79,12 @@ class ContaDigital(models.Model):
     def __str__(self):
         return f"Conta Digital Cliente {self.cliente_id} - Canal {self.canal_id}"
     
+    def save(self, *args, **kwargs):
+        """Override save para invalidar o snapshot de saldo após o commit"""
+        super().save(*args, **kwargs)
+        from .services_extrato import ExtratoService
+        ExtratoService.invalidar_saldo(self)
+    
     def get_saldo_disponivel(self):
         """Retorna saldo disponível (atual - bloqueado)"""
         return self.saldo_atual - self.saldo_bloqueado
@@ -227,6 +233,11 @@ class MovimentacaoContaDigital(models.Model):
     # Timestamps
     data_movimentacao = models.DateTimeField(default=timezone.now)
     processada_em = models.DateTimeField(null=True, blank=True)
+    
+    # Cashback (copiado do CashbackUso para o extrato não consultar cashback_uso)
+    cashback_tipo_origem = models.CharField(max_length=10, null=True, blank=True)
+    cashback_status = models.CharField(max_length=20, null=True, blank=True)
+    cashback_aplicado_em = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -154,6 +154,7 @@ class ExtratoSerializer(serializers.Serializer):
     cashback_bloqueado = serializers.DecimalField(max_digits=15, decimal_places=2)
     movimentacoes = MovimentacaoSerializer(many=True)
     resumo_cashback = ResumoCashbackSerializer()
+    proximo_cursor = serializers.CharField(allow_null=True, required=False)
     
     def to_representation(self, instance):
         # Passar cashback_info para o contexto das movimentações
@@ -253,6 +254,7 @@ class ExtratoFiltroSerializer(serializers.Serializer):
     data_fim = serializers.DateField(required=False)
     tipo_movimentacao = serializers.CharField(max_length=30, required=False)
     limite = serializers.IntegerField(min_value=1, max_value=100, default=50)
+    cursor = serializers.CharField(max_length=64, required=False)
     
     def validate(self, data):
         """Valida se data_inicio é anterior a data_fim e converte para datetime"""
@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 import pytz
 from django.core.exceptions import ValidationError
 from .models import ContaDigital, TipoMovimentacao, MovimentacaoContaDigital, ConfiguracaoContaDigital, CashbackRetencao
+from .services_referencia import ReferenciaContaDigitalService
 from apps.cliente.models import Cliente
 from wallclub_core.utilitarios.log_control import registrar_log
 
@@ -33,8 +34,6 @@ class ContaDigitalService:
                 cliente_id=cliente_id,
                 canal_id=canal_id
             )
-            # Refresh para garantir dados mais recentes do banco
-            conta.refresh_from_db()
             registrar_log('apps.conta_digital', f'Conta obtida: cliente={cliente_id}, canal={canal_id}, saldo={conta.saldo_atual}')
             return conta
         except ContaDigital.DoesNotExist:
@@ -100,7 +99,7 @@ class ContaDigitalService:
 
             with transaction.atomic():
                 conta = ContaDigitalService.obter_ou_criar_conta(cliente_id, canal_id)
-                tipo_movimentacao = TipoMovimentacao.objects.get(codigo=tipo_codigo)
+                tipo_movimentacao = ReferenciaContaDigitalService.tipo_movimentacao(tipo_codigo)
 
                 # Validações
                 if not conta.ativa:
@@ -203,7 +202,7 @@ class ContaDigitalService:
 
             with transaction.atomic():
                 conta = ContaDigitalService.obter_ou_criar_conta(cliente_id, canal_id)
-                tipo_movimentacao = TipoMovimentacao.objects.get(codigo=tipo_codigo)
+                tipo_movimentacao = ReferenciaContaDigitalService.tipo_movimentacao(tipo_codigo)
 
                 # Validações básicas
                 if not conta.ativa:
@@ -286,110 +285,62 @@ class ContaDigitalService:
     @staticmethod
     def obter_saldo(cliente_id, canal_id):
         """
-        Obtém informações de saldo da conta digital.
+        Obtém informações de saldo da conta digital (snapshot em cache, invalidado a cada commit).
         """
         try:
-            conta = ContaDigitalService.obter_ou_criar_conta(cliente_id, canal_id)
-
-            return {
-                'saldo_atual': conta.saldo_atual,
-                'saldo_bloqueado': conta.saldo_bloqueado,
-                'saldo_disponivel': conta.get_saldo_disponivel(),
-                'cashback_disponivel': conta.cashback_disponivel,
-                'cashback_bloqueado': conta.cashback_bloqueado,
-                'cashback_total': conta.get_cashback_total(),
-                'saldo_total_disponivel': conta.get_saldo_total_disponivel(),
-                'limite_diario': conta.limite_diario,
-                'limite_mensal': conta.limite_mensal,
-                'conta_ativa': conta.ativa,
-                'conta_bloqueada': conta.bloqueada,
-                'motivo_bloqueio': conta.motivo_bloqueio
-            }
+            from .services_extrato import ExtratoService
+            return dict(ExtratoService.obter_snapshot(cliente_id, canal_id)['saldo'])
         except Exception as e:
             registrar_log('apps.conta_digital', f'❌ Erro ao obter saldo: {str(e)}', nivel='ERROR')
             raise
 
     @staticmethod
     def obter_extrato(cliente_id, canal_id, data_inicio=None, data_fim=None,
-                     tipo_movimentacao=None, limite=50):
+                     tipo_movimentacao=None, limite=50, cursor=None):
         """
         Obtém extrato de movimentações da conta digital com informações de cashback.
+        Saldo vem do snapshot em cache; movimentações em 1 query paginada por keyset.
+
+        Args:
+            cursor (str): Opcional - proximo_cursor da página anterior
         """
         try:
-            registrar_log('apps.conta_digital', f'📊 Solicitação extrato: cliente={cliente_id}, canal={canal_id}, data_inicio={data_inicio}, data_fim={data_fim}, tipo={tipo_movimentacao}, limite={limite}')
-
-            conta = ContaDigitalService.obter_ou_criar_conta(cliente_id, canal_id)
-
-            # Filtros
-            filtros = {
-                'conta_digital': conta,
-                'tipo_movimentacao__visivel_extrato': True
-            }
-            registrar_log('apps.conta_digital', f'🔍 Conta encontrada: ID={conta.id}, saldo_atual={conta.saldo_atual}, cashback_disponivel={conta.cashback_disponivel}')
-
-            if data_inicio:
-                # Se data_inicio for string de data, converter para datetime início do dia
-                if isinstance(data_inicio, str) and len(data_inicio) == 10:  # YYYY-MM-DD
-                    from datetime import datetime
-                    data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d').replace(hour=0, minute=0, second=0)
-                filtros['data_movimentacao__gte'] = data_inicio
-            if data_fim:
-                # Se data_fim for string de data, converter para datetime fim do dia
-                if isinstance(data_fim, str) and len(data_fim) == 10:  # YYYY-MM-DD
-                    from datetime import datetime
-                    data_fim = datetime.strptime(data_fim, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-                filtros['data_movimentacao__lte'] = data_fim
-            if tipo_movimentacao:
-                filtros['tipo_movimentacao__codigo'] = tipo_movimentacao
-
-            registrar_log('apps.conta_digital', f'🔎 Filtros aplicados: {filtros}')
-
-            movimentacoes = MovimentacaoContaDigital.objects.filter(**filtros).order_by('-data_movimentacao')[:limite]
-            total_movimentacoes = movimentacoes.count()
-
-            registrar_log('apps.conta_digital', f'📋 Movimentações encontradas: {total_movimentacoes} registros')
-
-            # Buscar informações de cashback para movimentações de cashback
-            from apps.cashback.models import CashbackUso
-            from django.db import connection
-
-            movimentacoes_list = list(movimentacoes)
-            movimentacoes_ids = [m.id for m in movimentacoes_list]
-
-            # Buscar cashback_uso relacionados às movimentações
-            cashback_info = {}
-            if movimentacoes_ids:
-                cashback_usos = CashbackUso.objects.filter(
-                    movimentacao_id__in=movimentacoes_ids
-                ).values(
-                    'movimentacao_id', 'tipo_origem', 'status',
-                    'aplicado_em', 'liberado_em', 'expira_em'
-                )
-
-                for cu in cashback_usos:
-                    cashback_info[cu['movimentacao_id']] = cu
-
-            # Buscar próxima liberação de cashback
-            retencoes = CashbackRetencao.objects.filter(
-                conta_digital=conta,
-                status='RETIDO'
-            ).order_by('data_liberacao_prevista').first()
-
-            proxima_liberacao = retencoes.data_liberacao_prevista if retencoes else None
+            from .services_extrato import ExtratoService
+
+            # Se datas vierem como string YYYY-MM-DD, converter para início/fim do dia
+            if isinstance(data_inicio, str) and len(data_inicio) == 10:
+                data_inicio = datetime.strptime(data_inicio, '%Y-%m-%d').replace(hour=0, minute=0, second=0)
+            if isinstance(data_fim, str) and len(data_fim) == 10:
+                data_fim = datetime.strptime(data_fim, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+
+            snapshot = ExtratoService.obter_snapshot(cliente_id, canal_id)
+            saldo = snapshot['saldo']
+
+            movimentacoes_list, proximo_cursor = ExtratoService.listar_movimentacoes(
+                snapshot['conta_id'],
+                data_inicio=data_inicio,
+                data_fim=data_fim,
+                tipo_movimentacao=tipo_movimentacao,
+                limite=limite,
+                cursor_pagina=cursor
+            )
 
-            registrar_log('apps.conta_digital', f'✅ Extrato gerado: {total_movimentacoes} movimentações, saldo_atual={conta.saldo_atual}')
+            registrar_log('apps.conta_digital',
+                f'📊 Extrato: cliente={cliente_id}, canal={canal_id}, {len(movimentacoes_list)} movimentações, '
+                f'tipo={tipo_movimentacao}, cursor={cursor}')
 
             return {
-                'saldo_atual': conta.saldo_atual,
-                'cashback_disponivel': conta.cashback_disponivel,
-                'cashback_bloqueado': conta.cashback_bloqueado,
+                'saldo_atual': saldo['saldo_atual'],
+                'cashback_disponivel': saldo['cashback_disponivel'],
+                'cashback_bloqueado': saldo['cashback_bloqueado'],
                 'movimentacoes': movimentacoes_list,
-                'cashback_info': cashback_info,
+                'cashback_info': ExtratoService.cashback_info(movimentacoes_list),
+                'proximo_cursor': proximo_cursor,
                 'resumo_cashback': {
-                    'total_retido': conta.cashback_bloqueado,
-                    'total_disponivel': conta.cashback_disponivel,
-                    'total_geral': conta.cashback_bloqueado + conta.cashback_disponivel,
-                    'proxima_liberacao': proxima_liberacao
+                    'total_retido': saldo['cashback_bloqueado'],
+                    'total_disponivel': saldo['cashback_disponivel'],
+                    'total_geral': saldo['cashback_bloqueado'] + saldo['cashback_disponivel'],
+                    'proxima_liberacao': snapshot['proxima_liberacao']
                 }
             }
 
@@ -419,7 +370,7 @@ class ContaDigitalService:
                 conta.save()
 
                 # Criar movimentação de bloqueio
-                tipo_bloqueio = TipoMovimentacao.objects.get(codigo='BLOQUEIO')
+                tipo_bloqueio = ReferenciaContaDigitalService.tipo_movimentacao('BLOQUEIO')
                 movimentacao = MovimentacaoContaDigital.objects.create(
                     conta_digital=conta,
                     tipo_movimentacao=tipo_bloqueio,
@@ -460,7 +411,7 @@ class ContaDigitalService:
                 conta.save()
 
                 # Criar movimentação de desbloqueio
-                tipo_desbloqueio = TipoMovimentacao.objects.get(codigo='DESBLOQUEIO')
+                tipo_desbloqueio = ReferenciaContaDigitalService.tipo_movimentacao('DESBLOQUEIO')
                 movimentacao = MovimentacaoContaDigital.objects.create(
                     conta_digital=conta,
                     tipo_movimentacao=tipo_desbloqueio,
@@ -520,7 +471,7 @@ class ContaDigitalService:
                     conta.save()
 
                     # Criar movimentação de estorno
-                    tipo_estorno = TipoMovimentacao.objects.get(codigo='ESTORNO')
+                    tipo_estorno = ReferenciaContaDigitalService.tipo_movimentacao('ESTORNO')
                     movimentacao_estorno = MovimentacaoContaDigital.objects.create(
                         conta_digital=conta,
                         tipo_movimentacao=tipo_estorno,
@@ -556,7 +507,7 @@ class ContaDigitalService:
                     conta.save()
 
                     # Criar movimentação de estorno
-                    tipo_estorno = TipoMovimentacao.objects.get(codigo='ESTORNO')
+                    tipo_estorno = ReferenciaContaDigitalService.tipo_movimentacao('ESTORNO')
                     movimentacao_estorno = MovimentacaoContaDigital.objects.create(
                         conta_digital=conta,
                         tipo_movimentacao=tipo_estorno,
@@ -586,16 +537,19 @@ class ContaDigitalService:
     @staticmethod
     def _obter_configuracao_canal(canal_id):
         """
-        Obtém configuração do canal ou cria uma padrão.
+        Obtém configuração do canal (registro em memória) ou cria uma padrão.
         """
-        try:
-            return ConfiguracaoContaDigital.objects.get(canal_id=canal_id)
-        except ConfiguracaoContaDigital.DoesNotExist:
-            # Criar configuração padrão
-            return ConfiguracaoContaDigital.objects.create(
-                canal_id=canal_id,
-                nome_canal=f"Canal {canal_id}"
-            )
+        config = ReferenciaContaDigitalService.configuracao_canal(canal_id)
+        if config is not None:
+            return config
+
+        # Criar configuração padrão
+        config, _ = ConfiguracaoContaDigital.objects.get_or_create(
+            canal_id=canal_id,
+            defaults={'nome_canal': f"Canal {canal_id}"}
+        )
+        ReferenciaContaDigitalService.invalidar()
+        return config
 
     @staticmethod
     def liberar_cashback_retido(retencao_id, motivo="Liberação manual"):
@@ -628,7 +582,7 @@ class ContaDigitalService:
                 retencao.save()
 
                 # Criar movimentação de liberação
-                tipo_liberacao = TipoMovimentacao.objects.get(codigo='CASHBACK_CREDITO')
+                tipo_liberacao = ReferenciaContaDigitalService.tipo_movimentacao('CASHBACK_CREDITO')
                 movimentacao = MovimentacaoContaDigital.objects.create(
                     conta_digital=conta,
                     tipo_movimentacao=tipo_liberacao,
@@ -679,7 +633,7 @@ class ContaDigitalService:
                 conta.save()
 
                 # Criar movimentação
-                tipo_uso = TipoMovimentacao.objects.get(codigo='CASHBACK_DEBITO')
+                tipo_uso = ReferenciaContaDigitalService.tipo_movimentacao('CASHBACK_DEBITO')
                 movimentacao = MovimentacaoContaDigital.objects.create(
                     conta_digital=conta,
                     tipo_movimentacao=tipo_uso,
@@ -757,7 +711,7 @@ class ContaDigitalService:
                     registrar_log('apps.conta_digital', f'✅ [POS] Cashback DISPONÍVEL: cliente={cliente_id}, valor={valor_cashback}, saldo={conta.cashback_disponivel}, NSU={nsu_transacao}')
 
                 # Criar movimentação
-                tipo_cashback = TipoMovimentacao.objects.get(codigo='CASHBACK_CREDITO')
+                tipo_cashback = ReferenciaContaDigitalService.tipo_movimentacao('CASHBACK_CREDITO')
                 movimentacao = MovimentacaoContaDigital.objects.create(
                     conta_digital=conta,
                     tipo_movimentacao=tipo_cashback,
@@ -850,7 +804,7 @@ class ContaDigitalService:
                 conta.save()
 
                 # Criar movimentação de estorno
-                tipo_estorno = TipoMovimentacao.objects.get(codigo='CASHBACK_DEBITO')
+                tipo_estorno = ReferenciaContaDigitalService.tipo_movimentacao('CASHBACK_DEBITO')
                 movimentacao_estorno = MovimentacaoContaDigital.objects.create(
                     conta_digital=conta,
                     tipo_movimentacao=tipo_estorno,
@@ -921,10 +875,11 @@ class ContaDigitalService:
 
                 # Buscar tipo de movimentação COMPRA_CARTAO
                 try:
-                    tipo_compra = TipoMovimentacao.objects.get(codigo='COMPRA_CARTAO')
+                    tipo_compra = ReferenciaContaDigitalService.tipo_movimentacao('COMPRA_CARTAO')
                 except TipoMovimentacao.DoesNotExist:
                     registrar_log('apps.conta_digital',
                         '⚠️ Tipo COMPRA_CARTAO não existe, criando...', nivel='WARNING')
+                    ReferenciaContaDigitalService.invalidar()
                     tipo_compra = TipoMovimentacao.objects.create(
                         codigo='COMPRA_CARTAO',
                         nome='Compra com Cartão',
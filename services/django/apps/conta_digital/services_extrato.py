@@ -0,0 +1,198 @@
+"""
+Leitura de saldo e extrato da conta digital para o app (home/extrato).
+
+- conta_digital:saldo:versao:<cliente_id>:<canal_id>: versão do saldo, trocada
+  no commit de cada alteração da conta (ContaDigital.save)
+- conta_digital:saldo:<cliente_id>:<canal_id>:<versao>: snapshot do saldo,
+  montado do banco no miss e gravado sob a versão lida ANTES da leitura - um
+  snapshot lido antes de um commit fica na versão antiga, nunca na nova
+- extrato lido direto de conta_digital_movimentacoes, paginado por keyset em
+  (data_movimentacao DESC, id DESC), com os dados de cashback gravados na
+  própria movimentação (cashback_tipo_origem/status/aplicado_em)
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from wallclub_core.utilitarios.log_control import registrar_log
+from .models import CashbackRetencao, ContaDigital, MovimentacaoContaDigital
+
+
+class ExtratoService:
+    """Snapshot de saldo + páginas do extrato (1 query por página)"""
+
+    PREFIXO_SALDO = 'conta_digital:saldo'
+    CACHE_TIMEOUT = 3600
+
+    # ------------------------------------------------------------------
+    # Snapshot de saldo
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _chave_saldo(cls, cliente_id, canal_id, versao) -> str:
+        return f"{cls.PREFIXO_SALDO}:{cliente_id}:{canal_id}:{versao}"
+
+    @classmethod
+    def _chave_versao(cls, cliente_id, canal_id) -> str:
+        return f"{cls.PREFIXO_SALDO}:versao:{cliente_id}:{canal_id}"
+
+    @staticmethod
+    def _nova_versao() -> int:
+        return time.time_ns() // 1000
+
+    @classmethod
+    def _versao_saldo(cls, cliente_id, canal_id) -> int:
+        chave = cls._chave_versao(cliente_id, canal_id)
+        versao = cache.get(chave)
+        if versao is None:
+            cache.add(chave, cls._nova_versao(), timeout=None)
+            versao = cache.get(chave)
+        return versao
+
+    @staticmethod
+    def _montar_snapshot(conta: ContaDigital, proxima_liberacao: Optional[datetime]) -> Dict:
+        return {
+            'conta_id': conta.id,
+            'saldo': {
+                'saldo_atual': conta.saldo_atual,
+                'saldo_bloqueado': conta.saldo_bloqueado,
+                'saldo_disponivel': conta.get_saldo_disponivel(),
+                'cashback_disponivel': conta.cashback_disponivel,
+                'cashback_bloqueado': conta.cashback_bloqueado,
+                'cashback_total': conta.get_cashback_total(),
+                'saldo_total_disponivel': conta.get_saldo_total_disponivel(),
+                'limite_diario': conta.limite_diario,
+                'limite_mensal': conta.limite_mensal,
+                'conta_ativa': conta.ativa,
+                'conta_bloqueada': conta.bloqueada,
+                'motivo_bloqueio': conta.motivo_bloqueio
+            },
+            'proxima_liberacao': proxima_liberacao,
+        }
+
+    @staticmethod
+    def _proxima_liberacao(conta: ContaDigital) -> Optional[datetime]:
+        if not conta.cashback_bloqueado:
+            return None
+        return CashbackRetencao.objects.filter(
+            conta_digital_id=conta.id,
+            status='RETIDO'
+        ).order_by('data_liberacao_prevista').values_list('data_liberacao_prevista', flat=True).first()
+
+    @classmethod
+    def invalidar_saldo(cls, conta: ContaDigital):
+        """
+        Troca a versão do snapshot após o commit. Não grava os valores da
+        instância: commits concorrentes terminam em qualquer ordem e um set
+        aqui deixaria o saldo de uma transação mais antiga no cache
+        """
+        chave = cls._chave_versao(conta.cliente_id, conta.canal_id)
+
+        def trocar_versao():
+            try:
+                cache.set(chave, cls._nova_versao(), timeout=None)
+            except Exception as e:
+                registrar_log('apps.conta_digital', f'Erro ao invalidar snapshot de saldo: {str(e)}', nivel='ERROR')
+
+        transaction.on_commit(trocar_versao)
+
+    @classmethod
+    def obter_snapshot(cls, cliente_id, canal_id) -> Dict:
+        """Snapshot do cache; no miss lê a conta (ou cria, conforme config do canal)"""
+        # Versão lida antes do banco: commit no meio da leitura troca a versão
+        # e o snapshot montado aqui fica órfão na anterior
+        chave = cls._chave_saldo(cliente_id, canal_id, cls._versao_saldo(cliente_id, canal_id))
+        snapshot = cache.get(chave)
+        if snapshot is None:
+            conta = ContaDigital.objects.filter(cliente_id=cliente_id, canal_id=canal_id).first()
+            if conta is None:
+                from .services import ContaDigitalService
+                conta = ContaDigitalService.obter_ou_criar_conta(cliente_id, canal_id)
+            snapshot = cls._montar_snapshot(conta, cls._proxima_liberacao(conta))
+            # Dentro de transação a leitura pode ter dados não commitados (ou
+            # um snapshot MVCC anterior à versão lida): não grava
+            if not transaction.get_connection().in_atomic_block:
+                # add: entre leituras concorrentes do miss, fica a primeira gravada
+                cache.add(chave, snapshot, cls.CACHE_TIMEOUT)
+        return snapshot
+
+    # ------------------------------------------------------------------
+    # Extrato
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def listar_movimentacoes(cls, conta_id, data_inicio=None, data_fim=None, tipo_movimentacao=None,
+                             limite=50, cursor_pagina=None) -> Tuple[List[MovimentacaoContaDigital], Optional[str]]:
+        """
+        Uma página do extrato (movimentações + tipo em um JOIN)
+
+        Returns:
+            tuple: (movimentações, proximo_cursor - None na última página)
+        """
+        movimentacoes = MovimentacaoContaDigital.objects.select_related('tipo_movimentacao').filter(
+            conta_digital_id=conta_id,
+            tipo_movimentacao__visivel_extrato=True
+        )
+        if data_inicio:
+            movimentacoes = movimentacoes.filter(data_movimentacao__gte=data_inicio)
+        if data_fim:
+            movimentacoes = movimentacoes.filter(data_movimentacao__lte=data_fim)
+        if tipo_movimentacao:
+            movimentacoes = movimentacoes.filter(tipo_movimentacao__codigo=tipo_movimentacao)
+
+        posicao = cls._decodificar_cursor(cursor_pagina)
+        if posicao:
+            data, movimentacao_id = posicao
+            movimentacoes = movimentacoes.filter(
+                Q(data_movimentacao__lt=data) | Q(data_movimentacao=data, id__lt=movimentacao_id)
+            )
+
+        pagina = list(movimentacoes.order_by('-data_movimentacao', '-id')[:limite + 1])
+        proximo_cursor = None
+        if len(pagina) > limite:
+            pagina = pagina[:limite]
+            proximo_cursor = cls._codificar_cursor(pagina[-1])
+        return pagina, proximo_cursor
+
+    @staticmethod
+    def cashback_info(movimentacoes: List[MovimentacaoContaDigital]) -> Dict[int, Dict]:
+        """Dados de cashback por movimentação (formato esperado pelo MovimentacaoSerializer)"""
+        return {
+            m.id: {
+                'tipo_origem': m.cashback_tipo_origem,
+                'status': m.cashback_status,
+                'aplicado_em': m.cashback_aplicado_em,
+            }
+            for m in movimentacoes
+            if m.cashback_status
+        }
+
+    @staticmethod
+    def registrar_cashback(cashback_uso):
+        """Copia origem/status/data do CashbackUso para a movimentação de crédito"""
+        if not cashback_uso.movimentacao_id:
+            return
+        MovimentacaoContaDigital.objects.filter(id=cashback_uso.movimentacao_id).update(
+            cashback_tipo_origem=cashback_uso.tipo_origem,
+            cashback_status=cashback_uso.status,
+            cashback_aplicado_em=cashback_uso.aplicado_em
+        )
+
+    @staticmethod
+    def _codificar_cursor(movimentacao: MovimentacaoContaDigital) -> str:
+        return f"{movimentacao.data_movimentacao.strftime('%Y-%m-%d %H:%M:%S.%f')}|{movimentacao.id}"
+
+    @staticmethod
+    def _decodificar_cursor(cursor_pagina):
+        if not cursor_pagina:
+            return None
+        try:
+            data, movimentacao_id = str(cursor_pagina).rsplit('|', 1)
+            return (datetime.strptime(data, '%Y-%m-%d %H:%M:%S.%f'), int(movimentacao_id))
+        except ValueError:
+            registrar_log('apps.conta_digital', f"Cursor de extrato inválido: {cursor_pagina}", nivel='WARNING')
+            return None
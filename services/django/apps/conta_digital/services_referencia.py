@@ -0,0 +1,110 @@
+"""
+Tabelas de referência da conta digital em memória do processo:
+tipos de movimentação (por código) e configurações por canal.
+
+Carregadas uma vez por processo (2 queries) e recarregadas quando a chave de
+versão no cache muda - incrementada após o commit de qualquer alteração - ou
+após MEMO_TIMEOUT (rede de segurança para alterações direto no banco).
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from wallclub_core.utilitarios.log_control import registrar_log
+from .models import ConfiguracaoContaDigital, TipoMovimentacao
+
+
+class ReferenciaContaDigitalService:
+    """
+    - conta_digital:referencia:versao: incrementada (após commit) a cada escrita
+    - memo local do processo: (versão, carregado_em, tipos por código, configurações por canal)
+
+    As instâncias devolvidas são compartilhadas entre requests: somente leitura.
+    """
+
+    CHAVE_VERSAO = 'conta_digital:referencia:versao'
+    MEMO_TIMEOUT = 600
+
+    _lock = threading.Lock()
+    _memo: Optional[Tuple[int, float, Dict[str, TipoMovimentacao], Dict[int, ConfiguracaoContaDigital]]] = None
+
+    @staticmethod
+    def _nova_versao() -> int:
+        return time.time_ns() // 1000
+
+    @classmethod
+    def versao(cls) -> int:
+        versao = cache.get(cls.CHAVE_VERSAO)
+        if versao is None:
+            versao = cls._nova_versao()
+            if not cache.add(cls.CHAVE_VERSAO, versao, timeout=None):
+                versao = cache.get(cls.CHAVE_VERSAO, versao)
+        return versao
+
+    @classmethod
+    def invalidar(cls):
+        """Chamar após criar/alterar tipo de movimentação ou configuração de canal"""
+        transaction.on_commit(
+            lambda: cache.set(cls.CHAVE_VERSAO, cls._nova_versao(), timeout=None)
+        )
+
+    @classmethod
+    def _valido(cls, memo, versao) -> bool:
+        return memo is not None and memo[0] == versao and time.monotonic() - memo[1] < cls.MEMO_TIMEOUT
+
+    @classmethod
+    def _referencias(cls):
+        versao = cls.versao()
+        memo = cls._memo
+        if cls._valido(memo, versao):
+            return memo
+
+        with cls._lock:
+            memo = cls._memo
+            if not cls._valido(memo, versao):
+                tipos = {tipo.codigo: tipo for tipo in TipoMovimentacao.objects.all()}
+                configuracoes = {config.canal_id: config for config in ConfiguracaoContaDigital.objects.all()}
+                memo = (versao, time.monotonic(), tipos, configuracoes)
+                cls._memo = memo
+                registrar_log('apps.conta_digital',
+                    f'Referências carregadas: {len(tipos)} tipos de movimentação, '
+                    f'{len(configuracoes)} configurações de canal', nivel='DEBUG')
+            return memo
+
+    # ------------------------------------------------------------------
+    # Tipos de movimentação
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def tipo_movimentacao(cls, codigo: str) -> TipoMovimentacao:
+        """
+        Equivalente a TipoMovimentacao.objects.get(codigo=codigo)
+
+        Raises:
+            TipoMovimentacao.DoesNotExist
+        """
+        tipo = cls._referencias()[2].get(codigo)
+        if tipo is None:
+            raise TipoMovimentacao.DoesNotExist(f"Tipo de movimentação '{codigo}' não cadastrado")
+        return tipo
+
+    @classmethod
+    def tipos_movimentacao(cls) -> Dict[str, TipoMovimentacao]:
+        """Todos os tipos por código (para jobs em lote)"""
+        return dict(cls._referencias()[2])
+
+    # ------------------------------------------------------------------
+    # Configurações por canal
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def configuracao_canal(cls, canal_id) -> Optional[ConfiguracaoContaDigital]:
+        return cls._referencias()[3].get(int(canal_id))
+
+    @classmethod
+    def configuracoes_canais(cls) -> Dict[int, ConfiguracaoContaDigital]:
+        """Todas as configurações por canal_id (para jobs em lote)"""
+        return dict(cls._referencias()[3])
@@ -174,7 +174,8 @@ def extrato(request):
             'data_inicio': request.data.get('data_inicio'),
             'data_fim': request.data.get('data_fim'),
             'tipo_movimentacao': request.data.get('tipo_movimentacao'),
-            'limite': int(request.data.get('limite', 50))
+            'limite': int(request.data.get('limite', 50)),
+            'cursor': request.data.get('cursor')
         }
         
         # Remover valores None
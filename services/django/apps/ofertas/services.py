@@ -11,6 +11,7 @@ import threading
 from typing import List, Optional
 
 from apps.ofertas.models import Oferta, OfertaDisparo, OfertaEnvio
+from apps.ofertas.services_segmentacao import SegmentacaoService
 from apps.cliente.models import Cliente
 from wallclub_core.integracoes.notification_service import NotificationService
 from wallclub_core.utilitarios.log_control import registrar_log
@@ -116,6 +117,8 @@ class OfertaService:
             ).order_by('-created_at')
 
             # Filtrar por segmentação
+            # Grupos do cliente buscados uma única vez (cache), só se houver oferta segmentada
+            grupos_cliente = None
             resultado = []
             for oferta in ofertas:
                 # Se é 'todos_canal', cliente sempre recebe
@@ -124,12 +127,9 @@ class OfertaService:
                 # Se é 'grupo_customizado', verificar se cliente está no grupo
                 elif oferta.tipo_segmentacao == 'grupo_customizado':
                     if oferta.grupo_id:
-                        with connection.cursor() as cursor:
-                            cursor.execute(
-                                "SELECT 1 FROM ofertas_grupos_clientes WHERE grupo_id = %s AND cliente_id = %s",
-                                [oferta.grupo_id, cliente_id]
-                            )
-                            incluir = cursor.fetchone() is not None
+                        if grupos_cliente is None:
+                            grupos_cliente = SegmentacaoService.grupos_do_cliente(cliente_id)
+                        incluir = oferta.grupo_id in grupos_cliente
                     else:
                         incluir = False
                 else:
@@ -194,12 +194,7 @@ class OfertaService:
                 incluir = True
             elif oferta.tipo_segmentacao == 'grupo_customizado':
                 if oferta.grupo_id:
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "SELECT 1 FROM ofertas_grupos_clientes WHERE grupo_id = %s AND cliente_id = %s",
-                            [oferta.grupo_id, cliente_id]
-                        )
-                        incluir = cursor.fetchone() is not None
+                    incluir = oferta.grupo_id in SegmentacaoService.grupos_do_cliente(cliente_id)
                 else:
                     incluir = False
             else:
@@ -426,6 +421,25 @@ class OfertaService:
             Lista de ofertas
         """
         return list(Oferta.objects.all().order_by('-created_at'))
+
+    @staticmethod
+    def listar_ofertas_canal(canal_id: int, filtro_lojas: str = '1 = 1') -> List[Oferta]:
+        """
+        Ofertas do canal globais (loja_id NULL) ou das lojas do filtro,
+        ordenadas por data de criação
+
+        Args:
+            canal_id: ID do canal
+            filtro_lojas: condição SQL sobre loja_id (EscopoAcessoService.clausula_ids)
+
+        Returns:
+            Lista de ofertas
+        """
+        return list(
+            Oferta.objects.filter(canal_id=canal_id)
+            .extra(where=[f"(loja_id IS NULL OR {filtro_lojas})"])
+            .order_by('-created_at')
+        )
     
     @staticmethod
     def obter_oferta_por_id(oferta_id: int) -> Optional[Oferta]:
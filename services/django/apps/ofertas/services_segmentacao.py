@@ -0,0 +1,90 @@
+"""
+Services de segmentação - grupos customizados de clientes (ofertas_grupos_clientes)
+"""
+from datetime import datetime
+from typing import Dict, FrozenSet, Tuple
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+
+from apps.ofertas.models import GrupoCliente
+from wallclub_core.utilitarios.log_control import registrar_log
+
+
+class SegmentacaoService:
+    """
+    Pertencimento de clientes a grupos de segmentação.
+
+    - ofertas:grupos_cliente:<cliente_id>: ids dos grupos do cliente
+      (1 query no cache miss; invalidada ao adicionar/remover o cliente de um grupo)
+    """
+
+    PREFIXO_CACHE = 'ofertas:grupos_cliente'
+    CACHE_TIMEOUT = 3600
+
+    @classmethod
+    def grupos_do_cliente(cls, cliente_id: int) -> FrozenSet[int]:
+        """Ids de todos os grupos de segmentação do cliente"""
+        chave = f"{cls.PREFIXO_CACHE}:{cliente_id}"
+        grupos = cache.get(chave)
+        if grupos is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT grupo_id FROM ofertas_grupos_clientes WHERE cliente_id = %s",
+                    [cliente_id]
+                )
+                grupos = frozenset(row[0] for row in cursor.fetchall())
+            cache.set(chave, grupos, cls.CACHE_TIMEOUT)
+        return grupos
+
+    @classmethod
+    def invalidar_cliente(cls, *cliente_ids: int):
+        chaves = [f"{cls.PREFIXO_CACHE}:{cliente_id}" for cliente_id in cliente_ids]
+        if chaves:
+            transaction.on_commit(lambda: cache.delete_many(chaves))
+
+    @classmethod
+    def adicionar_cliente(cls, grupo_id: int, cliente_id: int) -> Tuple[bool, str]:
+        """
+        Returns:
+            tuple: (sucesso, mensagem)
+        """
+        if GrupoCliente.objects.filter(grupo_id=grupo_id, cliente_id=cliente_id).exists():
+            return False, 'Cliente já está no grupo'
+
+        try:
+            GrupoCliente.objects.create(
+                grupo_id=grupo_id,
+                cliente_id=cliente_id,
+                adicionado_em=datetime.now()
+            )
+        except IntegrityError:
+            return False, 'Cliente já está no grupo'
+
+        cls.invalidar_cliente(cliente_id)
+        registrar_log('apps.ofertas', f'Cliente {cliente_id} adicionado ao grupo {grupo_id}')
+        return True, 'Cliente adicionado'
+
+    @classmethod
+    def remover_cliente(cls, grupo_id: int, cliente_id: int) -> Tuple[bool, str]:
+        """
+        Returns:
+            tuple: (sucesso, mensagem)
+        """
+        removidos, _ = GrupoCliente.objects.filter(grupo_id=grupo_id, cliente_id=cliente_id).delete()
+        if not removidos:
+            return False, 'Vínculo não encontrado'
+
+        cls.invalidar_cliente(cliente_id)
+        registrar_log('apps.ofertas', f'Cliente {cliente_id} removido do grupo {grupo_id}')
+        return True, 'Cliente removido'
+
+    @staticmethod
+    def totais_por_grupo() -> Dict[int, int]:
+        """Quantidade de clientes de cada grupo (uma query agregada)"""
+        return dict(
+            GrupoCliente.objects.values('grupo_id')
+            .annotate(total=Count('id'))
+            .values_list('grupo_id', 'total')
+        )
@@ -13,6 +13,7 @@ class ExtratoRequestSerializer(serializers.Serializer):
     data_inicio = serializers.DateField(required=False)
     data_fim = serializers.DateField(required=False)
     limite = serializers.IntegerField(min_value=1, max_value=100, default=50)
+    cursor = serializers.CharField(required=False, allow_blank=True)  # proximo_cursor da página anterior
     
     def validate(self, data):
         """Validações customizadas"""
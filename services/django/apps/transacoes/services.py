@@ -64,7 +64,10 @@ class TransacaoService:
             registrar_log('apps.transacoes', f"Erro ao verificar cancelamento NSU {nsu}: {str(e)}", nivel='ERROR')
             return False
 
-    def consultar_extrato(self, id_usuario_app, dt_inicio, dt_fim):
+    # Linhas por página na leitura do extrato (keyset em data_transacao, id)
+    EXTRATO_TAMANHO_PAGINA = 500
+
+    def consultar_extrato(self, id_usuario_app, dt_inicio, dt_fim, limite=None, cursor_pagina=None):
         """
         Consulta extrato - LÓGICA EXATA DO extrato.php
 
@@ -72,9 +75,12 @@ class TransacaoService:
             id_usuario_app (int): ID do usuário no app (cadastro.id)
             dt_inicio (str): Data início (YYYY-MM-DD HH:MM:SS)
             dt_fim (str): Data fim (YYYY-MM-DD HH:MM:SS)
+            limite (int): Opcional - retorna só uma página com este tamanho
+            cursor_pagina (str): Opcional - proximo_cursor da página anterior
 
         Returns:
             dict: Dados do extrato formatados igual ao PHP
+                  (com limite: inclui proximo_cursor, None na última página)
         """
         try:
             registrar_log('apps.transacoes',
@@ -101,107 +107,175 @@ class TransacaoService:
                 registrar_log('apps.transacoes', f"Cliente não encontrado: {id_usuario_app}", nivel='ERROR')
                 return {'erro': 'Cliente não encontrado'}
 
-            with connection.cursor() as cursor:
-                # Migrado para base_transacoes_unificadas (1 linha por NSU)
-                query = """
-                    SELECT
-                        btu.data_transacao,
-                        btu.var5,
-                        btu.var11,
-                        CASE
-                            WHEN btu.var13 >= 1 THEN ABS(btu.var13 * btu.var20)
-                            ELSE btu.var26
-                        END - COALESCE(btu.valor_cashback, 0),
-                        btu.var13,
-                        btu.var3,
-                        btu.var12,
-                        btu.card_number,
-                        btu.var9,
-                        CASE
-                            WHEN btu.var8 = 'A VISTA' THEN 'CREDIT_ONE_INSTALLMENT'
-                            WHEN btu.var8 = 'DEBITO' THEN 'DEBIT'
-                            WHEN btu.var8 = 'PARCELADO SEM JUROS' THEN 'CREDIT_IN_INSTALLMENTS_WITHOUT_INTEREST'
-                            WHEN btu.var8 = 'PARCELADO COM JUROS' THEN 'CREDIT_IN_INSTALLMENTS_WITH_INTEREST'
-                            ELSE btu.var2
-                        END
-                    FROM wallclub.base_transacoes_unificadas btu
-                    INNER JOIN wallclub.canal canal ON btu.var4 = canal.nome
-                    WHERE btu.var7 = %s AND canal.id = %s
-                      AND btu.data_transacao >= %s
-                      AND btu.data_transacao < CONCAT(%s, ' 23:59:59')
-                    ORDER BY btu.data_transacao DESC
-                """
-
-                cursor.execute(query, [cpf_cliente, canal_id, dt_inicio, dt_fim])
+            # var4 guarda o nome do canal: resolve id -> nome pela árvore da hierarquia
+            # (substitui o JOIN canal ON btu.var4 = canal.nome)
+            from wallclub_core.estr_organizacional.arvore import ArvoreHierarquiaService
+            canal = ArvoreHierarquiaService.obter_arvore().no('canal', canal_id)
 
-                extrato = []
-                for row in cursor.fetchall():
-                    data, estab, valoro, valord, parcelas, forma, band, card, nsu, metodo = row
+            posicao = self._decodificar_cursor_extrato(cursor_pagina)
+            extrato = []
+            proximo_cursor = None
 
-                    # Formatação de forma de pagamento
-                    if metodo == 'CREDIT_ONE_INSTALLMENT':
-                        forma = "crédito à vista"
-                    elif metodo in ['CREDIT_IN_INSTALLMENTS_WITHOUT_INTEREST', 'CREDIT_IN_INSTALLMENTS_WITH_INTEREST']:
-                        forma = "crédito"
-                    elif metodo == 'DEBIT':
-                        forma = "débito"
+            while canal is not None:
+                tamanho = self.EXTRATO_TAMANHO_PAGINA
+                if limite:
+                    tamanho = min(tamanho, limite - len(extrato))
 
-                    if band == "PIX":
-                        forma = ''
+                linhas = self._buscar_pagina_extrato(cpf_cliente, canal.nome, dt_inicio, dt_fim, posicao, tamanho)
+                if not linhas:
+                    break
 
-                    # Formatação do cartão
-                    if card and len(str(card)) > 6:
-                        card = f"Cartão final {str(card)[-3:]}"
-                    else:
-                        card = ""
-
-                    forma = f" {forma}" if forma else ''
+                # Cancelamentos da página inteira em uma query
+                from wallclub_core.database.queries import TransacoesQueries
+                cancelados = TransacoesQueries.listar_nsus_cancelados([linha[8] for linha in linhas])
 
-                    # Status de cancelamento
-                    status = " (CANCELADA)" if self.verificar_transacao_cancelada(nsu) else ""
+                for linha in linhas:
+                    extrato.append(self._formatar_linha_extrato(linha[:10], str(linha[8]) in cancelados))
 
-                    # Descrição formatada
-                    if band == "PIX":
-                        descricao = f"{estab}\\n\\n{data}\\n\\nPIX{card}{status}"
-                    else:
-                        descricao = f"{estab}\\n\\n{data}\\n\\n{band}{forma}{card}{status}"
-
-                    # Formatar data no padrão YYYY-MM-DD HH:MM:SS
-                    if isinstance(data, str):
-                        try:
-                            dt = datetime.strptime(data, '%Y-%m-%d %H:%M:%S')
-                            data_formatada = dt.strftime('%Y-%m-%d %H:%M:%S')
-                        except:
-                            data_formatada = str(data)
-                    else:
-                        data_formatada = data.strftime('%Y-%m-%d %H:%M:%S') if data else ""
-
-                    extrato.append({
-                        'data': data_formatada,
-                        'estabelecimento': str(estab),
-                        'valor_original': valoro or Decimal('0.00'),
-                        'valor_decimal': valord or Decimal('0.00'),
-                        'parcelas': int(parcelas) if parcelas else 1,
-                        'forma_pagamento': str(forma).strip(),
-                        'bandeira': str(band),
-                        'cartao': str(card),
-                        'nsu': str(nsu),
-                        'metodo': str(metodo),
-                        'descricao': descricao,
-                        'cancelada': self.verificar_transacao_cancelada(nsu)
-                    })
+                posicao = (linhas[-1][0], linhas[-1][10])
+                if len(linhas) < tamanho:
+                    break
+                if limite and len(extrato) >= limite:
+                    proximo_cursor = self._codificar_cursor_extrato(posicao)
+                    break
 
-                return {
-                    'sucesso': True,
-                    'mensagem': 'Extrato consultado com sucesso',
-                    'extrato': extrato,
-                    'total': len(extrato)
-                }
+            resultado = {
+                'sucesso': True,
+                'mensagem': 'Extrato consultado com sucesso',
+                'extrato': extrato,
+                'total': len(extrato)
+            }
+            if limite:
+                resultado['proximo_cursor'] = proximo_cursor
+            return resultado
 
         except Exception as e:
             registrar_log('apps.transacoes', f"Erro ao consultar extrato: {str(e)}", nivel='ERROR')
             return {'sucesso': False, 'mensagem': 'Erro interno do servidor'}
 
+    @staticmethod
+    def _buscar_pagina_extrato(cpf_cliente, canal_nome, dt_inicio, dt_fim, posicao, tamanho):
+        """
+        Página do extrato em ordem decrescente de (data_transacao, id).
+        posicao: (data_transacao, id) da última linha da página anterior ou None
+        """
+        params = [cpf_cliente, canal_nome, dt_inicio, dt_fim]
+        filtro_pagina = ""
+        if posicao:
+            filtro_pagina = """
+                      AND (btu.data_transacao < %s
+                           OR (btu.data_transacao = %s AND btu.id < %s))"""
+            params.extend([posicao[0], posicao[0], posicao[1]])
+        params.append(tamanho)
+
+        with connection.cursor() as cursor:
+            # Migrado para base_transacoes_unificadas (1 linha por NSU)
+            cursor.execute(f"""
+                SELECT
+                    btu.data_transacao,
+                    btu.var5,
+                    btu.var11,
+                    CASE
+                        WHEN btu.var13 >= 1 THEN ABS(btu.var13 * btu.var20)
+                        ELSE btu.var26
+                    END - COALESCE(btu.valor_cashback, 0),
+                    btu.var13,
+                    btu.var3,
+                    btu.var12,
+                    btu.card_number,
+                    btu.var9,
+                    CASE
+                        WHEN btu.var8 = 'A VISTA' THEN 'CREDIT_ONE_INSTALLMENT'
+                        WHEN btu.var8 = 'DEBITO' THEN 'DEBIT'
+                        WHEN btu.var8 = 'PARCELADO SEM JUROS' THEN 'CREDIT_IN_INSTALLMENTS_WITHOUT_INTEREST'
+                        WHEN btu.var8 = 'PARCELADO COM JUROS' THEN 'CREDIT_IN_INSTALLMENTS_WITH_INTEREST'
+                        ELSE btu.var2
+                    END,
+                    btu.id
+                FROM wallclub.base_transacoes_unificadas btu
+                WHERE btu.var7 = %s AND btu.var4 = %s
+                  AND btu.data_transacao >= %s
+                  AND btu.data_transacao < CONCAT(%s, ' 23:59:59'){filtro_pagina}
+                ORDER BY btu.data_transacao DESC, btu.id DESC
+                LIMIT %s
+            """, params)
+            return cursor.fetchall()
+
+    @staticmethod
+    def _codificar_cursor_extrato(posicao):
+        data, btu_id = posicao
+        data = data.strftime('%Y-%m-%d %H:%M:%S') if hasattr(data, 'strftime') else str(data)
+        return f"{data}|{btu_id}"
+
+    @staticmethod
+    def _decodificar_cursor_extrato(cursor_pagina):
+        if not cursor_pagina:
+            return None
+        try:
+            data, btu_id = str(cursor_pagina).rsplit('|', 1)
+            return (datetime.strptime(data, '%Y-%m-%d %H:%M:%S'), int(btu_id))
+        except ValueError:
+            registrar_log('apps.transacoes', f"Cursor de extrato inválido: {cursor_pagina}", nivel='WARNING')
+            return None
+
+    @staticmethod
+    def _formatar_linha_extrato(row, cancelada):
+        """Item do extrato no formato do extrato.php"""
+        data, estab, valoro, valord, parcelas, forma, band, card, nsu, metodo = row
+
+        # Formatação de forma de pagamento
+        if metodo == 'CREDIT_ONE_INSTALLMENT':
+            forma = "crédito à vista"
+        elif metodo in ['CREDIT_IN_INSTALLMENTS_WITHOUT_INTEREST', 'CREDIT_IN_INSTALLMENTS_WITH_INTEREST']:
+            forma = "crédito"
+        elif metodo == 'DEBIT':
+            forma = "débito"
+
+        if band == "PIX":
+            forma = ''
+
+        # Formatação do cartão
+        if card and len(str(card)) > 6:
+            card = f"Cartão final {str(card)[-3:]}"
+        else:
+            card = ""
+
+        forma = f" {forma}" if forma else ''
+
+        # Status de cancelamento
+        status = " (CANCELADA)" if cancelada else ""
+
+        # Descrição formatada
+        if band == "PIX":
+            descricao = f"{estab}\\n\\n{data}\\n\\nPIX{card}{status}"
+        else:
+            descricao = f"{estab}\\n\\n{data}\\n\\n{band}{forma}{card}{status}"
+
+        # Formatar data no padrão YYYY-MM-DD HH:MM:SS
+        if isinstance(data, str):
+            try:
+                dt = datetime.strptime(data, '%Y-%m-%d %H:%M:%S')
+                data_formatada = dt.strftime('%Y-%m-%d %H:%M:%S')
+            except:
+                data_formatada = str(data)
+        else:
+            data_formatada = data.strftime('%Y-%m-%d %H:%M:%S') if data else ""
+
+        return {
+            'data': data_formatada,
+            'estabelecimento': str(estab),
+            'valor_original': valoro or Decimal('0.00'),
+            'valor_decimal': valord or Decimal('0.00'),
+            'parcelas': int(parcelas) if parcelas else 1,
+            'forma_pagamento': str(forma).strip(),
+            'bandeira': str(band),
+            'cartao': str(card),
+            'nsu': str(nsu),
+            'metodo': str(metodo),
+            'descricao': descricao,
+            'cancelada': cancelada
+        }
+
     def gerar_comprovante(self, nsu_pinbank, cliente_id):
         """
         Gera comprovante de transação específica - COMPLETO
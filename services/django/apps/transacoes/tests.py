@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from wallclub_core.estr_organizacional.arvore import ArvoreHierarquia
+
+from .services import TransacaoService
+
+
+class CursorFalso:
+    """Cursor que registra as queries e responde a partir de linhas em memória"""
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.resultado = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        params = list(params or [])
+        self.conexao.queries.append(sql)
+        if 'baseTransacoesGestao' in sql:
+            self.resultado = [(nsu,) for nsu in params if nsu in self.conexao.cancelados]
+            return
+
+        # Extrato: [cpf, canal, inicio, fim, (data, data, id)?, limite]
+        linhas = self.conexao.linhas
+        if len(params) == 8:
+            data, _, btu_id = params[4:7]
+            linhas = [l for l in linhas if (l[0], l[10]) < (data, btu_id)]
+        self.resultado = linhas[:params[-1]]
+
+    def fetchall(self):
+        return self.resultado
+
+
+class ConexaoFalsa:
+    def __init__(self, total_linhas, cancelados=()):
+        inicio = datetime(2025, 1, 31, 23, 0, 0)
+        # Ordem decrescente de (data_transacao, id), com datas repetidas
+        self.linhas = [
+            (inicio - timedelta(minutes=i // 2), 'Loja', Decimal('10.00'), Decimal('9.50'), 1,
+             'A VISTA', 'VISA', '4111111111111111', str(100000 + i), 'CREDIT_ONE_INSTALLMENT',
+             total_linhas - i)
+            for i in range(total_linhas)
+        ]
+        self.cancelados = set(cancelados)
+        self.queries = []
+
+    def cursor(self):
+        return CursorFalso(self)
+
+
+class ConsultarExtratoQueryCountTest(SimpleTestCase):
+    """Quantidade de queries do extrato independe do número de linhas"""
+
+    def _consultar(self, conexao, **kwargs):
+        cliente = mock.Mock(canal_id=1, cpf='123.456.789-00')
+        arvore = ArvoreHierarquia([(1, 'WALLCLUB', 'wallclub')], [], [], [], [])
+        with mock.patch('apps.cliente.models.Cliente.objects') as clientes, \
+                mock.patch('wallclub_core.estr_organizacional.arvore.ArvoreHierarquiaService.obter_arvore',
+                           return_value=arvore), \
+                mock.patch('apps.transacoes.services.connection', conexao), \
+                mock.patch('wallclub_core.database.queries.connection', conexao):
+            clientes.get.return_value = cliente
+            return TransacaoService().consultar_extrato(1, '2025-01-01', '2025-01-31', **kwargs)
+
+    def test_uma_query_de_cancelamento_por_pagina(self):
+        conexao = ConexaoFalsa(20, cancelados={'100003'})
+        resultado = self._consultar(conexao)
+
+        self.assertEqual(resultado['total'], 20)
+        self.assertEqual(len(conexao.queries), 2)
+        self.assertTrue(resultado['extrato'][3]['cancelada'])
+        self.assertIn('(CANCELADA)', resultado['extrato'][3]['descricao'])
+        self.assertFalse(resultado['extrato'][4]['cancelada'])
+
+    def test_periodo_longo_lido_em_paginas(self):
+        conexao = ConexaoFalsa(1200)
+        resultado = self._consultar(conexao)
+
+        paginas = -(-1200 // TransacaoService.EXTRATO_TAMANHO_PAGINA)
+        self.assertEqual(resultado['total'], 1200)
+        self.assertEqual(len(conexao.queries), 2 * paginas)
+        self.assertEqual(len({item['nsu'] for item in resultado['extrato']}), 1200)
+
+    def test_paginacao_por_cursor(self):
+        conexao = ConexaoFalsa(7)
+        primeira = self._consultar(conexao, limite=4)
+        segunda = self._consultar(conexao, limite=4, cursor_pagina=primeira['proximo_cursor'])
+
+        self.assertEqual([i['nsu'] for i in primeira['extrato'] + segunda['extrato']],
+                         [str(100000 + i) for i in range(7)])
+        self.assertIsNone(segunda['proximo_cursor'])
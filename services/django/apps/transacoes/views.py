@@ -80,10 +80,15 @@ def extrato(request):
         dt_fim = serializer.validated_data.get('data_fim')
         
         
+        # Paginação só quando o app pede (limite/cursor); sem isso retorna o período inteiro
+        paginar = 'limite' in request.data or 'cursor' in request.data
+
         # Chamar service com lógica EXATA do PHP usando cliente_id correto
         service = TransacaoService()
         resultado = service.consultar_extrato(
-            cliente_id, dt_inicio, dt_fim
+            cliente_id, dt_inicio, dt_fim,
+            limite=serializer.validated_data.get('limite') if paginar else None,
+            cursor_pagina=serializer.validated_data.get('cursor') or None
         )
         
         
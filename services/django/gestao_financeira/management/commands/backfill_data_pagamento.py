@@ -0,0 +1,79 @@
+"""
+Management command para preencher data_pagamento (var45 tipada) nas linhas
+anteriores ao DDL docs/sql/007_data_pagamento_tipada.sql.
+
+Percorre a tabela em faixas de id (cada lote em transação própria), converte
+var45 em Python (converter_data_ou_nula) e grava um UPDATE por data distinta
+do lote. var45 vazia ou fora do padrão fica NULL. Pode ser interrompido e
+retomado com --desde-id.
+
+Uso:
+    python manage.py backfill_data_pagamento
+    python manage.py backfill_data_pagamento --tabela base_transacoes_unificadas --lote 20000
+    python manage.py backfill_data_pagamento --desde-id 1500000
+"""
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
+from wallclub_core.utilitarios.log_control import registrar_log
+
+TABELAS = ('base_transacoes_unificadas', 'pagamentos_efetuados')
+
+
+class Command(BaseCommand):
+    help = 'Preenche data_pagamento a partir de var45 (base unificada e pagamentos efetuados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tabela', choices=TABELAS, action='append', dest='tabelas',
+                            help='Tabela a preencher (pode repetir). Padrão: ambas')
+        parser.add_argument('--lote', type=int, default=10000,
+                            help='Linhas por transação (padrão: 10000)')
+        parser.add_argument('--desde-id', type=int, default=0,
+                            help='Retoma a partir deste id (padrão: 0)')
+
+    def handle(self, *args, **options):
+        for tabela in options.get('tabelas') or TABELAS:
+            inicio = time.perf_counter()
+            atualizadas, ultimo_id = self._preencher(tabela, options['lote'], options['desde_id'])
+            duracao = time.perf_counter() - inicio
+            registrar_log('gestao_financeira',
+                          f"Backfill data_pagamento {tabela}: {atualizadas} linhas até id {ultimo_id} em {duracao:.1f}s")
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {tabela}: {atualizadas} linhas com data_pagamento (último id {ultimo_id}, {duracao:.1f}s)'
+            ))
+
+    def _preencher(self, tabela, tamanho_lote, desde_id):
+        atualizadas = 0
+        ultimo_id = desde_id
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT id, var45 FROM {tabela} "
+                    f"WHERE id > %s AND data_pagamento IS NULL AND var45 IS NOT NULL AND var45 != '' "
+                    f"ORDER BY id LIMIT %s",
+                    [ultimo_id, tamanho_lote]
+                )
+                linhas = cursor.fetchall()
+                if not linhas:
+                    return atualizadas, ultimo_id
+
+                ids_por_data = defaultdict(list)
+                for id_linha, var45 in linhas:
+                    data = converter_data_ou_nula(var45)
+                    if data is not None:
+                        ids_por_data[data].append(id_linha)
+
+                for data, ids in ids_por_data.items():
+                    cursor.execute(
+                        f"UPDATE {tabela} SET data_pagamento = %s "
+                        f"WHERE id IN ({','.join(['%s'] * len(ids))})",
+                        [data] + ids
+                    )
+                    atualizadas += len(ids)
+
+            ultimo_id = linhas[-1][0]
+            self.stdout.write(f'{tabela}: id {ultimo_id} ({atualizadas} atualizadas)')
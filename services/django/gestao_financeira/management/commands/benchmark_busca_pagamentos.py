@@ -0,0 +1,131 @@
+"""
+Benchmark da busca de pagamentos (portal admin) e do relatório financeiro.
+
+Gera --linhas pagamentos sintéticos em pagamentos_efetuados dentro de uma
+transação desfeita ao final (nada fica gravado) e mede, por página da busca
+por período:
+
+- legado: COUNT da tabela inteira + COUNT do Paginator + EXISTS + página
+  (fluxo anterior da view pagamentos_busca)
+- resumo: uma agregação (COUNT/SUM/AVG) + página, cache vazio
+- resumo_cache: total vindo do cache por hash dos filtros + página
+
+Com --lojas, mede também obter_relatorio_financeiro sobre os dados reais de
+base_transacoes_unificadas: primeira chamada (agregação no banco) vs cache.
+
+Uso:
+    python manage.py benchmark_busca_pagamentos
+    python manage.py benchmark_busca_pagamentos --linhas 500000 --repeticoes 10 --lojas 1,2,3
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from gestao_financeira.models import PagamentoEfetuado
+from gestao_financeira.services import PagamentoService
+
+INICIO = date(2025, 1, 1)
+DIAS = 365
+
+
+class Command(BaseCommand):
+    help = 'Benchmark: busca de pagamentos (COUNTs por página vs agregação em cache) e relatório financeiro'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=200000, help='Pagamentos sintéticos (padrão: 200000)')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Execuções por cenário (padrão: 5)')
+        parser.add_argument('--lojas', type=str, default='', help='IDs de lojas para o relatório financeiro (ex: 1,2,3)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        filtros = {'data_inicio': '2025-06-01', 'data_fim': '2025-06-30'}
+        repeticoes = options['repeticoes']
+
+        with transaction.atomic():
+            inicio = time.perf_counter()
+            self._gerar_pagamentos(options['linhas'], options['seed'])
+            self.stdout.write(f"{options['linhas']} pagamentos gerados em {time.perf_counter() - inicio:.1f}s")
+
+            totais = {}
+            for nome, busca in (
+                ('legado', lambda: self._busca_legado(filtros)),
+                ('resumo', lambda: self._busca_resumo(filtros, limpar_cache=True)),
+                ('resumo_cache', lambda: self._busca_resumo(filtros, limpar_cache=False)),
+            ):
+                tempos = []
+                for _ in range(repeticoes):
+                    t0 = time.perf_counter()
+                    totais[nome] = busca()
+                    tempos.append((time.perf_counter() - t0) * 1000)
+                self.stdout.write(f'busca {nome:14s} mediana {statistics.median(tempos):9.1f}ms  '
+                                  f'min {min(tempos):9.1f}ms  total {totais[nome]}')
+
+            transaction.set_rollback(True)
+
+        if options['lojas']:
+            self._relatorio([int(loja) for loja in options['lojas'].split(',')], repeticoes)
+
+        if len(set(totais.values())) != 1:
+            self.stdout.write(self.style.ERROR('Totais divergentes entre os cenários'))
+            return
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    def _gerar_pagamentos(self, linhas, seed):
+        rnd = random.Random(seed)
+        lote = []
+        for i in range(linhas):
+            dia = INICIO + timedelta(days=rnd.randrange(DIAS))
+            lote.append(PagamentoEfetuado(
+                nsu=900000000 + i,
+                var45=dia.strftime('%d/%m/%Y'),
+                data_pagamento=dia,
+                var111=Decimal(rnd.randrange(100, 500000)) / 100,
+            ))
+            if len(lote) == 5000:
+                PagamentoEfetuado.objects.bulk_create(lote)
+                lote = []
+        if lote:
+            PagamentoEfetuado.objects.bulk_create(lote)
+
+    @staticmethod
+    def _busca_legado(filtros):
+        PagamentoEfetuado.objects.count()
+        pagamentos = PagamentoService.buscar_pagamentos(filtros)
+        paginator = Paginator(pagamentos, 20)
+        list(paginator.get_page(2))
+        return paginator.count if pagamentos.exists() else 0
+
+    @staticmethod
+    def _busca_resumo(filtros, limpar_cache):
+        if limpar_cache:
+            cache.set(PagamentoService.CHAVE_VERSAO_PAGAMENTOS, time.time_ns(), timeout=None)
+        resumo = PagamentoService.resumo_pagamentos(filtros)
+        paginator = Paginator(PagamentoService.buscar_pagamentos(filtros), 20)
+        paginator.count = resumo['total']
+        list(paginator.get_page(2))
+        return resumo['total']
+
+    def _relatorio(self, lojas_ids, repeticoes):
+        data_inicio, data_fim = '2025-06-01', '2025-06-30'
+        chave = PagamentoService._chave_relatorio(lojas_ids, data_inicio, data_fim)
+        tempos = {'banco': [], 'cache': []}
+        for _ in range(repeticoes):
+            for cenario in ('banco', 'cache'):
+                if cenario == 'banco':
+                    cache.delete(chave)
+                t0 = time.perf_counter()
+                resultado = PagamentoService.obter_relatorio_financeiro(lojas_ids, data_inicio, data_fim)
+                tempos[cenario].append((time.perf_counter() - t0) * 1000)
+        for cenario, valores in tempos.items():
+            self.stdout.write(f'relatorio {cenario:10s} mediana {statistics.median(valores):9.1f}ms  '
+                              f'min {min(valores):9.1f}ms')
+        self.stdout.write(f'relatorio: {resultado}')
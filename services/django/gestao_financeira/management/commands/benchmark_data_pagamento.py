@@ -0,0 +1,190 @@
+"""
+Benchmark dos filtros por data de pagamento: var45 texto vs data_pagamento DATE.
+
+Monta uma cópia sintética de base_transacoes_unificadas (padrão 1 milhão de
+linhas, colunas var6/var45/var111/data_pagamento com o índice
+idx_btu_loja_data_pagamento) no banco configurado (MySQL) e mede, para o
+relatório financeiro (lojas + mês) e os recebimentos por data:
+
+- python: SELECT das linhas das lojas e filtro de var45 em Python (fluxo
+  anterior do obter_relatorio_financeiro)
+- str_to_date: STR_TO_DATE(var45) no WHERE/GROUP BY (não usa índice)
+- data_pagamento: intervalo na coluna DATE com SUM/COUNT no banco
+  (PagamentoService._sql_relatorio_financeiro)
+
+A tabela de teste (bench_btu_data_pagamento) é removida ao final.
+
+Uso:
+    python manage.py benchmark_data_pagamento
+    python manage.py benchmark_data_pagamento --linhas 200000 --lojas 500 --repeticoes 10
+"""
+import statistics
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from gestao_financeira.services import PagamentoService, filtro_data_pagamento
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
+
+TABELA = 'bench_btu_data_pagamento'
+INICIO = date(2025, 1, 1)
+DIAS = 730
+
+
+class Command(BaseCommand):
+    help = 'Benchmark: filtros por data de pagamento em var45 (texto) vs data_pagamento (DATE indexada)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=1000000, help='Linhas da tabela sintética (padrão: 1000000)')
+        parser.add_argument('--lojas', type=int, default=1000, help='Lojas distintas (padrão: 1000)')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Execuções por consulta (padrão: 5)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            self.stdout.write(self.style.ERROR('Benchmark requer MySQL'))
+            return
+
+        lojas_ids = list(range(1, 11))
+        data_inicio, data_fim = '2025-06-01', '2025-06-30'
+        repeticoes = options['repeticoes']
+
+        try:
+            inicio = time.perf_counter()
+            self._montar_tabela(options['linhas'], options['lojas'])
+            self.stdout.write(f"Tabela com {options['linhas']} linhas montada em {time.perf_counter() - inicio:.1f}s")
+
+            resultados = {}
+            for nome, consulta in (
+                ('relatorio python', lambda: self._relatorio_python(lojas_ids, data_inicio, data_fim)),
+                ('relatorio str_to_date', lambda: self._relatorio_str_to_date(lojas_ids, data_inicio, data_fim)),
+                ('relatorio data_pagamento', lambda: self._relatorio_data_pagamento(lojas_ids, data_inicio, data_fim)),
+                ('recebimentos str_to_date', lambda: self._recebimentos_str_to_date(lojas_ids, data_inicio, data_fim)),
+                ('recebimentos data_pagamento', lambda: self._recebimentos_data_pagamento(lojas_ids, data_inicio, data_fim)),
+            ):
+                tempos = []
+                for _ in range(repeticoes):
+                    t0 = time.perf_counter()
+                    resultados[nome] = consulta()
+                    tempos.append((time.perf_counter() - t0) * 1000)
+                self.stdout.write(f'{nome:30s} mediana {statistics.median(tempos):9.1f}ms  '
+                                  f'min {min(tempos):9.1f}ms  resultado {resultados[nome]}')
+
+            self.stdout.write(f"EXPLAIN data_pagamento: {self._explain(lojas_ids, data_inicio, data_fim)}")
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {TABELA}")
+
+        relatorios = {resultados[n] for n in resultados if n.startswith('relatorio')}
+        recebimentos = {resultados[n] for n in resultados if n.startswith('recebimentos')}
+        if len(relatorios) != 1 or len(recebimentos) != 1:
+            self.stdout.write(self.style.ERROR('Resultados divergentes entre as estratégias'))
+            return
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    def _montar_tabela(self, linhas, lojas):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABELA}")
+            cursor.execute(f"""
+                CREATE TABLE {TABELA} (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    var6 INT NULL,
+                    var45 VARCHAR(20) NULL,
+                    var111 VARCHAR(20) NULL,
+                    data_pagamento DATE NULL,
+                    KEY idx_btu_loja_data_pagamento (var6, data_pagamento)
+                ) ENGINE=InnoDB
+            """)
+            # Produto cartesiano de dígitos: n = 0..linhas-1 sem loop em Python
+            digitos = "(SELECT 0 d UNION ALL SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4 " \
+                      "UNION ALL SELECT 5 UNION ALL SELECT 6 UNION ALL SELECT 7 UNION ALL SELECT 8 UNION ALL SELECT 9)"
+            casas = max(1, len(str(max(linhas - 1, 1))))
+            numero = ' + '.join(f'd{i}.d * {10 ** i}' for i in range(casas))
+            origem = ' CROSS JOIN '.join(f'{digitos} d{i}' for i in range(casas))
+            cursor.execute(f"""
+                INSERT INTO {TABELA} (var6, var45, var111, data_pagamento)
+                SELECT
+                    n %% %s + 1,
+                    DATE_FORMAT(DATE_ADD(%s, INTERVAL n %% %s DAY), '%%d/%%m/%%Y'),
+                    CAST((n %% 10000) / 100 AS DECIMAL(15,2)),
+                    DATE_ADD(%s, INTERVAL n %% %s DAY)
+                FROM (SELECT {numero} AS n FROM {origem}) numeros
+                WHERE n < %s
+            """, [lojas, INICIO, DIAS, INICIO, DIAS, linhas])
+            cursor.execute(f"ANALYZE TABLE {TABELA}")
+            cursor.fetchall()
+
+    @staticmethod
+    def _placeholders(valores):
+        return ','.join(['%s'] * len(valores))
+
+    def _relatorio_python(self, lojas_ids, data_inicio, data_fim):
+        inicio = converter_data_ou_nula(data_inicio)
+        fim = converter_data_ou_nula(data_fim)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT var6, var45, var111 FROM {TABELA} WHERE var6 IN ({self._placeholders(lojas_ids)})",
+                lojas_ids
+            )
+            total, valor, lojas = 0, Decimal('0'), set()
+            for var6, var45, var111 in cursor.fetchall():
+                data = converter_data_ou_nula(var45)
+                if data and inicio <= data <= fim:
+                    total += 1
+                    valor += Decimal(var111)
+                    lojas.add(var6)
+        return total, valor, len(lojas)
+
+    def _relatorio_str_to_date(self, lojas_ids, data_inicio, data_fim):
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT COUNT(*), COALESCE(SUM(CAST(var111 AS DECIMAL(15,2))), 0), COUNT(DISTINCT var6)
+                FROM {TABELA}
+                WHERE var6 IN ({self._placeholders(lojas_ids)})
+                  AND STR_TO_DATE(var45, '%%d/%%m/%%Y') >= %s
+                  AND STR_TO_DATE(var45, '%%d/%%m/%%Y') <= %s
+            """, lojas_ids + [data_inicio, data_fim])
+            return cursor.fetchone()
+
+    def _relatorio_data_pagamento(self, lojas_ids, data_inicio, data_fim):
+        sql, params = PagamentoService._sql_relatorio_financeiro(lojas_ids, data_inicio, data_fim)
+        with connection.cursor() as cursor:
+            cursor.execute(sql.replace('base_transacoes_unificadas', TABELA), params)
+            total, valor, _, lojas = cursor.fetchone()
+        return total, valor, lojas
+
+    def _recebimentos_str_to_date(self, lojas_ids, data_inicio, data_fim):
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT STR_TO_DATE(var45, '%%d/%%m/%%Y') AS dia, COUNT(*)
+                FROM {TABELA}
+                WHERE var6 IN ({self._placeholders(lojas_ids)})
+                  AND STR_TO_DATE(var45, '%%d/%%m/%%Y') BETWEEN %s AND %s
+                GROUP BY dia
+                ORDER BY dia DESC
+            """, lojas_ids + [data_inicio, data_fim])
+            return tuple(cursor.fetchall())
+
+    def _recebimentos_data_pagamento(self, lojas_ids, data_inicio, data_fim):
+        condicoes, params = filtro_data_pagamento(data_inicio, data_fim)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT data_pagamento, COUNT(*)
+                FROM {TABELA}
+                WHERE var6 IN ({self._placeholders(lojas_ids)}) AND {' AND '.join(condicoes)}
+                GROUP BY data_pagamento
+                ORDER BY data_pagamento DESC
+            """, lojas_ids + params)
+            return tuple(cursor.fetchall())
+
+    def _explain(self, lojas_ids, data_inicio, data_fim):
+        sql, params = PagamentoService._sql_relatorio_financeiro(lojas_ids, data_inicio, data_fim)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql.replace('base_transacoes_unificadas', TABELA), params)
+            colunas = [c[0] for c in cursor.description]
+            plano = dict(zip(colunas, cursor.fetchone()))
+        return f"type={plano['type']} key={plano['key']} rows={plano['rows']}"
@@ -0,0 +1,148 @@
+"""
+Benchmark da carga de pagamentos em lote e da conciliação por NSU.
+
+Monta --linhas pagamentos sintéticos (padrão 50 mil, com 1% de NSUs repetidos
+e 0,5% inválidos) e mede, dentro de uma transação desfeita ao final (nada
+fica gravado):
+
+- lote legado: verificar_nsu_existe + criar_pagamento por linha (EXISTS,
+  INSERT e UPDATE do pinbankExtratoPOS por NSU)
+- lote por conjunto: PagamentoService.processar_lote_pagamentos (NSUs
+  existentes por bloco, bulk_create, UPDATE ... IN por bloco)
+- conciliação legada (filter(nsu).first() por NSU) vs conciliar_pagamentos
+
+--amostra-legado limita as linhas dos cenários legados (o tempo é
+extrapolado para o lote inteiro).
+
+Uso:
+    python manage.py benchmark_lote_pagamentos
+    python manage.py benchmark_lote_pagamentos --linhas 50000 --amostra-legado 5000
+"""
+import random
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gestao_financeira.models import PagamentoEfetuado
+from gestao_financeira.services import PagamentoService
+
+NSU_BASE_LEGADO = 800000000
+NSU_BASE_LOTE = 700000000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark: carga de pagamentos e conciliação linha a linha vs por conjunto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=50000, help='Linhas do lote (padrão: 50000)')
+        parser.add_argument('--amostra-legado', type=int, default=0,
+                            help='Linhas usadas nos cenários legados (padrão: 0 = lote inteiro)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        total = options['linhas']
+        amostra = min(options['amostra_legado'] or total, total)
+        usuario = SimpleNamespace(id=0, nome='benchmark')
+        rnd = random.Random(options['seed'])
+
+        with transaction.atomic():
+            # Lote legado
+            lote = self._gerar_lote(amostra, NSU_BASE_LEGADO, rnd)
+            inicio = time.perf_counter()
+            resultado_legado = self._lote_legado(lote, usuario)
+            duracao = (time.perf_counter() - inicio) * total / amostra
+            self._escrever('lote legado', duracao, total, resultado_legado, amostra)
+
+            # Lote por conjunto
+            lote = self._gerar_lote(total, NSU_BASE_LOTE, rnd)
+            inicio = time.perf_counter()
+            resultado = PagamentoService.processar_lote_pagamentos(lote, usuario)
+            self._escrever('lote por conjunto', time.perf_counter() - inicio, total, resultado)
+
+            # Conciliação dos NSUs do lote (existentes + 10% inexistentes)
+            nsus = [linha['nsu'] for linha in lote] + [str(600000000 + i) for i in range(total // 10)]
+            rnd.shuffle(nsus)
+
+            inicio = time.perf_counter()
+            conciliacao_legada = self._conciliar_legado(nsus[:amostra])
+            duracao_legada = (time.perf_counter() - inicio) * len(nsus) / amostra
+            inicio = time.perf_counter()
+            conciliacao = PagamentoService.conciliar_pagamentos(nsus)
+            duracao_conjunto = time.perf_counter() - inicio
+
+            self.stdout.write(f'conciliação legada     {duracao_legada:8.2f}s '
+                              f'({len(nsus) / duracao_legada:9.0f} NSUs/s)'
+                              + (f' - extrapolado de {amostra} NSUs' if amostra < total else ''))
+            self.stdout.write(f'conciliação conjunto   {duracao_conjunto:8.2f}s '
+                              f'({len(nsus) / duracao_conjunto:9.0f} NSUs/s) - '
+                              f"{conciliacao['total_encontrados']} encontrados, "
+                              f"{conciliacao['total_nao_encontrados']} não encontrados")
+
+            # Mesma amostra nos dois fluxos: mesmos pagamentos, mesma ordem
+            ids_conjunto = [p['id'] for p in PagamentoService.conciliar_pagamentos(nsus[:amostra])['encontrados']]
+            ids_legado = [p['id'] for p in conciliacao_legada['encontrados']]
+
+            transaction.set_rollback(True)
+
+        if ids_conjunto != ids_legado:
+            self.stdout.write(self.style.ERROR('Conciliação divergente entre legado e conjunto'))
+            return
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _gerar_lote(linhas, nsu_base, rnd):
+        lote = []
+        for i in range(linhas):
+            if i % 200 == 199:
+                nsu = 'NSU-INVALIDO'
+            elif i % 100 == 99:
+                nsu = str(nsu_base + i - 1)  # repetido no lote
+            else:
+                nsu = str(nsu_base + i)
+            lote.append({
+                'nsu': nsu,
+                'var44': f'{rnd.randrange(100, 100000) / 100:.2f}',
+                'var45': f'{rnd.randrange(1, 29):02d}/{rnd.randrange(1, 13):02d}/2025',
+                'var58': f'{rnd.randrange(100, 100000) / 100:.2f}',
+                'var111': f'{rnd.randrange(100, 100000) / 100:.2f}'.replace('.', ','),
+                'var112': None,
+            })
+        return lote
+
+    @staticmethod
+    def _lote_legado(lote, usuario):
+        """Fluxo anterior de processar_lote_pagamentos"""
+        criados, erros = [], []
+        for i, dados in enumerate(lote, 1):
+            try:
+                if PagamentoService.verificar_nsu_existe(dados['nsu']):
+                    erros.append(f"Linha {i}: NSU {dados['nsu']} já existe")
+                    continue
+                criados.append(PagamentoService.criar_pagamento(dados, usuario))
+            except (ValidationError, ValueError) as e:
+                erros.append(f'Linha {i}: {str(e)}')
+        return {'total_criados': len(criados), 'total_erros': len(erros)}
+
+    @staticmethod
+    def _conciliar_legado(nsus):
+        """Fluxo anterior de conciliar_pagamentos"""
+        encontrados = []
+        for nsu in nsus:
+            try:
+                pagamento = PagamentoEfetuado.objects.filter(nsu=int(nsu)).first()
+            except (ValueError, TypeError):
+                continue
+            if pagamento:
+                encontrados.append({'nsu': pagamento.nsu, 'id': pagamento.id, 'var111': pagamento.var111 or Decimal('0')})
+        return {'encontrados': encontrados}
+
+    def _escrever(self, nome, duracao, total, resultado, amostra=None):
+        extrapolado = f' - extrapolado de {amostra} linhas' if amostra and amostra < total else ''
+        self.stdout.write(f'{nome:22s} {duracao:8.2f}s ({total / duracao:9.0f} linhas/s) - '
+                          f"{resultado['total_criados']} criados, {resultado['total_erros']} erros{extrapolado}")
@@ -0,0 +1,51 @@
+"""
+Management command para reconstruir os agregados diários da base unificada
+(base_transacoes_resumo_diario / base_transacoes_resumo_recebimento).
+
+Uso:
+    python manage.py reconstruir_resumo_diario --data-inicio 2025-10-01
+    python manage.py reconstruir_resumo_diario --data-inicio 2026-01-01 --data-fim 2026-01-31 --loja 15
+"""
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestao_financeira.services_resumo_diario import ResumoDiarioService
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os agregados diários de vendas e recebimentos do Portal Lojista'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-inicio', type=str, required=True,
+                            help='Data inicial (YYYY-MM-DD)')
+        parser.add_argument('--data-fim', type=str, default=None,
+                            help='Data final (YYYY-MM-DD, padrão: hoje)')
+        parser.add_argument('--loja', type=int, action='append', dest='lojas',
+                            help='ID da loja (pode repetir). Padrão: todas')
+        parser.add_argument('--dias-por-lote', type=int, default=7,
+                            help='Dias por transação (padrão: 7)')
+
+    def handle(self, *args, **options):
+        try:
+            data_inicio = datetime.strptime(options['data_inicio'], '%Y-%m-%d').date()
+            data_fim = (datetime.strptime(options['data_fim'], '%Y-%m-%d').date()
+                        if options['data_fim'] else date.today())
+        except ValueError:
+            raise CommandError('Datas devem estar no formato YYYY-MM-DD')
+
+        if data_fim < data_inicio:
+            raise CommandError('--data-fim deve ser maior ou igual a --data-inicio')
+
+        self.stdout.write(f'Reconstruindo resumo diário de {data_inicio} a {data_fim}...')
+
+        resultado = ResumoDiarioService.reconstruir(
+            data_inicio, data_fim,
+            lojas_ids=options.get('lojas'),
+            dias_por_lote=options['dias_por_lote']
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Resumo reconstruído: {resultado['buckets_vendas']} buckets de vendas, "
+            f"{resultado['buckets_recebimento']} buckets de recebimento"
+        ))
@@ -36,6 +36,7 @@ class PagamentoEfetuado(models.Model):
     nsu = models.BigIntegerField(verbose_name="NSU da transação")
     var44 = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     var45 = models.CharField(max_length=20, null=True, blank=True)
+    data_pagamento = models.DateField(null=True, blank=True, help_text="var45 tipada (filtros por período)")
     var58 = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     var59 = models.CharField(max_length=20, null=True, blank=True)
     var66 = models.CharField(max_length=20, null=True, blank=True)
@@ -54,6 +55,7 @@ class PagamentoEfetuado(models.Model):
         indexes = [
             models.Index(fields=['nsu']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['data_pagamento'], name='idx_pagamentos_data_pagamento'),
         ]
     
     def __str__(self):
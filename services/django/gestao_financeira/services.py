@@ -3,24 +3,80 @@ Serviços do Sistema Bancário
 Camada de negócio para operações financeiras e pagamentos
 """
 
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Avg, Count, Sum
 from django.core.exceptions import ValidationError
 from decimal import Decimal
-from datetime import datetime
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
 from wallclub_core.utilitarios.log_control import registrar_log
 from .models import PagamentoEfetuado
 
 
+def filtro_data_pagamento(data_inicio=None, data_fim=None, coluna='data_pagamento'):
+    """
+    Condições por intervalo na data de pagamento tipada (coluna DATE indexada,
+    em vez de STR_TO_DATE(var45) ou filtro em Python).
+
+    Args:
+        data_inicio/data_fim: 'YYYY-MM-DD', 'DD/MM/YYYY' ou date; inválidas são ignoradas
+        coluna: nome da coluna (com alias, se houver)
+
+    Returns:
+        tuple: (lista de condições SQL, lista de parâmetros)
+    """
+    condicoes = []
+    params = []
+    inicio = converter_data_ou_nula(data_inicio)
+    fim = converter_data_ou_nula(data_fim)
+    if inicio:
+        condicoes.append(f"{coluna} >= %s")
+        params.append(inicio)
+    if fim:
+        condicoes.append(f"{coluna} <= %s")
+        params.append(fim)
+    if not condicoes:
+        condicoes.append(f"{coluna} IS NOT NULL")
+    return condicoes, params
+
+
+def chave_cache_filtros(prefixo, filtros):
+    """
+    Chave de cache de uma consulta: hash dos filtros normalizados (ordem
+    das chaves e das listas não importa; datas e números viram texto).
+    """
+    normalizados = {
+        chave: sorted(str(v) for v in valor) if isinstance(valor, (list, tuple, set)) else str(valor)
+        for chave, valor in (filtros or {}).items()
+        if valor not in (None, '', [], ())
+    }
+    conteudo = json.dumps(normalizados, sort_keys=True)
+    return f"{prefixo}:{hashlib.sha256(conteudo.encode('utf-8')).hexdigest()}"
+
+
 class PagamentoService:
     """
     Serviço para gerenciamento de pagamentos efetuados.
     Centraliza todas as operações bancárias relacionadas a pagamentos.
     """
 
+    # Resultados agregados (relatório, totais da busca) em cache por hash dos filtros
+    CACHE_TTL = getattr(settings, 'GESTAO_FINANCEIRA_CACHE_TTL', 120)
+    # Incrementada a cada gravação em pagamentos_efetuados: descarta os resumos em cache
+    CHAVE_VERSAO_PAGAMENTOS = 'gestao_financeira:pagamentos:versao'
+    # NSUs por consulta/UPDATE nas operações em lote
+    TAMANHO_BLOCO = 1000
+
     @staticmethod
     def buscar_pagamentos(filtros=None):
         """
         Busca pagamentos com filtros opcionais.
+        Consulta preguiçosa: paginar com LIMIT/OFFSET e obter o total por
+        resumo_pagamentos (evita COUNT por página).
 
         Args:
             filtros (dict): Filtros de busca (nsu, data_inicio, data_fim)
@@ -44,66 +100,57 @@ class PagamentoService:
             except ValueError:
                 return queryset.none()
 
-        # Filtros de data precisam processar em Python porque var45 está em formato DD/MM/YYYY
-        if filtros.get('data_inicio') or filtros.get('data_fim'):
-            try:
-                data_inicio_obj = None
-                data_fim_obj = None
-
-                if filtros.get('data_inicio'):
-                    data_inicio_obj = datetime.strptime(filtros['data_inicio'], '%Y-%m-%d').date()
-                    tem_filtro_valido = True
-
-                if filtros.get('data_fim'):
-                    data_fim_obj = datetime.strptime(filtros['data_fim'], '%Y-%m-%d').date()
-                    tem_filtro_valido = True
-
-                # Buscar todos com var45 preenchido e filtrar em Python
-                pagamentos_temp = queryset.filter(var45__isnull=False).exclude(var45='')
-                ids_validos = []
-
-                for pag in pagamentos_temp:
-                    try:
-                        # Converter var45 de DD/MM/YYYY para date
-                        data_pag = datetime.strptime(pag.var45, '%d/%m/%Y').date()
-
-                        # Aplicar filtros
-                        if data_inicio_obj and data_pag < data_inicio_obj:
-                            continue
-                        if data_fim_obj and data_pag > data_fim_obj:
-                            continue
-
-                        ids_validos.append(pag.id)
-                    except ValueError:
-                        # Ignorar registros com data inválida
-                        continue
-
-                queryset = queryset.filter(id__in=ids_validos)
-            except ValueError:
-                pass
+        # Data de pagamento tipada: intervalo direto no índice (datas inválidas são ignoradas)
+        data_inicio = converter_data_ou_nula(filtros.get('data_inicio'))
+        data_fim = converter_data_ou_nula(filtros.get('data_fim'))
+        if data_inicio:
+            queryset = queryset.filter(data_pagamento__gte=data_inicio)
+            tem_filtro_valido = True
+        if data_fim:
+            queryset = queryset.filter(data_pagamento__lte=data_fim)
+            tem_filtro_valido = True
 
         # Se não há filtros válidos, retorna vazio
         if not tem_filtro_valido:
             return queryset.none()
 
-        # Debug: adicionar logs para verificar filtros
-        print(f"DEBUG PagamentoService: filtros={filtros}")
-        print(f"DEBUG PagamentoService: tem_filtro_valido={tem_filtro_valido}")
-
-        # Verificar se existem registros na tabela
-        total_registros = PagamentoEfetuado.objects.count()
-        print(f"DEBUG PagamentoService: total registros na tabela={total_registros}")
+        return queryset.order_by('-created_at')
 
-        # Contar registros após filtros
-        resultado_count = queryset.count()
-        print(f"DEBUG PagamentoService: registros após filtros={resultado_count}")
+    @classmethod
+    def resumo_pagamentos(cls, filtros=None):
+        """
+        Totais da busca de pagamentos em uma única agregação (COUNT, SUM e AVG
+        de var111), em cache por hash dos filtros.
 
-        # Se há filtros de data, mostrar alguns registros para debug
-        if filtros.get('data_inicio') or filtros.get('data_fim'):
-            sample_dates = PagamentoEfetuado.objects.values_list('created_at', flat=True)[:5]
-            print(f"DEBUG PagamentoService: sample dates na tabela={list(sample_dates)}")
+        Args:
+            filtros (dict): Mesmos filtros de buscar_pagamentos
 
-        return queryset.order_by('-created_at')
+        Returns:
+            dict: total, valor_total, valor_medio
+        """
+        versao = cache.get_or_set(cls.CHAVE_VERSAO_PAGAMENTOS, 1, timeout=None)
+        chave = chave_cache_filtros(f'gestao_financeira:pagamentos:resumo:v{versao}', filtros)
+        resumo = cache.get(chave)
+        if resumo is None:
+            resumo = cls.buscar_pagamentos(filtros).order_by().aggregate(
+                total=Count('id'),
+                valor_total=Sum('var111'),
+                valor_medio=Avg('var111'),
+            )
+            resumo['valor_total'] = resumo['valor_total'] or Decimal('0.00')
+            resumo['valor_medio'] = resumo['valor_medio'] or Decimal('0.00')
+            cache.set(chave, resumo, timeout=cls.CACHE_TTL)
+        return resumo
+
+    @classmethod
+    def _invalidar_resumos(cls):
+        """Após o commit, nova versão dos resumos (as chaves antigas expiram pelo TTL)"""
+        def incrementar():
+            try:
+                cache.incr(cls.CHAVE_VERSAO_PAGAMENTOS)
+            except ValueError:
+                cache.set(cls.CHAVE_VERSAO_PAGAMENTOS, 2, timeout=None)
+        transaction.on_commit(incrementar)
 
     @staticmethod
     def criar_pagamento(dados_pagamento, usuario):
@@ -122,47 +169,16 @@ class PagamentoService:
             ValueError: Se NSU já existe
         """
         with transaction.atomic():
-            # Validar NSU obrigatório
-            nsu = dados_pagamento.get('nsu')
-            if not nsu:
-                raise ValidationError('NSU é obrigatório')
-
-            try:
-                nsu_int = int(nsu)
-            except (ValueError, TypeError):
-                raise ValidationError('NSU deve ser um número válido')
+            dados_validados = PagamentoService._validar_dados_pagamento(dados_pagamento, usuario)
+            nsu_int = dados_validados['nsu']
 
             # Verificar se NSU já existe
             if PagamentoEfetuado.objects.filter(nsu=nsu_int).exists():
                 raise ValueError(f'Já existe um pagamento com NSU {nsu_int}')
 
-            # Validar campos monetários
-            campos_monetarios = ['var44', 'var58', 'var111', 'var112']
-            dados_validados = {'nsu': nsu_int, 'user_id': usuario.id}
-
-            for campo in campos_monetarios:
-                valor = dados_pagamento.get(campo)
-                if valor:
-                    try:
-                        if isinstance(valor, str):
-                            valor = valor.replace(',', '.')
-                        dados_validados[campo] = Decimal(str(valor))
-                    except (ValueError, TypeError):
-                        dados_validados[campo] = None
-                else:
-                    dados_validados[campo] = None
-
-            # Validar campos de texto
-            campos_texto = ['var45', 'var59', 'var66', 'var71', 'var100']
-            for campo in campos_texto:
-                valor = dados_pagamento.get(campo)
-                if valor is None or valor == '':
-                    dados_validados[campo] = None
-                else:
-                    dados_validados[campo] = str(valor).strip()
-
             # Criar pagamento
             pagamento = PagamentoEfetuado.objects.create(**dados_validados)
+            PagamentoService._invalidar_resumos()
 
             # Atualizar pinbankExtratoPOS.lido = 0 e processado = 0 para reprocessar
             from pinbank.cargas_pinbank.models import PinbankExtratoPOS
@@ -184,6 +200,71 @@ class PagamentoService:
 
             return pagamento
 
+    @staticmethod
+    def _validar_dados_pagamento(dados_pagamento, usuario):
+        """
+        Valida e normaliza os dados de um pagamento (sem acesso ao banco).
+
+        Returns:
+            dict: Campos prontos para PagamentoEfetuado
+
+        Raises:
+            ValidationError: NSU ausente ou não numérico, ou valor fora dos
+                limites da coluna (dígitos, tamanho) - o lote é gravado por
+                bulk_create e um valor inválido abortaria o lote inteiro
+        """
+        # Validar NSU obrigatório
+        nsu = dados_pagamento.get('nsu')
+        if not nsu:
+            raise ValidationError('NSU é obrigatório')
+
+        try:
+            nsu_int = int(nsu)
+        except (ValueError, TypeError):
+            raise ValidationError('NSU deve ser um número válido')
+
+        # Validar campos monetários
+        campos_monetarios = ['var44', 'var58', 'var111', 'var112']
+        dados_validados = {'nsu': nsu_int, 'user_id': usuario.id}
+
+        for campo in campos_monetarios:
+            valor = dados_pagamento.get(campo)
+            if valor:
+                try:
+                    if isinstance(valor, str):
+                        valor = valor.replace(',', '.')
+                    dados_validados[campo] = Decimal(str(valor))
+                except (ValueError, TypeError):
+                    dados_validados[campo] = None
+            else:
+                dados_validados[campo] = None
+
+        # Validar campos de texto
+        campos_texto = ['var45', 'var59', 'var66', 'var71', 'var100']
+        for campo in campos_texto:
+            valor = dados_pagamento.get(campo)
+            if valor is None or valor == '':
+                dados_validados[campo] = None
+            else:
+                dados_validados[campo] = str(valor).strip()
+
+        dados_validados['data_pagamento'] = converter_data_ou_nula(dados_validados.get('var45'))
+
+        # Limites das colunas (o save arredonda as casas decimais)
+        for campo, valor in dados_validados.items():
+            if valor is None:
+                continue
+            campo_modelo = PagamentoEfetuado._meta.get_field(campo)
+            if isinstance(valor, Decimal) and valor.is_finite():
+                valor = valor.quantize(Decimal(1).scaleb(-campo_modelo.decimal_places))
+                dados_validados[campo] = valor
+            try:
+                campo_modelo.run_validators(valor)
+            except ValidationError as e:
+                raise ValidationError(f'{campo}: {" ".join(e.messages)}')
+
+        return dados_validados
+
     @staticmethod
     def atualizar_pagamento(pagamento_id, dados_atualizacao, usuario):
         """
@@ -233,8 +314,10 @@ class PagamentoService:
                     if isinstance(valor, str):
                         valor = valor.strip()
                     setattr(pagamento, campo, valor if valor else None)
+            pagamento.data_pagamento = converter_data_ou_nula(pagamento.var45)
 
             pagamento.save()
+            PagamentoService._invalidar_resumos()
 
             # Log de auditoria bancária
             valores_novos = {
@@ -282,6 +365,7 @@ class PagamentoService:
 
             # Excluir pagamento
             pagamento.delete()
+            PagamentoService._invalidar_resumos()
 
             # Log de auditoria bancária
             registrar_log(
@@ -328,16 +412,18 @@ class PagamentoService:
         return PagamentoEfetuado.objects.get(id=pagamento_id)
 
     @staticmethod
-    def listar_recebimentos(filtros=None):
+    def listar_recebimentos(filtros=None, pagina=None, por_pagina=100):
         """
         Lista recebimentos com filtros avançados para relatórios.
         MIGRADO: Consulta base_transacoes_unificadas
 
         Args:
-            filtros (dict): Filtros de busca (lojas, data_inicio, data_fim, tipo)
+            filtros (dict): Filtros de busca (lojas, data_inicio, data_fim, nsu)
+            pagina (int): Página (1..n) - None traz todas as linhas
+            por_pagina (int): Linhas por página
 
         Returns:
-            QuerySet: Recebimentos filtrados com agregações
+            list: Recebimentos filtrados (namedtuples)
         """
         from django.db import connection
         from collections import namedtuple
@@ -345,9 +431,8 @@ class PagamentoService:
         if not filtros:
             return []
 
-        # Construir WHERE clause
-        where_clauses = ["var45 IS NOT NULL", "var45 != ''"]
-        params = []
+        # Construir WHERE clause (data de pagamento tipada, índice por loja + data)
+        where_clauses, params = filtro_data_pagamento(filtros.get('data_inicio'), filtros.get('data_fim'))
 
         # Filtro por lojas
         if filtros.get('lojas'):
@@ -367,11 +452,17 @@ class PagamentoService:
 
         where_sql = " AND ".join(where_clauses)
 
+        limite_sql = ""
+        if pagina:
+            limite_sql = "LIMIT %s OFFSET %s"
+            params.extend([por_pagina, (max(int(pagina), 1) - 1) * por_pagina])
+
         with connection.cursor() as cursor:
             cursor.execute(f"""
                 SELECT * FROM base_transacoes_unificadas
                 WHERE {where_sql}
                 ORDER BY data_transacao DESC
+                {limite_sql}
             """, params)
             
             columns = [col[0] for col in cursor.description]
@@ -380,7 +471,7 @@ class PagamentoService:
 
         registrar_log(
             'gestao_financeira',
-            f'Listando recebimentos - Filtros: {filtros} - Total: {len(resultados)}'
+            f'Listando recebimentos - Filtros: {filtros} - Página: {pagina or "todas"} - Total: {len(resultados)}'
         )
 
         return resultados
@@ -390,6 +481,7 @@ class PagamentoService:
         """
         Gera relatório financeiro agregado de recebimentos.
         MIGRADO: Consulta base_transacoes_unificadas
+        Uma agregação no banco; resultado em cache por hash dos filtros (CACHE_TTL)
 
         Args:
             lojas_ids (list): IDs das lojas
@@ -400,88 +492,24 @@ class PagamentoService:
             dict: Dados agregados do relatório
         """
         from django.db import connection
-        from decimal import Decimal
-        from collections import namedtuple
-
-        # Construir WHERE clause
-        where_clauses = ["var45 IS NOT NULL", "var45 != ''"]
-        params = []
-
-        # Filtro por lojas
-        if lojas_ids:
-            placeholders = ','.join(['%s'] * len(lojas_ids))
-            where_clauses.append(f"var6 IN ({placeholders})")
-            params.extend(lojas_ids)
 
-        where_sql = " AND ".join(where_clauses)
+        chave = PagamentoService._chave_relatorio(lojas_ids, data_inicio, data_fim)
+        resultado = cache.get(chave)
+        if resultado is not None:
+            return resultado
 
+        sql, params = PagamentoService._sql_relatorio_financeiro(lojas_ids, data_inicio, data_fim)
         with connection.cursor() as cursor:
-            cursor.execute(f"""
-                SELECT * FROM base_transacoes_unificadas
-                WHERE {where_sql}
-            """, params)
-            
-            columns = [col[0] for col in cursor.description]
-            Transacao = namedtuple('Transacao', columns)
-            transacoes = [Transacao(*row) for row in cursor.fetchall()]
-
-        # Processar datas (filtro em Python porque var45 está em formato DD/MM/YYYY)
-        if data_inicio or data_fim:
-            recebimentos_filtrados = []
-
-            for t in transacoes:
-                if not t.var45:
-                    continue
-
-                try:
-                    # Tentar vários formatos de data
-                    data_recebimento = None
-                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%Y%m%d']:
-                        try:
-                            data_recebimento = datetime.strptime(t.var45, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-
-                    if not data_recebimento:
-                        continue
-
-                    # Aplicar filtros de data
-                    if data_inicio:
-                        data_ini_obj = datetime.strptime(data_inicio, '%Y-%m-%d').date()
-                        if data_recebimento < data_ini_obj:
-                            continue
-
-                    if data_fim:
-                        data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d').date()
-                        if data_recebimento > data_fim_obj:
-                            continue
-
-                    recebimentos_filtrados.append(t)
-
-                except Exception:
-                    continue
-
-            transacoes_queryset = recebimentos_filtrados
-        else:
-            transacoes_queryset = transacoes
-
-        # Calcular agregações
-        total_transacoes = len(transacoes_queryset)
-
-        valor_total = Decimal('0.00')
-        for t in transacoes_queryset:
-            if hasattr(t, 'var111') and t.var111:
-                valor_total += Decimal(str(t.var111))
-
-        valor_medio = valor_total / total_transacoes if total_transacoes > 0 else Decimal('0.00')
+            cursor.execute(sql, params)
+            total_transacoes, valor_total, valor_medio, lojas_count = cursor.fetchone()
 
         resultado = {
             'total_transacoes': total_transacoes,
-            'valor_total': valor_total,
-            'valor_medio': valor_medio,
-            'lojas_count': len(set(t.var6 for t in transacoes_queryset if hasattr(t, 'var6')))
+            'valor_total': Decimal(str(valor_total or 0)),
+            'valor_medio': Decimal(str(valor_medio or 0)),
+            'lojas_count': lojas_count
         }
+        cache.set(chave, resultado, timeout=PagamentoService.CACHE_TTL)
 
         registrar_log(
             'gestao_financeira',
@@ -491,10 +519,53 @@ class PagamentoService:
 
         return resultado
 
+    @staticmethod
+    def _chave_relatorio(lojas_ids, data_inicio=None, data_fim=None):
+        return chave_cache_filtros('gestao_financeira:relatorio', {
+            'lojas': lojas_ids,
+            'data_inicio': converter_data_ou_nula(data_inicio),
+            'data_fim': converter_data_ou_nula(data_fim),
+        })
+
+    @staticmethod
+    def _sql_relatorio_financeiro(lojas_ids, data_inicio=None, data_fim=None):
+        """
+        Agregação do relatório no banco: var6 IN + intervalo em data_pagamento
+        (índice idx_btu_loja_data_pagamento), sem trazer as linhas.
+        Colunas: total, valor total, valor médio (total / transações), lojas.
+
+        Returns:
+            tuple: (sql, params)
+        """
+        where_clauses = []
+        params = []
+
+        if lojas_ids:
+            placeholders = ','.join(['%s'] * len(lojas_ids))
+            where_clauses.append(f"var6 IN ({placeholders})")
+            params.extend(lojas_ids)
+
+        condicoes_data, params_data = filtro_data_pagamento(data_inicio, data_fim)
+        where_clauses.extend(condicoes_data)
+        params.extend(params_data)
+
+        sql = f"""
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(CAST(var111 AS DECIMAL(15,2))), 0),
+                COALESCE(SUM(CAST(var111 AS DECIMAL(15,2))) / COUNT(*), 0),
+                COUNT(DISTINCT var6)
+            FROM base_transacoes_unificadas
+            WHERE {' AND '.join(where_clauses)}
+        """
+        return sql, params
+
     @staticmethod
     def processar_lote_pagamentos(pagamentos_dados, usuario):
         """
-        Processa lote de pagamentos em transação atômica.
+        Processa lote de pagamentos em transação atômica, por conjunto:
+        validação em memória, NSUs existentes em uma consulta por bloco,
+        bulk_create dos novos e UPDATE do pinbankExtratoPOS por bloco de NSUs.
 
         Args:
             pagamentos_dados (list): Lista de dicts com dados dos pagamentos
@@ -503,37 +574,71 @@ class PagamentoService:
         Returns:
             dict: Resultado do processamento (criados, erros)
         """
+        from pinbank.cargas_pinbank.models import PinbankExtratoPOS
+        from django.utils import timezone
+
         criados = []
         erros = []
+        bloco = PagamentoService.TAMANHO_BLOCO
+
+        # 1. Validação de todas as linhas em memória
+        validos = []
+        for i, dados in enumerate(pagamentos_dados, 1):
+            if not dados.get('nsu'):
+                erros.append((i, f'Linha {i}: NSU obrigatório'))
+                continue
+            try:
+                validos.append((i, PagamentoService._validar_dados_pagamento(dados, usuario)))
+            except ValidationError as e:
+                erros.append((i, f'Linha {i}: {str(e)}'))
+            except Exception as e:
+                erros.append((i, f'Linha {i}: Erro inesperado - {str(e)}'))
 
         with transaction.atomic():
-            for i, dados in enumerate(pagamentos_dados, 1):
-                try:
-                    # Validar NSU
-                    nsu = dados.get('nsu')
-                    if not nsu:
-                        erros.append(f'Linha {i}: NSU obrigatório')
-                        continue
-
-                    # Verificar duplicata
-                    if PagamentoService.verificar_nsu_existe(nsu):
-                        erros.append(f'Linha {i}: NSU {nsu} já existe')
-                        continue
-
-                    # Criar pagamento
-                    pagamento = PagamentoService.criar_pagamento(dados, usuario)
-                    criados.append(pagamento)
-
-                except ValidationError as e:
-                    erros.append(f'Linha {i}: {str(e)}')
-                except ValueError as e:
-                    erros.append(f'Linha {i}: {str(e)}')
-                except Exception as e:
-                    erros.append(f'Linha {i}: Erro inesperado - {str(e)}')
+            # 2. NSUs já cadastrados (uma consulta por bloco)
+            nsus = list({dados['nsu'] for _, dados in validos})
+            existentes = set()
+            for inicio in range(0, len(nsus), bloco):
+                existentes.update(PagamentoEfetuado.objects.filter(
+                    nsu__in=nsus[inicio:inicio + bloco]
+                ).values_list('nsu', flat=True))
+
+            # Repetido no lote conta como existente (primeira ocorrência vale)
+            for i, dados in validos:
+                if dados['nsu'] in existentes:
+                    erros.append((i, f'Linha {i}: NSU {dados["nsu"]} já existe'))
+                    continue
+                existentes.add(dados['nsu'])
+                criados.append(PagamentoEfetuado(**dados))
+
+            # 3. Inserção e reprocessamento do extrato por bloco
+            linhas_afetadas = 0
+            if criados:
+                PagamentoEfetuado.objects.bulk_create(criados, batch_size=bloco)
+                PagamentoService._invalidar_resumos()
+
+                agora = timezone.now()
+                for inicio in range(0, len(criados), bloco):
+                    nsus_bloco = [p.nsu for p in criados[inicio:inicio + bloco]]
+                    linhas_afetadas += PinbankExtratoPOS.objects.filter(NsuOperacao__in=nsus_bloco).update(
+                        Lido=0,
+                        processado=0,
+                        updated_at=agora
+                    )
+
+                    # Log de auditoria bancária (por bloco)
+                    registrar_log(
+                        'gestao_financeira',
+                        f'Pagamentos criados em lote - Usuário: {usuario.nome} - {len(nsus_bloco)} NSU(s): '
+                        f'{", ".join(str(nsu) for nsu in nsus_bloco)}'
+                    )
+
+        erros = [mensagem for _, mensagem in sorted(erros)]
 
         registrar_log(
             'gestao_financeira',
-            f'Lote processado - Criados: {len(criados)} - Erros: {len(erros)} - Usuário: {usuario.nome}',
+            f'Lote processado - Criados: {len(criados)} - Erros: {len(erros)} - Usuário: {usuario.nome} - '
+            f'PinbankExtratoPOS marcado para reprocessamento: {linhas_afetadas} linha(s)',
             nivel='INFO' if not erros else 'WARNING'
         )
 
@@ -547,7 +652,8 @@ class PagamentoService:
     @staticmethod
     def conciliar_pagamentos(nsu_list):
         """
-        Realiza conciliação de pagamentos por lista de NSUs.
+        Realiza conciliação de pagamentos por lista de NSUs
+        (uma consulta por bloco de NSUs, na ordem da lista).
 
         Args:
             nsu_list (list): Lista de NSUs para conciliar
@@ -558,24 +664,37 @@ class PagamentoService:
         encontrados = []
         nao_encontrados = []
 
+        nsus_int = []
         for nsu in nsu_list:
             try:
-                nsu_int = int(nsu)
-                pagamento = PagamentoEfetuado.objects.filter(nsu=nsu_int).first()
-
-                if pagamento:
-                    encontrados.append({
-                        'nsu': nsu_int,
-                        'id': pagamento.id,
-                        'var44': pagamento.var44,
-                        'var111': pagamento.var111,
-                        'created_at': pagamento.created_at
-                    })
-                else:
-                    nao_encontrados.append(nsu_int)
-
+                nsus_int.append(int(nsu))
             except (ValueError, TypeError):
+                nsus_int.append(None)
+
+        # Primeiro pagamento (menor id) de cada NSU
+        pagamentos = {}
+        distintos = list({nsu for nsu in nsus_int if nsu is not None})
+        bloco = PagamentoService.TAMANHO_BLOCO
+        for inicio in range(0, len(distintos), bloco):
+            for pagamento in PagamentoEfetuado.objects.filter(
+                nsu__in=distintos[inicio:inicio + bloco]
+            ).order_by('-id').values('id', 'nsu', 'var44', 'var111', 'created_at'):
+                pagamentos[pagamento['nsu']] = pagamento
+
+        for nsu, nsu_int in zip(nsu_list, nsus_int):
+            if nsu_int is None:
                 nao_encontrados.append(nsu)
+            elif nsu_int in pagamentos:
+                pagamento = pagamentos[nsu_int]
+                encontrados.append({
+                    'nsu': nsu_int,
+                    'id': pagamento['id'],
+                    'var44': pagamento['var44'],
+                    'var111': pagamento['var111'],
+                    'created_at': pagamento['created_at']
+                })
+            else:
+                nao_encontrados.append(nsu_int)
 
         registrar_log(
             'gestao_financeira',
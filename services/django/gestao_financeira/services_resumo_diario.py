@@ -0,0 +1,381 @@
+"""
+Agregados diários de base_transacoes_unificadas (read model do Portal Lojista)
+
+As cargas da base unificada registram os NSUs gravados em cada execução e chamam
+ResumoDiarioService.atualizar_por_nsus(); o POSP2 chama no commit de cada venda.
+O serviço recalcula apenas os buckets (loja, dia) e (loja, data de recebimento)
+afetados, usando o índice (var6, data_transacao) da tabela fato - o custo depende
+do volume do dia da loja, não do tamanho da tabela.
+
+Quem atualiza uma linha existente guarda antes os buckets em que ela estava
+(buckets_por_nsus / adicionar_bucket) e os repassa em buckets_anteriores: se a
+loja, o dia ou a data de recebimento mudou, o bucket antigo também é recalculado.
+
+Tabelas: docs/sql/001_create_base_transacoes_resumo.sql
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import connection, transaction
+
+from wallclub_core.utilitarios.log_control import registrar_log
+
+STATUS_APROVADO = 'TRANS. APROVADO'
+TAMANHO_LOTE_NSU = 1000
+
+_SQL_INSERIR_RESUMO_DIARIO = """
+    INSERT INTO base_transacoes_resumo_diario (
+        loja_id, canal_id, data, tipo_operacao, bandeira, modalidade,
+        qtd_total, qtd_aprovadas, qtd_aprovadas_com_valor, qtd_nao_aprovadas,
+        valor_bruto_aprovado, valor_pago_aprovado, valor_bruto_nao_aprovado
+    )
+    SELECT
+        btu.var6,
+        MAX(l.canal_id),
+        DATE(btu.data_transacao),
+        btu.tipo_operacao,
+        COALESCE(btu.var12, ''),
+        COALESCE(btu.var8, ''),
+        COUNT(*),
+        SUM(CASE WHEN btu.var68 = %s THEN 1 ELSE 0 END),
+        SUM(CASE WHEN btu.var68 = %s AND btu.var19 IS NOT NULL THEN 1 ELSE 0 END),
+        SUM(CASE WHEN btu.var68 != %s OR btu.var68 IS NULL THEN 1 ELSE 0 END),
+        COALESCE(SUM(CASE WHEN btu.var68 = %s THEN CAST(btu.var19 AS DECIMAL(15,2)) END), 0),
+        COALESCE(SUM(CASE WHEN btu.var68 = %s THEN CAST(COALESCE(NULLIF(btu.var44, 0), btu.var42) AS DECIMAL(15,2)) END), 0),
+        COALESCE(SUM(CASE WHEN btu.var68 != %s OR btu.var68 IS NULL THEN CAST(btu.var19 AS DECIMAL(15,2)) END), 0)
+    FROM base_transacoes_unificadas btu
+    LEFT JOIN loja l ON l.id = btu.var6
+    WHERE {where}
+      AND btu.var6 IS NOT NULL
+      AND btu.data_transacao IS NOT NULL
+    GROUP BY btu.var6, DATE(btu.data_transacao), btu.tipo_operacao, COALESCE(btu.var12, ''), COALESCE(btu.var8, '')
+"""
+
+_SQL_INSERIR_RESUMO_RECEBIMENTO = """
+    INSERT INTO base_transacoes_resumo_recebimento (
+        loja_id, canal_id, data_recebimento, tipo_operacao, quantidade, valor_total
+    )
+    SELECT
+        btu.var6,
+        MAX(l.canal_id),
+        btu.data_pagamento,
+        btu.tipo_operacao,
+        COUNT(*),
+        COALESCE(SUM(CAST(COALESCE(btu.var44, 0) AS DECIMAL(15,2))), 0)
+    FROM base_transacoes_unificadas btu
+    LEFT JOIN loja l ON l.id = btu.var6
+    WHERE {where}
+      AND btu.var6 IS NOT NULL
+      AND btu.data_pagamento IS NOT NULL
+    GROUP BY btu.var6, btu.data_pagamento, btu.tipo_operacao
+"""
+
+
+def _params_status():
+    return [STATUS_APROVADO] * 6
+
+
+class ResumoDiarioService:
+    """
+    Manutenção e leitura dos agregados diários da base unificada.
+    """
+
+    # ------------------------------------------------------------------
+    # Manutenção incremental
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def adicionar_bucket(buckets: Tuple[Set, Set], loja_id, dia, data_pagamento):
+        """Inclui em buckets (vendas, recebimento) as chaves de uma linha da base unificada"""
+        if loja_id is None:
+            return
+        if isinstance(dia, datetime):
+            dia = dia.date()
+        if dia is not None:
+            buckets[0].add((loja_id, dia))
+        if data_pagamento is not None:
+            buckets[1].add((loja_id, data_pagamento))
+
+    @staticmethod
+    def buckets_por_nsus(nsus: Iterable, buckets: Optional[Tuple[Set, Set]] = None) -> Tuple[Set, Set]:
+        """
+        Buckets em que os NSUs estão agora (chamar antes de atualizar as linhas)
+
+        Args:
+            buckets: (vendas, recebimento) a complementar; None cria um par novo
+
+        Returns:
+            tuple: (buckets de vendas, buckets de recebimento)
+        """
+        if buckets is None:
+            buckets = (set(), set())
+        nsus = [str(n) for n in set(nsus) if n]
+
+        with connection.cursor() as cursor:
+            for i in range(0, len(nsus), TAMANHO_LOTE_NSU):
+                lote = nsus[i:i + TAMANHO_LOTE_NSU]
+                placeholders = ','.join(['%s'] * len(lote))
+                cursor.execute(f"""
+                    SELECT DISTINCT var6, DATE(data_transacao), data_pagamento
+                    FROM base_transacoes_unificadas
+                    WHERE var9 IN ({placeholders})
+                """, lote)
+                for loja_id, dia, data_pagamento in cursor.fetchall():
+                    ResumoDiarioService.adicionar_bucket(buckets, loja_id, dia, data_pagamento)
+        return buckets
+
+    @staticmethod
+    def atualizar_por_nsus(nsus: Iterable, buckets_anteriores: Optional[Tuple[Set, Set]] = None) -> int:
+        """
+        Recalcula os buckets afetados pelos NSUs gravados/cancelados numa carga.
+
+        Args:
+            nsus: NSUs (var9) inseridos ou atualizados em base_transacoes_unificadas
+            buckets_anteriores: (vendas, recebimento) lidos antes da atualização
+                das linhas (buckets_por_nsus), recalculados junto com os atuais
+
+        Returns:
+            int: Quantidade de buckets recalculados
+        """
+        nsus = [str(n) for n in set(nsus) if n]
+        if not nsus:
+            return 0
+
+        try:
+            buckets_vendas, buckets_recebimento = ResumoDiarioService.buckets_por_nsus(nsus)
+            if buckets_anteriores:
+                buckets_vendas |= buckets_anteriores[0]
+                buckets_recebimento |= buckets_anteriores[1]
+
+            with transaction.atomic():
+                for loja_id, dia in buckets_vendas:
+                    ResumoDiarioService._recalcular_dia(loja_id, dia)
+                for loja_id, data_recebimento in buckets_recebimento:
+                    ResumoDiarioService._recalcular_recebimento(loja_id, data_recebimento)
+        except Exception as e:
+            # Resumo nunca derruba a carga: fica defasado até o próximo rebuild
+            registrar_log('gestao_financeira.resumo_diario',
+                          f"Erro ao atualizar resumo diário ({len(nsus)} NSUs): {str(e)}", nivel='ERROR')
+            return 0
+
+        total = len(buckets_vendas) + len(buckets_recebimento)
+        registrar_log('gestao_financeira.resumo_diario',
+                      f"Resumo diário atualizado: {len(nsus)} NSUs, {len(buckets_vendas)} buckets de vendas, "
+                      f"{len(buckets_recebimento)} buckets de recebimento")
+        return total
+
+    @staticmethod
+    def _recalcular_dia(loja_id, dia: date):
+        inicio = datetime.combine(dia, datetime.min.time())
+        fim = inicio + timedelta(days=1)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM base_transacoes_resumo_diario WHERE loja_id = %s AND data = %s",
+                [loja_id, dia]
+            )
+            cursor.execute(
+                _SQL_INSERIR_RESUMO_DIARIO.format(
+                    where="btu.var6 = %s AND btu.data_transacao >= %s AND btu.data_transacao < %s"
+                ),
+                _params_status() + [loja_id, inicio, fim]
+            )
+
+    @staticmethod
+    def _recalcular_recebimento(loja_id, data_recebimento: date):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM base_transacoes_resumo_recebimento WHERE loja_id = %s AND data_recebimento = %s",
+                [loja_id, data_recebimento]
+            )
+            cursor.execute(
+                _SQL_INSERIR_RESUMO_RECEBIMENTO.format(where="btu.var6 = %s AND btu.data_pagamento = %s"),
+                [loja_id, data_recebimento]
+            )
+
+    # ------------------------------------------------------------------
+    # Reconstrução completa
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def reconstruir(data_inicio: date, data_fim: date, lojas_ids: Optional[List[int]] = None,
+                    dias_por_lote: int = 7) -> Dict[str, int]:
+        """
+        Reconstrói os agregados de vendas no intervalo [data_inicio, data_fim] e
+        os agregados de recebimento cuja data de recebimento cai no intervalo.
+        Processa em janelas de dias_por_lote para manter as transações curtas.
+        """
+        resultado = {'buckets_vendas': 0, 'buckets_recebimento': 0}
+        filtro_loja = ''
+        params_loja = []
+        if lojas_ids:
+            filtro_loja = f" AND {{alias}}var6 IN ({','.join(['%s'] * len(lojas_ids))})"
+            params_loja = list(lojas_ids)
+
+        janela_inicio = data_inicio
+        while janela_inicio <= data_fim:
+            janela_fim = min(janela_inicio + timedelta(days=dias_por_lote - 1), data_fim)
+            inicio = datetime.combine(janela_inicio, datetime.min.time())
+            fim = datetime.combine(janela_fim, datetime.min.time()) + timedelta(days=1)
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM base_transacoes_resumo_diario WHERE data >= %s AND data <= %s"
+                    + filtro_loja.replace('{alias}var6', 'loja_id'),
+                    [janela_inicio, janela_fim] + params_loja
+                )
+                cursor.execute(
+                    _SQL_INSERIR_RESUMO_DIARIO.format(
+                        where="btu.data_transacao >= %s AND btu.data_transacao < %s"
+                              + filtro_loja.replace('{alias}', 'btu.')
+                    ),
+                    _params_status() + [inicio, fim] + params_loja
+                )
+                resultado['buckets_vendas'] += cursor.rowcount
+
+                cursor.execute(
+                    "DELETE FROM base_transacoes_resumo_recebimento WHERE data_recebimento >= %s AND data_recebimento <= %s"
+                    + filtro_loja.replace('{alias}var6', 'loja_id'),
+                    [janela_inicio, janela_fim] + params_loja
+                )
+                cursor.execute(
+                    _SQL_INSERIR_RESUMO_RECEBIMENTO.format(
+                        where="btu.data_pagamento >= %s AND btu.data_pagamento <= %s"
+                              + filtro_loja.replace('{alias}', 'btu.')
+                    ),
+                    [janela_inicio, janela_fim] + params_loja
+                )
+                resultado['buckets_recebimento'] += cursor.rowcount
+
+            registrar_log('gestao_financeira.resumo_diario',
+                          f"Resumo reconstruído: {janela_inicio} a {janela_fim}")
+            janela_inicio = janela_fim + timedelta(days=1)
+
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Consultas (Portal Lojista)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _filtro_lojas(lojas_ids, where: list, params: list):
+        if lojas_ids is None:
+            return
+        lojas_ids = list(lojas_ids)
+        if not lojas_ids:
+            where.append("1 = 0")
+        elif len(lojas_ids) == 1:
+            where.append("loja_id = %s")
+            params.append(lojas_ids[0])
+        else:
+            where.append(f"loja_id IN ({','.join(['%s'] * len(lojas_ids))})")
+            params.extend(lojas_ids)
+
+    @staticmethod
+    def obter_estatisticas_home(lojas_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Transações aprovadas (com valor) de hoje e do mês corrente.
+
+        Args:
+            lojas_ids: None = todas as lojas (admin)
+        """
+        hoje = date.today()
+        inicio_mes = hoje.replace(day=1)
+        proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+
+        where = ["data >= %s", "data < %s"]
+        params = [hoje, hoje, inicio_mes, proximo_mes]
+        ResumoDiarioService._filtro_lojas(lojas_ids, where, params)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT
+                    SUM(CASE WHEN data >= %s THEN qtd_aprovadas_com_valor ELSE 0 END),
+                    SUM(CASE WHEN data >= %s THEN valor_bruto_aprovado ELSE 0 END),
+                    SUM(qtd_aprovadas_com_valor),
+                    SUM(valor_bruto_aprovado)
+                FROM base_transacoes_resumo_diario
+                WHERE {' AND '.join(where)}
+            """, params)
+            row = cursor.fetchone()
+
+        return {
+            'transacoes_hoje': row[0] or 0,
+            'valor_hoje': row[1] or 0,
+            'transacoes_mes': row[2] or 0,
+            'valor_mes': row[3] or 0,
+        }
+
+    @staticmethod
+    def obter_totais_vendas(lojas_ids: List[int], data_inicio: Optional[str] = None,
+                            data_fim: Optional[str] = None, incluir_tef: bool = True) -> Dict[str, Any]:
+        """
+        Totais de vendas aprovadas (mesmos filtros da tela de vendas sem NSU).
+
+        Returns:
+            dict: total_bruto, total_pago, total_registros
+        """
+        where = []
+        params = []
+        ResumoDiarioService._filtro_lojas(lojas_ids, where, params)
+        if data_inicio:
+            where.append("data >= %s")
+            params.append(data_inicio)
+        if data_fim:
+            where.append("data <= %s")
+            params.append(data_fim)
+        if not incluir_tef:
+            where.append("tipo_operacao != %s")
+            params.append('Credenciadora')
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT SUM(valor_bruto_aprovado), SUM(valor_pago_aprovado), SUM(qtd_aprovadas)
+                FROM base_transacoes_resumo_diario
+                WHERE {' AND '.join(where) if where else '1=1'}
+            """, params)
+            row = cursor.fetchone()
+
+        return {
+            'total_bruto': float(row[0] or 0),
+            'total_pago': float(row[1] or 0),
+            'total_registros': int(row[2] or 0),
+        }
+
+    @staticmethod
+    def obter_recebimentos_por_data(lojas_ids: List[int], data_inicio: Optional[str] = None,
+                                    data_fim: Optional[str] = None, incluir_tef: bool = True,
+                                    limite: int = 1000) -> List[tuple]:
+        """
+        Recebimentos agrupados por data (mais recente primeiro).
+
+        Returns:
+            list: tuplas (data_recebimento: date, quantidade, valor_total: Decimal)
+        """
+        where = []
+        params = []
+        ResumoDiarioService._filtro_lojas(lojas_ids, where, params)
+        if data_inicio:
+            where.append("data_recebimento >= %s")
+            params.append(data_inicio)
+        if data_fim:
+            where.append("data_recebimento <= %s")
+            params.append(data_fim)
+        if not incluir_tef:
+            where.append("tipo_operacao != %s")
+            params.append('Credenciadora')
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT data_recebimento, SUM(quantidade), SUM(valor_total)
+                FROM base_transacoes_resumo_recebimento
+                WHERE {' AND '.join(where) if where else '1=1'}
+                GROUP BY data_recebimento
+                ORDER BY data_recebimento DESC
+                LIMIT {int(limite)}
+            """, params)
+            return [
+                (data_recebimento, int(quantidade or 0), Decimal(str(valor_total or 0)))
+                for data_recebimento, quantidade, valor_total in cursor.fetchall()
+            ]
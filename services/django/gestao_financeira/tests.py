@@ -1,3 +1,91 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from gestao_financeira.services import PagamentoService, filtro_data_pagamento
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
+
+
+class DataPagamentoTest(SimpleTestCase):
+
+    def test_converter_var45(self):
+        self.assertEqual(converter_data_ou_nula('05/03/2026'), date(2026, 3, 5))
+        self.assertEqual(converter_data_ou_nula(' 2026-03-05 '), date(2026, 3, 5))
+        self.assertEqual(converter_data_ou_nula('20260305'), date(2026, 3, 5))
+        for invalida in (None, '', '  ', '31/02/2026', 'N/A', '00/00/0000'):
+            self.assertIsNone(converter_data_ou_nula(invalida))
+
+    def test_filtro_intervalo(self):
+        condicoes, params = filtro_data_pagamento('2026-01-01', '31/01/2026', coluna='btu.data_pagamento')
+        self.assertEqual(condicoes, ['btu.data_pagamento >= %s', 'btu.data_pagamento <= %s'])
+        self.assertEqual(params, [date(2026, 1, 1), date(2026, 1, 31)])
+
+        condicoes, params = filtro_data_pagamento(None, 'invalida')
+        self.assertEqual(condicoes, ['data_pagamento IS NOT NULL'])
+        self.assertEqual(params, [])
+
+
+class ValidacaoPagamentoTest(SimpleTestCase):
+    """Valores fora da coluna viram erro da linha (o lote é gravado por bulk_create)"""
+
+    usuario = SimpleNamespace(id=1)
+
+    def test_limites_das_colunas(self):
+        dados = PagamentoService._validar_dados_pagamento({'nsu': '123', 'var111': '999999,994'}, self.usuario)
+        self.assertEqual(dados['var111'], Decimal('999999.99'))
+
+        with self.assertRaisesMessage(ValidationError, 'var111'):
+            PagamentoService._validar_dados_pagamento({'nsu': '123', 'var111': '1000000'}, self.usuario)
+        with self.assertRaisesMessage(ValidationError, 'var59'):
+            PagamentoService._validar_dados_pagamento({'nsu': '123', 'var59': 'x' * 21}, self.usuario)
+
+
+@skipUnless(connection.vendor == 'mysql', 'EXPLAIN específico do MySQL')
+class RelatorioFinanceiroExplainTest(TransactionTestCase):
+    """O relatório financeiro deve usar o índice (var6, data_pagamento), sem full scan"""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS base_transacoes_unificadas")
+            cursor.execute("""
+                CREATE TABLE base_transacoes_unificadas (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    var6 INT NULL,
+                    var45 VARCHAR(20) NULL,
+                    var111 VARCHAR(20) NULL,
+                    data_pagamento DATE NULL,
+                    KEY idx_btu_loja_data_pagamento (var6, data_pagamento)
+                ) ENGINE=InnoDB
+            """)
+            inicio = date(2025, 1, 1)
+            linhas = []
+            for i in range(5000):
+                dia = inicio + timedelta(days=i % 365)
+                linhas.extend([i % 200, dia.strftime('%d/%m/%Y'), '10.00', dia])
+            for i in range(0, len(linhas), 4000):
+                lote = linhas[i:i + 4000]
+                cursor.execute(
+                    "INSERT INTO base_transacoes_unificadas (var6, var45, var111, data_pagamento) VALUES "
+                    + ','.join(['(%s, %s, %s, %s)'] * (len(lote) // 4)),
+                    lote
+                )
+            cursor.execute("ANALYZE TABLE base_transacoes_unificadas")
+            cursor.fetchall()
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS base_transacoes_unificadas")
+
+    def test_relatorio_usa_indice_loja_data(self):
+        sql, params = PagamentoService._sql_relatorio_financeiro([7, 8], '2025-03-01', '2025-03-31')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql, params)
+            colunas = [c[0] for c in cursor.description]
+            plano = dict(zip(colunas, cursor.fetchone()))
+        self.assertEqual(plano['key'], 'idx_btu_loja_data_pagamento')
+        self.assertEqual(plano['type'], 'range')
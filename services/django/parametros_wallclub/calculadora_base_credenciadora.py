@@ -8,7 +8,8 @@ from datetime import datetime as dt, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, Any
 from pinbank.services import PinbankService
-from parametros_wallclub.services import ParametrosService
+from parametros_wallclub.services import ParametrosService, ParametrosVigentes
+from parametros_wallclub.calculadora_lote import CalculoEmLoteMixin
 from wallclub_core.utilitarios.funcoes_gerais import proxima_sexta_feira
 from django.db import connection
 from wallclub_core.utilitarios.log_control import registrar_log, log_esta_habilitado
@@ -17,7 +18,7 @@ from wallclub_core.database.queries import TransacoesQueries
 # logger removido - usando registrar_log
 
 
-class CalculadoraBaseCredenciadora:
+class CalculadoraBaseCredenciadora(CalculoEmLoteMixin):
     """
     Calculadora de valores primários para base de gestão
     Migração fiel da função mainCalculaValoresPrimarios() do PHP
@@ -54,6 +55,38 @@ class CalculadoraBaseCredenciadora:
         Returns:
             Dict com valores calculados (var0-var130)
         """
+        return self.calcular_lote([(dados_linha, info_loja, info_canal)], tipo_operacao=tipo_operacao).linha(0)
+
+    def _preparar_lote(self, linhas) -> Dict[str, Any]:
+        """var45 já gravadas na base unificada, uma consulta para o lote (var9 -> var45)"""
+        nsus = list({str(dados_linha.get('NsuOperacao')) for dados_linha, _, _ in linhas})
+        var45_existentes = {}
+        try:
+            with connection.cursor() as cursor:
+                for inicio in range(0, len(nsus), 1000):
+                    bloco = nsus[inicio:inicio + 1000]
+                    cursor.execute(f"""
+                        SELECT var9, var45
+                        FROM base_transacoes_unificadas
+                        WHERE var9 IN ({', '.join(['%s'] * len(bloco))})
+                    """, bloco)
+                    for var9, var45 in cursor.fetchall():
+                        var45_existentes.setdefault(str(var9), var45)
+        except Exception as e:
+            # Sem as datas gravadas, var45 é calculada normalmente
+            registrar_log('parametros_wallclub', f"Erro ao buscar var45 do lote: {str(e)}", nivel='ERROR')
+        return {'var45_existentes': var45_existentes}
+
+    def _calcular_linha(
+        self,
+        dados_linha: Dict[str, Any],
+        info_loja: Dict[str, Any],
+        info_canal: Dict[str, Any],
+        id_plano: int,
+        parametros: ParametrosVigentes,
+        dados_lote: Dict[str, Any]
+    ) -> Dict[int, Any]:
+        """Fórmulas de uma linha; plano e parâmetros vêm resolvidos por calcular_lote"""
         from datetime import datetime as dt, timedelta
         try:
             registrar_log('parametros_wallclub', f"Iniciando cálculo para NSU: {dados_linha.get('NsuOperacao', 'N/A')}")
@@ -62,10 +95,8 @@ class CalculadoraBaseCredenciadora:
             # Validar se a operação é Club (Wall S) ou Normal (Wall N)
             cpf = dados_linha.get('cpf', '') or ''
             if cpf and len(cpf) > 0:
-                wall = 's'
                 valores[130] = "Club"
             else:
-                wall = 'n'
                 valores[130] = "Normal"
 
             # info_loja e info_canal são obrigatórios (passados pelo service de carga)
@@ -75,13 +106,6 @@ class CalculadoraBaseCredenciadora:
             if data_ref is None:
                 raise ValueError(f"Erro ao converter DataTransacao para timestamp: {dados_linha['DataTransacao']}")
 
-            id_plano = self.parametros_service.busca_plano(
-                dados_linha['TipoCompra'],
-                dados_linha['NumeroTotalParcelas'],
-                dados_linha['Bandeira'],
-                wall
-            )
-
             # Estabelecer valores básicos
             valores['id_fila_extrato'] = dados_linha['id']  # ID da fila de extrato
             valores['canal_id'] = info_canal['id']
@@ -105,7 +129,7 @@ class CalculadoraBaseCredenciadora:
 
             # Variáveis secundárias que vem do Pinbank
             # var89 - Parâmetro wall 1 (CORRIGIDO - antes usava ValorTaxaAdm incorretamente)
-            param_wall_1 = ParametrosService.retornar_parametro_uptal(info_loja['id'], data_ref, id_plano, 1, wall)
+            param_wall_1 = parametros.uptal(1)
             if param_wall_1 is None:
                 param_wall_1 = 0
             valores[89] = self._format_decimal(self._to_decimal(param_wall_1, 4), 4)
@@ -165,7 +189,7 @@ class CalculadoraBaseCredenciadora:
             if valores[130] == "Normal":
                 valores[14] = self._format_decimal(0, 4)
             else:
-                param_7 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 7, wall)
+                param_7 = parametros.loja(7)
                 if param_7 is None:
                     valores[14] = None  # Retornar None como no PHP
                 else:
@@ -187,7 +211,7 @@ class CalculadoraBaseCredenciadora:
             valores[84] = valores[15]
 
             # Variável 29 - Parâmetro 1 (arredondado para 0 casas decimais como no PHP)
-            param_1 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 1, wall)
+            param_1 = parametros.loja(1)
             if param_1 is None:
                 param_1 = 0
             valores[29] = self._format_decimal(self._to_decimal(param_1, 0), 0)
@@ -210,7 +234,7 @@ class CalculadoraBaseCredenciadora:
 
             # Variável 17 - Percentual parâmetro 10
             # Sempre buscar o parâmetro_loja_10, independente de ser Normal ou não
-            param_10 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 10, wall)
+            param_10 = parametros.loja(10)
             if param_10 is None:
                 param_10 = 0
             self._validar_parametro(param_10, "param_10", f"loja {info_loja['id']}, plano {id_plano}")
@@ -259,7 +283,7 @@ class CalculadoraBaseCredenciadora:
             valores[23] = self._format_decimal(valores[16], 2)
 
             # Variável 24 - Parâmetro 14
-            param_14 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 14, wall)
+            param_14 = parametros.loja(14)
             if param_14 is None:
                 param_14 = 0
             self._validar_parametro(param_14, "param_14", f"loja {info_loja['id']}, plano {id_plano}")
@@ -284,7 +308,7 @@ class CalculadoraBaseCredenciadora:
             valores[82] = valores[26]
 
             # Variável 28 - Parâmetro 5
-            param_5 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 5, wall)
+            param_5 = parametros.loja(5)
             if param_5 is None:
                 param_5 = 0
             self._validar_parametro(param_5, "param_5", f"loja {info_loja['id']}, plano {id_plano}")
@@ -300,7 +324,7 @@ class CalculadoraBaseCredenciadora:
                 valores[27] = self._format_decimal(valores[11] * (1 - valores[28]), 2)
 
             # Variável 31 - Parâmetro 17
-            param_17 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 17, wall)
+            param_17 = parametros.loja(17)
             if param_17 is None:
                 param_17 = 0
             self._validar_parametro(param_17, "param_17", f"loja {info_loja['id']}, plano {id_plano}")
@@ -382,7 +406,7 @@ class CalculadoraBaseCredenciadora:
                 valores[43] = ''
 
             # Variável 50 - Parâmetro loja 23
-            param_23 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 23, wall)
+            param_23 = parametros.loja(23)
             if param_23 is None:
                 param_23 = 0
             valores[50] = self._format_decimal(self._to_decimal(param_23, 4), 4)
@@ -394,13 +418,13 @@ class CalculadoraBaseCredenciadora:
                 valores[49] = self._format_decimal(valores[50] * valores[19], 2)
 
             # Variável 47 - Parâmetro 21
-            param_21 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 21, wall)
+            param_21 = parametros.loja(21)
             if param_21 is None:
                 param_21 = 0
             valores[47] = self._format_decimal(self._to_decimal(param_21, 4), 4)
 
             # Variável 87 - Parâmetro uptal 1
-            param_wall_1 = ParametrosService.retornar_parametro_uptal(info_loja['id'], data_ref, id_plano, 1, wall)
+            param_wall_1 = parametros.uptal(1)
             if param_wall_1 is None:
                 param_wall_1 = 0
             valores[87] = self._format_decimal(self._to_decimal(param_wall_1, 4), 4)
@@ -421,7 +445,7 @@ class CalculadoraBaseCredenciadora:
                 valores[90] = self._format_decimal(valores[89] * valores[19], 2)
 
             # Variável 91 - Parâmetro uptal 4
-            param_wall_4 = ParametrosService.retornar_parametro_uptal(info_loja['id'], data_ref, id_plano, 4, wall)
+            param_wall_4 = parametros.uptal(4)
             if param_wall_4 is None:
                 param_wall_4 = 0
             valores[91] = self._format_decimal(self._to_decimal(param_wall_4, 4), 4)
@@ -504,7 +528,7 @@ class CalculadoraBaseCredenciadora:
                     valores[73] = self._format_decimal(valores[26] - valores[80] - valores[42], 2)
 
             # Variável 74 - Parâmetro clientef2 2
-            param_clientef2_2 = ParametrosService.retornar_parametro_wall(info_loja['id'], data_ref, id_plano, 2, wall)
+            param_clientef2_2 = parametros.wall(2)
             if param_clientef2_2 is None:
                 param_clientef2_2 = 0
             valores[74] = self._format_decimal(self._to_decimal(param_clientef2_2, 4), 4)
@@ -549,7 +573,7 @@ class CalculadoraBaseCredenciadora:
                         valores[21] = self._format_decimal(valores[78], 4)
 
             # Variável 108 - Parâmetro wall 6 (usa ID da loja, não do canal)
-            param_wall_6 = ParametrosService.retornar_parametro_uptal(info_loja['id'], data_ref, id_plano, 6, wall)
+            param_wall_6 = parametros.uptal(6)
             if param_wall_6 is None:
                 param_wall_6 = 0
             valores[108] = self._format_decimal(self._to_decimal(param_wall_6, 4), 4)
@@ -601,13 +625,13 @@ class CalculadoraBaseCredenciadora:
 
 
             # Variável 48 - Parâmetro 20
-            param_20 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 20, wall)
+            param_20 = parametros.loja(20)
             if param_20 is None:
                 param_20 = 0
             valores[48] = self._format_decimal(self._to_decimal(param_20, 4), 4)
 
             # Variável 52 - Parâmetro loja 25
-            param_25 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 25, wall)
+            param_25 = parametros.loja(25)
             if param_25 is None:
                 param_25 = 0
             valores[52] = self._format_decimal(self._to_decimal(param_25, 4), 4)
@@ -619,7 +643,7 @@ class CalculadoraBaseCredenciadora:
                 valores[51] = self._format_decimal(valores[52] * valores[19], 2)
 
             # Variável 53 - Parâmetro loja 27
-            param_27 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 27, wall)
+            param_27 = parametros.loja(27)
             if param_27 is None:
                 param_27 = 0
             valores[53] = self._format_decimal(self._to_decimal(param_27, 4), 4)
@@ -646,10 +670,10 @@ class CalculadoraBaseCredenciadora:
                 valores[57] = proxima_sexta_feira(valores[0])
 
             # Variável 60 - var19 - (param_12 * var19) - (param_14 * var19) + var56
-            param_12 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 12, wall)
+            param_12 = parametros.loja(12)
             if param_12 is None:
                 param_12 = 0
-            param_14 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 14, wall)
+            param_14 = parametros.loja(14)
             if param_14 is None:
                 param_14 = 0
 
@@ -708,40 +732,22 @@ class CalculadoraBaseCredenciadora:
             nsu_operacao = dados_linha['NsuOperacao']
             descricao_status_pag = str(dados_linha.get('DescricaoStatusPagamento', '')).strip()
 
-            try:
-                # Consultar base_transacoes_unificadas ao invés de BaseTransacoesGestao
-                with connection.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT var45 
-                        FROM base_transacoes_unificadas 
-                        WHERE var9 = %s 
-                        LIMIT 1
-                    """, [str(nsu_operacao)])
-                    resultado = cursor.fetchone()
-
-                if resultado and resultado[0]:
-                    # Preservar data existente
-                    valores[45] = resultado[0]
-                    registrar_log('parametros_wallclub',
-                                 f"var45 preservada para NSU {nsu_operacao}: {valores[45]}",
-                                 nivel='DEBUG')
-                else:
-                    # Primeira vez ou não tinha data: calcular
-                    if descricao_status_pag.startswith('Pago'):
-                        from datetime import datetime
-                        valores[45] = datetime.now().strftime('%d/%m/%Y')
-                        registrar_log('parametros_wallclub',
-                                     f"var45 calculada para NSU {nsu_operacao} (Pago): {valores[45]}",
-                                     nivel='DEBUG')
-                    else:
-                        valores[45] = ''
-            except Exception as e:
-                # Se houver erro na busca, calcular normalmente
+            # var45 já gravada em base_transacoes_unificadas (consultada em lote por _preparar_lote)
+            var45_existente = dados_lote['var45_existentes'].get(str(nsu_operacao))
+            if var45_existente:
+                # Preservar data existente
+                valores[45] = var45_existente
                 registrar_log('parametros_wallclub',
-                             f"Erro ao buscar var45 para NSU {nsu_operacao}: {str(e)}", nivel='ERROR')
+                             f"var45 preservada para NSU {nsu_operacao}: {valores[45]}",
+                             nivel='DEBUG')
+            else:
+                # Primeira vez ou não tinha data: calcular
                 if descricao_status_pag.startswith('Pago'):
                     from datetime import datetime
                     valores[45] = datetime.now().strftime('%d/%m/%Y')
+                    registrar_log('parametros_wallclub',
+                                 f"var45 calculada para NSU {nsu_operacao} (Pago): {valores[45]}",
+                                 nivel='DEBUG')
                 else:
                     valores[45] = ''
 
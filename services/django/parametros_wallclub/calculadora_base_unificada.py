@@ -9,7 +9,8 @@ import decimal
 from datetime import datetime as dt, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, Any
-from parametros_wallclub.services import ParametrosService
+from parametros_wallclub.services import ParametrosService, ParametrosVigentes
+from parametros_wallclub.calculadora_lote import CalculoEmLoteMixin
 from wallclub_core.utilitarios.funcoes_gerais import proxima_sexta_feira
 from django.db import connection
 from wallclub_core.utilitarios.log_control import registrar_log, log_esta_habilitado
@@ -17,7 +18,7 @@ from wallclub_core.utilitarios.log_control import registrar_log, log_esta_habili
 # logger removido - usando registrar_log
 
 
-class CalculadoraBaseUnificada:
+class CalculadoraBaseUnificada(CalculoEmLoteMixin):
     """
     Calculadora de valores primários para base de gestão
     Migração fiel da função mainCalculaValoresPrimarios() do PHP
@@ -44,6 +45,11 @@ class CalculadoraBaseUnificada:
             info_loja: Dict com info da loja (OBRIGATÓRIO)
             info_canal: Dict com info do canal (OBRIGATÓRIO)
         """
+        return self.calcular_lote([(dados_linha, info_loja, info_canal)], tabela=tabela).linha(0)
+
+    def _calcular_linha(self, dados_linha, info_loja: Dict[str, Any], info_canal: Dict[str, Any],
+                        id_plano: int, parametros: ParametrosVigentes, dados_lote: Dict[str, Any]):
+        """Fórmulas de uma linha; plano e parâmetros vêm resolvidos por calcular_lote"""
         from datetime import datetime as dt, timedelta
         try:
             log_id = dados_linha.get('NsuOperacao', 'N/A')
@@ -65,13 +71,6 @@ class CalculadoraBaseUnificada:
             if data_ref is None:
                 raise ValueError(f"Erro ao converter DataTransacao para timestamp: {dados_linha['DataTransacao']}")
 
-            id_plano = self.parametros_service.busca_plano(
-                dados_linha['TipoCompra'],
-                dados_linha['NumeroTotalParcelas'],
-                dados_linha['Bandeira'],
-                wall
-            )
-
             # Estabelecer valores básicos
             valores['id_fila_extrato'] = dados_linha['id']  # ID da fila de extrato
             valores['canal_id'] = info_canal['id']
@@ -135,7 +134,7 @@ class CalculadoraBaseUnificada:
             if valores[130] == "Normal":
                 valores[14] = self._format_decimal(0, 4)
             else:
-                param_7 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 7, wall)
+                param_7 = parametros.loja(7)
                 if param_7 is None:
                     valores[14] = None  # Retornar None como no PHP
                 else:
@@ -157,7 +156,7 @@ class CalculadoraBaseUnificada:
             valores[84] = valores[15]
 
             # Variável 29 - Parâmetro 1 (arredondado para 0 casas decimais como no PHP)
-            param_1 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 1, wall)
+            param_1 = parametros.loja(1)
             if param_1 is None:
                 param_1 = 0
             valores[29] = self._format_decimal(self._to_decimal(param_1, 0), 0)
@@ -180,7 +179,7 @@ class CalculadoraBaseUnificada:
 
             # Variável 17 - Percentual parâmetro 10
             # Sempre buscar o parâmetro_loja_10, independente de ser Normal ou não
-            param_10 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 10, wall)
+            param_10 = parametros.loja(10)
             if param_10 is None:
                 param_10 = 0
             self._validar_parametro(param_10, "param_10", f"loja {info_loja['id']}, plano {id_plano}")
@@ -229,7 +228,7 @@ class CalculadoraBaseUnificada:
             valores[23] = self._format_decimal(valores[16], 2)
 
             # Variável 24 - Parâmetro 14
-            param_14 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 14, wall)
+            param_14 = parametros.loja(14)
             if param_14 is None:
                 param_14 = 0
             self._validar_parametro(param_14, "param_14", f"loja {info_loja['id']}, plano {id_plano}")
@@ -251,7 +250,7 @@ class CalculadoraBaseUnificada:
             valores[82] = valores[26]
 
             # Variável 28 - Parâmetro 5
-            param_5 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 5, wall)
+            param_5 = parametros.loja(5)
             if param_5 is None:
                 param_5 = 0
             self._validar_parametro(param_5, "param_5", f"loja {info_loja['id']}, plano {id_plano}")
@@ -267,7 +266,7 @@ class CalculadoraBaseUnificada:
                 valores[27] = self._format_decimal(valores[11] * (1 - valores[28]), 2)
 
             # Variável 31 - Parâmetro 17
-            param_17 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 17, wall)
+            param_17 = parametros.loja(17)
             if param_17 is None:
                 param_17 = 0
             self._validar_parametro(param_17, "param_17", f"loja {info_loja['id']}, plano {id_plano}")
@@ -298,7 +297,7 @@ class CalculadoraBaseUnificada:
                 valores[35] = self._format_decimal(0, 4)
 
             # Variável 36 - Parâmetro 12
-            param_12 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 12, wall)
+            param_12 = parametros.loja(12)
             if param_12 is None:
                 param_12 = 0
             self._validar_parametro(param_12, "param_12", f"loja {info_loja['id']}, plano {id_plano}")
@@ -311,7 +310,7 @@ class CalculadoraBaseUnificada:
             valores[38] = self._format_decimal(valores[16] - valores[37], 2)
 
             # Variável 39 - Parâmetro 13
-            param_13 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 13, wall)
+            param_13 = parametros.loja(13)
             if param_13 is None:
                 param_13 = 0
             valores[39] = self._format_decimal(self._to_decimal(param_13, 4), 4)
@@ -336,7 +335,7 @@ class CalculadoraBaseUnificada:
             registrar_log('parametros_wallclub', f"var42 = {valores[42]} (var38={valores[38]} - var41={valores[41]})", nivel='DEBUG')
 
             # Variável 43 - Data com dias adicionados (parâmetro 18)
-            param_18 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 18, wall)
+            param_18 = parametros.loja(18)
             if param_18 is None:
                 param_18 = 0
             dias_adicionar = int(self._to_decimal(param_18, 0))
@@ -373,13 +372,13 @@ class CalculadoraBaseUnificada:
                 valores[50] = self._format_decimal(0, 4)
 
             # Variável 47 - Parâmetro 21
-            param_21 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 21, wall)
+            param_21 = parametros.loja(21)
             if param_21 is None:
                 param_21 = 0
             valores[47] = self._format_decimal(self._to_decimal(param_21, 4), 4)
 
             # Variável 87 - Parâmetro wall 1 (usa ID da loja, não do canal)
-            param_wall_1 = ParametrosService.retornar_parametro_uptal(info_loja['id'], data_ref, id_plano, 1, wall)
+            param_wall_1 = parametros.uptal(1)
             registrar_log('parametros_wallclub', f"var87 DEBUG: loja_id={info_loja['id']}, data_ref={data_ref}, id_plano={id_plano}, wall={wall}, param_wall_1={param_wall_1}", nivel='DEBUG')
             if param_wall_1 is None:
                 param_wall_1 = 0
@@ -393,7 +392,7 @@ class CalculadoraBaseUnificada:
                 valores[88] = self._format_decimal(valores[26] * valores[87], 2)
 
             # Variável 91 - Parâmetro wall 4 (usa ID da loja, não do canal)
-            param_wall_4 = ParametrosService.retornar_parametro_uptal(info_loja['id'], data_ref, id_plano, 4, wall)
+            param_wall_4 = parametros.uptal(4)
             if param_wall_4 is None:
                 param_wall_4 = 0
             valores[91] = self._format_decimal(self._to_decimal(param_wall_4, 4), 4)
@@ -437,7 +436,7 @@ class CalculadoraBaseUnificada:
                     valores[73] = self._format_decimal(valores[26] - valores[80] - valores[42], 2)
 
             # Variável 74 - Parâmetro clientef2 2
-            param_clientef2_2 = ParametrosService.retornar_parametro_wall(info_loja['id'], data_ref, id_plano, 2, wall)
+            param_clientef2_2 = parametros.wall(2)
             if param_clientef2_2 is None:
                 param_clientef2_2 = 0
             valores[74] = self._format_decimal(self._to_decimal(param_clientef2_2, 4), 4)
@@ -488,7 +487,7 @@ class CalculadoraBaseUnificada:
             valores[107] = {"0": self._format_decimal(valores[95] - valores[42], 2)}
 
             # Variável 108 - Parâmetro wall 6 (usa ID da loja, não do canal)
-            param_wall_6 = ParametrosService.retornar_parametro_uptal(info_loja['id'], data_ref, id_plano, 6, wall)
+            param_wall_6 = parametros.uptal(6)
             if param_wall_6 is None:
                 param_wall_6 = 0
             valores[108] = self._format_decimal(self._to_decimal(param_wall_6, 4), 4)
@@ -569,7 +568,7 @@ class CalculadoraBaseUnificada:
                 valores[52] = self._format_decimal(0, 4)
 
             # Variável 48 - Parâmetro 20
-            param_20 = ParametrosService.retornar_parametro_loja(info_loja['id'], data_ref, id_plano, 20, wall)
+            param_20 = parametros.loja(20)
             if param_20 is None:
                 param_20 = 0
             valores[48] = self._format_decimal(self._to_decimal(param_20, 4), 4)
@@ -648,7 +647,7 @@ class CalculadoraBaseUnificada:
                 valores[79] = self._format_decimal(0, 4)
 
             # Variável 96 - Data com dias adicionados (parâmetro wall 3 - usa ID da loja)
-            param_wall_3 = ParametrosService.retornar_parametro_uptal(info_loja['id'], data_ref, id_plano, 3, wall)
+            param_wall_3 = parametros.uptal(3)
             if param_wall_3 is None:
                 param_wall_3 = 0
             dias_adicionar = int(self._to_decimal(param_wall_3, 0))
@@ -0,0 +1,144 @@
+"""
+Cálculo em lote das calculadoras da base unificada
+Resolve plano e parâmetros uma vez por grupo (loja, plano, wall, vigência) e
+devolve as variáveis em colunas
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from parametros_wallclub.services import ParametrosService, ParametrosVigentes
+from wallclub_core.utilitarios.log_control import registrar_log
+
+# Marca, nas colunas, a variável que a linha não calculou (erro ou ramo sem a variável)
+AUSENTE = object()
+
+
+class ResultadoLote:
+    """
+    Variáveis calculadas em colunas: colunas[variavel][i] é o valor da linha i
+    do lote. erros[i] guarda a exceção da linha i (None se calculou).
+    """
+
+    def __init__(self, total: int):
+        self.colunas: Dict[Any, List[Any]] = {}
+        self.erros: List[Optional[Exception]] = [None] * total
+        # Ordem das variáveis de cada linha, para linha() sair igual ao cálculo individual
+        self._variaveis: List[tuple] = [()] * total
+
+    def __len__(self):
+        return len(self.erros)
+
+    def adicionar(self, indice: int, valores: Dict[Any, Any]):
+        for variavel, valor in valores.items():
+            coluna = self.colunas.get(variavel)
+            if coluna is None:
+                coluna = self.colunas[variavel] = [AUSENTE] * len(self.erros)
+            coluna[indice] = valor
+        self._variaveis[indice] = tuple(valores)
+
+    def linha(self, indice: int) -> Dict[Any, Any]:
+        """Valores da linha no formato de calcular_valores_primarios (levanta o erro da linha)"""
+        if self.erros[indice] is not None:
+            raise self.erros[indice]
+        return {variavel: self.colunas[variavel][indice] for variavel in self._variaveis[indice]}
+
+
+class CalculoEmLoteMixin:
+    """
+    calcular_lote para as calculadoras de valores primários.
+
+    A subclasse implementa _calcular_linha(dados_linha, info_loja, info_canal,
+    id_plano, parametros, dados_lote) com as fórmulas de uma linha; plano,
+    parâmetros e o que _preparar_lote carregar chegam já resolvidos.
+    """
+
+    def calcular_lote(self, linhas: Sequence[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]],
+                      **opcoes) -> ResultadoLote:
+        """
+        Calcula os valores primários de várias linhas.
+
+        Args:
+            linhas: Lista de (dados_linha, info_loja, info_canal)
+            opcoes: tipo_operacao/tabela, aceitos por compatibilidade com
+                    calcular_valores_primarios
+
+        Returns:
+            ResultadoLote com as variáveis em colunas, na ordem de `linhas`
+        """
+        resultado = ResultadoLote(len(linhas))
+        if not linhas:
+            return resultado
+
+        # 1. Data de referência, wall e plano de cada linha (plano: uma busca por combinação)
+        preparadas = []
+        planos = {}
+        for dados_linha, info_loja, _ in linhas:
+            try:
+                cpf = dados_linha.get('cpf', '') or ''
+                wall = 's' if cpf else 'n'
+                data_ref = self.parametros_service.converter_para_timestamp(dados_linha['DataTransacao'])
+                chave_plano = (dados_linha['TipoCompra'], dados_linha['NumeroTotalParcelas'], dados_linha['Bandeira'], wall)
+                loja_id = info_loja['id']
+            except Exception:
+                data_ref = None
+            if data_ref is None:
+                # Linha inválida: _calcular_linha levanta o mesmo erro do cálculo individual
+                preparadas.append(None)
+                continue
+            if chave_plano not in planos:
+                planos[chave_plano] = self.parametros_service.busca_plano(*chave_plano)
+            preparadas.append((loja_id, planos[chave_plano], wall, datetime.fromtimestamp(data_ref)))
+
+        # 2. Configurações de todas as (loja, plano, wall) do lote em uma consulta
+        validas = [p for p in preparadas if p is not None]
+        configuracoes = {}
+        if validas:
+            datas = [data for _, _, _, data in validas]
+            try:
+                configuracoes = ParametrosService.carregar_configuracoes(
+                    {(loja_id, id_plano, wall) for loja_id, id_plano, wall, _ in validas}, min(datas), max(datas)
+                )
+            except Exception as e:
+                # Como retornar_parametro_*: erro na busca = parâmetros ausentes (None)
+                registrar_log('parametros_wallclub', f"Erro ao carregar parâmetros do lote: {e}", nivel='ERROR')
+
+        # 3. Agrupar por (loja, plano, wall, vigência): parâmetros resolvidos uma vez por grupo
+        grupos: Dict[tuple, List[int]] = {}
+        parametros_grupo = {}
+        for indice, preparada in enumerate(preparadas):
+            if preparada is None:
+                grupos.setdefault(None, []).append(indice)
+                continue
+            loja_id, id_plano, wall, data_referencia = preparada
+            config = ParametrosService.selecionar_configuracao(
+                configuracoes.get((loja_id, id_plano, wall.upper()), []), data_referencia
+            )
+            chave = (loja_id, id_plano, wall, config.id if config else None)
+            if chave not in parametros_grupo:
+                parametros_grupo[chave] = ParametrosVigentes(config)
+            grupos.setdefault(chave, []).append(indice)
+
+        dados_lote = self._preparar_lote(linhas)
+
+        # 4. Fórmulas de cada grupo sobre as linhas do grupo
+        for chave, indices in grupos.items():
+            parametros = parametros_grupo.get(chave, ParametrosVigentes(None))
+            id_plano = chave[1] if chave else 0
+            for indice in indices:
+                dados_linha, info_loja, info_canal = linhas[indice]
+                try:
+                    resultado.adicionar(indice, self._calcular_linha(
+                        dados_linha, info_loja, info_canal, id_plano, parametros, dados_lote
+                    ))
+                except Exception as e:
+                    resultado.erros[indice] = e
+
+        registrar_log('parametros_wallclub',
+                      f"Lote calculado: {len(linhas)} linhas, {len(grupos)} grupos de parâmetros, "
+                      f"{sum(1 for erro in resultado.erros if erro is not None)} erros")
+        return resultado
+
+    def _preparar_lote(self, linhas) -> Dict[str, Any]:
+        """Dados do lote inteiro usados pelas fórmulas (consultas em lote)"""
+        return {}
@@ -0,0 +1,135 @@
+"""
+Benchmark das calculadoras de valores primários: linha a linha vs calcular_lote.
+
+Usa os planos e parâmetros de parametros_wallclub/fixtures/calculadora_lote.json
+(lojas deslocadas para não colidir com lojas reais) e repete as linhas de
+credenciadora e checkout da fixture até --linhas, com NSUs distintos. Tudo
+roda dentro de uma transação desfeita ao final (nada fica gravado).
+
+Para cada calculadora mede:
+
+- linha a linha: calcular_valores_primarios por linha (plano, parâmetros e
+  var45 consultados a cada linha)
+- lote: calcular_lote em blocos de --lote linhas (o BATCH_SIZE das cargas)
+
+e confere que as duas saídas são iguais.
+
+Uso:
+    python manage.py benchmark_calculadora_lote
+    python manage.py benchmark_calculadora_lote --linhas 20000 --lote 100
+"""
+import json
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from parametros_wallclub.calculadora_base_credenciadora import CalculadoraBaseCredenciadora
+from parametros_wallclub.calculadora_base_unificada import CalculadoraBaseUnificada
+from parametros_wallclub.models import ParametrosWall, Plano
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', '..', 'fixtures', 'calculadora_lote.json')
+DESLOCAMENTO_LOJA = 900000
+NSU_BASE = 900000000
+CAMPOS_DECIMAIS = ('valor_original', 'ValorBruto', 'ValorBrutoParcela', 'ValorSplit', 'ValorTaxaAdm',
+                   'ValorTaxaMes', 'vRepasse', 'f44', 'f58', 'f111', 'f112')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark: valores primários linha a linha vs calcular_lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=5000, help='Linhas por calculadora (padrão: 5000)')
+        parser.add_argument('--lote', type=int, default=100, help='Linhas por calcular_lote (padrão: 100)')
+
+    def handle(self, *args, **options):
+        total = options['linhas']
+        tamanho_lote = options['lote']
+        with open(FIXTURE, encoding='utf-8') as arquivo:
+            fixture = json.load(arquivo)
+
+        divergentes = []
+        with transaction.atomic():
+            self._carregar_parametros(fixture)
+
+            cenarios = (
+                ('credenciadora', CalculadoraBaseCredenciadora(), {'tipo_operacao': 'Credenciadora'}),
+                ('checkout', CalculadoraBaseUnificada(), {'tabela': 'transactiondata_pos'}),
+            )
+            for nome, calculadora, opcoes in cenarios:
+                linhas = self._gerar_linhas(fixture[nome], total)
+                argumento = next(iter(opcoes.values()))
+
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    saida_linha = []
+                    for dados_linha, info_loja, info_canal in linhas:
+                        try:
+                            saida_linha.append(calculadora.calcular_valores_primarios(
+                                dados_linha, argumento, info_loja, info_canal
+                            ))
+                        except Exception as e:
+                            saida_linha.append(repr(e))
+                    duracao = time.perf_counter() - inicio
+                self._escrever(f'{nome} linha a linha', duracao, total, len(consultas))
+
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    saida_lote = []
+                    for i in range(0, total, tamanho_lote):
+                        resultado = calculadora.calcular_lote(linhas[i:i + tamanho_lote], **opcoes)
+                        for indice in range(len(resultado)):
+                            try:
+                                saida_lote.append(resultado.linha(indice))
+                            except Exception as e:
+                                saida_lote.append(repr(e))
+                    duracao = time.perf_counter() - inicio
+                self._escrever(f'{nome} lote de {tamanho_lote}', duracao, total, len(consultas))
+
+                if saida_linha != saida_lote:
+                    divergentes.append(nome)
+
+            transaction.set_rollback(True)
+
+        if divergentes:
+            self.stdout.write(self.style.ERROR(f"Saída divergente entre linha a linha e lote: {', '.join(divergentes)}"))
+            return
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _carregar_parametros(fixture):
+        Plano.objects.bulk_create([Plano(**plano) for plano in fixture['planos']], ignore_conflicts=True)
+        ParametrosWall.objects.bulk_create([
+            ParametrosWall(**dict(
+                parametros,
+                id_desc=f"{parametros['loja_id'] + DESLOCAMENTO_LOJA}-{parametros['id_plano']}",
+                loja_id=parametros['loja_id'] + DESLOCAMENTO_LOJA,
+                vigencia_inicio=datetime.fromisoformat(parametros['vigencia_inicio']),
+                vigencia_fim=(datetime.fromisoformat(parametros['vigencia_fim'])
+                              if parametros['vigencia_fim'] else None),
+            ))
+            for parametros in fixture['parametros']
+        ])
+
+    @staticmethod
+    def _gerar_linhas(modelos, total):
+        linhas = []
+        for i in range(total):
+            modelo = modelos[i % len(modelos)]
+            dados_linha = dict(modelo['dados_linha'], NsuOperacao=NSU_BASE + i)
+            for campo in CAMPOS_DECIMAIS:
+                if dados_linha.get(campo) is not None:
+                    dados_linha[campo] = Decimal(dados_linha[campo])
+            loja_id = modelo['info_loja']['id'] + DESLOCAMENTO_LOJA
+            info_loja = dict(modelo['info_loja'], id=loja_id, loja_id=loja_id)
+            linhas.append((dados_linha, info_loja, dict(modelo['info_canal'])))
+        return linhas
+
+    def _escrever(self, nome, duracao, total, consultas):
+        self.stdout.write(f'{nome:30s} {duracao:8.2f}s ({total / duracao:9.0f} linhas/s) - {consultas} consultas')
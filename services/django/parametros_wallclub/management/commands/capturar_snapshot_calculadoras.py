@@ -0,0 +1,36 @@
+"""
+Captura um snapshot anonimizado para o replay das calculadoras.
+
+Grava as transações do extrato (credenciadora e checkout, uma linha por NSU,
+no formato que as cargas entregam às calculadoras), as entradas de desconto
+derivadas delas, os planos, os ParametrosWall das lojas envolvidas e as var45
+já gravadas. Veja parametros_wallclub/replay_calculadoras.py.
+
+Uso:
+    python manage.py capturar_snapshot_calculadoras --inicio 2025-06-01 --fim 2025-07-01 --saida snapshot.json
+    python manage.py capturar_snapshot_calculadoras --inicio 2025-06-01 --fim 2025-06-02 --loja 12 --limite 500 --saida loja12.json
+"""
+from django.core.management.base import BaseCommand
+
+from parametros_wallclub.replay_calculadoras import capturar_snapshot, salvar_json
+
+
+class Command(BaseCommand):
+    help = 'Captura transações e parâmetros anonimizados para o replay das calculadoras'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', required=True, help='DataTransacao inicial, inclusiva (YYYY-MM-DD)')
+        parser.add_argument('--fim', required=True, help='DataTransacao final, exclusiva (YYYY-MM-DD)')
+        parser.add_argument('--limite', type=int, default=1000, help='NSUs por calculadora (padrão: 1000)')
+        parser.add_argument('--loja', type=int, action='append', dest='lojas',
+                            help='Restringe a uma loja (pode repetir)')
+        parser.add_argument('--saida', required=True, help='Arquivo JSON do snapshot')
+
+    def handle(self, *args, **options):
+        snapshot = capturar_snapshot(options['inicio'], options['fim'], options['limite'], options['lojas'])
+        salvar_json(snapshot, options['saida'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot gravado em {options['saida']}: {len(snapshot['credenciadora'])} credenciadora, "
+            f"{len(snapshot['checkout'])} checkout, {len(snapshot['desconto'])} desconto, "
+            f"{len(snapshot['parametros'])} parâmetros"
+        ))
@@ -0,0 +1,118 @@
+"""
+Replay de um snapshot nas calculadoras: desempenho e diff das saídas.
+
+Roda as entradas do snapshot (padrão: parametros_wallclub/fixtures/
+calculadora_lote.json) em credenciadora, checkout e desconto e mostra, por
+calculadora e API (linha a linha ou calcular_lote):
+
+- linhas/s e latência p50/p99 por linha (no lote: tempo do bloco / linhas)
+- com --alocacoes: pico de memória e blocos retidos por linha (tracemalloc,
+  em uma segunda passada para não distorcer o tempo)
+- com --referencia: diff variável a variável contra saídas gravadas antes
+  (--gravar-saida de outra versão, ou fixtures/calculadora_lote_golden.json)
+
+--classe troca a calculadora por outra versão (caminho Python da classe, ex.
+uma cópia antiga em outro módulo). --modo memoria serve planos/parâmetros/var45
+do próprio snapshot; --modo banco grava o snapshot no banco atual dentro de
+uma transação desfeita ao final (use um banco vazio, ex. SQLite).
+
+Uso:
+    python manage.py replay_calculadoras
+    python manage.py replay_calculadoras --calculadora checkout --api lote --lote 100 --repeticoes 50 --alocacoes
+    python manage.py replay_calculadoras --calculadora credenciadora --classe copia.calculadora.CalculadoraBaseCredenciadora --gravar-saida antes.json
+    python manage.py replay_calculadoras --snapshot snapshot.json --referencia antes.json
+"""
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from parametros_wallclub.replay_calculadoras import (
+    CALCULADORAS, ReplayCalculadoras, carregar_no_banco, carregar_snapshot, comparar_saidas, salvar_json,
+)
+
+SNAPSHOT_PADRAO = os.path.join(os.path.dirname(__file__), '..', '..', 'fixtures', 'calculadora_lote.json')
+
+
+class Command(BaseCommand):
+    help = 'Replay de transações gravadas nas calculadoras (linhas/s, p50/p99, alocações e diff)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--snapshot', default=SNAPSHOT_PADRAO, help='Snapshot JSON (padrão: fixture do repositório)')
+        parser.add_argument('--calculadora', choices=list(CALCULADORAS), action='append', dest='calculadoras',
+                            help='Calculadora a rodar (pode repetir). Padrão: todas')
+        parser.add_argument('--classe', help='Classe alternativa da calculadora (exige uma única --calculadora)')
+        parser.add_argument('--api', choices=('linha', 'lote', 'ambas'), default='ambas')
+        parser.add_argument('--lote', type=int, default=100, help='Linhas por calcular_lote (padrão: 100)')
+        parser.add_argument('--modo', choices=('memoria', 'banco'), default='memoria')
+        parser.add_argument('--repeticoes', type=int, default=1,
+                            help='Repete as entradas do snapshot N vezes (amostra maior)')
+        parser.add_argument('--alocacoes', action='store_true', help='Mede alocações com tracemalloc')
+        parser.add_argument('--referencia', help='Saídas de referência para o diff')
+        parser.add_argument('--gravar-saida', help='Grava as saídas (referência para outra versão)')
+
+    def handle(self, *args, **options):
+        calculadoras = options['calculadoras'] or list(CALCULADORAS)
+        if options['classe'] and len(calculadoras) != 1:
+            raise CommandError('--classe exige exatamente uma --calculadora')
+
+        snapshot = carregar_snapshot(options['snapshot'])
+        repeticoes = options['repeticoes']
+        for nome in CALCULADORAS:
+            snapshot[nome] = snapshot.get(nome, []) * repeticoes
+        referencia = None
+        if options['referencia']:
+            with open(options['referencia'], encoding='utf-8') as arquivo:
+                referencia = {nome: saida * repeticoes for nome, saida in json.load(arquivo).items()}
+
+        with transaction.atomic():
+            if options['modo'] == 'banco':
+                try:
+                    carregar_no_banco(snapshot)
+                except ValueError as e:
+                    raise CommandError(str(e))
+            replay = ReplayCalculadoras(snapshot, modo=options['modo'])
+            saidas, divergentes = {}, []
+            for nome in calculadoras:
+                apis = ['linha', 'lote'] if options['api'] == 'ambas' else [options['api']]
+                if CALCULADORAS[nome][1] is None:
+                    apis = ['linha']  # desconto não tem cálculo em lote
+                for api in apis:
+                    resultado = replay.executar(nome, classe=options['classe'], api=api,
+                                                tamanho_lote=options['lote'], alocacoes=options['alocacoes'])
+                    self._escrever(f'{nome}/{api}', resultado['metricas'])
+                    saidas.setdefault(nome, resultado['saida'])
+                    if referencia is not None and nome in referencia:
+                        if not self._escrever_diff(comparar_saidas(referencia[nome], resultado['saida'])):
+                            divergentes.append(f'{nome}/{api}')
+            transaction.set_rollback(True)
+
+        if options['gravar_saida']:
+            salvar_json({nome: saida[:len(saida) // repeticoes] for nome, saida in saidas.items()},
+                        options['gravar_saida'])
+            self.stdout.write(f"Saídas gravadas em {options['gravar_saida']}")
+
+        if divergentes:
+            self.stdout.write(self.style.ERROR(f"Saídas divergentes da referência: {', '.join(divergentes)}"))
+            return
+        self.stdout.write(self.style.SUCCESS('Replay concluído'))
+
+    def _escrever(self, nome, metricas):
+        linha = (f"{nome:22s} {metricas['linhas']:7d} linhas {metricas['linhas_por_segundo']:9.0f} linhas/s  "
+                 f"p50 {metricas['p50_ms']:7.3f}ms  p99 {metricas['p99_ms']:7.3f}ms  {metricas['erros']} erros")
+        if 'pico_kib' in metricas:
+            linha += (f"  pico {metricas['pico_kib']:.0f} KiB, retido {metricas['retido_kib']:.0f} KiB, "
+                      f"{metricas['blocos_retidos_por_linha']:.1f} blocos/linha")
+        self.stdout.write(linha)
+
+    def _escrever_diff(self, diff):
+        if not diff['linhas_divergentes']:
+            self.stdout.write(f"{'':22s} sem divergências em {diff['linhas']} linhas")
+            return True
+        self.stdout.write(f"{'':22s} {diff['linhas_divergentes']} de {diff['linhas']} linhas divergentes")
+        for coluna, divergencia in sorted(diff['colunas'].items(), key=lambda item: -item[1]['divergencias']):
+            linha, esperado, obtido = divergencia['exemplos'][0]
+            self.stdout.write(f"{'':24s}var {coluna}: {divergencia['divergencias']} linhas "
+                              f"(linha {linha}: esperado {esperado}, obtido {obtido})")
+        return False
@@ -0,0 +1,593 @@
+"""
+Replay de transações gravadas nas calculadoras (desempenho e regressão)
+
+Snapshot: linhas do extrato no formato das cargas (credenciadora e checkout),
+entradas de desconto, ParametrosWall/Plano das lojas envolvidas e as var45 já
+gravadas, anonimizados, em um JSON portátil (o formato de
+fixtures/calculadora_lote.json).
+
+Replay: roda o snapshot em qualquer versão das calculadoras sem o banco de
+produção, com os parâmetros carregados no banco atual (SQLite) ou servidos em
+memória. Compara as saídas variável a variável e mede linhas/s, latência
+p50/p99 por linha e alocações.
+"""
+import copy
+import datetime
+import hashlib
+import inspect
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from django.db import connection, models
+from django.utils.module_loading import import_string
+
+from parametros_wallclub.models import ParametrosWall, Plano
+from parametros_wallclub.services import ParametrosService
+from wallclub_core.utilitarios.log_control import registrar_log
+
+FORMATO = 1
+
+# nome -> (classe padrão, opções de calcular_lote; o valor é o 2º argumento de calcular_valores_primarios)
+CALCULADORAS = {
+    'credenciadora': ('parametros_wallclub.calculadora_base_credenciadora.CalculadoraBaseCredenciadora',
+                      {'tipo_operacao': 'Credenciadora'}),
+    'checkout': ('parametros_wallclub.calculadora_base_unificada.CalculadoraBaseUnificada',
+                 {'tabela': 'transactiondata_pos'}),
+    'desconto': ('parametros_wallclub.services.CalculadoraDesconto', None),
+}
+
+CAMPOS_DECIMAIS = ('valor_original', 'ValorBruto', 'ValorBrutoParcela', 'ValorSplit', 'ValorTaxaAdm',
+                   'ValorTaxaMes', 'vRepasse', 'f44', 'f58', 'f111', 'f112')
+
+# NSUs do snapshot são renumerados a partir daqui (var9 das var45 acompanha)
+NSU_BASE = 7000000
+
+DATETIME = datetime.datetime
+
+
+# ----------------------------------------------------------------------
+# Relógio fixo (var45, var65, var123 e o desconto dependem da data corrente)
+# ----------------------------------------------------------------------
+
+class _TipoData(type):
+    # datetimes criados antes do patch (e pelo driver do banco) continuam sendo datetime
+    def __instancecheck__(cls, objeto):
+        return isinstance(objeto, DATETIME)
+
+    def __subclasscheck__(cls, classe):
+        return issubclass(classe, DATETIME)
+
+
+def data_fixa(agora: str):
+    """datetime com now() fixo em `agora` (ISO)"""
+    class DataFixa(DATETIME, metaclass=_TipoData):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.fromisoformat(agora)
+    return DataFixa
+
+
+@contextmanager
+def relogio_fixo(agora: str, *classes):
+    """
+    Fixa datetime.now() em `agora`: no módulo datetime e nos módulos das
+    classes (e bases) que importaram a classe datetime com outro nome
+    (ex.: `from datetime import datetime as dt`).
+    """
+    fixa = data_fixa(agora)
+    modulos = {sys.modules[base.__module__] for classe in classes
+               for base in inspect.getmro(classe) if base.__module__ in sys.modules}
+    with ExitStack() as pilha:
+        pilha.enter_context(mock.patch('datetime.datetime', fixa))
+        for modulo in modulos:
+            for nome, valor in list(vars(modulo).items()):
+                if valor is DATETIME:
+                    pilha.enter_context(mock.patch.object(modulo, nome, fixa))
+        yield
+
+
+# ----------------------------------------------------------------------
+# Snapshot
+# ----------------------------------------------------------------------
+
+def capturar_snapshot(data_inicio: str, data_fim: str, limite: int = 1000,
+                      lojas: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Captura as transações do extrato com DataTransacao em [data_inicio, data_fim)
+    (até `limite` NSUs por calculadora) e os parâmetros das lojas envolvidas.
+
+    Anonimização: só as colunas lidas pelas calculadoras; NSUs e ids
+    renumerados; CPF/CNPJ trocados por hash; nome da loja trocado por 'LOJA <id>'.
+    """
+    anonimizador = _Anonimizador()
+    canais = _canais()
+    snapshot = {'formato': FORMATO, 'agora': DATETIME.now().isoformat(timespec='seconds')}
+
+    for nome in ('credenciadora', 'checkout'):
+        snapshot[nome] = [anonimizador.linha(linha, canais, nome)
+                          for linha in _consultar_extrato(nome, data_inicio, data_fim, limite, lojas)]
+
+    snapshot['base_transacoes_unificadas'] = [
+        {'var9': str(anonimizador.nsu(int(var9))), 'var45': var45}
+        for var9, var45 in _var45_existentes(list(anonimizador.nsus))
+    ]
+
+    lojas_snapshot = sorted({linha['info_loja']['id'] for nome in ('credenciadora', 'checkout')
+                             for linha in snapshot[nome]})
+    snapshot['planos'] = [_registro(plano) for plano in Plano.objects.order_by('id')]
+    snapshot['parametros'] = [_registro(config) for config in
+                              ParametrosWall.objects.filter(loja_id__in=lojas_snapshot).order_by('id')]
+    snapshot['desconto'] = entradas_desconto(snapshot['credenciadora'] + snapshot['checkout'])
+
+    registrar_log('parametros_wallclub',
+                  f"Snapshot capturado: {len(snapshot['credenciadora'])} credenciadora, "
+                  f"{len(snapshot['checkout'])} checkout, {len(lojas_snapshot)} lojas, "
+                  f"{len(snapshot['parametros'])} parâmetros")
+    return snapshot
+
+
+def entradas_desconto(linhas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Argumentos de calcular_desconto derivados das linhas do extrato"""
+    entradas = []
+    for linha in linhas:
+        dados = linha['dados_linha']
+        if dados.get('ValorBruto') is None:
+            continue
+        entradas.append({
+            'valor_original': str(dados['ValorBruto']),
+            'data': (dados.get('DataTransacao') or '')[:10],
+            'forma': dados.get('TipoCompra'),
+            'parcelas': dados.get('NumeroTotalParcelas') or 0,
+            'id_loja': linha['info_loja']['id'],
+            'wall': 's' if dados.get('cpf') else 'n',
+        })
+    return entradas
+
+
+def salvar_json(dados: Dict[str, Any], caminho: str):
+    """Grava snapshot/saídas com um registro por linha (diff legível)"""
+    partes = []
+    for chave, valor in dados.items():
+        if isinstance(valor, list) and valor:
+            itens = ',\n'.join('  ' + json.dumps(item, ensure_ascii=False, separators=(',', ':'))
+                               for item in valor)
+            partes.append(f' {json.dumps(chave)}: [\n{itens}\n ]')
+        else:
+            partes.append(f' {json.dumps(chave)}: {json.dumps(valor, ensure_ascii=False)}')
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write('{\n' + ',\n'.join(partes) + '\n}\n')
+
+
+def carregar_snapshot(caminho: str) -> Dict[str, Any]:
+    """Lê o snapshot convertendo os campos monetários para Decimal"""
+    with open(caminho, encoding='utf-8') as arquivo:
+        snapshot = json.load(arquivo)
+    for chave in ('credenciadora', 'checkout'):
+        for linha in snapshot.get(chave, []):
+            dados = linha['dados_linha']
+            for campo in CAMPOS_DECIMAIS:
+                if dados.get(campo) is not None:
+                    dados[campo] = Decimal(dados[campo])
+    for entrada in snapshot.get('desconto', []):
+        entrada['valor_original'] = Decimal(entrada['valor_original'])
+    return snapshot
+
+
+def carregar_no_banco(snapshot: Dict[str, Any]):
+    """
+    Grava planos, parâmetros e var45 do snapshot no banco atual (SQLite de
+    teste ou dentro de uma transação desfeita). Recusa banco que já tenha
+    parâmetros das lojas do snapshot, para não misturar configurações.
+    """
+    parametros = [ParametrosWall(**_campos_parametros(registro)) for registro in snapshot['parametros']]
+    lojas = {config.loja_id for config in parametros}
+    if ParametrosWall.objects.filter(loja_id__in=lojas).exists():
+        raise ValueError('O banco já tem parâmetros das lojas do snapshot: use um banco vazio ou o modo memória')
+
+    Plano.objects.bulk_create([Plano(**plano) for plano in snapshot['planos']], ignore_conflicts=True)
+    ParametrosWall.objects.bulk_create(parametros)
+    with connection.cursor() as cursor:
+        if 'base_transacoes_unificadas' not in connection.introspection.table_names(cursor):
+            cursor.execute("CREATE TABLE base_transacoes_unificadas (var9 VARCHAR(50) NULL, var45 VARCHAR(20) NULL)")
+        cursor.executemany("INSERT INTO base_transacoes_unificadas (var9, var45) VALUES (%s, %s)",
+                           [(linha['var9'], linha['var45']) for linha in snapshot['base_transacoes_unificadas']])
+
+
+class ParametrosEmMemoria:
+    """
+    busca_plano, get_configuracao_ativa e carregar_configuracoes servidos do
+    snapshot, sem banco. Versões da calculadora que consultam o banco por
+    SQL direto (var45 linha a linha) precisam do modo banco.
+    """
+
+    def __init__(self, snapshot: Dict[str, Any]):
+        self.planos = sorted((Plano(**plano) for plano in snapshot['planos']), key=lambda plano: plano.id)
+        self.configuracoes: Dict[tuple, List[ParametrosWall]] = {}
+        for numero, registro in enumerate(snapshot['parametros'], 1):
+            config = ParametrosWall(**_campos_parametros(registro))
+            config.id = config.id or numero
+            self.configuracoes.setdefault((config.loja_id, config.id_plano, config.wall.upper()), []).append(config)
+        for configs in self.configuracoes.values():
+            # Ordem de carregar_configuracoes: vigencia_inicio mais recente primeiro, depois id
+            configs.sort(key=lambda config: config.id)
+            configs.sort(key=lambda config: config.vigencia_inicio, reverse=True)
+
+        self.var45_existentes = {}
+        for linha in snapshot['base_transacoes_unificadas']:
+            self.var45_existentes.setdefault(str(linha['var9']), linha['var45'])
+
+    def busca_plano(self, forma: str, parcelas: int, bandeira: str, wall: str = 'S') -> int:
+        nome_plano, parcelas, bandeira = ParametrosService.normalizar_plano(forma, parcelas, bandeira)
+        for plano in self.planos:
+            if (plano.nome, plano.prazo_dias, plano.bandeira) == (nome_plano, parcelas, bandeira):
+                return plano.id
+        return 0
+
+    def get_configuracao_ativa(self, loja_id: int, data_referencia=None, id_plano: Optional[int] = None,
+                               wall: Optional[str] = None) -> Optional[ParametrosWall]:
+        if data_referencia is None:
+            data_referencia = datetime.datetime.now()
+        if id_plano is not None and wall is not None:
+            configs = self.configuracoes.get((loja_id, id_plano, wall.upper()), [])
+        else:
+            configs = sorted((config for (loja, _, _), lista in self.configuracoes.items()
+                              if loja == loja_id for config in lista),
+                             key=lambda config: config.vigencia_inicio, reverse=True)
+        return ParametrosService.selecionar_configuracao(configs, data_referencia)
+
+    def carregar_configuracoes(self, chaves, data_inicio, data_fim, tamanho_bloco: int = 500):
+        configuracoes = {}
+        for loja_id, id_plano, wall in chaves:
+            chave = (loja_id, id_plano, wall.upper())
+            configuracoes[chave] = [
+                config for config in self.configuracoes.get(chave, [])
+                if config.vigencia_inicio <= data_fim and (config.vigencia_fim is None or config.vigencia_fim >= data_inicio)
+            ]
+        return configuracoes
+
+    @contextmanager
+    def ativar(self, calculadora):
+        with ExitStack() as pilha:
+            for nome in ('busca_plano', 'get_configuracao_ativa', 'carregar_configuracoes'):
+                pilha.enter_context(mock.patch.object(ParametrosService, nome, staticmethod(getattr(self, nome))))
+            if hasattr(calculadora, '_preparar_lote'):
+                pilha.enter_context(mock.patch.object(
+                    calculadora, '_preparar_lote', lambda linhas: {'var45_existentes': self.var45_existentes}
+                ))
+            yield
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+def serializar_saida(valores: Dict[Any, Any]) -> List[List[str]]:
+    """Variáveis na ordem do cálculo, com tipo e str() de cada valor"""
+    return [[repr(chave), type(valor).__name__, str(valor)] for chave, valor in valores.items()]
+
+
+def serializar_erro(erro: Exception) -> Dict[str, str]:
+    return {'erro': f'{type(erro).__name__}: {erro}'}
+
+
+class ReplayCalculadoras:
+    """
+    Roda as entradas de um snapshot em uma calculadora.
+
+    modo='banco' usa o banco atual (carregar_no_banco antes); modo='memoria'
+    troca as consultas de plano/parâmetros/var45 por ParametrosEmMemoria.
+    """
+
+    def __init__(self, snapshot: Dict[str, Any], modo: str = 'memoria'):
+        if modo not in ('banco', 'memoria'):
+            raise ValueError(f'Modo inválido: {modo}')
+        self.snapshot = snapshot
+        self.modo = modo
+        self.memoria = ParametrosEmMemoria(snapshot) if modo == 'memoria' else None
+
+    def executar(self, nome: str, classe: Optional[str] = None, api: str = 'linha',
+                 tamanho_lote: int = 100, alocacoes: bool = False) -> Dict[str, Any]:
+        """
+        Args:
+            nome: credenciadora, checkout ou desconto
+            classe: Caminho da classe da calculadora (padrão: a atual do repositório)
+            api: 'linha' (calcular_valores_primarios/calcular_desconto) ou 'lote' (calcular_lote)
+            tamanho_lote: Linhas por calcular_lote
+            alocacoes: Repete o replay sob tracemalloc e mede as alocações
+
+        Returns:
+            {'saida': lista serializada por linha, 'metricas': {...}}
+        """
+        caminho, opcoes = CALCULADORAS[nome]
+        if api == 'lote' and opcoes is None:
+            raise ValueError(f'{nome} não tem cálculo em lote')
+        classe_calculadora = import_string(classe or caminho)
+        entradas = self.snapshot.get(nome, [])
+
+        with ExitStack() as pilha:
+            pilha.enter_context(relogio_fixo(self.snapshot['agora'], classe_calculadora, ParametrosService))
+            calculadora = classe_calculadora()
+            if self.memoria:
+                pilha.enter_context(self.memoria.ativar(calculadora))
+
+            saida, latencias = self._rodar(calculadora, nome, opcoes, copy.deepcopy(entradas), api, tamanho_lote)
+            metricas = self._metricas(latencias)
+            if alocacoes:
+                metricas.update(self._alocacoes(calculadora, nome, opcoes, copy.deepcopy(entradas), api, tamanho_lote))
+
+        metricas['erros'] = sum(1 for linha in saida if isinstance(linha, dict))
+        return {'saida': saida, 'metricas': metricas}
+
+    @staticmethod
+    def _rodar(calculadora, nome, opcoes, entradas, api, tamanho_lote):
+        saida, latencias = [], []
+        if api == 'lote':
+            linhas = [(e['dados_linha'], e['info_loja'], e['info_canal']) for e in entradas]
+            for inicio in range(0, len(linhas), tamanho_lote):
+                bloco = linhas[inicio:inicio + tamanho_lote]
+                t0 = time.perf_counter()
+                resultado = calculadora.calcular_lote(bloco, **opcoes)
+                duracao = time.perf_counter() - t0
+                # Latência por linha no lote: tempo do bloco dividido pelas linhas
+                latencias.extend([duracao / len(bloco)] * len(bloco))
+                for indice in range(len(resultado)):
+                    try:
+                        saida.append(serializar_saida(resultado.linha(indice)))
+                    except Exception as e:
+                        saida.append(serializar_erro(e))
+            return saida, latencias
+
+        for entrada in entradas:
+            t0 = time.perf_counter()
+            try:
+                if opcoes is None:
+                    resultado = calculadora.calcular_desconto(**entrada)
+                    valores = {'resultado': resultado, **calculadora.valores}
+                else:
+                    valores = calculadora.calcular_valores_primarios(
+                        entrada['dados_linha'], next(iter(opcoes.values())), entrada['info_loja'], entrada['info_canal']
+                    )
+            except Exception as e:
+                latencias.append(time.perf_counter() - t0)
+                saida.append(serializar_erro(e))
+                continue
+            latencias.append(time.perf_counter() - t0)
+            saida.append(serializar_saida(valores))
+        return saida, latencias
+
+    @staticmethod
+    def _metricas(latencias: List[float]) -> Dict[str, Any]:
+        total = sum(latencias)
+        ordenadas = sorted(latencias)
+        return {
+            'linhas': len(latencias),
+            'segundos': total,
+            'linhas_por_segundo': len(latencias) / total if total else 0,
+            'p50_ms': _percentil(ordenadas, 50) * 1000,
+            'p99_ms': _percentil(ordenadas, 99) * 1000,
+        }
+
+    def _alocacoes(self, calculadora, nome, opcoes, entradas, api, tamanho_lote) -> Dict[str, Any]:
+        ja_ativo = tracemalloc.is_tracing()
+        if not ja_ativo:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        antes = tracemalloc.take_snapshot()
+        atual_antes, _ = tracemalloc.get_traced_memory()
+        self._rodar(calculadora, nome, opcoes, entradas, api, tamanho_lote)
+        atual, pico = tracemalloc.get_traced_memory()
+        depois = tracemalloc.take_snapshot()
+        if not ja_ativo:
+            tracemalloc.stop()
+
+        blocos = sum(estatistica.count_diff for estatistica in depois.compare_to(antes, 'filename')
+                     if estatistica.count_diff > 0)
+        linhas = max(len(entradas), 1)
+        return {
+            'pico_kib': (pico - atual_antes) / 1024,
+            'retido_kib': (atual - atual_antes) / 1024,
+            'blocos_retidos_por_linha': blocos / linhas,
+        }
+
+
+def comparar_saidas(esperado: List[Any], obtido: List[Any], exemplos: int = 3) -> Dict[str, Any]:
+    """
+    Diff variável a variável de duas saídas serializadas.
+
+    Returns:
+        {'linhas', 'linhas_divergentes', 'colunas': {variavel: {'divergencias', 'exemplos'}}}
+        Exemplos: (linha, esperado, obtido); '(ordem)' marca linhas iguais com
+        variáveis em outra ordem.
+    """
+    colunas: Dict[str, Dict[str, Any]] = {}
+
+    def divergir(coluna, indice, valor_esperado, valor_obtido):
+        coluna = colunas.setdefault(coluna, {'divergencias': 0, 'exemplos': []})
+        coluna['divergencias'] += 1
+        if len(coluna['exemplos']) < exemplos:
+            coluna['exemplos'].append((indice, valor_esperado, valor_obtido))
+
+    total = max(len(esperado), len(obtido))
+    linhas_divergentes = 0
+    for indice in range(total):
+        linha_esperada = _por_coluna(esperado[indice]) if indice < len(esperado) else {}
+        linha_obtida = _por_coluna(obtido[indice]) if indice < len(obtido) else {}
+        divergiu = False
+        for coluna in dict.fromkeys(list(linha_esperada) + list(linha_obtida)):
+            valor_esperado = linha_esperada.get(coluna)
+            valor_obtido = linha_obtida.get(coluna)
+            if valor_esperado != valor_obtido:
+                divergir(coluna, indice, valor_esperado, valor_obtido)
+                divergiu = True
+        if not divergiu and list(linha_esperada) != list(linha_obtida):
+            divergir('(ordem)', indice, list(linha_esperada), list(linha_obtida))
+            divergiu = True
+        linhas_divergentes += divergiu
+    return {'linhas': total, 'linhas_divergentes': linhas_divergentes, 'colunas': colunas}
+
+
+# ----------------------------------------------------------------------
+# Auxiliares
+# ----------------------------------------------------------------------
+
+def _por_coluna(linha) -> Dict[str, Any]:
+    if isinstance(linha, dict):
+        return {'erro': linha['erro']}
+    return {chave: (tipo, valor) for chave, tipo, valor in linha}
+
+
+def _percentil(ordenadas: List[float], percentil: int) -> float:
+    if not ordenadas:
+        return 0.0
+    posicao = max(0, -(-len(ordenadas) * percentil // 100) - 1)  # nearest-rank
+    return ordenadas[posicao]
+
+
+def _registro(instancia) -> Dict[str, Any]:
+    registro = {}
+    for campo in instancia._meta.concrete_fields:
+        valor = getattr(instancia, campo.attname)
+        if isinstance(valor, (datetime.date, DATETIME)):
+            valor = valor.isoformat()
+        elif isinstance(valor, Decimal):
+            valor = str(valor)
+        registro[campo.attname] = valor
+    return registro
+
+
+def _campos_parametros(registro: Dict[str, Any]) -> Dict[str, Any]:
+    """Campos do ParametrosWall com os tipos que o banco devolve (Decimal na escala da coluna)"""
+    campos = dict(registro)
+    for campo in ParametrosWall._meta.concrete_fields:
+        if campos.get(campo.attname) is None:
+            continue
+        valor = campo.to_python(campos[campo.attname])
+        if isinstance(campo, models.DecimalField):
+            valor = valor.quantize(Decimal(1).scaleb(-campo.decimal_places))
+        campos[campo.attname] = valor
+    return campos
+
+
+def _canais() -> Dict[int, Dict[str, Any]]:
+    from wallclub_core.estr_organizacional.canal import Canal
+    return {
+        canal.id: {
+            'id': canal.id,
+            'codigo_canal': int(canal.canal) if canal.canal and canal.canal.isdigit() else 0,
+            'codigo_cliente': int(canal.codigo_cliente) if canal.codigo_cliente and canal.codigo_cliente.isdigit() else 0,
+            'key_loja': canal.keyvalue or '',
+            'canal': canal.canal or '',
+            'nome': canal.nome or ''
+        }
+        for canal in Canal.objects.all()
+    }
+
+
+def _consultar_extrato(nome, data_inicio, data_fim, limite, lojas):
+    """Uma linha por NSU (menor id), com as colunas que as cargas entregam às calculadoras"""
+    if nome == 'checkout':
+        colunas = "cc.cpf AS cpf, ct.nsu AS nsuAcquirer, pep.ValorBruto AS valor_original"
+        juncoes = """INNER JOIN wallclub.checkout_transactions ct ON pep.NsuOperacao = ct.nsu
+                     INNER JOIN wallclub.checkout_cliente cc ON ct.cliente_id = cc.id"""
+        filtro = ""
+    else:
+        colunas = "'' AS cpf, '' AS nsuAcquirer, 0 AS valor_original"
+        juncoes = """LEFT JOIN transactiondata_pos td ON pep.NsuOperacao = td.nsu_gateway
+                     LEFT JOIN checkout_transactions ct ON pep.NsuOperacao = ct.nsu
+                     LEFT JOIN terminais t ON pep.serialnumber = t.terminal"""
+        filtro = "AND td.nsu_gateway IS NULL AND ct.nsu IS NULL AND t.terminal IS NULL"
+    parametros = [data_inicio, data_fim]
+    filtro_lojas = ""
+    if lojas:
+        filtro_lojas = f"AND cecp.cliente_id IN ({', '.join(['%s'] * len(lojas))})"
+        parametros.extend(lojas)
+    parametros.append(limite)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT   pep.id, l.canal_id, cecp.cliente_id AS clienteId, cecp.cnpj AS cnpj, {colunas},
+                     pep.idTerminal, pep.SerialNumber, pep.Bandeira, pep.TipoCompra,
+                     pep.NumeroTotalParcelas, pep.DataTransacao, pep.DataFuturaPagamento,
+                     pep.NsuOperacao, pep.ValorBruto, pep.ValorBrutoParcela, pep.ValorSplit,
+                     pep.DescricaoStatus, pep.IdStatusPagamento, pep.DescricaoStatusPagamento,
+                     pep.ValorTaxaAdm, pep.ValorTaxaMes, pep.DataCancelamento,
+                     ( SELECT SUM(pep2.ValorLiquidoRepasse)
+                       FROM   wallclub.pinbankExtratoPOS pep2
+                       WHERE  pep.NsuOperacao = pep2.NsuOperacao
+                              AND pep2.DescricaoStatusPagamento IN ('Pago', 'Pago-M') ) vRepasse
+            FROM     wallclub.pinbankExtratoPOS pep
+            INNER JOIN wallclub.credenciaisExtratoContaPinbank cecp ON pep.codigo_cliente = cecp.codigo_cliente
+            INNER JOIN wallclub.loja l ON l.id = cecp.cliente_id
+            {juncoes}
+            WHERE    pep.id IN ( SELECT MIN(pep3.id)
+                                 FROM   wallclub.pinbankExtratoPOS pep3
+                                 WHERE  pep3.DataTransacao >= %s AND pep3.DataTransacao < %s
+                                 GROUP BY pep3.NsuOperacao )
+                     {filtro}
+                     {filtro_lojas}
+            ORDER BY pep.id
+            LIMIT %s
+        """, parametros)
+        nomes = [desc[0] for desc in cursor.description]
+        return [dict(zip(nomes, row)) for row in cursor.fetchall()]
+
+
+def _var45_existentes(nsus: List[str], tamanho_bloco: int = 1000):
+    linhas = []
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(nsus), tamanho_bloco):
+            bloco = nsus[inicio:inicio + tamanho_bloco]
+            cursor.execute(
+                f"SELECT var9, var45 FROM base_transacoes_unificadas WHERE var9 IN ({', '.join(['%s'] * len(bloco))})",
+                bloco
+            )
+            linhas.extend(cursor.fetchall())
+    return linhas
+
+
+class _Anonimizador:
+
+    def __init__(self):
+        # NSU original (str) -> NSU do snapshot
+        self.nsus: Dict[str, int] = {}
+        self.ids = 0
+
+    def nsu(self, nsu):
+        if nsu in (None, ''):
+            return nsu
+        novo = self.nsus.setdefault(str(nsu), NSU_BASE + len(self.nsus))
+        return str(novo) if isinstance(nsu, str) else novo
+
+    @staticmethod
+    def documento(valor, digitos: int):
+        if not valor:
+            return valor
+        return str(int(hashlib.sha256(str(valor).encode()).hexdigest(), 16) % 10 ** digitos).zfill(digitos)
+
+    def linha(self, linha: Dict[str, Any], canais: Dict[int, Dict[str, Any]], nome: str) -> Dict[str, Any]:
+        self.ids += 1
+        loja_id = linha.pop('clienteId')
+        canal_id = linha.pop('canal_id')
+        cnpj = linha.pop('cnpj')
+        dados = {campo: (str(valor) if isinstance(valor, Decimal) else valor) for campo, valor in linha.items()}
+        dados['id'] = self.ids
+        dados['NsuOperacao'] = self.nsu(linha['NsuOperacao'])
+        dados['nsuAcquirer'] = self.nsu(linha['nsuAcquirer'])
+        dados['cpf'] = self.documento(linha['cpf'], 11)
+
+        fallback = f'CANAL_{canal_id}' if nome == 'checkout' else ''
+        info_canal = canais.get(canal_id, {
+            'id': canal_id, 'codigo_canal': 0, 'codigo_cliente': 0, 'key_loja': '', 'canal': fallback, 'nome': fallback
+        })
+        return {
+            'dados_linha': dados,
+            'info_loja': {'id': loja_id, 'loja_id': loja_id, 'loja': f'LOJA {loja_id}',
+                          'cnpj': self.documento(cnpj, 14), 'canal_id': canal_id},
+            'info_canal': info_canal,
+        }
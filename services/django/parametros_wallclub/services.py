@@ -126,21 +126,8 @@ class ParametrosService:
         Returns:
             ID consolidado do plano ou 0 se não encontrado
         """
-        # Tratamento para PIX
-        if bandeira == 'PIX':
-            parcelas = 0
-            forma = 'PIX'
-
-        # Tratamento para DEBITO
-        if forma == 'DEBITO':
-            parcelas = 0
-
         try:
-            # Mapear forma para nome correto do plano
-            if forma == 'PARCELADO':
-                nome_plano = 'PARCELADO SEM JUROS'
-            else:
-                nome_plano = forma
+            nome_plano, parcelas, bandeira = ParametrosService.normalizar_plano(forma, parcelas, bandeira)
 
             plano = Plano.objects.filter(
                 nome=nome_plano,
@@ -158,6 +145,30 @@ class ParametrosService:
             registrar_log('parametros_wallclub', f"Erro ao buscar plano: {e}", nivel='ERROR')
             return 0
 
+    @staticmethod
+    def normalizar_plano(forma: str, parcelas: int, bandeira: str) -> tuple:
+        """
+        (nome, prazo_dias, bandeira) do plano procurado por busca_plano
+
+        PIX e DEBITO não têm parcelas; PARCELADO é o plano 'PARCELADO SEM JUROS'.
+        """
+        # Tratamento para PIX
+        if bandeira == 'PIX':
+            parcelas = 0
+            forma = 'PIX'
+
+        # Tratamento para DEBITO
+        if forma == 'DEBITO':
+            parcelas = 0
+
+        # Mapear forma para nome correto do plano
+        if forma == 'PARCELADO':
+            nome_plano = 'PARCELADO SEM JUROS'
+        else:
+            nome_plano = forma
+
+        return nome_plano, parcelas, bandeira
+
     @staticmethod
     def get_all_configuracoes_count() -> int:
         """
@@ -281,6 +292,54 @@ class ParametrosService:
             registrar_log('parametros_wallclub', f"Erro ao buscar parâmetro wall: {str(e)}", nivel='ERROR')
             return None
 
+    @staticmethod
+    def carregar_configuracoes(chaves, data_inicio: datetime, data_fim: datetime,
+                               tamanho_bloco: int = 500) -> Dict[tuple, List[ParametrosWall]]:
+        """
+        Carrega de uma vez as configurações de várias (loja, plano, wall)
+        com vigência que cruza o período [data_inicio, data_fim].
+
+        Args:
+            chaves: Iterável de (loja_id, id_plano, wall)
+            data_inicio/data_fim: Menor e maior data de referência do lote
+
+        Returns:
+            Dict (loja_id, id_plano, WALL) -> configurações na ordem de
+            get_configuracao_ativa (vigencia_inicio mais recente primeiro)
+        """
+        chaves = {(loja_id, id_plano, wall.upper()) for loja_id, id_plano, wall in chaves}
+        lojas = sorted({loja_id for loja_id, _, _ in chaves})
+        planos = {id_plano for _, id_plano, _ in chaves}
+        walls = {wall for _, _, wall in chaves}
+
+        configuracoes = {chave: [] for chave in chaves}
+        for inicio in range(0, len(lojas), tamanho_bloco):
+            consulta = ParametrosWall.objects.filter(
+                loja_id__in=lojas[inicio:inicio + tamanho_bloco],
+                id_plano__in=planos,
+                wall__in=walls,
+                vigencia_inicio__lte=data_fim
+            ).filter(
+                models.Q(vigencia_fim__isnull=True) |
+                models.Q(vigencia_fim__gte=data_inicio)
+            ).order_by('-vigencia_inicio', 'id')
+            for config in consulta:
+                chave = (config.loja_id, config.id_plano, config.wall.upper())
+                if chave in configuracoes:
+                    configuracoes[chave].append(config)
+        return configuracoes
+
+    @staticmethod
+    def selecionar_configuracao(configuracoes: List[ParametrosWall],
+                                data_referencia: datetime) -> Optional[ParametrosWall]:
+        """Configuração vigente em data_referencia (mesma regra de get_configuracao_ativa)"""
+        for config in configuracoes:
+            if config.vigencia_inicio <= data_referencia and (
+                config.vigencia_fim is None or config.vigencia_fim >= data_referencia
+            ):
+                return config
+        return None
+
     @staticmethod
     def contar_configuracoes_loja(loja_id: int) -> int:
         """Conta total de configurações de uma loja"""
@@ -341,6 +400,32 @@ class ParametrosService:
             return None
 
 
+class ParametrosVigentes:
+    """
+    Parâmetros de uma configuração vigente já resolvida (loja, plano, wall,
+    vigência). Retorna o mesmo que retornar_parametro_loja/uptal/wall, sem
+    consultar o banco a cada parâmetro.
+    """
+
+    def __init__(self, config: Optional[ParametrosWall]):
+        self.config = config
+
+    def loja(self, parametro: int) -> Optional[Decimal]:
+        return self._valor(f'parametro_loja_{parametro}')
+
+    def uptal(self, parametro: int) -> Optional[Decimal]:
+        return self._valor(f'parametro_uptal_{parametro}')
+
+    def wall(self, parametro: int) -> Optional[Decimal]:
+        return self._valor(f'parametro_wall_{parametro}')
+
+    def _valor(self, campo: str) -> Optional[Decimal]:
+        if self.config is None:
+            return None
+        valor = getattr(self.config, campo, None)
+        return Decimal(str(valor)) if valor is not None else None
+
+
 class CalculadoraDesconto:
     """
     Calculadora de desconto que replica a lógica completa do PHP.
@@ -0,0 +1,277 @@
+"""
+Importação de parâmetros WallClub via CSV.
+
+Uma passada de leitura + validação, planos pré-carregados em memória e
+gravação com bulk_create dentro de uma única transação (tudo ou nada).
+Arquivos grandes são processados pela task Celery importar_parametros_csv.
+"""
+import csv
+import io
+import itertools
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from wallclub_core.utilitarios.log_control import registrar_log
+from parametros_wallclub.models import ImportacaoConfiguracoes, ParametrosWall, Plano
+
+# (nome do campo, é texto) na ordem do template CSV
+CAMPOS_PARAMETROS: List[Tuple[str, bool]] = (
+    [(f'parametro_loja_{i}', i == 16) for i in range(1, 31)]
+    + [(f'parametro_uptal_{i}', False) for i in range(1, 7)]
+    + [(f'parametro_wall_{i}', False) for i in range(1, 5)]
+)
+
+
+class ImportacaoParametrosService:
+    """
+    Pipeline de importação:
+    1. leitura em streaming do CSV, validando e montando os ParametrosWall
+    2. se houver QUALQUER erro, a importação inteira é cancelada
+    3. vencimento das configurações ativas das lojas do arquivo (1 UPDATE por lote de lojas)
+    4. bulk_create em lotes
+    """
+
+    TAMANHO_LOTE = 1000
+    TAMANHO_LOTE_LOJAS = 1000
+    LIMITE_BYTES_SINCRONO = 512 * 1024  # acima disso, processar via Celery
+
+    PREFIXO_CACHE = 'importacao_parametros'
+    CACHE_TIMEOUT = 6 * 3600
+
+    # ------------------------------------------------------------------
+    # Processamento
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def processar(cls, linhas: Iterable[str], vigencia_inicio: datetime,
+                  progresso: Optional[Callable[[str, int, int], None]] = None) -> Dict:
+        """
+        Processa o CSV (iterável de linhas de texto, sem BOM)
+
+        Args:
+            progresso: callback(etapa, processadas, total) chamado a cada lote
+
+        Returns:
+            dict com sucesso, total_linhas, linhas_importadas, linhas_erro, relatorio_erros
+        """
+        resultado = {
+            'sucesso': True,
+            'total_linhas': 0,
+            'linhas_importadas': 0,
+            'linhas_erro': 0,
+            'relatorio_erros': ''
+        }
+        erros = []
+
+        try:
+            configs, lojas, linhas_com_erro, total_linhas = cls._ler_e_validar(linhas, vigencia_inicio, progresso)
+            resultado['total_linhas'] = total_linhas
+
+            # REGRA: TUDO OU NADA - Se há QUALQUER erro, FALHAR a importação inteira
+            if linhas_com_erro:
+                registrar_log('parametros_wallclub.services',
+                              f"ERRO CRÍTICO: Encontrados {len(linhas_com_erro)} erros na validação", nivel='ERROR')
+                for erro in linhas_com_erro[:100]:
+                    registrar_log('parametros_wallclub.services', f"ERRO: {erro}", nivel='ERROR')
+
+                # Criar mensagem detalhada com os primeiros 3 erros
+                detalhes_erro = "; ".join(linhas_com_erro[:3])
+                if len(linhas_com_erro) > 3:
+                    detalhes_erro += f"; ... e mais {len(linhas_com_erro) - 3} erros"
+
+                raise ValueError(f"Importação cancelada: {len(linhas_com_erro)} erros encontrados. DETALHES: {detalhes_erro}")
+
+            with transaction.atomic():
+                total_vencidas = cls._vencer_configuracoes(lojas, vigencia_inicio)
+                registrar_log('parametros_wallclub.services',
+                              f"Vencimento em massa: {total_vencidas} configurações vencidas para {len(lojas)} lojas")
+
+                for inicio in range(0, len(configs), cls.TAMANHO_LOTE):
+                    lote = configs[inicio:inicio + cls.TAMANHO_LOTE]
+                    ParametrosWall.objects.bulk_create(lote, batch_size=cls.TAMANHO_LOTE)
+                    resultado['linhas_importadas'] += len(lote)
+                    if progresso:
+                        progresso('gravacao', resultado['linhas_importadas'], len(configs))
+
+            registrar_log('parametros_wallclub.services',
+                          f"Importação concluída: {resultado['linhas_importadas']} configurações importadas com sucesso")
+
+        except Exception as e:
+            resultado['sucesso'] = False
+            resultado['linhas_importadas'] = 0
+            erros.append(f"Erro geral: {str(e)}")
+
+        # Compilar relatório de erros
+        if erros:
+            relatorio_completo = '\n'.join(erros)
+            # Limitar tamanho para não exceder campo TEXT (65535 chars)
+            if len(relatorio_completo) > 65000:
+                resultado['relatorio_erros'] = relatorio_completo[:65000] + '\n... (relatório truncado - muitos erros)'
+            else:
+                resultado['relatorio_erros'] = relatorio_completo
+
+        return resultado
+
+    @classmethod
+    def _ler_e_validar(cls, linhas: Iterable[str], vigencia_inicio: datetime, progresso=None):
+        linhas = iter(linhas)
+        primeira_linha = next(linhas, '')
+
+        # Detectar delimitador automaticamente
+        delimiter = ';' if ';' in primeira_linha and primeira_linha.count(';') > primeira_linha.count(',') else ','
+        reader = csv.DictReader(itertools.chain([primeira_linha], linhas), delimiter=delimiter)
+        registrar_log('parametros_wallclub.services', f"CSV: Delimitador '{delimiter}', headers: {reader.fieldnames}")
+
+        planos_existentes = set(Plano.objects.values_list('id', flat=True))
+
+        configs = []
+        lojas = set()
+        linhas_com_erro = []
+        total_linhas = 0
+
+        for linha_num, row in enumerate(reader, start=2):
+            total_linhas += 1
+            if progresso and total_linhas % cls.TAMANHO_LOTE == 0:
+                progresso('validacao', total_linhas, 0)
+
+            # Pular linhas de comentário
+            if (row.get('loja_id') or '').startswith('#'):
+                continue
+
+            try:
+                loja_id = int(row['loja_id'])
+            except (TypeError, ValueError):
+                registrar_log('parametros_wallclub.services', f"LINHA {linha_num}: Erro ao converter loja_id para int", nivel='ERROR')
+                continue
+            lojas.add(loja_id)
+
+            try:
+                id_plano = int(row['id_plano'])
+                wall = row['wall'].upper()
+
+                if id_plano not in planos_existentes:
+                    linhas_com_erro.append(f"Linha {linha_num}: Plano {id_plano} não encontrado")
+                    continue
+
+                config = ParametrosWall(
+                    loja_id=loja_id,
+                    id_plano=id_plano,
+                    wall=wall,
+                    vigencia_inicio=vigencia_inicio,
+                    vigencia_fim=None  # Configuração ativa sem data fim
+                )
+
+                parametros_definidos = 0
+                for campo, texto in CAMPOS_PARAMETROS:
+                    bruto = row.get(campo)
+                    valor = None
+                    if bruto:
+                        try:
+                            valor = cls._converter_valor(bruto, texto)
+                            parametros_definidos += 1
+                        except InvalidOperation:
+                            linhas_com_erro.append(f"Linha {linha_num}: Valor inválido para {campo}: '{bruto}'")
+                    setattr(config, campo, valor)
+
+                # Verificar se todos os parâmetros estão vazios
+                if parametros_definidos == 0:
+                    linhas_com_erro.append(f"Linha {linha_num}: Todos os parâmetros estão vazios - Loja {loja_id}, Plano {id_plano}, Wall {wall}")
+                    continue
+
+                configs.append(config)
+
+            except Exception as e:
+                linhas_com_erro.append(f"Linha {linha_num}: Erro de validação - {str(e)}")
+
+        registrar_log('parametros_wallclub.services',
+                      f"Leitura concluída: {total_linhas} linhas, {len(configs)} configurações, "
+                      f"{len(lojas)} lojas, {len(linhas_com_erro)} erros")
+        return configs, lojas, linhas_com_erro, total_linhas
+
+    @staticmethod
+    def _converter_valor(bruto: str, texto: bool):
+        """CSV usa formato americano (0.00); parâmetro 16 é texto"""
+        if texto:
+            return str(bruto)
+        valor_str = str(bruto).strip()
+        if valor_str == '' or valor_str.lower() == 'null':
+            return None
+        return Decimal(valor_str)
+
+    @classmethod
+    def _vencer_configuracoes(cls, lojas, vigencia_inicio: datetime) -> int:
+        """Vence TODAS as configurações ativas das lojas do arquivo"""
+        lojas = sorted(lojas)
+        total = 0
+        for inicio in range(0, len(lojas), cls.TAMANHO_LOTE_LOJAS):
+            total += ParametrosWall.objects.filter(
+                loja_id__in=lojas[inicio:inicio + cls.TAMANHO_LOTE_LOJAS],
+                vigencia_fim__isnull=True  # Configurações ativas
+            ).update(vigencia_fim=vigencia_inicio)
+        return total
+
+    # ------------------------------------------------------------------
+    # Registro da importação
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def finalizar(importacao: ImportacaoConfiguracoes, resultado: Dict):
+        importacao.linhas_processadas = resultado['total_linhas']
+        importacao.linhas_importadas = resultado['linhas_importadas']
+        importacao.linhas_erro = resultado['linhas_erro']
+        importacao.mensagem_erro = resultado['relatorio_erros']
+        importacao.status = 'SUCESSO' if resultado['sucesso'] else 'ERRO'
+        importacao.save()
+
+    # ------------------------------------------------------------------
+    # Processamento assíncrono
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def agendar(cls, importacao: ImportacaoConfiguracoes, conteudo: bytes, vigencia_inicio: datetime):
+        """
+        Enfileira a importação no Celery. O worker não compartilha o volume de
+        media, então o arquivo vai pelo cache (Redis) até ser processado.
+        """
+        from parametros_wallclub.tasks import importar_parametros_csv
+
+        cache.set(f"{cls.PREFIXO_CACHE}:arquivo:{importacao.id}", conteudo, cls.CACHE_TIMEOUT)
+        cls.registrar_progresso(importacao.id, 'fila', 0, 0)
+        transaction.on_commit(
+            lambda: importar_parametros_csv.delay(importacao.id, vigencia_inicio.isoformat())
+        )
+
+    @classmethod
+    def executar_agendada(cls, importacao_id: int, vigencia_inicio: datetime,
+                          progresso: Optional[Callable[[str, int, int], None]] = None) -> Dict:
+        importacao = ImportacaoConfiguracoes.objects.get(id=importacao_id)
+        chave_arquivo = f"{cls.PREFIXO_CACHE}:arquivo:{importacao_id}"
+        conteudo = cache.get(chave_arquivo)
+
+        if conteudo is None:
+            resultado = {
+                'sucesso': False, 'total_linhas': 0, 'linhas_importadas': 0, 'linhas_erro': 0,
+                'relatorio_erros': 'Erro geral: arquivo da importação expirou antes do processamento'
+            }
+        else:
+            texto = io.StringIO(conteudo.decode('utf-8-sig'), newline='')
+            resultado = cls.processar(texto, vigencia_inicio, progresso)
+            cache.delete(chave_arquivo)
+
+        cls.finalizar(importacao, resultado)
+        cls.registrar_progresso(importacao_id, 'concluida',
+                                resultado['linhas_importadas'], resultado['linhas_importadas'])
+        return resultado
+
+    @classmethod
+    def registrar_progresso(cls, importacao_id: int, etapa: str, processadas: int, total: int):
+        cache.set(f"{cls.PREFIXO_CACHE}:progresso:{importacao_id}",
+                  {'etapa': etapa, 'processadas': processadas, 'total': total}, cls.CACHE_TIMEOUT)
+
+    @classmethod
+    def obter_progresso(cls, importacao_id: int) -> Optional[Dict]:
+        return cache.get(f"{cls.PREFIXO_CACHE}:progresso:{importacao_id}")
@@ -0,0 +1,35 @@
+"""
+Tasks Celery para Parâmetros WallClub
+"""
+from celery import shared_task
+from datetime import datetime
+
+from wallclub_core.utilitarios.log_control import registrar_log
+
+
+@shared_task(bind=True, name='parametros_wallclub.importar_parametros_csv',
+             soft_time_limit=1800, time_limit=2400)
+def importar_parametros_csv(self, importacao_id, vigencia_inicio):
+    """
+    Processa importação de parâmetros enfileirada pelo portal admin.
+    Progresso publicado no estado da task e no cache (consultado pelo portal).
+    """
+    from parametros_wallclub.services_importacao import ImportacaoParametrosService
+
+    def progresso(etapa, processadas, total):
+        meta = {'importacao_id': importacao_id, 'etapa': etapa, 'processadas': processadas, 'total': total}
+        self.update_state(state='PROGRESS', meta=meta)
+        ImportacaoParametrosService.registrar_progresso(importacao_id, etapa, processadas, total)
+
+    registrar_log('parametros_wallclub.services', f"Task: iniciando importação {importacao_id}")
+    resultado = ImportacaoParametrosService.executar_agendada(
+        importacao_id, datetime.fromisoformat(vigencia_inicio), progresso
+    )
+    registrar_log('parametros_wallclub.services',
+                  f"Task: importação {importacao_id} finalizada - sucesso={resultado['sucesso']}, "
+                  f"importadas={resultado['linhas_importadas']}")
+    return {
+        'importacao_id': importacao_id,
+        'sucesso': resultado['sucesso'],
+        'linhas_importadas': resultado['linhas_importadas'],
+    }
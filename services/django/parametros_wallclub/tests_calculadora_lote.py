@@ -0,0 +1,163 @@
+"""
+Golden test do cálculo em lote das calculadoras da base unificada.
+
+fixtures/calculadora_lote.json é um snapshot de replay_calculadoras: planos,
+parâmetros (duas vigências por loja/plano/wall), var45 já gravadas, linhas de
+credenciadora e checkout e entradas de desconto.
+fixtures/calculadora_lote_golden.json foi gravado com o cálculo linha a linha
+anterior ao calcular_lote: cada variável serializada com tipo e str(), então
+qualquer diferença de valor, casas decimais, tipo ou ordem das chaves falha.
+"""
+import json
+import os
+from contextlib import ExitStack
+from unittest import mock
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from parametros_wallclub.calculadora_base_credenciadora import CalculadoraBaseCredenciadora
+from parametros_wallclub.calculadora_base_unificada import CalculadoraBaseUnificada
+from parametros_wallclub.models import ParametrosWall, Plano
+from parametros_wallclub.replay_calculadoras import (
+    ReplayCalculadoras, carregar_no_banco, carregar_snapshot, comparar_saidas, relogio_fixo,
+    serializar_erro, serializar_saida as serializar,
+)
+from parametros_wallclub.services import ParametrosService
+
+DIRETORIO = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def carregar_fixture():
+    return carregar_snapshot(os.path.join(DIRETORIO, 'calculadora_lote.json'))
+
+
+def carregar_golden():
+    with open(os.path.join(DIRETORIO, 'calculadora_lote_golden.json'), encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+class CalculadoraLoteGoldenTest(TransactionTestCase):
+
+    def setUp(self):
+        self.fixture = carregar_fixture()
+        self.golden = carregar_golden()
+        carregar_no_banco(self.fixture)
+
+        pilha = ExitStack()
+        pilha.enter_context(relogio_fixo(self.fixture['agora'], CalculadoraBaseCredenciadora,
+                                         CalculadoraBaseUnificada, ParametrosService))
+        self.addCleanup(pilha.close)
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS base_transacoes_unificadas")
+
+    @staticmethod
+    def _linhas(fixture):
+        return [(linha['dados_linha'], linha['info_loja'], linha['info_canal']) for linha in fixture]
+
+    def _serializar_lote(self, resultado):
+        saida = []
+        for i in range(len(resultado)):
+            try:
+                saida.append(serializar(resultado.linha(i)))
+            except Exception as e:
+                saida.append(serializar_erro(e))
+        return saida
+
+    def _assert_golden(self, chave, obtido):
+        esperado = self.golden[chave]
+        self.assertEqual(len(obtido), len(esperado))
+        for i, (linha_obtida, linha_esperada) in enumerate(zip(obtido, esperado)):
+            self.assertEqual(json.dumps(linha_obtida), json.dumps(linha_esperada), f'{chave}, linha {i}')
+
+    def test_credenciadora_lote(self):
+        resultado = CalculadoraBaseCredenciadora().calcular_lote(
+            self._linhas(self.fixture['credenciadora']), tipo_operacao='Credenciadora'
+        )
+        self._assert_golden('credenciadora', self._serializar_lote(resultado))
+
+    def test_credenciadora_linha_a_linha(self):
+        calculadora = CalculadoraBaseCredenciadora()
+        saida = []
+        for dados_linha, info_loja, info_canal in self._linhas(self.fixture['credenciadora']):
+            try:
+                saida.append(serializar(calculadora.calcular_valores_primarios(
+                    dados_linha, 'Credenciadora', info_loja, info_canal
+                )))
+            except Exception as e:
+                saida.append(serializar_erro(e))
+        self._assert_golden('credenciadora', saida)
+
+    def test_checkout_lote(self):
+        resultado = CalculadoraBaseUnificada().calcular_lote(
+            self._linhas(self.fixture['checkout']), tabela='transactiondata_pos'
+        )
+        self._assert_golden('checkout', self._serializar_lote(resultado))
+
+    def test_checkout_linha_a_linha(self):
+        calculadora = CalculadoraBaseUnificada()
+        saida = []
+        for dados_linha, info_loja, info_canal in self._linhas(self.fixture['checkout']):
+            try:
+                saida.append(serializar(calculadora.calcular_valores_primarios(
+                    dados_linha, 'transactiondata_pos', info_loja, info_canal
+                )))
+            except Exception as e:
+                saida.append(serializar_erro(e))
+        self._assert_golden('checkout', saida)
+
+    def test_colunas_e_consultas_por_lote(self):
+        linhas = self._linhas(self.fixture['credenciadora'])
+        calculadora = CalculadoraBaseCredenciadora()
+        # Planos distintos + parâmetros + var45 existentes, independente do número de linhas
+        with mock.patch('parametros_wallclub.calculadora_lote.registrar_log'), \
+                mock.patch('parametros_wallclub.calculadora_base_credenciadora.registrar_log'), \
+                mock.patch('parametros_wallclub.services.registrar_log'):
+            with CaptureQueriesContext(connection) as consultas:
+                resultado = calculadora.calcular_lote(linhas + linhas, tipo_operacao='Credenciadora')
+        planos = {(d['TipoCompra'], d['NumeroTotalParcelas'], d['Bandeira'], 's' if d['cpf'] else 'n')
+                  for d, _, _ in linhas}
+        self.assertLessEqual(len(consultas), len(planos) + 2)
+
+        self.assertEqual(len(resultado), 2 * len(linhas))
+        self.assertEqual(len(resultado.colunas[9]), 2 * len(linhas))
+        self.assertEqual(resultado.colunas[9][:len(linhas)], resultado.colunas[9][len(linhas):])
+
+
+class ReplayCalculadorasTest(TransactionTestCase):
+    """Replay do snapshot com parâmetros em memória (sem tabelas de parâmetros)"""
+
+    def setUp(self):
+        self.replay = ReplayCalculadoras(carregar_fixture(), modo='memoria')
+        self.golden = carregar_golden()
+
+    def test_replay_em_memoria_igual_ao_golden(self):
+        for nome, api in (('credenciadora', 'linha'), ('credenciadora', 'lote'), ('checkout', 'lote'),
+                          ('desconto', 'linha')):
+            with CaptureQueriesContext(connection) as consultas:
+                resultado = self.replay.executar(nome, api=api, tamanho_lote=7)
+            diff = comparar_saidas(self.golden[nome], resultado['saida'])
+            self.assertEqual(diff['linhas_divergentes'], 0, f'{nome}/{api}: {diff["colunas"]}')
+            # Sem consultas a planos, parâmetros ou var45 (só as do controle de log)
+            tabelas = (connection.ops.quote_name(ParametrosWall._meta.db_table),
+                       connection.ops.quote_name(Plano._meta.db_table), 'base_transacoes_unificadas')
+            self.assertFalse([q['sql'] for q in consultas.captured_queries if any(t in q['sql'] for t in tabelas)])
+
+            metricas = resultado['metricas']
+            self.assertEqual(metricas['linhas'], len(self.golden[nome]))
+            self.assertLessEqual(metricas['p50_ms'], metricas['p99_ms'])
+
+    def test_comparar_saidas_por_variavel(self):
+        esperado = self.golden['checkout']
+        obtido = json.loads(json.dumps(esperado))
+        linha = next(i for i, valores in enumerate(obtido) if isinstance(valores, list))
+        obtido[linha][3][2] += '1'
+        obtido[linha + 1] = {'erro': 'ValueError: x'}
+
+        diff = comparar_saidas(esperado, obtido)
+        self.assertEqual(diff['linhas_divergentes'], 2)
+        self.assertEqual(diff['colunas'][obtido[linha][3][0]]['exemplos'][0][0], linha)
+        self.assertIn('erro', diff['colunas'])
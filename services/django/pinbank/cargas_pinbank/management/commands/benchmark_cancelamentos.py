@@ -0,0 +1,254 @@
+"""
+Benchmark da atualização de cancelamentos da base unificada Credenciadora.
+
+Monta --cancelamentos transações canceladas no extrato (padrão 100 mil) já
+gravadas na base unificada com o status anterior e mede, dentro de uma
+transação desfeita ao final (nada fica gravado):
+
+- legado: fluxo anterior de atualizar_cancelamentos (SELECT do extrato,
+  calcular_valores_primarios e INSERT ... ON DUPLICATE KEY UPDATE por NSU)
+- varredura: atualizar_cancelamentos (tabela temporária desde a marca
+  d'água, partições com UPDATE ... JOIN, calcular_lote e INSERT multi-linha)
+- reexecução: atualizar_cancelamentos de novo (nada pendente desde a marca)
+
+e confere que legado e varredura gravam as mesmas linhas na base unificada.
+--amostra-legado limita os NSUs do cenário legado (o tempo é extrapolado).
+
+Usa uma loja com parâmetros cadastrados, codigo_cliente BCANC e NSUs a partir
+de 2100000000; o extrato sintético tem updated_at no futuro e a marca é
+posicionada nele, e os pendentes reais são removidos (na mesma transação
+desfeita), então a varredura só enxerga os registros do benchmark.
+
+Uso:
+    python manage.py benchmark_cancelamentos
+    python manage.py benchmark_cancelamentos --cancelamentos 100000 --amostra-legado 2000 --tamanho-particao 5000
+"""
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from pinbank.cargas_pinbank.models import (
+    CredenciaisExtratoContaPinbank, PinbankCancelamentoPendente, PinbankExtratoPOS, PinbankMarcaCancelamentos,
+)
+from pinbank.cargas_pinbank.services_carga_base_unificada_credenciadora import CargaBaseUnificadaCredenciadoraService
+from pinbank.cargas_pinbank.services_pipeline_cargas import clausula_nsus
+
+CODIGO_CLIENTE = 'BCANC'
+NSU_INICIAL = 2100000000
+MARCA = datetime(2099, 1, 1)
+# Colunas comparadas entre legado e varredura (created_at é o horário da gravação)
+IGNORAR_COMPARACAO = ('id', 'created_at', 'updated_at')
+
+SQL_EXTRATO_LEGADO = """
+    SELECT
+        pep.id, l.canal_id, pep.codigo_cliente as codigoCliente, cecp.cliente_id as clienteId,
+        cecp.nome as razao_social, cecp.cnpj as cnpj, '' as cpf, '' as nsuAcquirer,
+        pep.idTerminal, pep.SerialNumber, pep.Terminal, pep.Bandeira, pep.TipoCompra, pep.DadosExtra,
+        pep.CpfCnpjComprador, pep.NomeRazaoSocialComprador, pep.NumeroParcela, pep.NumeroTotalParcelas,
+        pep.DataTransacao, pep.DataFuturaPagamento, pep.CodAutorizAdquirente, pep.NsuOperacao,
+        pep.NsuOperacaoLoja, pep.ValorBruto, pep.ValorBrutoParcela, pep.ValorLiquidoRepasse, pep.ValorSplit,
+        pep.IdStatus, pep.DescricaoStatus, pep.IdStatusPagamento, pep.DescricaoStatusPagamento,
+        pep.ValorTaxaAdm, pep.ValorTaxaMes, pep.NumeroCartao, pep.DataCancelamento, pep.Submerchant,
+        0 as valor_original,
+        (SELECT SUM(pep2.ValorLiquidoRepasse)
+         FROM wallclub.pinbankExtratoPOS pep2
+         WHERE pep.NsuOperacao = pep2.NsuOperacao
+           AND pep2.DescricaoStatusPagamento in ('Pago','Pago-M')) as vRepasse
+    FROM wallclub.pinbankExtratoPOS pep
+    INNER JOIN wallclub.credenciaisExtratoContaPinbank cecp ON pep.codigo_cliente = cecp.codigo_cliente
+    INNER JOIN wallclub.loja l ON l.id = cecp.cliente_id
+    WHERE pep.NsuOperacao = %s
+    LIMIT 1
+"""
+
+
+def _clausula_var9(nsus) -> str:
+    """Filtro por var9 (texto na base unificada): literais entre aspas para usar o índice"""
+    return f"AND var9 IN ({','.join(repr(str(int(nsu))) for nsu in nsus)})"
+
+
+class Command(BaseCommand):
+    help = 'Benchmark: atualização de cancelamentos por NSU vs varredura por conjunto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cancelamentos', type=int, default=100000,
+                            help='Transações canceladas no extrato (padrão: 100000)')
+        parser.add_argument('--amostra-legado', type=int, default=2000,
+                            help='NSUs usados no cenário legado (padrão: 2000; 0 = todos)')
+        parser.add_argument('--tamanho-particao', type=int,
+                            default=CargaBaseUnificadaCredenciadoraService.TAMANHO_PARTICAO_CANCELAMENTOS,
+                            help='NSUs por partição da varredura '
+                                 f'(padrão: {CargaBaseUnificadaCredenciadoraService.TAMANHO_PARTICAO_CANCELAMENTOS})')
+
+    def handle(self, *args, **options):
+        total = options['cancelamentos']
+        amostra = min(options['amostra_legado'] or total, total)
+        nsus = [NSU_INICIAL + i for i in range(total)]
+
+        if PinbankExtratoPOS.objects.filter(NsuOperacao__gte=NSU_INICIAL, NsuOperacao__lt=NSU_INICIAL + total).exists():
+            self.stdout.write(self.style.ERROR('Faixa de NSUs do benchmark já usada no extrato. Abortando.'))
+            return
+
+        loja_id = self._loja_com_parametros()
+        if loja_id is None:
+            self.stdout.write(self.style.ERROR('Nenhuma loja com parâmetros cadastrados. Abortando.'))
+            return
+
+        with transaction.atomic():
+            self.stdout.write(f'Montando {total} cancelamentos (loja {loja_id})...')
+            self._montar_cancelamentos(nsus, loja_id)
+
+            # Legado sobre a amostra; depois a amostra volta ao status anterior para a varredura
+            service = CargaBaseUnificadaCredenciadoraService()
+            inicio = time.perf_counter()
+            atualizados_legado = self._cancelamentos_legado(service, nsus[:amostra])
+            duracao_legado = (time.perf_counter() - inicio) * total / amostra
+            linhas_legado = self._linhas_base(nsus[:amostra])
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    UPDATE base_transacoes_unificadas SET var68 = 'Aprovada'
+                    WHERE tipo_operacao = 'Credenciadora' {_clausula_var9(nsus[:amostra])}
+                """)
+
+            service = CargaBaseUnificadaCredenciadoraService()
+            inicio = time.perf_counter()
+            atualizados = service.atualizar_cancelamentos(tamanho_particao=options['tamanho_particao'])
+            duracao = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            reexecucao = service.atualizar_cancelamentos(tamanho_particao=options['tamanho_particao'])
+            duracao_reexecucao = time.perf_counter() - inicio
+
+            linhas_varredura = self._linhas_base(nsus[:amostra])
+            marca = PinbankMarcaCancelamentos.objects.get(
+                processo=CargaBaseUnificadaCredenciadoraService.PROCESSO_CANCELAMENTOS
+            ).ultimo_updated_at
+
+            transaction.set_rollback(True)
+
+        extrapolado = f' - extrapolado de {amostra} NSUs' if amostra < total else ''
+        self.stdout.write(f'legado      {duracao_legado:8.2f}s ({total / duracao_legado:9.0f} NSUs/s) - '
+                          f'{atualizados_legado}/{amostra} recalculados{extrapolado}')
+        self.stdout.write(f'varredura   {duracao:8.2f}s ({total / duracao:9.0f} NSUs/s) - '
+                          f'{atualizados}/{total} recalculados ({duracao_legado / duracao:.1f}x)')
+        self.stdout.write(f'reexecução  {duracao_reexecucao:8.2f}s - {reexecucao} recalculados, marca={marca}')
+
+        if linhas_varredura != linhas_legado:
+            divergentes = sum(1 for a, b in zip(linhas_legado, linhas_varredura) if a != b)
+            self.stdout.write(self.style.ERROR(f'Base unificada divergente entre legado e varredura: {divergentes} linhas'))
+            return
+        if reexecucao != 0 or marca != MARCA:
+            self.stdout.write(self.style.ERROR('Reexecução encontrou cancelamentos pendentes ou marca não avançou'))
+            return
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _loja_com_parametros():
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT l.id
+                FROM wallclub.loja l
+                WHERE EXISTS (SELECT 1 FROM parametros_wallclub p WHERE p.loja_id = l.id)
+                ORDER BY l.id
+                LIMIT 1
+            """)
+            linha = cursor.fetchone()
+        return linha[0] if linha else None
+
+    @staticmethod
+    def _montar_cancelamentos(nsus, loja_id):
+        """Extrato cancelado (updated_at = MARCA) + base unificada ainda com o status aprovado"""
+        CredenciaisExtratoContaPinbank.objects.create(
+            nome='Benchmark cancelamentos', cnpj='00000000000000', username='bench_cancelamentos',
+            keyvalue='', canal='1', codigo_cliente=CODIGO_CLIENTE, cliente_id=loja_id, ativo=True
+        )
+        PinbankExtratoPOS.objects.bulk_create([
+            PinbankExtratoPOS(
+                codigo_cliente=CODIGO_CLIENTE, Lido=True, IdTerminal='TBENCH', SerialNumber='SNBENCH',
+                Terminal='POS BENCH', Bandeira='MASTERCARD', TipoCompra='CREDITO',
+                CpfCnpjComprador='12345678909', NomeRazaoSocialComprador='Cliente Benchmark',
+                NumeroParcela=1, NumeroTotalParcelas=1,
+                DataTransacao='2026-10-19T10:00:00', DataFuturaPagamento='2026-11-18T00:00:00',
+                CodAutorizAdquirente=f'{i % 1000000:06d}', NsuOperacao=nsu, NsuOperacaoLoja=str(i),
+                ValorBruto=150 + i % 500, ValorBrutoParcela=150 + i % 500, ValorLiquidoRepasse=145,
+                ValorSplit=0, IdStatus='2', DescricaoStatus='Cancelada', IdStatusPagamento='1',
+                DescricaoStatusPagamento='Pendente', ValorTaxaAdm=5, ValorTaxaMes=0,
+                NumeroCartao='544828******0001', DataCancelamento='2026-10-19T12:00:00', processado=True,
+            )
+            for i, nsu in enumerate(nsus)
+        ], batch_size=5000)
+        # auto_now não vale para update(): extrato "alterado" no instante da marca
+        PinbankExtratoPOS.objects.filter(codigo_cliente=CODIGO_CLIENTE).update(updated_at=MARCA)
+        PinbankCancelamentoPendente.objects.all().delete()
+        PinbankMarcaCancelamentos.objects.update_or_create(
+            processo=CargaBaseUnificadaCredenciadoraService.PROCESSO_CANCELAMENTOS,
+            defaults={'ultimo_updated_at': MARCA}
+        )
+
+        with connection.cursor() as cursor:
+            for inicio in range(0, len(nsus), 5000):
+                bloco = nsus[inicio:inicio + 5000]
+                cursor.execute(
+                    "INSERT INTO base_transacoes_unificadas (var9, var68, tipo_operacao, adquirente, origem_transacao, created_at) "
+                    f"VALUES {', '.join(['(%s, %s, %s, %s, %s, NOW())'] * len(bloco))}",
+                    [valor for nsu in bloco for valor in (str(nsu), 'Aprovada', 'Credenciadora', 'PINBANK', 'TEF')]
+                )
+
+    @staticmethod
+    def _cancelamentos_legado(service, nsus) -> int:
+        """Fluxo anterior de atualizar_cancelamentos, restrito aos NSUs da amostra"""
+        canais_cache = service._carregar_canais()
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT pep.NsuOperacao
+                FROM base_transacoes_unificadas btu
+                INNER JOIN wallclub.pinbankExtratoPOS pep ON btu.var9 = CAST(pep.NsuOperacao AS CHAR) COLLATE utf8mb4_unicode_ci
+                WHERE pep.DataCancelamento != '0001-01-01T00:00:00'
+                  AND pep.DescricaoStatus != btu.var68
+                  AND btu.tipo_operacao = 'Credenciadora'
+                  AND btu.adquirente = 'PINBANK'
+                  {clausula_nsus(nsus, 'pep.NsuOperacao')}
+            """)
+            cancelamentos = [row[0] for row in cursor.fetchall()]
+            PinbankExtratoPOS.objects.filter(NsuOperacao__in=cancelamentos).update(processado=0)
+
+            atualizados = 0
+            for nsu in cancelamentos:
+                cursor.execute(SQL_EXTRATO_LEGADO, [nsu])
+                colunas = [desc[0] for desc in cursor.description]
+                linha_dados = cursor.fetchone()
+                if not linha_dados:
+                    continue
+                linha = dict(zip(colunas, linha_dados))
+                linha['info_loja'] = {'id': linha.get('clienteId'), 'loja': linha.get('razao_social')}
+                canal_id = linha.get('canal_id')
+                linha['info_canal'] = canais_cache.get(canal_id) or {'id': canal_id}
+                try:
+                    valores = service.calculadora.calcular_valores_primarios(
+                        dados_linha=linha, tipo_operacao='Credenciadora',
+                        info_loja=linha['info_loja'], info_canal=linha['info_canal']
+                    )
+                except Exception:
+                    continue
+                if service._inserir_ou_atualizar_valores(valores, linha):
+                    atualizados += 1
+        service._atualizar_resumo_diario()
+        return atualizados
+
+    @staticmethod
+    def _linhas_base(nsus):
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT * FROM base_transacoes_unificadas
+                WHERE tipo_operacao = 'Credenciadora' {_clausula_var9(nsus)}
+                ORDER BY var9
+            """)
+            colunas = [desc[0] for desc in cursor.description]
+            return [
+                {coluna: valor for coluna, valor in zip(colunas, linha) if coluna not in IGNORAR_COMPARACAO}
+                for linha in cursor.fetchall()
+            ]
@@ -0,0 +1,202 @@
+"""
+Benchmark de registros ingeridos por segundo na carga de extrato POS.
+
+Sobe um servidor Pinbank local (ExtratoPosEncrypted com respostas criptografadas
+como a API real, latência configurável) e carrega o mesmo volume contra o
+banco configurado (MySQL - ON DUPLICATE KEY UPDATE). Compara:
+
+- legado: credenciais em série, resposta decodificada inteira, SELECT por
+  registro + INSERT de uma linha (fluxo anterior)
+- paralelo: CargaExtratoPOSService.traz_extrato_periodo (pool de credenciais,
+  leitura em fluxo, INSERT multi-linha com ON DUPLICATE KEY UPDATE)
+- recarga: mesmo período de novo sobre os registros já gravados (idempotência)
+
+Registros de teste usam codigo_cliente BENCH e NSUs a partir de 2000000000;
+removidos entre os cenários e ao final.
+
+Uso:
+    python manage.py benchmark_carga_extrato
+    python manage.py benchmark_carga_extrato --credenciais 8 --registros 10000 --latencia-api-ms 500
+"""
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from pinbank.cargas_pinbank.models import CredenciaisExtratoContaPinbank, PinbankExtratoPOS
+from pinbank.cargas_pinbank.services_carga_extrato_pos import CargaExtratoPOSService
+from pinbank.services import PinbankService
+
+CODIGO_CLIENTE = 'BENCH'
+NSU_INICIAL = 2000000000
+TOKEN = {'access_token': 'benchmark', 'token_type': 'Bearer', 'expires_in': 3600}
+
+
+class ServidorPinbankLocal:
+    """
+    Stub do endpoint ContaDigital/ExtratoPosEncrypted.
+
+    Respostas pré-montadas por username (criptografadas com a senha da
+    credencial, mesmo envelope da API) e enviadas em blocos após a latência.
+    """
+
+    def __init__(self, respostas, latencia):
+        self.respostas = respostas
+        self.latencia = latencia
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                corpo = servidor.respostas.get(self.headers.get('UserName'))
+                if not self.path.endswith('ContaDigital/ExtratoPosEncrypted') or corpo is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                time.sleep(servidor.latencia)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                for inicio in range(0, len(corpo), 64 * 1024):
+                    self.wfile.write(corpo[inicio:inicio + 64 * 1024])
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/'
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de registros/s da carga de extrato POS contra um servidor Pinbank local'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--credenciais', type=int, default=8,
+                            help='Credenciais (estabelecimentos) simuladas (padrão: 8)')
+        parser.add_argument('--registros', type=int, default=5000,
+                            help='Registros por credencial (padrão: 5000)')
+        parser.add_argument('--latencia-api-ms', type=float, default=300.0,
+                            help='Tempo de resposta simulado da Pinbank por consulta (padrão: 300)')
+        parser.add_argument('--workers', type=int, default=CargaExtratoPOSService.MAX_WORKERS,
+                            help=f'Credenciais em paralelo (padrão: {CargaExtratoPOSService.MAX_WORKERS})')
+
+    def handle(self, *args, **options):
+        por_credencial = options['registros']
+        execucao = uuid.uuid4().hex[:8]
+        credenciais = [
+            CredenciaisExtratoContaPinbank(id=i, username=f'bench_{execucao}_{i}', keyvalue=f'chave{execucao}{i}',
+                                           canal='1', codigo_cliente=CODIGO_CLIENTE, ativo=True)
+            for i in range(options['credenciais'])
+        ]
+        total = len(credenciais) * por_credencial
+
+        conflitos = PinbankExtratoPOS.objects.filter(
+            NsuOperacao__gte=NSU_INICIAL, NsuOperacao__lt=NSU_INICIAL + total
+        ).exclude(codigo_cliente=CODIGO_CLIENTE)
+        if conflitos.exists():
+            self.stdout.write(self.style.ERROR('Faixa de NSUs do benchmark já usada por registros reais. Abortando.'))
+            return
+
+        self.stdout.write(f'Montando {total} registros ({len(credenciais)} credenciais)...')
+        respostas = {
+            credencial.username: self._resposta(credencial, indice * por_credencial, por_credencial)
+            for indice, credencial in enumerate(credenciais)
+        }
+
+        resultados = {}
+        servidor = ServidorPinbankLocal(respostas, options['latencia_api_ms'] / 1000)
+        try:
+            with servidor, override_settings(PINBANK_URL=servidor.url), \
+                    mock.patch.object(PinbankService, 'obter_token', return_value=TOKEN), \
+                    mock.patch.object(CargaExtratoPOSService, '_credenciais', return_value=credenciais), \
+                    mock.patch.object(CargaExtratoPOSService, 'MAX_WORKERS', options['workers']):
+                for cenario in ('legado', 'paralelo', 'recarga'):
+                    if cenario != 'recarga':
+                        self._limpar()
+                    resultados[cenario] = self._executar(cenario, credenciais)
+        finally:
+            self._limpar()
+
+        base = resultados['legado'][0]
+        for cenario, (registros_s, gravados) in resultados.items():
+            self.stdout.write(
+                f'{cenario:<9} {registros_s:10.1f} registros/s  linhas na tabela={gravados}  '
+                f'({registros_s / base:.1f}x)'
+            )
+        if any(gravados != total for _, gravados in resultados.values()):
+            self.stdout.write(self.style.ERROR(f'Esperado {total} linhas em todos os cenários'))
+            return
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _resposta(credencial, deslocamento, quantidade) -> bytes:
+        registros = [
+            {
+                'IdTerminal': f'T{credencial.id:04d}', 'SerialNumber': f'SN{credencial.id:08d}',
+                'Terminal': f'POS {credencial.id}', 'Bandeira': 'MASTERCARD', 'TipoCompra': 'CREDITO',
+                'DadosExtra': None, 'CpfCnpjComprador': '12345678909', 'NomeRazaoSocialComprador': 'Cliente Benchmark',
+                'NumeroParcela': 1, 'NumeroTotalParcelas': 1,
+                'DataTransacao': '2026-10-19T10:00:00', 'DataFuturaPagamento': '2026-11-18T00:00:00',
+                'CodAutorizAdquirente': f'{i:06d}', 'NsuOperacao': NSU_INICIAL + deslocamento + i,
+                'NsuOperacaoLoja': str(i), 'ValorBruto': 150.0, 'ValorBrutoParcela': 150.0,
+                'ValorLiquidoRepasse': 145.5, 'ValorSplit': 0, 'IdStatus': 1, 'DescricaoStatus': 'Aprovada',
+                'IdStatusPagamento': 1, 'DescricaoStatusPagamento': 'Pendente',
+                'ValorTaxaAdm': 4.5, 'ValorTaxaMes': 0, 'NumeroCartao': '544828******0001',
+                'DataCancelamento': None, 'Submerchant': None,
+            }
+            for i in range(quantidade)
+        ]
+        cifrador = PinbankService()
+        cifrador.password = credencial.keyvalue
+        return cifrador.criptografar_payload({'ResultCode': 0, 'Message': 'Sucesso', 'Data': registros}).encode('utf-8')
+
+    @staticmethod
+    def _limpar():
+        PinbankExtratoPOS.objects.filter(codigo_cliente=CODIGO_CLIENTE).delete()
+
+    def _executar(self, cenario, credenciais):
+        service = CargaExtratoPOSService()
+        inicio = time.perf_counter()
+        if cenario == 'legado':
+            recebidos = self._carga_legada(service, credenciais)
+        else:
+            recebidos = service.traz_extrato_periodo('2026-10-19T00:00:00.000Z', '2026-10-19T23:59:59.000Z')
+        duracao = time.perf_counter() - inicio
+        return recebidos / duracao, PinbankExtratoPOS.objects.filter(codigo_cliente=CODIGO_CLIENTE).count()
+
+    @staticmethod
+    def _carga_legada(service, credenciais) -> int:
+        """Fluxo anterior: série, lista completa, consulta + INSERT por registro, commit a cada 100"""
+        total = 0
+        for credencial in credenciais:
+            registros = service.pinbank_service.consultar_extrato_pos_encrypted(
+                username=credencial.username,
+                password=credencial.keyvalue,
+                dados={'Data': {'CodigoCanal': credencial.canal, 'CodigoCliente': credencial.codigo_cliente}}
+            )
+            for i in range(0, len(registros), 100):
+                with transaction.atomic():
+                    for dados in registros[i:i + 100]:
+                        existente = PinbankExtratoPOS.objects.filter(
+                            NsuOperacao=dados['NsuOperacao'], NumeroParcela=dados['NumeroParcela']
+                        ).first()
+                        if not existente:
+                            service._gravar_lote([dados], credencial.codigo_cliente)
+            total += len(registros)
+        return total
@@ -27,6 +27,11 @@ class Command(BaseCommand):
             type=int,
             help='ID do worker para processamento paralelo (0-9)',
         )
+        parser.add_argument(
+            '--cancelamentos-desde-inicio',
+            action='store_true',
+            help='Varre cancelamentos em todo o extrato, ignorando a marca d\'água',
+        )
 
     def handle(self, *args, **options):
         limite = options.get('limite')
@@ -46,7 +51,9 @@ class Command(BaseCommand):
         registros_checkout = service_checkout.carregar_valores_primarios(limite=limite, nsu=nsu, worker_id=worker_id)
 
         # 4. Atualizar cancelamentos
-        cancelamentos_atualizados = service_credenciadora.atualizar_cancelamentos()
+        cancelamentos_atualizados = service_credenciadora.atualizar_cancelamentos(
+            desde_inicio=options.get('cancelamentos_desde_inicio')
+        )
 
         # Resumo
         total = registros_pos + registros_credenciadora + registros_checkout
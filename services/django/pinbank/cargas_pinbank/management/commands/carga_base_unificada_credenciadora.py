@@ -19,6 +19,11 @@ class Command(BaseCommand):
             type=str,
             help='NSU específico para processar (para debug)',
         )
+        parser.add_argument(
+            '--cancelamentos-desde-inicio',
+            action='store_true',
+            help='Varre cancelamentos em todo o extrato, ignorando a marca d\'água',
+        )
 
     def handle(self, *args, **options):
         limite = options.get('limite')
@@ -35,7 +40,9 @@ class Command(BaseCommand):
 
         # Atualizar cancelamentos
         self.stdout.write(self.style.SUCCESS('\nAtualizando cancelamentos...'))
-        cancelamentos_atualizados = service.atualizar_cancelamentos()
+        cancelamentos_atualizados = service.atualizar_cancelamentos(
+            desde_inicio=options.get('cancelamentos_desde_inicio')
+        )
 
         self.stdout.write(
             self.style.SUCCESS(f'✅ Cancelamentos atualizados: {cancelamentos_atualizados}')
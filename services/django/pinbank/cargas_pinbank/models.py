@@ -128,3 +128,52 @@ class TestePinbankExtratoPOS(models.Model):
 
     def __str__(self):
         return f"TESTE NSU {self.NsuOperacao} - Parcela {self.NumeroParcela}"
+
+
+class PinbankMarcaCancelamentos(models.Model):
+    """
+    Marca d'água da varredura de cancelamentos da base unificada
+    (CargaBaseUnificadaCredenciadoraService.atualizar_cancelamentos)
+
+    Uma linha por processo: maior pinbankExtratoPOS.updated_at já varrido.
+    Avança na mesma transação de cada partição recalculada.
+    """
+
+    id = models.AutoField(primary_key=True)
+    processo = models.CharField(max_length=50, unique=True)
+    ultimo_updated_at = models.DateTimeField(null=True, blank=True)
+    total_processados = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'pinbankMarcaCancelamentos'
+        managed = False
+        verbose_name = 'Marca de Cancelamentos Pinbank'
+        verbose_name_plural = 'Marcas de Cancelamentos Pinbank'
+
+    def __str__(self):
+        return f"{self.processo}: {self.ultimo_updated_at}"
+
+
+class PinbankCancelamentoPendente(models.Model):
+    """
+    NSUs cancelados que falharam na varredura de cancelamentos (recálculo ou
+    estorno de cashback). Voltam à tabela temporária em toda execução, além
+    dos NSUs desde a marca d'água, e saem daqui quando concluídos.
+    """
+
+    id = models.AutoField(primary_key=True)
+    NsuOperacao = models.BigIntegerField(unique=True)
+    tentativas = models.IntegerField(default=1)
+    erro = models.CharField(max_length=500, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'pinbankCancelamentosPendentes'
+        managed = False
+        verbose_name = 'Cancelamento Pinbank Pendente'
+        verbose_name_plural = 'Cancelamentos Pinbank Pendentes'
+
+    def __str__(self):
+        return f"NSU {self.NsuOperacao}: {self.tentativas} tentativas"
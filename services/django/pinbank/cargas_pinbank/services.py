@@ -7,6 +7,7 @@ ARQUITETURA ATUAL (base_transacoes_unificadas):
 - services_carga_base_unificada_pos.py: CargaBaseUnificadaPOSService (Wallet)
 - services_carga_base_unificada_credenciadora.py: CargaBaseUnificadaCredenciadoraService
 - services_carga_base_unificada_checkout.py: CargaBaseUnificadaCheckoutService
+- services_pipeline_cargas.py: PipelineCargasPinbankService (extrato → ajustes → base unificada, com lease)
 
 DEPRECATED (movidos para backup/):
 - services_carga_base_gestao_pos.py (baseTransacoesGestao)
@@ -19,10 +20,12 @@ from .services_carga_extrato_pos import CargaExtratoPOSService
 from .services_carga_base_unificada_pos import CargaBaseUnificadaPOSService
 from .services_carga_base_unificada_credenciadora import CargaBaseUnificadaCredenciadoraService
 from .services_carga_base_unificada_checkout import CargaBaseUnificadaCheckoutService
+from .services_pipeline_cargas import PipelineCargasPinbankService
 
 __all__ = [
     'CargaExtratoPOSService',
     'CargaBaseUnificadaPOSService',
     'CargaBaseUnificadaCredenciadoraService',
     'CargaBaseUnificadaCheckoutService',
+    'PipelineCargasPinbankService',
 ]
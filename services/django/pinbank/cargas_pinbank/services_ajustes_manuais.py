@@ -4,9 +4,10 @@ Queries de manutenção e correção de dados
 MIGRADO: 22/12/2025 - Insere em transactiondata_pos ao invés de transactiondata
 """
 
-from typing import Dict
+from typing import Dict, Iterable
 from django.db import connection
 from wallclub_core.utilitarios.log_control import registrar_log
+from .services_pipeline_cargas import clausula_nsus
 
 
 class AjustesManuaisService:
@@ -16,11 +17,14 @@ class AjustesManuaisService:
     """
 
     @staticmethod
-    def ajustes_manuais_base() -> Dict[str, int]:
+    def ajustes_manuais_base(nsus: Iterable[str] = None) -> Dict[str, int]:
         """
         Executa ajustes manuais na base de dados:
         1. Insere registros faltantes em transactiondata_pos a partir de pinbankExtratoPOS
 
+        Args:
+            nsus: Restringe aos NSUs informados (pipeline); padrão: extrato inteiro
+
         Returns:
             Dict com contador de registros inseridos
         """
@@ -35,7 +39,7 @@ class AjustesManuaisService:
                 # 1. Inserir registros faltantes em transactiondata_pos
                 registrar_log('pinbank.cargas_pinbank', "Executando INSERT em transactiondata_pos")
 
-                cursor.execute("""
+                cursor.execute(f"""
                     INSERT INTO transactiondata_pos
                     ( gateway, datahora, valor_original, nsu_gateway, terminal )
                     SELECT  'PINBANK',
@@ -49,6 +53,7 @@ class AjustesManuaisService:
                             AND t.inicio <= REPLACE(SUBSTRING_INDEX(p.DataTransacao, '.', 1), 'T', ' ')
                             AND ( t.fim IS NULL OR t.fim >= REPLACE(SUBSTRING_INDEX(p.DataTransacao, '.', 1), 'T', ' '))
                             AND NOT EXISTS ( SELECT nsu_gateway FROM transactiondata_pos WHERE nsu_gateway = NsuOperacao AND gateway = 'PINBANK' )
+                            {clausula_nsus(nsus, 'p.NsuOperacao')}
                 """)
 
                 resultado['inseridos_transactiondata'] = cursor.rowcount
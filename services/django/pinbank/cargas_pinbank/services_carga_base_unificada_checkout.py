@@ -10,10 +10,12 @@ Diferença da base antiga:
 - tipo_operacao = 'Wallet' (não passa por credenciadora)
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 from django.db import connection, transaction
 from .models import PinbankExtratoPOS
+from .services_pipeline_cargas import clausula_nsus
 from wallclub_core.utilitarios.log_control import registrar_log
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
 
 
 class CargaBaseUnificadaCheckoutService:
@@ -29,8 +31,13 @@ class CargaBaseUnificadaCheckoutService:
         from pinbank.services import PinbankService
         self.calculadora = CalculadoraBaseUnificada()
         self.pinbank_service = PinbankService()
+        # NSUs gravados na execução (para atualizar o resumo diário do portal) e
+        # buckets (vendas, recebimento) das linhas atualizadas, lidos antes do UPDATE
+        self.nsus_alterados = set()
+        self.buckets_anteriores = (set(), set())
 
-    def carregar_valores_primarios(self, limite: int = None, nsu: str = None, worker_id: int = None) -> int:
+    def carregar_valores_primarios(self, limite: int = None, nsu: str = None, worker_id: int = None,
+                                   nsus: Iterable[str] = None) -> int:
         """
         Rotina principal de carga de variáveis primárias
         Processa registros com processado = 0
@@ -40,12 +47,15 @@ class CargaBaseUnificadaCheckoutService:
             limite: Limite de registros
             nsu: NSU específico
             worker_id: ID do worker (0-9) para processamento paralelo
+            nsus: NSUs entregues pela etapa de extrato (pipeline): consulta só esses
         """
         registrar_log('pinbank.cargas_pinbank', f"Iniciando carga de valores primários - Base Unificada Checkout (worker_id={worker_id})")
 
         limit_clause = f"LIMIT {limite}" if limite else ""
         nsu_clause = f"AND pep.NsuOperacao = '{nsu}'" if nsu else ""
         worker_clause = f"AND MOD(CAST(pep.NsuOperacao AS UNSIGNED), 2) = {worker_id}" if worker_id is not None else ""
+        nsus_clause = clausula_nsus(nsus, 'pep.NsuOperacao')
+        nsus_clause_sub = clausula_nsus(nsus, 'pep2.NsuOperacao')
 
         registrar_log('pinbank.cargas_pinbank', f"Executando query com limite={limite}, nsu={nsu}, worker_id={worker_id}")
 
@@ -111,9 +121,11 @@ class CargaBaseUnificadaCheckoutService:
                              INNER JOIN wallclub.checkout_transactions ct2 ON pep2.NsuOperacao = ct2.nsu
                              WHERE pep2.processado = 0
                              {worker_clause}
+                             {nsus_clause_sub}
                              GROUP BY pep2.NsuOperacao
                          )
                          {nsu_clause}
+                         {nsus_clause}
                          {worker_clause}
                 ORDER BY pep.id
                 {limit_clause}
@@ -160,43 +172,14 @@ class CargaBaseUnificadaCheckoutService:
                     # Coletar IDs processados para batch update
                     ids_processados = []
 
-                    with transaction.atomic():
-                        for row_lote in lote_atual:
-                            linha = dict(zip(colunas, row_lote))
+                    linhas = [dict(zip(colunas, row_lote)) for row_lote in lote_atual]
+                    resultado_lote = self._calcular_lote(linhas, canais_cache)
 
+                    with transaction.atomic():
+                        for idx, linha in enumerate(linhas):
                             try:
-                                # Montar info_loja
-                                info_loja = {
-                                    'id': linha.get('clienteId'),
-                                    'loja_id': linha.get('clienteId'),
-                                    'loja': linha.get('razao_social'),
-                                    'cnpj': linha.get('cnpj'),
-                                    'canal_id': linha.get('canal_id')
-                                }
-
-                                # Usar cache ao invés de query
-                                canal_id = linha.get('canal_id')
-                                info_canal = canais_cache.get(canal_id)
-                                if not info_canal:
-                                    registrar_log('pinbank.cargas_pinbank',
-                                                f"⚠️ Canal ID {canal_id} não encontrado no cache",
-                                                nivel='WARNING')
-                                    info_canal = {
-                                        'id': canal_id,
-                                        'codigo_canal': 0,
-                                        'codigo_cliente': 0,
-                                        'key_loja': '',
-                                        'canal': f'CANAL_{canal_id}',  # Fallback com ID
-                                        'nome': f'CANAL_{canal_id}'
-                                    }
-
-                                # Calcular valores primários
-                                valores = self.calculadora.calcular_valores_primarios(
-                                    dados_linha=linha,
-                                    tabela='transactiondata_pos',
-                                    info_loja=info_loja,
-                                    info_canal=info_canal
-                                )
+                                # Valores primários calculados em lote (parâmetros por loja/plano/vigência)
+                                valores = resultado_lote.linha(idx)
 
                                 # Inserir na base unificada
                                 sucesso = self._inserir_valores_base_unificada(valores, linha)
@@ -232,43 +215,14 @@ class CargaBaseUnificadaCheckoutService:
 
                 ids_processados = []
 
-                with transaction.atomic():
-                    for row_lote in lote_atual:
-                        linha = dict(zip(colunas, row_lote))
+                linhas = [dict(zip(colunas, row_lote)) for row_lote in lote_atual]
+                resultado_lote = self._calcular_lote(linhas, canais_cache)
 
+                with transaction.atomic():
+                    for idx, linha in enumerate(linhas):
                         try:
-                            # Montar info_loja
-                            info_loja = {
-                                'id': linha.get('clienteId'),
-                                'loja_id': linha.get('clienteId'),
-                                'loja': linha.get('razao_social'),
-                                'cnpj': linha.get('cnpj'),
-                                'canal_id': linha.get('canal_id')
-                            }
-
-                            # Usar cache ao invés de query
-                            canal_id = linha.get('canal_id')
-                            info_canal = canais_cache.get(canal_id)
-                            if not info_canal:
-                                registrar_log('pinbank.cargas_pinbank',
-                                            f"⚠️ Canal ID {canal_id} não encontrado no cache",
-                                            nivel='WARNING')
-                                info_canal = {
-                                    'id': canal_id,
-                                    'codigo_canal': 0,
-                                    'codigo_cliente': 0,
-                                    'key_loja': '',
-                                    'canal': f'CANAL_{canal_id}',
-                                    'nome': f'CANAL_{canal_id}'
-                                }
-
-                            # Calcular valores primários
-                            valores = self.calculadora.calcular_valores_primarios(
-                                dados_linha=linha,
-                                tabela='transactiondata_pos',
-                                info_loja=info_loja,
-                                info_canal=info_canal
-                            )
+                            # Valores primários calculados em lote (parâmetros por loja/plano/vigência)
+                            valores = resultado_lote.linha(idx)
                             sucesso = self._inserir_valores_base_unificada(valores, linha)
 
                             if sucesso:
@@ -296,8 +250,49 @@ class CargaBaseUnificadaCheckoutService:
 
         registrar_log('pinbank.cargas_pinbank',
                     f"Carga de valores primários Checkout Unificado finalizada. Registros processados: {registros_processados}")
+        self._atualizar_resumo_diario()
         return registros_processados
 
+    def _calcular_lote(self, linhas, canais_cache):
+        """Monta info_loja/info_canal de cada linha e calcula o lote de uma vez (ResultadoLote)"""
+        entradas = []
+        for linha in linhas:
+            info_loja = {
+                'id': linha.get('clienteId'),
+                'loja_id': linha.get('clienteId'),
+                'loja': linha.get('razao_social'),
+                'cnpj': linha.get('cnpj'),
+                'canal_id': linha.get('canal_id')
+            }
+
+            # Usar cache ao invés de query
+            canal_id = linha.get('canal_id')
+            info_canal = canais_cache.get(canal_id)
+            if not info_canal:
+                registrar_log('pinbank.cargas_pinbank',
+                            f"⚠️ Canal ID {canal_id} não encontrado no cache",
+                            nivel='WARNING')
+                info_canal = {
+                    'id': canal_id,
+                    'codigo_canal': 0,
+                    'codigo_cliente': 0,
+                    'key_loja': '',
+                    'canal': f'CANAL_{canal_id}',  # Fallback com ID
+                    'nome': f'CANAL_{canal_id}'
+                }
+            entradas.append((linha, info_loja, info_canal))
+
+        return self.calculadora.calcular_lote(entradas, tabela='transactiondata_pos')
+
+    def _atualizar_resumo_diario(self):
+        """Recalcula os agregados diários afetados pelos NSUs gravados nesta execução"""
+        if not self.nsus_alterados:
+            return
+        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+        ResumoDiarioService.atualizar_por_nsus(self.nsus_alterados, self.buckets_anteriores)
+        self.nsus_alterados.clear()
+        self.buckets_anteriores = (set(), set())
+
     def _inserir_valores_base_unificada(self, valores: Dict[int, Any], linha: Dict) -> bool:
         """
         Insere ou atualiza valores na base unificada
@@ -349,10 +344,13 @@ class CargaBaseUnificadaCheckoutService:
                                 except (ValueError, TypeError):
                                     dados_insert[campo_nome] = None
 
+            # Data de pagamento tipada (var45 DD/MM/YYYY): filtros por intervalo usam índice
+            dados_insert['data_pagamento'] = converter_data_ou_nula(dados_insert.get('var45'))
+
             with connection.cursor() as cursor:
                 # Verificar se já existe e buscar campos críticos
                 cursor.execute("""
-                    SELECT var69, var70, var44, var45
+                    SELECT var69, var70, var44, var45, var6, data_transacao, data_pagamento
                     FROM wallclub.base_transacoes_unificadas
                     WHERE var9 = %s AND tipo_operacao = 'Wallet'
                 """, [str(nsu)])
@@ -361,7 +359,7 @@ class CargaBaseUnificadaCheckoutService:
 
                 if registro_atual:
                     # Registro já existe - verificar se precisa UPDATE
-                    var69_atual, var70_atual, var44_atual, var45_atual = registro_atual
+                    var69_atual, var70_atual, var44_atual, var45_atual = registro_atual[:4]
                     var69_novo = dados_insert.get('var69')
                     var70_novo = dados_insert.get('var70')
                     var44_novo = dados_insert.get('var44')
@@ -381,6 +379,9 @@ class CargaBaseUnificadaCheckoutService:
                         sql = f"UPDATE wallclub.base_transacoes_unificadas SET {set_clause} WHERE var9 = %s AND tipo_operacao = 'Wallet'"
                         cursor.execute(sql, valores_update)
 
+                        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+                        ResumoDiarioService.adicionar_bucket(self.buckets_anteriores, *registro_atual[4:])
+
                         # Auditoria
                         import json
                         motivo = []
@@ -426,6 +427,7 @@ class CargaBaseUnificadaCheckoutService:
 
                     registrar_log('pinbank.cargas_pinbank', f'✅ Inserido em base_transacoes_unificadas - NSU: {nsu}')
 
+            self.nsus_alterados.add(str(nsu))
             return True
 
         except Exception as e:
@@ -11,10 +11,14 @@ Diferença da base antiga:
 MIGRADO: 22/12/2025 - Consulta transactiondata_pos ao invés de transactiondata
 """
 
-from typing import Dict, Any
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Tuple
 from django.db import connection, transaction
-from .models import PinbankExtratoPOS
+from .models import PinbankCancelamentoPendente, PinbankExtratoPOS, PinbankMarcaCancelamentos
+from .services_pipeline_cargas import clausula_nsus
 from wallclub_core.utilitarios.log_control import registrar_log
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
 
 
 class CargaBaseUnificadaCredenciadoraService:
@@ -24,13 +28,25 @@ class CargaBaseUnificadaCredenciadoraService:
     Filtro: Apenas transações com lido = 0
     """
 
+    # Varredura de cancelamentos (atualizar_cancelamentos)
+    PROCESSO_CANCELAMENTOS = 'cancelamentos_credenciadora'
+    TAMANHO_PARTICAO_CANCELAMENTOS = 5000
+    MARGEM_MARCA_CANCELAMENTOS = timedelta(minutes=5)
+    # Linhas por INSERT multi-linha na base unificada (~110 colunas por linha)
+    LINHAS_POR_INSERT = 500
+
     def __init__(self):
         from parametros_wallclub.calculadora_base_credenciadora import CalculadoraBaseCredenciadora
         from pinbank.services import PinbankService
         self.calculadora = CalculadoraBaseCredenciadora()
         self.pinbank_service = PinbankService()
+        # NSUs gravados na execução (para atualizar o resumo diário do portal) e
+        # buckets (vendas, recebimento) das linhas atualizadas, lidos antes do UPDATE
+        self.nsus_alterados = set()
+        self.buckets_anteriores = (set(), set())
 
-    def carregar_valores_primarios(self, limite: int = None, nsu: str = None, worker_id: int = None) -> int:
+    def carregar_valores_primarios(self, limite: int = None, nsu: str = None, worker_id: int = None,
+                                   nsus: Iterable[str] = None) -> int:
         """
         Rotina principal de carga de variáveis primárias
         Processa registros com processado = 0
@@ -40,12 +56,15 @@ class CargaBaseUnificadaCredenciadoraService:
             limite: Limite de registros
             nsu: NSU específico
             worker_id: ID do worker (0-9) para processamento paralelo
+            nsus: NSUs entregues pela etapa de extrato (pipeline): consulta só esses
         """
         registrar_log('pinbank.cargas_pinbank', f"Iniciando carga de valores primários - Base Unificada Credenciadora (worker_id={worker_id})")
 
         limit_clause = f"LIMIT {limite}" if limite else ""
         nsu_clause = f"AND pep.NsuOperacao = '{nsu}'" if nsu else ""
         worker_clause = f"AND MOD(CAST(pep.NsuOperacao AS UNSIGNED), 2) = {worker_id}" if worker_id is not None else ""
+        nsus_clause = clausula_nsus(nsus, 'pep.NsuOperacao')
+        nsus_clause_sub = clausula_nsus(nsus, 'pep2.NsuOperacao')
 
         registrar_log('pinbank.cargas_pinbank', f"Executando query com limite={limite}, nsu={nsu}, worker_id={worker_id}")
 
@@ -119,9 +138,11 @@ class CargaBaseUnificadaCredenciadoraService:
                              AND ct2.nsu IS NULL
                              AND t2.terminal IS NULL
                              {worker_clause}
+                             {nsus_clause_sub}
                              GROUP BY pep2.NsuOperacao
                          )
                          {nsu_clause}
+                         {nsus_clause}
                          {worker_clause}
                 ORDER BY pep.id
                 {limit_clause}
@@ -135,17 +156,7 @@ class CargaBaseUnificadaCredenciadoraService:
             registrar_log('pinbank.cargas_pinbank', f"Iniciando processamento de registros em lotes de 100")
 
             # Cache de canais para evitar N+1 queries
-            from wallclub_core.estr_organizacional.canal import Canal
-            canais_cache = {}
-            for canal in Canal.objects.all():
-                canais_cache[canal.id] = {
-                    'id': canal.id,
-                    'codigo_canal': int(canal.canal) if canal.canal and canal.canal.isdigit() else 0,
-                    'codigo_cliente': int(canal.codigo_cliente) if canal.codigo_cliente and canal.codigo_cliente.isdigit() else 0,
-                    'key_loja': canal.keyvalue or '',
-                    'canal': canal.canal or '',
-                    'nome': canal.nome or ''
-                }
+            canais_cache = self._carregar_canais()
             registrar_log('pinbank.cargas_pinbank', f"Cache de {len(canais_cache)} canais carregado")
 
             # Processar em lotes de 100 registros
@@ -170,35 +181,16 @@ class CargaBaseUnificadaCredenciadoraService:
                     # Coletar IDs processados para batch update
                     ids_processados = []
 
-                    with transaction.atomic():
-                        for idx, row_lote in enumerate(lote_atual):
-                            linha = dict(zip(colunas, row_lote))
+                    # Cálculo do lote inteiro: parâmetros resolvidos uma vez por loja/plano/vigência
+                    linhas = [self._montar_linha(dict(zip(colunas, row_lote)), canais_cache) for row_lote in lote_atual]
+                    resultado_lote, posicoes = self._calcular_lote(linhas)
 
+                    with transaction.atomic():
+                        for idx, linha in enumerate(linhas):
                             try:
                                 import time
                                 inicio_registro = time.time()
 
-                                # Montar info_loja e info_canal
-                                linha['info_loja'] = {
-                                    'id': linha.get('clienteId'),
-                                    'loja_id': linha.get('clienteId'),
-                                    'loja': linha.get('razao_social'),
-                                    'cnpj': linha.get('cnpj'),
-                                    'canal_id': linha.get('canal_id')
-                                }
-                                # Usar cache ao invés de query
-                                canal_id = linha.get('canal_id')
-                                linha['info_canal'] = canais_cache.get(canal_id, {
-                                    'id': canal_id,
-                                    'codigo_canal': 0,
-                                    'codigo_cliente': 0,
-                                    'key_loja': '',
-                                    'canal': '',
-                                    'nome': ''
-                                })
-
-                                tempo_setup = time.time() - inicio_registro
-
                                 # Verificar se precisa inserir/atualizar
                                 var69_atual = linha.get('var69_atual')
                                 descricao_status = linha.get('DescricaoStatusPagamento')
@@ -215,12 +207,7 @@ class CargaBaseUnificadaCredenciadoraService:
                                         f"NSU {linha['NsuOperacao']}: NOVO (var69=NULL, status={descricao_status_normalizado}) → INSERT")
 
                                     inicio_calculo = time.time()
-                                    valores = self.calculadora.calcular_valores_primarios(
-                                        dados_linha=linha,
-                                        tipo_operacao='Credenciadora',
-                                        info_loja=linha['info_loja'],
-                                        info_canal=linha['info_canal']
-                                    )
+                                    valores = resultado_lote.linha(posicoes[idx])
                                     tempo_calculo = time.time() - inicio_calculo
 
                                     inicio_insert = time.time()
@@ -247,12 +234,7 @@ class CargaBaseUnificadaCredenciadoraService:
                                         f"NSU {linha['NsuOperacao']}: MUDANÇA (var69={var69_atual} → status={descricao_status_normalizado}) → UPDATE")
 
                                     inicio_calculo = time.time()
-                                    valores = self.calculadora.calcular_valores_primarios(
-                                        dados_linha=linha,
-                                        tipo_operacao='Credenciadora',
-                                        info_loja=linha['info_loja'],
-                                        info_canal=linha['info_canal']
-                                    )
+                                    valores = resultado_lote.linha(posicoes[idx])
                                     tempo_calculo = time.time() - inicio_calculo
 
                                     inicio_insert = time.time()
@@ -300,30 +282,12 @@ class CargaBaseUnificadaCredenciadoraService:
 
                 ids_processados = []
 
-                with transaction.atomic():
-                    for row_lote in lote_atual:
-                        linha = dict(zip(colunas, row_lote))
+                linhas = [self._montar_linha(dict(zip(colunas, row_lote)), canais_cache) for row_lote in lote_atual]
+                resultado_lote, posicoes = self._calcular_lote(linhas)
 
+                with transaction.atomic():
+                    for idx, linha in enumerate(linhas):
                         try:
-                            # Montar info_loja e info_canal
-                            linha['info_loja'] = {
-                                'id': linha.get('clienteId'),
-                                'loja_id': linha.get('clienteId'),
-                                'loja': linha.get('razao_social'),
-                                'cnpj': linha.get('cnpj'),
-                                'canal_id': linha.get('canal_id')
-                            }
-                            # Usar cache ao invés de query
-                            canal_id = linha.get('canal_id')
-                            linha['info_canal'] = canais_cache.get(canal_id, {
-                                'id': canal_id,
-                                'codigo_canal': 0,
-                                'codigo_cliente': 0,
-                                'key_loja': '',
-                                'canal': '',
-                                'nome': ''
-                            })
-
                             # Verificar se precisa inserir/atualizar
                             var69_atual = linha.get('var69_atual')
                             descricao_status = linha.get('DescricaoStatusPagamento')
@@ -333,12 +297,7 @@ class CargaBaseUnificadaCredenciadoraService:
                                 registrar_log('pinbank.cargas_pinbank',
                                     f"NSU {linha['NsuOperacao']}: NOVO (var69=NULL, status={descricao_status_normalizado}) → INSERT")
 
-                                valores = self.calculadora.calcular_valores_primarios(
-                                    dados_linha=linha,
-                                    tipo_operacao='Credenciadora',
-                                    info_loja=linha['info_loja'],
-                                    info_canal=linha['info_canal']
-                                )
+                                valores = resultado_lote.linha(posicoes[idx])
                                 sucesso = self._inserir_valores_base_unificada(valores, linha)
 
                                 if sucesso:
@@ -358,7 +317,7 @@ class CargaBaseUnificadaCredenciadoraService:
                                 registrar_log('pinbank.cargas_pinbank',
                                     f"NSU {linha['NsuOperacao']}: MUDANÇA (var69={var69_atual} → status={descricao_status_normalizado}) → UPDATE")
 
-                                valores = self.calculadora.calcular_valores_primarios(linha, tabela='credenciadora')
+                                valores = resultado_lote.linha(posicoes[idx])
                                 sucesso = self._inserir_ou_atualizar_valores(valores, linha)
 
                                 if sucesso:
@@ -388,175 +347,445 @@ class CargaBaseUnificadaCredenciadoraService:
 
             registrar_log('pinbank.cargas_pinbank',
                         f"✅ Processamento Base Unificada Credenciadora concluído: {registros_processados} transações processadas")
-            return registros_processados
 
-    def atualizar_cancelamentos(self) -> int:
+        self._atualizar_resumo_diario()
+        return registros_processados
+
+    def atualizar_cancelamentos(self, desde_inicio: bool = False, tamanho_particao: int = None) -> int:
         """
         Atualiza transações que foram canceladas posteriormente
         Compara var68 (status transação) com DescricaoStatus do extrato
-        """
-        registrar_log('pinbank.cargas_pinbank', "Iniciando atualização de cancelamentos")
 
-        # Carregar cache de canais
-        from wallclub_core.estr_organizacional.canal import Canal
-        canais = Canal.objects.all()
-        canais_cache = {}
-        for canal in canais:
-            canais_cache[canal.id] = {
-                'id': canal.id,
-                'codigo_canal': int(canal.canal) if canal.canal and canal.canal.isdigit() else 0,
-                'codigo_cliente': int(canal.codigo_cliente) if canal.codigo_cliente and canal.codigo_cliente.isdigit() else 0,
-                'key_loja': canal.keyvalue or '',
-                'canal': canal.canal or '',
-                'nome': canal.nome or ''
-            }
+        Varredura por conjunto: os NSUs cancelados no extrato alterado desde a
+        marca d'água (pinbankMarcaCancelamentos) vão para uma tabela temporária
+        e são processados em partições. Por partição, em uma transação: UPDATE
+        ... JOIN marca o extrato para reprocessamento, as linhas são
+        recalculadas com calcular_lote e gravadas em INSERT multi-linha, os
+        estornos de cashback são buscados para o conjunto e a marca avança.
+        NSUs que falham ficam em pinbankCancelamentosPendentes e entram de
+        novo na execução seguinte (a marca não fica presa neles).
+
+        Args:
+            desde_inicio: Ignora a marca e varre todo o extrato
+            tamanho_particao: NSUs por partição (padrão: TAMANHO_PARTICAO_CANCELAMENTOS)
 
+        Returns:
+            int: NSUs recalculados
+        """
+        tamanho_particao = tamanho_particao or self.TAMANHO_PARTICAO_CANCELAMENTOS
+        registrar_log('pinbank.cargas_pinbank', f"Iniciando atualização de cancelamentos (desde_inicio={desde_inicio})")
+
+        canais_cache = self._carregar_canais()
+
+        # Margem sobre a marca: extrato commitado fora da ordem de updated_at entra de novo
+        # (NSU já atualizado sai pelo filtro DescricaoStatus != var68)
+        marca = None
+        if not desde_inicio:
+            marca = PinbankMarcaCancelamentos.objects.filter(
+                processo=self.PROCESSO_CANCELAMENTOS
+            ).values_list('ultimo_updated_at', flat=True).first()
+        filtro_marca = "AND pep.updated_at >= %s" if marca else ""
+        parametros = [marca - self.MARGEM_MARCA_CANCELAMENTOS] if marca else []
+
+        atualizados = 0
         with connection.cursor() as cursor:
-            # Buscar transações canceladas que ainda não foram atualizadas
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS tmp_cancelamentos_credenciadora")
             cursor.execute("""
-                SELECT
-                    pep.NsuOperacao
-                FROM base_transacoes_unificadas btu
-                INNER JOIN wallclub.pinbankExtratoPOS pep ON btu.var9 = CAST(pep.NsuOperacao AS CHAR) COLLATE utf8mb4_unicode_ci
-                WHERE pep.DataCancelamento != '0001-01-01T00:00:00'
-                  AND pep.DescricaoStatus != btu.var68
-                  AND btu.tipo_operacao = 'Credenciadora'
-                  AND btu.adquirente = 'PINBANK'
+                CREATE TEMPORARY TABLE tmp_cancelamentos_credenciadora (
+                    posicao INT AUTO_INCREMENT PRIMARY KEY,
+                    NsuOperacao BIGINT NOT NULL,
+                    pep_id INT NOT NULL,
+                    marca DATETIME(6) NULL,
+                    UNIQUE KEY uk_tmp_cancelamentos_nsu (NsuOperacao)
+                ) ENGINE=InnoDB
             """)
+            try:
+                # Transações canceladas que ainda não foram atualizadas, na ordem da marca
+                cursor.execute(f"""
+                    INSERT INTO tmp_cancelamentos_credenciadora (NsuOperacao, pep_id, marca)
+                    SELECT
+                        pep.NsuOperacao,
+                        MIN(pep.id),
+                        MAX(pep.updated_at)
+                    FROM base_transacoes_unificadas btu
+                    INNER JOIN wallclub.pinbankExtratoPOS pep ON btu.var9 = CAST(pep.NsuOperacao AS CHAR) COLLATE utf8mb4_unicode_ci
+                    WHERE pep.DataCancelamento != '0001-01-01T00:00:00'
+                      AND pep.DescricaoStatus != btu.var68
+                      AND btu.tipo_operacao = 'Credenciadora'
+                      AND btu.adquirente = 'PINBANK'
+                      {filtro_marca}
+                    GROUP BY pep.NsuOperacao
+                    ORDER BY MAX(pep.updated_at), pep.NsuOperacao
+                """, parametros)
+
+                # NSUs que falharam nas execuções anteriores (marca NULL: não movem a marca)
+                cursor.execute("""
+                    INSERT IGNORE INTO tmp_cancelamentos_credenciadora (NsuOperacao, pep_id, marca)
+                    SELECT
+                        pend.NsuOperacao,
+                        MIN(pep.id),
+                        NULL
+                    FROM pinbankCancelamentosPendentes pend
+                    INNER JOIN wallclub.pinbankExtratoPOS pep ON pep.NsuOperacao = pend.NsuOperacao
+                    WHERE pep.DataCancelamento != '0001-01-01T00:00:00'
+                    GROUP BY pend.NsuOperacao
+                    ORDER BY pend.NsuOperacao
+                """)
+
+                cursor.execute("SELECT COUNT(*), MAX(posicao) FROM tmp_cancelamentos_credenciadora")
+                total, ultima_posicao = cursor.fetchone()
+
+                if total == 0:
+                    registrar_log('pinbank.cargas_pinbank', "Nenhum cancelamento pendente de atualização")
+                    return 0
+
+                registrar_log('pinbank.cargas_pinbank',
+                            f"Encontrados {total} cancelamentos para atualizar (partições de {tamanho_particao})")
+
+                for inicio in range(1, ultima_posicao + 1, tamanho_particao):
+                    fim = inicio + tamanho_particao - 1
+                    try:
+                        atualizados += self._atualizar_particao_cancelamentos(cursor, inicio, fim, canais_cache)
+                    except Exception as e:
+                        # Marca fica na última partição concluída: a próxima execução retoma daqui
+                        import traceback
+                        registrar_log('pinbank.cargas_pinbank',
+                                    f"Erro na partição de cancelamentos {inicio}-{fim}: {str(e)}",
+                                    nivel='ERROR')
+                        registrar_log('pinbank.cargas_pinbank', f"Traceback: {traceback.format_exc()}", nivel='ERROR')
+                        break
+            finally:
+                cursor.execute("DROP TEMPORARY TABLE IF EXISTS tmp_cancelamentos_credenciadora")
 
-            cancelamentos = cursor.fetchall()
-            total = len(cancelamentos)
+            registrar_log('pinbank.cargas_pinbank',
+                        f"✅ Cancelamentos atualizados: {atualizados}/{total}")
 
-            if total == 0:
-                registrar_log('pinbank.cargas_pinbank', "Nenhum cancelamento pendente de atualização")
-                return 0
+        self._atualizar_resumo_diario()
+        return atualizados
+
+    def _atualizar_particao_cancelamentos(self, cursor, inicio: int, fim: int,
+                                          canais_cache: Dict[int, Dict[str, Any]]) -> int:
+        """
+        Recalcula uma partição (posições inicio..fim) da tabela temporária de
+        cancelamentos e avança a marca d'água, tudo na mesma transação
 
-            registrar_log('pinbank.cargas_pinbank', f"Encontrados {total} cancelamentos para atualizar")
+        Returns:
+            int: NSUs recalculados na partição
+        """
+        with transaction.atomic():
+            cursor.execute("""
+                SELECT NsuOperacao, marca
+                FROM tmp_cancelamentos_credenciadora
+                WHERE posicao BETWEEN %s AND %s
+            """, [inicio, fim])
+            particao = cursor.fetchall()
+            if not particao:
+                return 0
 
             # Marcar como processado=0 para forçar reprocessamento
-            nsus_cancelados = [row[0] for row in cancelamentos]
-            PinbankExtratoPOS.objects.filter(NsuOperacao__in=nsus_cancelados).update(processado=0)
-            registrar_log('pinbank.cargas_pinbank',
-                        f"✅ {len(nsus_cancelados)} NSUs marcados como processado=0 para reprocessamento")
+            # (updated_at preservado: a marca d'água é o updated_at do extrato)
+            cursor.execute("""
+                UPDATE wallclub.pinbankExtratoPOS pep
+                INNER JOIN tmp_cancelamentos_credenciadora tmp ON tmp.NsuOperacao = pep.NsuOperacao
+                SET pep.processado = 0,
+                    pep.updated_at = pep.updated_at
+                WHERE tmp.posicao BETWEEN %s AND %s
+            """, [inicio, fim])
+
+            # Dados completos do extrato para recalcular
+            cursor.execute("""
+                SELECT
+                    pep.id,
+                    l.canal_id,
+                    pep.codigo_cliente as codigoCliente,
+                    cecp.cliente_id as clienteId,
+                    cecp.nome as razao_social,
+                    cecp.cnpj as cnpj,
+                    '' as cpf,
+                    '' as nsuAcquirer,
+                    pep.idTerminal,
+                    pep.SerialNumber,
+                    pep.Terminal,
+                    pep.Bandeira,
+                    pep.TipoCompra,
+                    pep.DadosExtra,
+                    pep.CpfCnpjComprador,
+                    pep.NomeRazaoSocialComprador,
+                    pep.NumeroParcela,
+                    pep.NumeroTotalParcelas,
+                    pep.DataTransacao,
+                    pep.DataFuturaPagamento,
+                    pep.CodAutorizAdquirente,
+                    pep.NsuOperacao,
+                    pep.NsuOperacaoLoja,
+                    pep.ValorBruto,
+                    pep.ValorBrutoParcela,
+                    pep.ValorLiquidoRepasse,
+                    pep.ValorSplit,
+                    pep.IdStatus,
+                    pep.DescricaoStatus,
+                    pep.IdStatusPagamento,
+                    pep.DescricaoStatusPagamento,
+                    pep.ValorTaxaAdm,
+                    pep.ValorTaxaMes,
+                    pep.NumeroCartao,
+                    pep.DataCancelamento,
+                    pep.Submerchant,
+                    0 as valor_original,
+                    (SELECT SUM(pep2.ValorLiquidoRepasse)
+                     FROM wallclub.pinbankExtratoPOS pep2
+                     WHERE pep.NsuOperacao = pep2.NsuOperacao
+                       AND pep2.DescricaoStatusPagamento in ('Pago','Pago-M')) as vRepasse
+                FROM tmp_cancelamentos_credenciadora tmp
+                INNER JOIN wallclub.pinbankExtratoPOS pep ON pep.id = tmp.pep_id
+                INNER JOIN wallclub.credenciaisExtratoContaPinbank cecp ON pep.codigo_cliente = cecp.codigo_cliente
+                INNER JOIN wallclub.loja l ON l.id = cecp.cliente_id
+                WHERE tmp.posicao BETWEEN %s AND %s
+                ORDER BY tmp.posicao
+            """, [inicio, fim])
+            colunas = [desc[0] for desc in cursor.description]
+            linhas = [self._montar_linha(dict(zip(colunas, row)), canais_cache) for row in cursor.fetchall()]
+
+            # Falhas da partição (NSU -> erro): voltam na próxima execução
+            encontrados = {linha.get('NsuOperacao') for linha in linhas}
+            falhas = {nsu: 'Sem credencial/loja no extrato' for nsu, _ in particao if nsu not in encontrados}
+            if falhas:
+                registrar_log('pinbank.cargas_pinbank',
+                            f"Partição {inicio}-{fim}: {len(falhas)} NSUs sem credencial/loja no extrato",
+                            nivel='WARNING')
+
+            # Recalcular todos os valores (parâmetros resolvidos uma vez por loja/plano/vigência)
+            resultado = self.calculadora.calcular_lote(
+                [(linha, linha['info_loja'], linha['info_canal']) for linha in linhas],
+                tipo_operacao='Credenciadora'
+            )
+            registros = []
+            for idx, linha in enumerate(linhas):
+                try:
+                    registros.append(self._preparar_campos_insercao(resultado.linha(idx), linha))
+                except Exception as e:
+                    falhas[linha.get('NsuOperacao')] = f"Recálculo: {str(e)}"
+                    registrar_log('pinbank.cargas_pinbank',
+                                f"Erro ao recalcular cancelamento NSU {linha.get('NsuOperacao')}: {str(e)}",
+                                nivel='ERROR')
 
-            atualizados = 0
-            for row in cancelamentos:
-                nsu = row[0]
+            self._guardar_buckets_anteriores(campos.get('var9') for campos in registros)
+            self._inserir_ou_atualizar_registros_sql(cursor, registros)
+            self.nsus_alterados.update(campos.get('var9') for campos in registros)
+
+            estornos, falhas_estorno = self._estornar_cashback_cancelados([nsu for nsu, _ in particao])
+            for nsu, erro in falhas_estorno.items():
+                falhas.setdefault(int(nsu), f"Estorno de cashback: {erro}")
+            self._registrar_pendentes(cursor, [nsu for nsu, _ in particao], falhas)
+
+            # Avançar a marca d'água junto com a partição
+            marca_particao = max((marca for _, marca in particao if marca), default=None)
+            controle, _ = PinbankMarcaCancelamentos.objects.select_for_update().get_or_create(
+                processo=self.PROCESSO_CANCELAMENTOS
+            )
+            if marca_particao and (controle.ultimo_updated_at is None or marca_particao > controle.ultimo_updated_at):
+                controle.ultimo_updated_at = marca_particao
+            controle.total_processados += len(registros)
+            controle.save()
+
+        registrar_log('pinbank.cargas_pinbank',
+                    f"Partição de cancelamentos {inicio}-{fim}: {len(registros)}/{len(particao)} recalculados, "
+                    f"{estornos} estornos de cashback, {len(falhas)} pendentes, marca={controle.ultimo_updated_at}")
+        return len(registros)
+
+    @classmethod
+    def _estornar_cashback_cancelados(cls, nsus) -> Tuple[int, Dict[str, str]]:
+        """
+        Estorna o cashback dos NSUs cancelados: os créditos ativos do conjunto
+        são buscados de uma vez (_cashback_a_estornar) e só eles passam pelos
+        serviços de estorno
 
-                try:
-                    # Buscar dados completos do extrato para recalcular
-                    cursor.execute("""
-                        SELECT
-                            pep.id,
-                            l.canal_id,
-                            pep.codigo_cliente as codigoCliente,
-                            cecp.cliente_id as clienteId,
-                            cecp.nome as razao_social,
-                            cecp.cnpj as cnpj,
-                            '' as cpf,
-                            '' as nsuAcquirer,
-                            pep.idTerminal,
-                            pep.SerialNumber,
-                            pep.Terminal,
-                            pep.Bandeira,
-                            pep.TipoCompra,
-                            pep.DadosExtra,
-                            pep.CpfCnpjComprador,
-                            pep.NomeRazaoSocialComprador,
-                            pep.NumeroParcela,
-                            pep.NumeroTotalParcelas,
-                            pep.DataTransacao,
-                            pep.DataFuturaPagamento,
-                            pep.CodAutorizAdquirente,
-                            pep.NsuOperacao,
-                            pep.NsuOperacaoLoja,
-                            pep.ValorBruto,
-                            pep.ValorBrutoParcela,
-                            pep.ValorLiquidoRepasse,
-                            pep.ValorSplit,
-                            pep.IdStatus,
-                            pep.DescricaoStatus,
-                            pep.IdStatusPagamento,
-                            pep.DescricaoStatusPagamento,
-                            pep.ValorTaxaAdm,
-                            pep.ValorTaxaMes,
-                            pep.NumeroCartao,
-                            pep.DataCancelamento,
-                            pep.Submerchant,
-                            0 as valor_original,
-                            (SELECT SUM(pep2.ValorLiquidoRepasse)
-                             FROM wallclub.pinbankExtratoPOS pep2
-                             WHERE pep.NsuOperacao = pep2.NsuOperacao
-                               AND pep2.DescricaoStatusPagamento in ('Pago','Pago-M')) as vRepasse
-                        FROM wallclub.pinbankExtratoPOS pep
-                        INNER JOIN wallclub.credenciaisExtratoContaPinbank cecp ON pep.codigo_cliente = cecp.codigo_cliente
-                        INNER JOIN wallclub.loja l ON l.id = cecp.cliente_id
-                        WHERE pep.NsuOperacao = %s
-                        LIMIT 1
-                    """, [nsu])
-
-                    linha_dados = cursor.fetchone()
-                    if not linha_dados:
-                        registrar_log('pinbank.cargas_pinbank',
-                                    f"NSU {nsu}: Não encontrado no extrato",
-                                    nivel='WARNING')
-                        continue
-
-                    # Converter para dict
-                    colunas = [
-                        'id', 'canal_id', 'codigoCliente', 'clienteId', 'razao_social', 'cnpj', 'cpf',
-                        'nsuAcquirer', 'idTerminal', 'SerialNumber', 'Terminal', 'Bandeira', 'TipoCompra',
-                        'DadosExtra', 'CpfCnpjComprador', 'NomeRazaoSocialComprador', 'NumeroParcela',
-                        'NumeroTotalParcelas', 'DataTransacao', 'DataFuturaPagamento', 'CodAutorizAdquirente',
-                        'NsuOperacao', 'NsuOperacaoLoja', 'ValorBruto', 'ValorBrutoParcela', 'ValorLiquidoRepasse',
-                        'ValorSplit', 'IdStatus', 'DescricaoStatus', 'IdStatusPagamento', 'DescricaoStatusPagamento',
-                        'ValorTaxaAdm', 'ValorTaxaMes', 'NumeroCartao', 'DataCancelamento', 'Submerchant',
-                        'valor_original', 'vRepasse'
-                    ]
-                    linha = dict(zip(colunas, linha_dados))
-
-                    # Montar info_loja e info_canal
-                    linha['info_loja'] = {
-                        'id': linha.get('clienteId'),
-                        'loja': linha.get('razao_social')
-                    }
-
-                    # Buscar dados do canal do cache
-                    canal_id = linha.get('canal_id')
-                    canal_info = canais_cache.get(canal_id, {})
-                    linha['info_canal'] = canal_info if canal_info else {'id': canal_id}
-
-                    # Recalcular todos os valores
-                    valores = self.calculadora.calcular_valores_primarios(
-                        dados_linha=linha,
-                        tipo_operacao='Credenciadora',
-                        info_loja=linha['info_loja'],
-                        info_canal=linha['info_canal']
-                    )
-
-                    # Atualizar usando INSERT ON DUPLICATE KEY UPDATE
-                    sucesso = self._inserir_ou_atualizar_valores(valores, linha)
-
-                    if sucesso:
-                        atualizados += 1
-                        registrar_log('pinbank.cargas_pinbank',
-                                    f"NSU {nsu}: Recalculado com sucesso")
-                    else:
-                        registrar_log('pinbank.cargas_pinbank',
-                                    f"NSU {nsu}: Falha ao recalcular",
-                                    nivel='ERROR')
+        Returns:
+            (estornos realizados, {nsu: erro} dos estornos que falharam)
+        """
+        from apps.cashback.services import CashbackService
+        from apps.conta_digital.services import ContaDigitalService
 
+        usos, creditos = cls._cashback_a_estornar(nsus)
+
+        estornos = 0
+        falhas = {}
+        for nsu, por_transacao in sorted(usos.items()):
+            for transacao_id, cashback_ids in por_transacao.items():
+                try:
+                    CashbackService.estornar_cashback('POS', transacao_id, cashback_ids=cashback_ids)
+                    estornos += len(cashback_ids)
                 except Exception as e:
-                    import traceback
-                    erro_detalhado = traceback.format_exc()
+                    falhas[nsu] = str(e)
                     registrar_log('pinbank.cargas_pinbank',
-                                f"Erro ao recalcular cancelamento NSU {nsu}: {str(e)}",
+                                f"Erro ao estornar cashback do NSU cancelado {nsu} (transação {transacao_id}): {str(e)}",
                                 nivel='ERROR')
-                    registrar_log('pinbank.cargas_pinbank', f"Traceback: {erro_detalhado}", nivel='ERROR')
+        for nsu in sorted(creditos):
+            resultado = ContaDigitalService.estornar_cashback_transacao_pos(nsu)
+            if resultado.get('sucesso'):
+                estornos += 1
+            else:
+                falhas[nsu] = resultado.get('mensagem') or 'Estorno não realizado'
+                registrar_log('pinbank.cargas_pinbank',
+                            f"Estorno de cashback POS do NSU cancelado {nsu} não realizado: {resultado.get('mensagem')}",
+                            nivel='WARNING')
+        return estornos, falhas
+
+    @staticmethod
+    def _registrar_pendentes(cursor, nsus, falhas: Dict[int, str]):
+        """
+        Atualiza pinbankCancelamentosPendentes com o resultado da partição:
+        NSUs que falharam entram (ou somam uma tentativa), os concluídos saem
+        """
+        concluidos = [nsu for nsu in nsus if nsu not in falhas]
+        if concluidos:
+            PinbankCancelamentoPendente.objects.filter(NsuOperacao__in=concluidos).delete()
+        if falhas:
+            agora = datetime.now()
+            cursor.execute(f"""
+                INSERT INTO pinbankCancelamentosPendentes (NsuOperacao, tentativas, erro, created_at, updated_at)
+                VALUES {', '.join(['(%s, 1, %s, %s, %s)'] * len(falhas))}
+                ON DUPLICATE KEY UPDATE
+                    tentativas = tentativas + 1,
+                    erro = VALUES(erro),
+                    updated_at = VALUES(updated_at)
+            """, [valor for nsu, erro in sorted(falhas.items()) for valor in (nsu, erro[:500], agora, agora)])
+
+    @staticmethod
+    def _cashback_a_estornar(nsus) -> Tuple[Dict[str, Dict[int, List[int]]], List[str]]:
+        """
+        Créditos de cashback ativos dos NSUs cancelados, em uma consulta por
+        tabela para o conjunto.
+
+        cashback_uso guarda o id de transactiondata_pos no fluxo atual
+        (TRDataPosService) e o NSU no fluxo legado (posp2.services_conta_digital).
+        O NSU é traduzido pelas vendas em transactiondata_pos (nsu_gateway,
+        gateway PINBANK) e o uso só entra se a chave for o id ou o NSU de uma
+        dessas vendas e o cliente tiver o CPF da venda: ids de
+        transactiondata_pos e NSUs caem na mesma faixa numérica.
+
+        Returns:
+            ({nsu: {transacao_id: [ids de cashback_uso]}}, NSUs com crédito POSP2 na conta digital)
+        """
+        from apps.cashback.models import CashbackUso
+        from apps.cliente.models import Cliente
+        from apps.conta_digital.models import MovimentacaoContaDigital
+        from posp2.models import TransactionDataPos
+
+        def somente_digitos(cpf):
+            return re.sub(r'\D', '', cpf or '')
+
+        nsus = [str(nsu) for nsu in nsus]
+
+        # Chaves possíveis do cashback de cada venda (id atual e NSU legado) com o CPF da venda
+        chaves = {}
+        for venda_id, nsu, cpf in TransactionDataPos.objects.filter(
+            gateway='PINBANK', nsu_gateway__in=nsus
+        ).values_list('id', 'nsu_gateway', 'cpf'):
+            cpf = somente_digitos(cpf)
+            if not cpf:
+                continue
+            chaves.setdefault(venda_id, set()).add((nsu, cpf))
+            if nsu.isdigit():
+                chaves.setdefault(int(nsu), set()).add((nsu, cpf))
+
+        usos = {}
+        if chaves:
+            candidatos = list(CashbackUso.objects.filter(
+                transacao_tipo='POS',
+                transacao_id__in=list(chaves),
+                status__in=['RETIDO', 'LIBERADO']
+            ).values_list('id', 'transacao_id', 'cliente_id'))
+            cpfs = dict(Cliente.objects.filter(
+                id__in={cliente_id for _, _, cliente_id in candidatos}
+            ).values_list('id', 'cpf'))
+            for cashback_id, transacao_id, cliente_id in candidatos:
+                cpf_cliente = somente_digitos(cpfs.get(cliente_id))
+                for nsu, cpf in sorted(chaves[transacao_id]):
+                    if cpf == cpf_cliente:
+                        usos.setdefault(nsu, {}).setdefault(transacao_id, []).append(cashback_id)
+                        break
+
+        creditos = sorted(set(MovimentacaoContaDigital.objects.filter(
+            referencia_externa__in=nsus,
+            sistema_origem='POSP2',
+            tipo_movimentacao__codigo='CASHBACK_CREDITO',
+            status='PROCESSADA'
+        ).values_list('referencia_externa', flat=True)))
+        return usos, creditos
+
+    @staticmethod
+    def _carregar_canais() -> Dict[int, Dict[str, Any]]:
+        """Cache de canais por id (evita N+1 queries)"""
+        from wallclub_core.estr_organizacional.canal import Canal
+        canais_cache = {}
+        for canal in Canal.objects.all():
+            canais_cache[canal.id] = {
+                'id': canal.id,
+                'codigo_canal': int(canal.canal) if canal.canal and canal.canal.isdigit() else 0,
+                'codigo_cliente': int(canal.codigo_cliente) if canal.codigo_cliente and canal.codigo_cliente.isdigit() else 0,
+                'key_loja': canal.keyvalue or '',
+                'canal': canal.canal or '',
+                'nome': canal.nome or ''
+            }
+        return canais_cache
+
+    @staticmethod
+    def _montar_linha(linha: Dict[str, Any], canais_cache: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        """Acrescenta info_loja e info_canal (do cache de canais) à linha da query"""
+        linha['info_loja'] = {
+            'id': linha.get('clienteId'),
+            'loja_id': linha.get('clienteId'),
+            'loja': linha.get('razao_social'),
+            'cnpj': linha.get('cnpj'),
+            'canal_id': linha.get('canal_id')
+        }
+        canal_id = linha.get('canal_id')
+        linha['info_canal'] = canais_cache.get(canal_id, {
+            'id': canal_id,
+            'codigo_canal': 0,
+            'codigo_cliente': 0,
+            'key_loja': '',
+            'canal': '',
+            'nome': ''
+        })
+        return linha
+
+    def _calcular_lote(self, linhas):
+        """
+        Calcula de uma vez as linhas que serão inseridas ou atualizadas
+        (var69 ainda NULL ou diferente do status de pagamento).
 
-            registrar_log('pinbank.cargas_pinbank',
-                        f"✅ Cancelamentos atualizados: {atualizados}/{total}")
-            return atualizados
+        Returns:
+            (ResultadoLote, {índice da linha: posição no resultado})
+        """
+        posicoes = {}
+        for idx, linha in enumerate(linhas):
+            descricao_status = linha.get('DescricaoStatusPagamento')
+            descricao_status_normalizado = 'Pago' if descricao_status == 'Pago-M' else descricao_status
+            var69_atual = linha.get('var69_atual')
+            if var69_atual is None or var69_atual != descricao_status_normalizado:
+                posicoes[idx] = len(posicoes)
+
+        resultado = self.calculadora.calcular_lote(
+            [(linhas[idx], linhas[idx]['info_loja'], linhas[idx]['info_canal']) for idx in posicoes],
+            tipo_operacao='Credenciadora'
+        )
+        return resultado, posicoes
+
+    def _atualizar_resumo_diario(self):
+        """Recalcula os agregados diários afetados pelos NSUs gravados nesta execução"""
+        if not self.nsus_alterados:
+            return
+        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+        ResumoDiarioService.atualizar_por_nsus(self.nsus_alterados, self.buckets_anteriores)
+        self.nsus_alterados.clear()
+        self.buckets_anteriores = (set(), set())
+
+    def _guardar_buckets_anteriores(self, nsus):
+        """Buckets do resumo diário em que as linhas estão antes do upsert"""
+        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+        ResumoDiarioService.buckets_por_nsus(nsus, self.buckets_anteriores)
 
     def _inserir_valores_base_unificada(self, valores: Dict[str, Any], linha: Dict[str, Any]) -> bool:
         """
@@ -570,6 +799,7 @@ class CargaBaseUnificadaCredenciadoraService:
             with connection.cursor() as cursor:
                 self._inserir_registro_sql(cursor, campos)
 
+            self.nsus_alterados.add(campos.get('var9'))
             return True
 
         except Exception as e:
@@ -589,9 +819,11 @@ class CargaBaseUnificadaCredenciadoraService:
             campos = self._preparar_campos_insercao(valores, linha)
 
             # Inserir/atualizar via SQL direto
+            self._guardar_buckets_anteriores([campos.get('var9')])
             with connection.cursor() as cursor:
                 self._inserir_ou_atualizar_registro_sql(cursor, campos)
 
+            self.nsus_alterados.add(campos.get('var9'))
             return True
 
         except Exception as e:
@@ -663,6 +895,9 @@ class CargaBaseUnificadaCredenciadoraService:
         campos['amount'] = None
         campos['valor_cashback'] = None
 
+        # Data de pagamento tipada (var45 DD/MM/YYYY): filtros por intervalo usam índice
+        campos['data_pagamento'] = converter_data_ou_nula(campos.get('var45'))
+
         # Timestamp
         campos['created_at'] = datetime.now()
 
@@ -721,3 +956,35 @@ class CargaBaseUnificadaCredenciadoraService:
             ON DUPLICATE KEY UPDATE {update_clause}
         """
         cursor.execute(sql_insert, valores_finais)
+
+    def _inserir_ou_atualizar_registros_sql(self, cursor, registros: List[Dict[str, Any]]):
+        """
+        Insere ou atualiza vários registros em INSERT ... ON DUPLICATE KEY UPDATE
+        multi-linha (mesmas regras de _inserir_ou_atualizar_registro_sql).
+        Um INSERT por conjunto de colunas, em blocos de LINHAS_POR_INSERT.
+        """
+        grupos = {}
+        for campos in registros:
+            campos_validos = {k: v for k, v in campos.items() if k not in ['id']}
+            grupos.setdefault(tuple(sorted(campos_validos.keys())), []).append(campos_validos)
+
+        for campos_ordenados, grupo in grupos.items():
+            placeholders = '(' + ', '.join(['%s'] * len(campos_ordenados)) + ')'
+            update_clause = ', '.join([f'{campo} = VALUES({campo})' for campo in campos_ordenados if campo not in ['var9', 'tipo_operacao']])
+
+            for inicio in range(0, len(grupo), self.LINHAS_POR_INSERT):
+                bloco = grupo[inicio:inicio + self.LINHAS_POR_INSERT]
+
+                # Converter datetime para string
+                valores_finais = []
+                for campos in bloco:
+                    for campo in campos_ordenados:
+                        valor = campos[campo]
+                        valores_finais.append(valor.strftime('%Y-%m-%d %H:%M:%S') if hasattr(valor, 'strftime') else valor)
+
+                sql_insert = f"""
+                    INSERT INTO base_transacoes_unificadas ({', '.join(campos_ordenados)})
+                    VALUES {', '.join([placeholders] * len(bloco))}
+                    ON DUPLICATE KEY UPDATE {update_clause}
+                """
+                cursor.execute(sql_insert, valores_finais)
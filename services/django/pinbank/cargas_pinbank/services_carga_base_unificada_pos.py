@@ -6,10 +6,12 @@ Filtro: Apenas transações de outubro/2025 em diante
 MIGRADO: 22/12/2025 - Consulta transactiondata_pos ao invés de transactiondata
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 from django.db import connection, transaction
 from .models import PinbankExtratoPOS
+from .services_pipeline_cargas import clausula_nsus
 from wallclub_core.utilitarios.log_control import registrar_log
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
 
 
 class CargaBaseUnificadaPOSService:
@@ -22,8 +24,13 @@ class CargaBaseUnificadaPOSService:
     def __init__(self):
         from parametros_wallclub.calculadora_base_unificada import CalculadoraBaseUnificada
         self.calculadora = CalculadoraBaseUnificada()
+        # NSUs gravados na execução (para atualizar o resumo diário do portal) e
+        # buckets (vendas, recebimento) das linhas atualizadas, lidos antes do UPDATE
+        self.nsus_alterados = set()
+        self.buckets_anteriores = (set(), set())
 
-    def carregar_valores_primarios(self, limite: int = None, nsu: str = None, worker_id: int = None) -> int:
+    def carregar_valores_primarios(self, limite: int = None, nsu: str = None, worker_id: int = None,
+                                   nsus: Iterable[str] = None) -> int:
         """
         Rotina principal de carga de variáveis primárias
         Processa registros com processado = 0 e data >= 2025-10-01
@@ -33,22 +40,26 @@ class CargaBaseUnificadaPOSService:
             limite: Limite de registros
             nsu: NSU específico
             worker_id: ID do worker (0-9) para processamento paralelo
+            nsus: NSUs entregues pela etapa de extrato (pipeline): consulta só esses
         """
         registrar_log('pinbank.cargas_pinbank', f"Iniciando carga de valores primários - Base Unificada (worker_id={worker_id})")
 
         limit_clause = f"LIMIT {limite}" if limite else ""
         nsu_clause = f"AND pep.NsuOperacao = '{nsu}'" if nsu else ""
         worker_clause = f"AND MOD(CAST(pep.NsuOperacao AS UNSIGNED), 2) = {worker_id}" if worker_id is not None else ""
+        nsus_clause = clausula_nsus(nsus, 'pep.NsuOperacao')
+        nsus_clause_sub = clausula_nsus(nsus, 'pep2.NsuOperacao')
 
         registrar_log('pinbank.cargas_pinbank', f"Executando query com limite={limite}, nsu={nsu}, worker_id={worker_id}")
 
         # Debug: contar registros antes da query
         with connection.cursor() as cursor:
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT COUNT(*)
                 FROM wallclub.pinbankExtratoPOS pep
                 INNER JOIN wallclub.transactiondata_pos t ON pep.NsuOperacao = t.nsu_gateway AND t.gateway = 'PINBANK'
                 WHERE pep.processado = 0
+                {nsus_clause}
             """)
             total_antes = cursor.fetchone()[0]
             registrar_log('pinbank.cargas_pinbank', f"DEBUG: {total_antes} registros com processado=0 e transactiondata_pos")
@@ -152,9 +163,11 @@ class CargaBaseUnificadaPOSService:
                                   AND (term2.fim IS NULL OR pep2.DataTransacao < term2.fim)
                              WHERE pep2.processado = 0
                              {worker_clause}
+                             {nsus_clause_sub}
                              GROUP BY pep2.NsuOperacao
                          )
                          {nsu_clause}
+                         {nsus_clause}
                          {worker_clause}
                 ORDER BY pep.id
                 {limit_clause}
@@ -288,7 +301,18 @@ class CargaBaseUnificadaPOSService:
 
             registrar_log('pinbank.cargas_pinbank',
                         f"✅ Processamento Base Unificada concluído: {registros_processados} transações processadas")
-            return registros_processados
+
+        self._atualizar_resumo_diario()
+        return registros_processados
+
+    def _atualizar_resumo_diario(self):
+        """Recalcula os agregados diários afetados pelos NSUs gravados nesta execução"""
+        if not self.nsus_alterados:
+            return
+        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+        ResumoDiarioService.atualizar_por_nsus(self.nsus_alterados, self.buckets_anteriores)
+        self.nsus_alterados.clear()
+        self.buckets_anteriores = (set(), set())
 
     def _inserir_valores_base_unificada(self, valores: Dict[str, Any], linha: Dict[str, Any]) -> bool:
         """
@@ -310,6 +334,7 @@ class CargaBaseUnificadaPOSService:
                     [nsu]
                 )
 
+            self.nsus_alterados.add(campos.get('var9'))
             return True
 
         except Exception as e:
@@ -382,6 +407,9 @@ class CargaBaseUnificadaPOSService:
         campos['amount'] = linha.get('amount')
         campos['valor_cashback'] = linha.get('valor_cashback', 0)
 
+        # Data de pagamento tipada (var45 DD/MM/YYYY): filtros por intervalo usam índice
+        campos['data_pagamento'] = converter_data_ou_nula(campos.get('var45'))
+
         # Timestamp
         campos['created_at'] = datetime.now()
 
@@ -391,9 +419,10 @@ class CargaBaseUnificadaPOSService:
         """Insere ou atualiza registro - só UPDATE se status ou pagamento mudou"""
         nsu = campos.get('var9')
 
-        # Buscar var69 (status), var70 (cancelamento), var44 (valor pago) e var45 (data pagamento)
+        # Buscar var69 (status), var70 (cancelamento), var44 (valor pago), var45 (data pagamento)
+        # e as chaves do resumo diário (loja, dia, data de recebimento)
         cursor.execute("""
-            SELECT var69, var70, var44, var45
+            SELECT var69, var70, var44, var45, var6, data_transacao, data_pagamento
             FROM wallclub.base_transacoes_unificadas
             WHERE var9 = %s AND tipo_operacao = 'Wallet'
         """, [nsu])
@@ -408,7 +437,7 @@ class CargaBaseUnificadaPOSService:
         campos_validos = {k: v for k, v in campos.items() if k in colunas_tabela}
 
         if registro_atual:
-            var69_atual, var70_atual, var44_atual, var45_atual = registro_atual
+            var69_atual, var70_atual, var44_atual, var45_atual = registro_atual[:4]
             var69_novo = campos.get('var69')
             var70_novo = campos.get('var70')
             var44_novo = campos.get('var44')
@@ -431,6 +460,9 @@ class CargaBaseUnificadaPOSService:
                 sql = f"UPDATE wallclub.base_transacoes_unificadas SET {set_clause} WHERE var9 = %s AND tipo_operacao = 'Wallet'"
                 cursor.execute(sql, valores)
 
+                from gestao_financeira.services_resumo_diario import ResumoDiarioService
+                ResumoDiarioService.adicionar_bucket(self.buckets_anteriores, *registro_atual[4:])
+
                 # Registrar auditoria
                 import json
                 motivo = []
@@ -1,19 +1,64 @@
 """
 Serviço para carga de extrato POS da Pinbank
 Migração fiel de pinbank_carga_extrato_pos.php
+
+Credenciais consultadas em paralelo (pool limitado, com limite de requisições
+por credencial); cada resposta é lida em fluxo e gravada em lotes de INSERT
+multi-linha com ON DUPLICATE KEY UPDATE na chave natural (NsuOperacao, NumeroParcela).
 """
 
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from django.db import connection, transaction
+from functools import lru_cache
+from typing import List, Dict
+from django.conf import settings
+from django.db import connection
 from .models import (
     CredenciaisExtratoContaPinbank,
     PinbankExtratoPOS
 )
 from pinbank.services import PinbankService
+from wallclub_core.seguranca.rate_limiter import LimitadorJanelaDeslizante
 from wallclub_core.utilitarios.log_control import registrar_log
 
+# Colunas recebidas da API, na ordem do INSERT (além de codigo_cliente e Lido)
+COLUNAS_EXTRATO = (
+    'IdTerminal', 'SerialNumber', 'Terminal', 'Bandeira', 'TipoCompra', 'DadosExtra',
+    'CpfCnpjComprador', 'NomeRazaoSocialComprador', 'NumeroParcela', 'NumeroTotalParcelas',
+    'DataTransacao', 'DataFuturaPagamento', 'CodAutorizAdquirente', 'NsuOperacao',
+    'NsuOperacaoLoja', 'ValorBruto', 'ValorBrutoParcela', 'ValorLiquidoRepasse',
+    'ValorSplit', 'IdStatus', 'DescricaoStatus', 'IdStatusPagamento',
+    'DescricaoStatusPagamento', 'ValorTaxaAdm', 'ValorTaxaMes', 'NumeroCartao',
+    'DataCancelamento', 'Submerchant',
+)
+
+# Únicos campos que podem mudar num registro já carregado; alteração em
+# qualquer um deles marca o registro para reprocessamento (Lido = 0, processado = 0)
+CAMPOS_MUTAVEIS = (
+    'DadosExtra', 'DataFuturaPagamento', 'CodAutorizAdquirente', 'IdStatus',
+    'DescricaoStatus', 'IdStatusPagamento', 'DescricaoStatusPagamento', 'DataCancelamento',
+)
+
+
+@lru_cache(maxsize=8)
+def _sql_upsert(linhas: int) -> str:
+    colunas = ('codigo_cliente',) + COLUNAS_EXTRATO + ('Lido',)
+    linha = '(' + ', '.join(['%s'] * len(colunas)) + ')'
+    alterou = ' OR '.join(f'NOT ({campo} <=> VALUES({campo}))' for campo in CAMPOS_MUTAVEIS)
+    # MySQL aplica as atribuições da esquerda para a direita: Lido/processado/updated_at
+    # comparam com os valores antigos antes de os campos mutáveis serem sobrescritos
+    return (
+        f"INSERT INTO wallclub.pinbankExtratoPOS ({', '.join(colunas)}) "
+        f"VALUES {', '.join([linha] * linhas)} "
+        f"ON DUPLICATE KEY UPDATE "
+        f"Lido = IF({alterou}, 0, Lido), "
+        f"processado = IF({alterou}, 0, processado), "
+        f"updated_at = IF({alterou}, NOW(), updated_at), "
+        + ', '.join(f'{campo} = VALUES({campo})' for campo in CAMPOS_MUTAVEIS)
+    )
+
 
 class CargaExtratoPOSService:
     """
@@ -21,9 +66,18 @@ class CargaExtratoPOSService:
     Migração fiel de pinbank_carga_extrato_pos.php
     """
 
+    # Credenciais consultadas ao mesmo tempo (cada uma com sua conexão ao banco)
+    MAX_WORKERS = getattr(settings, 'PINBANK_EXTRATO_WORKERS', 4)
+    # Requisições por credencial: (máximo, janela em segundos)
+    LIMITES_CREDENCIAL = getattr(settings, 'PINBANK_EXTRATO_LIMITES', [(6, 60)])
+    TAMANHO_LOTE = 500
+
     def __init__(self):
         self.pinbank_service = PinbankService()
         self.modelo_tabela = PinbankExtratoPOS
+        # NSUs gravados na execução: entregues à etapa da base unificada pelo pipeline
+        self.nsus_gravados = set()
+        self._lock_nsus = threading.Lock()
 
     def traz_extrato_periodo(self, data_inicial: str, data_final: str) -> int:
         """
@@ -38,198 +92,125 @@ class CargaExtratoPOSService:
         """
         registrar_log('pinbank.cargas_pinbank', f"Iniciando trazExtratoPeriodo, período {data_inicial} a {data_final}")
 
-        total_transacoes = 0
-
-        # Buscar apenas credenciais ativas
-        credenciais = CredenciaisExtratoContaPinbank.objects.filter(ativo=1)
-
-        for credencial in credenciais:
-            try:
-                registrar_log('pinbank.cargas_pinbank', f"Processando estabelecimento - username: {credencial.username}, canal: {credencial.canal}, codigo_cliente: {credencial.codigo_cliente}")
-
-                # Validar dados obrigatórios
-                if not all([credencial.username, credencial.keyvalue,
-                           credencial.canal, credencial.codigo_cliente]):
-                    registrar_log('pinbank.cargas_pinbank', "Dados incompletos para este registro, pulando.")
-                    continue
-
-                # Montar payload de consulta - LIMITADO A 100000 LINHAS PARA TESTE
-                quantidade_linhas = 100000
-                dados_requisicao = {
-                    "Data": {
-                        "CodigoCanal": credencial.canal,
-                        "CodigoCliente": credencial.codigo_cliente,
-                        "DataInicial": data_inicial,
-                        "DataFinal": data_final,
-                        "Status": "Todos",
-                        "MeioCaptura": "Todos",
-                        "QuantidadeLinhasRetorno": quantidade_linhas
-                    }
-                }
+        credenciais = self._credenciais()
+        if not credenciais:
+            return 0
 
-                # Log simplificado (apenas para arquivo via log_control)
-                registrar_log('pinbank.cargas_pinbank', f"Requisição: {credencial.username} | Canal: {credencial.canal} | Cliente: {credencial.codigo_cliente} | Período: {data_inicial} a {data_final}")
-
-                # Fazer requisição para API Pinbank
-                try:
-                    registros = self.pinbank_service.consultar_extrato_pos_encrypted(
-                        username=credencial.username,
-                        password=credencial.keyvalue,
-                        dados=dados_requisicao
-                    )
-
-                    if not isinstance(registros, list):
-                        # Verificar se é "Sem resultado"
-                        if (hasattr(registros, 'ResultCode') and registros.ResultCode == 1 and
-                            hasattr(registros, 'Message') and registros.Message == 'Sem resultado.'):
-                            registrar_log('pinbank.cargas_pinbank', "Sem resultado para este período/estabelecimento")
-                            registros = []
-                        else:
-                            raise Exception("Formato de resposta inesperado da API: não é um array")
-
-                    registrar_log('pinbank.cargas_pinbank', f"Registros decodificados com sucesso. Total: {len(registros)}")
-
-                except Exception as e:
-                    if '"Message": "Sem resultado."' in str(e):
-                        registrar_log('pinbank.cargas_pinbank', "Sem resultado para este período/estabelecimento")
-                        registros = []
-                    else:
-                        registrar_log('pinbank.cargas_pinbank', f"Erro ao processar resposta - {str(e)}", nivel='ERROR')
-                        raise Exception(f"Erro ao processar resposta da API: {str(e)}")
-
-                # Contar transações processadas
-                total_transacoes += len(registros)
-
-                # Processar registros em lotes de 100 para commit
-                BATCH_SIZE = 100
-                for i in range(0, len(registros), BATCH_SIZE):
-                    lote = registros[i:i+BATCH_SIZE]
-                    registrar_log('pinbank.cargas_pinbank', f"Processando lote {i//BATCH_SIZE + 1}: registros {i+1} a {min(i+BATCH_SIZE, len(registros))} de {len(registros)}")
-
-                    with transaction.atomic():
-                        for dados in lote:
-                            self._processar_registro_extrato(dados, credencial.codigo_cliente)
-
-                    registrar_log('pinbank.cargas_pinbank', f"Lote {i//BATCH_SIZE + 1} commitado com sucesso ({len(lote)} registros)")
-
-            except Exception as e:
-                registrar_log('pinbank.cargas_pinbank', f"Erro crítico (trazExtratoPeriodo): {str(e)}", nivel='ERROR')
-                continue
+        # Token aquecido no cache antes de abrir as threads (uma geração só)
+        try:
+            self.pinbank_service.obter_token()
+        except Exception as e:
+            registrar_log('pinbank.cargas_pinbank', f"Erro ao obter token Pinbank: {str(e)}", nivel='ERROR')
 
+        total_transacoes = 0
+        workers = max(1, min(self.MAX_WORKERS, len(credenciais)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='extrato_pos') as executor:
+            futuros = [
+                executor.submit(self._carregar_credencial, credencial, data_inicial, data_final)
+                for credencial in credenciais
+            ]
+            for futuro in as_completed(futuros):
+                total_transacoes += futuro.result()
+
+        registrar_log('pinbank.cargas_pinbank', f"trazExtratoPeriodo concluído: {total_transacoes} transações, {len(credenciais)} credenciais")
         return total_transacoes
 
-    def _processar_registro_extrato(self, dados: Dict, codigo_cliente: int):
+    def _credenciais(self) -> List[CredenciaisExtratoContaPinbank]:
+        """Credenciais ativas com todos os dados obrigatórios"""
+        credenciais = []
+        for credencial in CredenciaisExtratoContaPinbank.objects.filter(ativo=1):
+            if not all([credencial.username, credencial.keyvalue,
+                        credencial.canal, credencial.codigo_cliente]):
+                registrar_log('pinbank.cargas_pinbank', f"Dados incompletos para a credencial {credencial.id}, pulando.")
+                continue
+            credenciais.append(credencial)
+        return credenciais
+
+    def _aguardar_limite(self, credencial: CredenciaisExtratoContaPinbank):
+        """Bloqueia até a credencial ter cota de requisição na Pinbank"""
+        while True:
+            resultado = LimitadorJanelaDeslizante.verificar(
+                f"pinbank:extrato:{credencial.username}", self.LIMITES_CREDENCIAL
+            )
+            if resultado.permitido:
+                return
+            registrar_log('pinbank.cargas_pinbank', f"Limite de requisições da credencial {credencial.username}, aguardando {resultado.retry_after}s")
+            time.sleep(resultado.retry_after)
+
+    def _carregar_credencial(self, credencial: CredenciaisExtratoContaPinbank,
+                             data_inicial: str, data_final: str) -> int:
         """
-        Processa um registro individual do extrato
-        Faz INSERT ou UPDATE conforme necessário
+        Consulta o período de uma credencial e grava em lotes (executa numa thread do pool)
+
+        Returns:
+            int: Transações recebidas (erros são registrados e não interrompem as demais credenciais)
         """
+        recebidas = 0
         try:
-            nsu_operacao = dados['NsuOperacao']
-            numero_parcela = dados['NumeroParcela']
-
-            # Verificar se registro já existe
-            registro_existente = self.modelo_tabela.objects.filter(
-                NsuOperacao=nsu_operacao,
-                NumeroParcela=numero_parcela
-            ).first()
-
-            if not registro_existente:
-                # Log detalhado do NSU sendo inserido
-                nsu = dados.get('NsuOperacao')
-                status_pag = dados.get('DescricaoStatusPagamento')
-                id_status_pag = dados.get('IdStatusPagamento')
-                registrar_log('pinbank.cargas_pinbank', f"Inserindo NSU {nsu} - Status: {status_pag} (ID: {id_status_pag})")
-
-                # Usar SQL direto para INSERT - omitir campo id (AUTO_INCREMENT)
-                with connection.cursor() as cursor:
-                    cursor.execute(f"""
-                        INSERT INTO wallclub.pinbankExtratoPOS (
-                            codigo_cliente, IdTerminal, SerialNumber, Terminal, Bandeira, TipoCompra, DadosExtra,
-                            CpfCnpjComprador, NomeRazaoSocialComprador, NumeroParcela, NumeroTotalParcelas,
-                            DataTransacao, DataFuturaPagamento, CodAutorizAdquirente, NsuOperacao,
-                            NsuOperacaoLoja, ValorBruto, ValorBrutoParcela, ValorLiquidoRepasse,
-                            ValorSplit, IdStatus, DescricaoStatus, IdStatusPagamento,
-                            DescricaoStatusPagamento, ValorTaxaAdm, ValorTaxaMes, NumeroCartao,
-                            DataCancelamento, Submerchant, Lido
-                        ) VALUES (
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                        )
-                    """, [
-                        codigo_cliente,  # codigo_cliente
-                        dados.get('IdTerminal'),  # IdTerminal
-                        dados.get('SerialNumber'),  # SerialNumber
-                        dados.get('Terminal'),  # Terminal
-                        dados.get('Bandeira'),  # Bandeira
-                        dados.get('TipoCompra'),  # TipoCompra
-                        dados.get('DadosExtra'),  # DadosExtra
-                        dados.get('CpfCnpjComprador'),  # CpfCnpjComprador
-                        dados.get('NomeRazaoSocialComprador'),  # NomeRazaoSocialComprador
-                        dados.get('NumeroParcela'),  # NumeroParcela
-                        dados.get('NumeroTotalParcelas'),  # NumeroTotalParcelas
-                        dados.get('DataTransacao'),  # DataTransacao
-                        dados.get('DataFuturaPagamento'),  # DataFuturaPagamento
-                        dados.get('CodAutorizAdquirente'),  # CodAutorizAdquirente
-                        dados.get('NsuOperacao'),  # NsuOperacao
-                        dados.get('NsuOperacaoLoja'),  # NsuOperacaoLoja
-                        dados.get('ValorBruto'),  # ValorBruto
-                        dados.get('ValorBrutoParcela'),  # ValorBrutoParcela
-                        dados.get('ValorLiquidoRepasse'),  # ValorLiquidoRepasse
-                        dados.get('ValorSplit'),  # ValorSplit
-                        dados.get('IdStatus'),  # IdStatus
-                        dados.get('DescricaoStatus'),  # DescricaoStatus
-                        dados.get('IdStatusPagamento'),  # IdStatusPagamento
-                        dados.get('DescricaoStatusPagamento'),  # DescricaoStatusPagamento
-                        dados.get('ValorTaxaAdm'),  # ValorTaxaAdm
-                        dados.get('ValorTaxaMes'),  # ValorTaxaMes
-                        dados.get('NumeroCartao'),  # NumeroCartao
-                        dados.get('DataCancelamento'),  # DataCancelamento
-                        dados.get('Submerchant'),  # Submerchant
-                        0  # Lido = 0 (novo registro não processado)
-                    ])
-
-            else:
-                # Registro existe, verificar apenas campos que podem mudar
-                campos_alterados = {}
-
-                # Verificar apenas os 8 campos que podem mudar conforme especificação
-                campos_verificar = {
-                    'DadosExtra': dados.get('DadosExtra'),
-                    'DataFuturaPagamento': dados.get('DataFuturaPagamento'),
-                    'CodAutorizAdquirente': dados.get('CodAutorizAdquirente'),
-                    'IdStatus': dados.get('IdStatus'),
-                    'DescricaoStatus': dados.get('DescricaoStatus'),
-                    'IdStatusPagamento': dados.get('IdStatusPagamento'),
-                    'DescricaoStatusPagamento': dados.get('DescricaoStatusPagamento'),
-                    'DataCancelamento': dados.get('DataCancelamento')
+            registrar_log('pinbank.cargas_pinbank', f"Processando estabelecimento - username: {credencial.username}, canal: {credencial.canal}, codigo_cliente: {credencial.codigo_cliente}")
+
+            dados_requisicao = {
+                "Data": {
+                    "CodigoCanal": credencial.canal,
+                    "CodigoCliente": credencial.codigo_cliente,
+                    "DataInicial": data_inicial,
+                    "DataFinal": data_final,
+                    "Status": "Todos",
+                    "MeioCaptura": "Todos",
+                    "QuantidadeLinhasRetorno": 100000
                 }
+            }
+
+            self._aguardar_limite(credencial)
+            registros = self.pinbank_service.consultar_extrato_pos_stream(
+                username=credencial.username,
+                password=credencial.keyvalue,
+                dados=dados_requisicao
+            )
+
+            lote = []
+            for dados in registros:
+                lote.append(dados)
+                if len(lote) >= self.TAMANHO_LOTE:
+                    self._gravar_lote(lote, credencial.codigo_cliente)
+                    recebidas += len(lote)
+                    lote = []
+            if lote:
+                self._gravar_lote(lote, credencial.codigo_cliente)
+                recebidas += len(lote)
+
+            registrar_log('pinbank.cargas_pinbank', f"Credencial {credencial.username}: {recebidas} registros gravados")
 
-                # Verificar se algum campo relevante mudou
-                campos_mudaram = False
-                for campo, novo_valor in campos_verificar.items():
-                    valor_atual = getattr(registro_existente, campo)
-                    if str(valor_atual) != str(novo_valor):
-                        campos_alterados[campo] = novo_valor
-                        campos_mudaram = True
-
-                # Se algum campo mudou, setar Lido = 0 e processado = 0 para reprocessamento
-                if campos_mudaram:
-                    campos_alterados['Lido'] = 0
-                    campos_alterados['processado'] = 0
-
-                    # Log detalhado do NSU sendo atualizado
-                    nsu = dados.get('NsuOperacao')
-                    status_pag_novo = dados.get('DescricaoStatusPagamento')
-                    id_status_pag_novo = dados.get('IdStatusPagamento')
-                    registrar_log('pinbank.cargas_pinbank', f"Atualizando NSU {nsu} - Novo Status: {status_pag_novo} (ID: {id_status_pag_novo})")
-
-                # Atualizar se houver campos alterados
-                if campos_alterados:
-                    for campo, valor in campos_alterados.items():
-                        setattr(registro_existente, campo, valor)
-                    registro_existente.save()
         except Exception as e:
-            raise
+            registrar_log('pinbank.cargas_pinbank', f"Erro crítico (trazExtratoPeriodo) credencial {credencial.username}: {str(e)}", nivel='ERROR')
+        finally:
+            # Conexão do banco é por thread: não deixar aberta com o pool encerrado
+            connection.close()
+
+        return recebidas
+
+    def _gravar_lote(self, lote: List[Dict], codigo_cliente) -> int:
+        """
+        Grava um lote em um único INSERT ... ON DUPLICATE KEY UPDATE (autocommit:
+        lote atômico). Novos registros entram com Lido = 0; existentes só têm os
+        campos mutáveis atualizados e voltam para Lido = 0 / processado = 0 se algum mudou.
+
+        Returns:
+            int: Linhas afetadas (1 por inserção, 2 por atualização)
+        """
+        parametros = []
+        for dados in lote:
+            parametros.append(codigo_cliente)
+            parametros.extend(dados.get(coluna) for coluna in COLUNAS_EXTRATO)
+            parametros.append(0)
+
+        with connection.cursor() as cursor:
+            cursor.execute(_sql_upsert(len(lote)), parametros)
+            afetadas = cursor.rowcount
+
+        with self._lock_nsus:
+            self.nsus_gravados.update(str(dados['NsuOperacao']) for dados in lote if dados.get('NsuOperacao'))
+        return afetadas
 
     def buscar_ultimo_ano(self) -> int:
         """Busca transações do último ano"""
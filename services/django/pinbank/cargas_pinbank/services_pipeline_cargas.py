@@ -0,0 +1,177 @@
+"""
+Pipeline das cargas Pinbank executado no próprio worker Celery (sem subprocess
+nem novo boot do Django).
+
+Etapas: extrato POS → ajustes manuais → base unificada (POS, Credenciadora,
+Checkout). A etapa de extrato entrega os NSUs gravados às seguintes, que
+consultam só esses (NsuOperacao IN ...) em vez de varrer processado = 0.
+
+Modos:
+- completo: janela de 80 minutos, varredura do backlog (processado = 0, limite
+  por tipo) e atualização de cancelamentos - execução de 30 em 30 minutos
+- micro: janela curta (PINBANK_MICRO_LOTE_JANELA_MIN) e só os NSUs entregues
+  pelo extrato - transações chegam aos portais em minutos
+
+Execuções nunca se sobrepõem: lease no Redis (token com TTL, renovado a cada
+etapa). Tempo de cada etapa e profundidade do backlog vão para o log e para o
+retorno da task.
+"""
+
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from wallclub_core.utilitarios.log_control import registrar_log
+
+FORMATO_DATA_API = '%Y-%m-%dT%H:%M:%S.000Z'
+
+
+def clausula_nsus(nsus: Optional[Iterable], coluna: str) -> str:
+    """
+    Filtro "AND coluna IN (...)" que restringe as consultas das cargas aos NSUs
+    entregues pela etapa anterior. None = sem filtro; vazio = nenhum registro.
+    NsuOperacao é numérico: valores não numéricos são descartados (vão literais no SQL).
+    """
+    if nsus is None:
+        return ""
+    valores = sorted({str(nsu) for nsu in nsus if str(nsu).isdigit()}, key=int)
+    if not valores:
+        return "AND 1 = 0"
+    return f"AND {coluna} IN ({','.join(valores)})"
+
+
+class PipelineCargasPinbankService:
+    """
+    Orquestra as cargas Pinbank em processo, com lease exclusivo no Redis
+    """
+
+    CHAVE_LEASE = 'pinbank:cargas:lease'
+    # TTL do lease por modo (>= time_limit da task: worker morto libera sozinho)
+    LEASE_TTL = {'completo': 2400, 'micro': 600}
+
+    JANELA_COMPLETO_MIN = 80
+    JANELA_MICRO_MIN = getattr(settings, 'PINBANK_MICRO_LOTE_JANELA_MIN', 15)
+    LIMITE_COMPLETO = 5000
+
+    @classmethod
+    def executar(cls, modo: str = 'completo') -> Dict[str, Any]:
+        """
+        Executa o pipeline, se nenhum outro estiver em andamento
+
+        Args:
+            modo: 'completo' ou 'micro'
+
+        Returns:
+            dict: status, tempos por etapa (s), registros por etapa e backlog
+        """
+        if modo not in cls.LEASE_TTL:
+            raise ValueError(f"Modo inválido: {modo}")
+
+        token = uuid.uuid4().hex
+        if not cache.add(cls.CHAVE_LEASE, token, timeout=cls.LEASE_TTL[modo]):
+            registrar_log('pinbank.cargas_pinbank', f"Pipeline {modo}: outra execução em andamento, ignorando", nivel='WARNING')
+            return {'status': 'ignorado', 'modo': modo}
+
+        resultado = {'status': 'sucesso', 'modo': modo, 'etapas': {}, 'registros': {}}
+        inicio_total = time.perf_counter()
+        try:
+            cls._executar_etapas(modo, token, resultado)
+        except Exception as e:
+            resultado['status'] = 'erro'
+            registrar_log('pinbank.cargas_pinbank', f"❌ Pipeline {modo} interrompido: {str(e)}", nivel='ERROR')
+            raise
+        finally:
+            cls._liberar(token)
+            resultado['duracao'] = round(time.perf_counter() - inicio_total, 2)
+            registrar_log('pinbank.cargas_pinbank',
+                          f"Pipeline {modo} {resultado['status']} em {resultado['duracao']}s - "
+                          f"etapas: {resultado['etapas']} - registros: {resultado['registros']} - "
+                          f"backlog: {resultado.get('backlog')}")
+
+        return resultado
+
+    @classmethod
+    def _executar_etapas(cls, modo: str, token: str, resultado: Dict[str, Any]):
+        from .services_ajustes_manuais import AjustesManuaisService
+        from .services_carga_base_unificada_checkout import CargaBaseUnificadaCheckoutService
+        from .services_carga_base_unificada_credenciadora import CargaBaseUnificadaCredenciadoraService
+        from .services_carga_base_unificada_pos import CargaBaseUnificadaPOSService
+        from .services_carga_extrato_pos import CargaExtratoPOSService
+
+        micro = modo == 'micro'
+        registros = resultado['registros']
+
+        # 1. Extrato: janela recente da API; guarda os NSUs gravados
+        fim = datetime.now()
+        inicio = fim - timedelta(minutes=cls.JANELA_MICRO_MIN if micro else cls.JANELA_COMPLETO_MIN)
+        extrato = CargaExtratoPOSService()
+        with cls._etapa(resultado, 'extrato', token):
+            registros['extrato'] = extrato.traz_extrato_periodo(
+                inicio.strftime(FORMATO_DATA_API), fim.strftime(FORMATO_DATA_API)
+            )
+        registros['nsus_extrato'] = len(extrato.nsus_gravados)
+
+        # Micro: etapas seguintes só nos NSUs entregues; completo: backlog inteiro
+        escopo = extrato.nsus_gravados if micro else None
+        if micro and not escopo:
+            resultado['backlog'] = 0
+            return
+
+        # 2. Ajustes: transactiondata_pos faltante (antes da base para o NSU já sair como POS)
+        with cls._etapa(resultado, 'ajustes', token):
+            registros['ajustes'] = AjustesManuaisService.ajustes_manuais_base(nsus=escopo)['inseridos_transactiondata']
+
+        # 3. Base unificada
+        limite = None if micro else cls.LIMITE_COMPLETO
+        for nome, servico in (('base_pos', CargaBaseUnificadaPOSService),
+                              ('base_credenciadora', CargaBaseUnificadaCredenciadoraService),
+                              ('base_checkout', CargaBaseUnificadaCheckoutService)):
+            with cls._etapa(resultado, nome, token):
+                carga = servico()
+                registros[nome] = carga.carregar_valores_primarios(limite=limite, nsus=escopo)
+                if nome == 'base_credenciadora' and not micro:
+                    registros['cancelamentos'] = carga.atualizar_cancelamentos()
+
+        resultado['backlog'] = cls._backlog(escopo)
+
+    @classmethod
+    @contextmanager
+    def _etapa(cls, resultado: Dict[str, Any], nome: str, token: str):
+        """Renova o lease e mede a etapa (registra o tempo mesmo se falhar)"""
+        cls._renovar(token, resultado['modo'])
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            resultado['etapas'][nome] = round(duracao, 2)
+            registrar_log('pinbank.cargas_pinbank', f"Pipeline {resultado['modo']}: etapa {nome} em {duracao:.2f}s")
+
+    @classmethod
+    def _renovar(cls, token: str, modo: str):
+        """Estende o lease; se expirou (ou outra execução assumiu), interrompe"""
+        if cache.get(cls.CHAVE_LEASE) != token or not cache.touch(cls.CHAVE_LEASE, cls.LEASE_TTL[modo]):
+            raise RuntimeError("Lease das cargas Pinbank perdido (execução excedeu o TTL)")
+
+    @classmethod
+    def _liberar(cls, token: str):
+        if cache.get(cls.CHAVE_LEASE) == token:
+            cache.delete(cls.CHAVE_LEASE)
+
+    @staticmethod
+    def _backlog(nsus: Optional[Iterable]) -> int:
+        """NSUs ainda com processado = 0 (do escopo entregue, ou do extrato inteiro)"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT COUNT(DISTINCT NsuOperacao)
+                FROM wallclub.pinbankExtratoPOS
+                WHERE processado = 0
+                {clausula_nsus(nsus, 'NsuOperacao')}
+            """)
+            return cursor.fetchone()[0]
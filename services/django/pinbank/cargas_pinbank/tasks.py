@@ -30,31 +30,23 @@ def carga_extrato_pos_task(self, periodo='80min'):
 @shared_task(bind=True, name='pinbank.cargas_completas', soft_time_limit=1800, time_limit=2400)
 def cargas_completas_task(self):
     """
-    Task que executa o script executar_cargas_completas.py
+    Task que executa o pipeline completo (extrato 80min → ajustes → base unificada)
+    no próprio worker
     """
-    import subprocess
-    import sys
+    from pinbank.cargas_pinbank.services_pipeline_cargas import PipelineCargasPinbankService
 
-    try:
-        logger.info(f"[{datetime.now()}] 🚀 Executando script de cargas completas")
-
-        # Executar script Python
-        result = subprocess.run(
-            [sys.executable, '/app/pinbank/cargas_pinbank/executar_cargas_completas.py'],
-            capture_output=True,
-            text=True,
-            cwd='/app'
-        )
-
-        if result.returncode == 0:
-            logger.info(f"[{datetime.now()}] 🎉 Script executado com sucesso")
-            logger.info(result.stdout)
-            return {'status': 'success', 'output': result.stdout}
-        else:
-            logger.error(f"[{datetime.now()}] ❌ Erro ao executar script")
-            logger.error(result.stderr)
-            raise Exception(f"Script falhou: {result.stderr}")
+    logger.info(f"[{datetime.now()}] 🚀 Executando pipeline de cargas completas")
+    resultado = PipelineCargasPinbankService.executar('completo')
+    logger.info(f"[{datetime.now()}] Pipeline de cargas completas: {resultado}")
+    return resultado
 
-    except Exception as e:
-        logger.error(f"[{datetime.now()}] ⚠️ Erro nas cargas completas: {str(e)}")
-        raise
+
+@shared_task(bind=True, name='pinbank.cargas_micro_lote', soft_time_limit=540, time_limit=600)
+def cargas_micro_lote_task(self):
+    """
+    Task de micro-lote: extrato da janela curta e base unificada só dos NSUs
+    recebidos (ignorada se outra carga estiver em andamento)
+    """
+    from pinbank.cargas_pinbank.services_pipeline_cargas import PipelineCargasPinbankService
+
+    return PipelineCargasPinbankService.executar('micro')
@@ -0,0 +1,106 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from apps.cashback.models import CashbackUso
+from apps.cliente.models import Cliente
+from apps.conta_digital.models import ContaDigital, MovimentacaoContaDigital, TipoMovimentacao
+from pinbank.cargas_pinbank.services_carga_base_unificada_credenciadora import CargaBaseUnificadaCredenciadoraService
+from posp2.models import TransactionDataPos
+
+NSU_CANCELADO = 51000001
+NSU_LEGADO = 51000002
+NSU_ATIVO = 51000003
+
+
+class EstornoCashbackCanceladosTest(TransactionTestCase):
+    """
+    Estorno de cashback da varredura de cancelamentos: cashback_uso é chaveado
+    pelo id de transactiondata_pos (fluxo atual) ou pelo NSU (fluxo legado)
+    """
+
+    def setUp(self):
+        # transactiondata_pos não é gerenciada pelo Django
+        with connection.schema_editor() as editor:
+            editor.create_model(TransactionDataPos)
+        self.addCleanup(self._remover_transactiondata_pos)
+
+        self.cliente = Cliente.objects.create(cpf='12345678909', canal_id=1, hash_senha='x', nome='Cliente', celular='11999999999')
+        self.outro = Cliente.objects.create(cpf='98765432100', canal_id=1, hash_senha='x', nome='Outro', celular='11888888888')
+        self.conta = ContaDigital.objects.create(cliente_id=self.cliente.id, canal_id=1, cpf=self.cliente.cpf,
+                                                 cashback_bloqueado=Decimal('30.00'))
+        self.conta_outro = ContaDigital.objects.create(cliente_id=self.outro.id, canal_id=1, cpf=self.outro.cpf,
+                                                       cashback_bloqueado=Decimal('7.00'))
+
+        self.venda = self._venda(NSU_CANCELADO, '123.456.789-09')
+        self.venda_legado = self._venda(NSU_LEGADO, '12345678909')
+        self.venda_ativa = self._venda(NSU_ATIVO, '98765432100')
+
+    def _remover_transactiondata_pos(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(TransactionDataPos)
+
+    @staticmethod
+    def _venda(nsu, cpf):
+        return TransactionDataPos.objects.create(gateway='PINBANK', datahora=datetime(2026, 10, 19, 10), cpf=cpf,
+                                                 valor_original=Decimal('100.00'), terminal='T1', nsu_gateway=str(nsu))
+
+    @staticmethod
+    def _uso(cliente, transacao_id, valor):
+        return CashbackUso.objects.create(tipo_origem='WALL', cliente_id=cliente.id, loja_id=1, canal_id=1,
+                                          transacao_tipo='POS', transacao_id=transacao_id,
+                                          valor_transacao=Decimal('100.00'), valor_cashback=Decimal(valor))
+
+    def test_estorna_pelo_id_da_venda_e_pelo_nsu_legado(self):
+        atual = self._uso(self.cliente, self.venda.id, '10.00')
+        legado = self._uso(self.cliente, NSU_LEGADO, '5.00')
+        # Venda não cancelada cujo id coincide com o NSU cancelado: não pode ser estornada
+        TransactionDataPos.objects.filter(id=self.venda_ativa.id).update(id=NSU_CANCELADO)
+        colisao = self._uso(self.outro, NSU_CANCELADO, '7.00')
+        # NSU cancelado usado como transacao_id por outro cliente
+        outro_cliente = self._uso(self.outro, NSU_LEGADO, '3.00')
+
+        with mock.patch('apps.conta_digital.services.ContaDigitalService.estornar_cashback_transacao_pos') as posp2:
+            estornos, falhas = CargaBaseUnificadaCredenciadoraService._estornar_cashback_cancelados([NSU_CANCELADO, NSU_LEGADO])
+
+        self.assertEqual((estornos, falhas), (2, {}))
+        posp2.assert_not_called()
+        status = dict(CashbackUso.objects.values_list('id', 'status'))
+        self.assertEqual(status[atual.id], 'ESTORNADO')
+        self.assertEqual(status[legado.id], 'ESTORNADO')
+        self.assertEqual(status[colisao.id], 'RETIDO')
+        self.assertEqual(status[outro_cliente.id], 'RETIDO')
+
+        self.conta.refresh_from_db()
+        self.conta_outro.refresh_from_db()
+        self.assertEqual(self.conta.cashback_bloqueado, Decimal('15.00'))
+        self.assertEqual(self.conta_outro.cashback_bloqueado, Decimal('7.00'))
+
+        # Já estornado: nova varredura não movimenta de novo
+        with mock.patch('apps.conta_digital.services.ContaDigitalService.estornar_cashback_transacao_pos'):
+            self.assertEqual(CargaBaseUnificadaCredenciadoraService._estornar_cashback_cancelados([NSU_CANCELADO, NSU_LEGADO]), (0, {}))
+
+    def test_credito_posp2_pelo_nsu(self):
+        tipo = TipoMovimentacao.objects.create(codigo='CASHBACK_CREDITO', nome='Cashback', descricao='Cashback')
+        MovimentacaoContaDigital.objects.create(
+            conta_digital=self.conta, tipo_movimentacao=tipo, saldo_anterior=0, saldo_posterior=Decimal('4.00'),
+            valor=Decimal('4.00'), descricao='Cashback', referencia_externa=str(NSU_CANCELADO),
+            sistema_origem='POSP2', status='PROCESSADA'
+        )
+
+        with mock.patch('apps.conta_digital.services.ContaDigitalService.estornar_cashback_transacao_pos',
+                        return_value={'sucesso': True}) as posp2:
+            estornos, falhas = CargaBaseUnificadaCredenciadoraService._estornar_cashback_cancelados([NSU_CANCELADO, NSU_ATIVO])
+
+        self.assertEqual((estornos, falhas), (1, {}))
+        posp2.assert_called_once_with(str(NSU_CANCELADO))
+
+        # Estorno recusado: NSU volta como falha (fica pendente para a próxima varredura)
+        with mock.patch('apps.conta_digital.services.ContaDigitalService.estornar_cashback_transacao_pos',
+                        return_value={'sucesso': False, 'mensagem': 'Erro ao estornar'}):
+            estornos, falhas = CargaBaseUnificadaCredenciadoraService._estornar_cashback_cancelados([NSU_CANCELADO])
+
+        self.assertEqual((estornos, falhas), (0, {str(NSU_CANCELADO): 'Erro ao estornar'}))
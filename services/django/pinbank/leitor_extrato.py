@@ -0,0 +1,190 @@
+"""
+Leitura em fluxo da resposta criptografada do ExtratoPosEncrypted.
+
+Envelope {"Data":{"Json":"<base64>"}} -> base64 -> AES-128-CBC -> UTF-8 -> itens
+do array de transações, entregues um a um enquanto o corpo é baixado. A memória
+fica limitada a um bloco de leitura + um registro, independente de
+QuantidadeLinhasRetorno (o fluxo anterior mantinha corpo, base64, texto
+decifrado e a lista completa ao mesmo tempo).
+"""
+import base64
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import unpad
+
+# Início do conteúdo criptografado no envelope (mesmas chaves aceitas por descriptografar_payload)
+_INICIO_CONTEUDO = re.compile(rb'"(?:Json|DataCriptografada)"\s*:\s*"')
+_ESPACOS = ' \t\r\n'
+
+
+def chave_aes(senha: str) -> bytes:
+    """Senha da credencial completada/truncada para 16 bytes (AES-128)"""
+    return senha.encode('utf-8')[:16].ljust(16, b'\x00')
+
+
+class LeitorExtratoCriptografado:
+    """
+    Iterador dos registros do extrato.
+
+    Após a iteração:
+        recebeu_lista: a resposta trouxe o array de transações
+        metadados: demais campos do JSON decifrado (ResultCode, Message, ...)
+    """
+
+    def __init__(self, blocos: Iterable[bytes], senha: str):
+        self.blocos = blocos
+        self.senha = senha
+        self.recebeu_lista = False
+        self.metadados: Dict[str, Any] = {}
+
+    def __iter__(self) -> Iterator[Dict]:
+        textos = self._texto(self._texto_claro(self._base64(self.blocos)))
+        return self._registros(textos)
+
+    # ------------------------------------------------------------------
+    # Envelope -> base64 -> AES -> UTF-8
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _base64(blocos: Iterable[bytes]) -> Iterator[bytes]:
+        blocos = iter(blocos)
+        inicio = b''
+        for bloco in blocos:
+            inicio += bloco
+            encontrado = _INICIO_CONTEUDO.search(inicio)
+            if encontrado:
+                restante = inicio[encontrado.end():]
+                break
+        else:
+            raise Exception(f"Estrutura JSON não contém chave Json ou DataCriptografada. Estrutura: {inicio[:500]!r}")
+
+        while True:
+            fim = restante.find(b'"')
+            # Base64 não tem barra invertida: só aparece no escape "\/"
+            if fim >= 0:
+                yield restante[:fim].replace(b'\\', b'')
+                return
+            yield restante.replace(b'\\', b'')
+            restante = next(blocos, None)
+            if restante is None:
+                raise Exception("Conteúdo criptografado truncado na resposta")
+
+    def _texto_claro(self, partes_base64: Iterator[bytes]) -> Iterator[bytes]:
+        cifra = AES.new(chave_aes(self.senha), AES.MODE_CBC, b'\x00' * 16)
+        pendente_base64 = b''
+        pendente_cifrado = b''
+        for parte in partes_base64:
+            pendente_base64 += parte
+            corte = len(pendente_base64) - len(pendente_base64) % 4
+            if not corte:
+                continue
+            pendente_cifrado += base64.b64decode(pendente_base64[:corte])
+            pendente_base64 = pendente_base64[corte:]
+            # Último bloco retido: o padding só é removido no final
+            corte = (len(pendente_cifrado) - 1) // AES.block_size * AES.block_size
+            if corte > 0:
+                yield cifra.decrypt(pendente_cifrado[:corte])
+                pendente_cifrado = pendente_cifrado[corte:]
+
+        if pendente_base64:
+            pendente_cifrado += base64.b64decode(pendente_base64)
+        if not pendente_cifrado or len(pendente_cifrado) % AES.block_size:
+            raise Exception("Falha ao descriptografar o conteúdo: tamanho inválido")
+        yield unpad(cifra.decrypt(pendente_cifrado), AES.block_size)
+
+    @staticmethod
+    def _texto(partes: Iterator[bytes]) -> Iterator[str]:
+        decodificador = codecs.getincrementaldecoder('utf-8')()
+        for parte in partes:
+            texto = decodificador.decode(parte)
+            if texto:
+                yield texto
+        decodificador.decode(b'', final=True)
+
+    # ------------------------------------------------------------------
+    # JSON incremental
+    # ------------------------------------------------------------------
+
+    def _registros(self, textos: Iterator[str]) -> Iterator[Dict]:
+        decodificador = json.JSONDecoder()
+        buffer = ''
+        pos = 0
+
+        def carregar() -> bool:
+            nonlocal buffer, pos
+            texto = next(textos, None)
+            if texto is None:
+                return False
+            buffer = buffer[pos:] + texto
+            pos = 0
+            return True
+
+        def proximo_caractere() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _ESPACOS:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not carregar():
+                    return ''
+
+        def valor():
+            nonlocal pos
+            while True:
+                try:
+                    objeto, fim = decodificador.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if not carregar():
+                        raise
+                    continue
+                # Valor encostado no fim do buffer pode estar incompleto (ex: número)
+                if fim < len(buffer) or not carregar():
+                    pos = fim
+                    return objeto
+
+        def itens():
+            nonlocal pos
+            pos += 1  # [
+            self.recebeu_lista = True
+            while True:
+                caractere = proximo_caractere()
+                if caractere == ']':
+                    pos += 1
+                    return
+                if caractere == ',':
+                    pos += 1
+                    continue
+                if not caractere:
+                    raise Exception("Erro ao decodificar JSON descriptografado: array truncado")
+                yield valor()
+
+        caractere = proximo_caractere()
+        if caractere == '[':
+            yield from itens()
+            return
+        if caractere != '{':
+            raise Exception("Erro ao decodificar JSON descriptografado: formato inesperado")
+
+        pos += 1
+        while True:
+            caractere = proximo_caractere()
+            if caractere == '}':
+                return
+            if caractere == ',':
+                pos += 1
+                continue
+            if not caractere:
+                raise Exception("Erro ao decodificar JSON descriptografado: objeto truncado")
+            chave = valor()
+            proximo_caractere()
+            pos += 1  # :
+            caractere = proximo_caractere()
+            if chave in ('Data', 'data') and caractere == '[':
+                yield from itens()
+            else:
+                self.metadados[chave] = valor()
@@ -3,7 +3,7 @@ Serviços para integração com Pinbank
 Funções relacionadas a transações e dados do Pinbank
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 import requests
 import json
 from datetime import datetime, timedelta
@@ -15,6 +15,7 @@ from Crypto.Util.Padding import pad, unpad
 import base64
 import urllib3
 from wallclub_core.utilitarios.log_control import registrar_log
+from pinbank.leitor_extrato import LeitorExtratoCriptografado
 
 # Desabilitar warnings SSL para Pinbank
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -550,3 +551,61 @@ class PinbankService:
             registrar_log('pinbank', f"Pinbank: {error_msg}", nivel='ERROR')
             raise Exception(error_msg)
 
+
+    def consultar_extrato_pos_stream(self, username: str, password: str, dados: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Mesma consulta de consultar_extrato_pos_encrypted, lendo a resposta em fluxo:
+        registros entregues um a um enquanto o corpo é baixado e descriptografado
+        (memória independente de QuantidadeLinhasRetorno).
+
+        "Sem resultado." não gera registros.
+
+        Raises:
+            Exception: Erro HTTP, de descriptografia ou ResultCode de erro da API
+        """
+        registrar_log('pinbank', f"Pinbank: Consultando extrato POS (fluxo) para username={username}")
+
+        token_data = self.obter_token()
+
+        temp_service = PinbankService()
+        temp_service.username = username
+        temp_service.password = password
+        payload_criptografado = temp_service.criptografar_payload(dados)
+
+        headers = {
+            'Authorization': f"{token_data['token_type']} {token_data['access_token']}",
+            'UserName': username,
+            'RequestOrigin': '5',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+
+        try:
+            with requests.post(
+                f"{self.base_url}ContaDigital/ExtratoPosEncrypted",
+                data=payload_criptografado,
+                headers=headers,
+                timeout=self.timeout,
+                verify=False,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Erro ao consultar extrato: Erro HTTP {response.status_code}: {response.text}")
+
+                leitor = LeitorExtratoCriptografado(response.iter_content(chunk_size=64 * 1024), password)
+                yield from leitor
+        except Exception as e:
+            error_msg = f"Erro ao consultar extrato POS: {str(e)}"
+            registrar_log('pinbank', f"Pinbank: {error_msg}", nivel='ERROR')
+            raise Exception(error_msg)
+
+        if not leitor.recebeu_lista:
+            resposta = leitor.metadados
+            if isinstance(resposta.get('Data'), dict):
+                resposta = resposta['Data']
+            if resposta.get('ResultCode') == 1 and resposta.get('Message') == 'Sem resultado.':
+                registrar_log('pinbank', "Pinbank: Sem resultado para este período/estabelecimento")
+            elif resposta.get('ResultCode') != 0:
+                error_msg = resposta.get('Message', 'Erro desconhecido')
+                registrar_log('pinbank', f"Pinbank: API retornou erro - {error_msg}", nivel='ERROR')
+                raise Exception(f"Erro da API Pinbank: {error_msg}")
@@ -12,6 +12,12 @@ from wallclub_core.utilitarios.log_control import registrar_log
 class TerminaisService:
     """Service para gestão de terminais POS"""
     
+    @staticmethod
+    def _invalidar_contexto_pos(terminal: str):
+        """Descarta loja/canal do terminal em cache no TRData (posp2)"""
+        from posp2.services_contexto import ContextoPOSService
+        ContextoPOSService.invalidar_terminal(terminal)
+    
     @staticmethod
     def listar_terminais(canais_usuario: Optional[List[int]] = None) -> List[Dict[str, Any]]:
         """
@@ -138,6 +144,7 @@ class TerminaisService:
                 terminal_obj.fim = datetime.combine(fim, datetime.min.time())
             
             terminal_obj.save()
+            TerminaisService._invalidar_contexto_pos(terminal)
             
             registrar_log(
                 'portais.admin',
@@ -208,6 +215,7 @@ class TerminaisService:
                 terminal_obj.fim = datetime.combine(fim, datetime.min.time())
             
             terminal_obj.save()
+            TerminaisService._invalidar_contexto_pos(terminal_obj.terminal)
             
             registrar_log(
                 'portais.admin',
@@ -256,6 +264,7 @@ class TerminaisService:
             # Definir data/hora de fim para agora
             terminal_obj.fim = datetime.now()
             terminal_obj.save()
+            TerminaisService._invalidar_contexto_pos(terminal_obj.terminal)
             
             registrar_log(
                 'portais.admin',
@@ -303,6 +312,7 @@ class TerminaisService:
             terminal_obj = Terminal.objects.get(id=terminal_id)
             terminal_info = f"ID: {terminal_obj.id}, Loja: {terminal_obj.loja_id}, Terminal: {terminal_obj.terminal}"
             terminal_obj.delete()
+            TerminaisService._invalidar_contexto_pos(terminal_obj.terminal)
             
             registrar_log(
                 'portais.admin',
@@ -49,6 +49,7 @@ urlpatterns = [
     path('parametros/importar/', views_importacao.importacao_parametros, name='importacao_parametros'),
     path('parametros/processar-csv/', views_importacao.processar_importacao_csv, name='processar_importacao_csv'),
     path('parametros/template/', views_importacao.download_template_csv, name='parametros_template'),
+    path('parametros/importacao/<int:importacao_id>/progresso/', views_importacao.importacao_progresso, name='importacao_progresso'),
 
     # Pagamentos
     path('pagamentos/', views_pagamentos.pagamentos_list, name='pagamentos_list'),  # Carga CSV
@@ -74,6 +75,7 @@ urlpatterns = [
 
     # Hierarquia Organizacional
     path('hierarquia/', views_hierarquia.hierarquia_geral, name='hierarquia_geral'),
+    path('hierarquia/filhos/', views_hierarquia.hierarquia_filhos, name='hierarquia_filhos'),
     path('hierarquia/canal/<int:canal_id>/', views_hierarquia.canal_detail, name='canal_detail'),
     path('hierarquia/canal/<int:canal_id>/comissao/', views_hierarquia.canal_edit_comissao, name='canal_edit_comissao'),
     path('hierarquia/regional/<int:regional_id>/', views_hierarquia.regional_detail, name='regional_detail'),
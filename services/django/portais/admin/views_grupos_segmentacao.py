@@ -1,11 +1,13 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db import connection
+from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef
 from datetime import datetime
 
 from portais.admin.decorators import admin_required
 from django.apps import apps
+from apps.ofertas.services_segmentacao import SegmentacaoService
 from wallclub_core.estr_organizacional.canal import Canal
 from wallclub_core.utilitarios.log_control import registrar_log
 
@@ -15,18 +17,15 @@ def grupos_list(request):
     """Lista todos os grupos de segmentação"""
     try:
         GrupoSegmentacao = apps.get_model('ofertas', 'GrupoSegmentacao')
-        GrupoCliente = apps.get_model('ofertas', 'GrupoCliente')
         
         grupos = GrupoSegmentacao.objects.all().order_by('canal_id', 'nome')
         
-        # Contar clientes por grupo
-        grupos_com_total = []
-        for grupo in grupos:
-            total_clientes = GrupoCliente.objects.filter(grupo_id=grupo.id).count()
-            grupos_com_total.append({
-                'grupo': grupo,
-                'total_clientes': total_clientes
-            })
+        # Contar clientes por grupo (uma query agregada)
+        totais = SegmentacaoService.totais_por_grupo()
+        grupos_com_total = [
+            {'grupo': grupo, 'total_clientes': totais.get(grupo.id, 0)}
+            for grupo in grupos
+        ]
         
         context = {
             'grupos_com_total': grupos_com_total
@@ -150,31 +149,32 @@ def grupos_clientes(request, grupo_id):
             messages.error(request, 'Grupo não encontrado')
             return redirect('portais_admin:grupos_list')
         
-        # Buscar clientes do grupo
-        vinculos = GrupoCliente.objects.filter(grupo_id=grupo_id).order_by('-adicionado_em')
+        # Clientes do grupo paginados; dados dos clientes da página em uma query
+        vinculos = GrupoCliente.objects.filter(grupo_id=grupo_id).order_by('-adicionado_em', '-id')
+        paginator = Paginator(vinculos, 50)
+        page_obj = paginator.get_page(request.GET.get('page'))
         
-        # Buscar dados dos clientes
-        clientes_grupo = []
-        for vinculo in vinculos:
-            cliente = Cliente.objects.filter(id=vinculo.cliente_id).first()
-            if cliente:
-                clientes_grupo.append({
-                    'vinculo': vinculo,
-                    'cliente': cliente
-                })
+        clientes = Cliente.objects.in_bulk([v.cliente_id for v in page_obj])
+        clientes_grupo = [
+            {'vinculo': vinculo, 'cliente': clientes[vinculo.cliente_id]}
+            for vinculo in page_obj
+            if vinculo.cliente_id in clientes
+        ]
         
         # Buscar clientes disponíveis do canal (para adicionar)
-        clientes_no_grupo = [v.cliente_id for v in vinculos]
         clientes_disponiveis = Cliente.objects.filter(
             canal_id=grupo.canal_id,
-            ativo=True
-        ).exclude(id__in=clientes_no_grupo).order_by('nome')[:100]  # Limitar 100
+            is_active=True
+        ).exclude(
+            Exists(GrupoCliente.objects.filter(grupo_id=grupo_id, cliente_id=OuterRef('id')))
+        ).order_by('nome')[:100]  # Limitar 100
         
         context = {
             'grupo': grupo,
             'clientes_grupo': clientes_grupo,
             'clientes_disponiveis': clientes_disponiveis,
-            'total_clientes': len(clientes_grupo)
+            'page_obj': page_obj,
+            'total_clientes': paginator.count
         }
         
         return render(request, 'portais/admin/grupos_segmentacao_clientes.html', context)
@@ -190,26 +190,15 @@ def grupos_adicionar_cliente(request, grupo_id):
     """Adiciona cliente ao grupo (AJAX)"""
     if request.method == 'POST':
         try:
-            GrupoCliente = apps.get_model('ofertas', 'GrupoCliente')
-            
             import json
             data = json.loads(request.body)
             cliente_id = int(data.get('cliente_id'))
             
-            # Verificar se já existe
-            existe = GrupoCliente.objects.filter(grupo_id=grupo_id, cliente_id=cliente_id).first()
-            if existe:
-                return JsonResponse({'sucesso': False, 'mensagem': 'Cliente já está no grupo'}, status=400)
+            sucesso, mensagem = SegmentacaoService.adicionar_cliente(grupo_id, cliente_id)
+            if not sucesso:
+                return JsonResponse({'sucesso': False, 'mensagem': mensagem}, status=400)
             
-            # Adicionar
-            vinculo = GrupoCliente(
-                grupo_id=grupo_id,
-                cliente_id=cliente_id,
-                adicionado_em=datetime.now()
-            )
-            vinculo.save()
-            
-            return JsonResponse({'sucesso': True, 'mensagem': 'Cliente adicionado'})
+            return JsonResponse({'sucesso': True, 'mensagem': mensagem})
             
         except Exception as e:
             registrar_log('portais.admin', f'Erro ao adicionar cliente: {str(e)}', nivel='ERROR')
@@ -223,15 +212,11 @@ def grupos_remover_cliente(request, grupo_id, cliente_id):
     """Remove cliente do grupo (AJAX)"""
     if request.method == 'POST':
         try:
-            GrupoCliente = apps.get_model('ofertas', 'GrupoCliente')
-            
-            vinculo = GrupoCliente.objects.filter(grupo_id=grupo_id, cliente_id=cliente_id).first()
-            if not vinculo:
-                return JsonResponse({'sucesso': False, 'mensagem': 'Vínculo não encontrado'}, status=404)
-            
-            vinculo.delete()
+            sucesso, mensagem = SegmentacaoService.remover_cliente(grupo_id, cliente_id)
+            if not sucesso:
+                return JsonResponse({'sucesso': False, 'mensagem': mensagem}, status=404)
             
-            return JsonResponse({'sucesso': True, 'mensagem': 'Cliente removido'})
+            return JsonResponse({'sucesso': True, 'mensagem': mensagem})
             
         except Exception as e:
             registrar_log('portais.admin', f'Erro ao remover cliente: {str(e)}', nivel='ERROR')
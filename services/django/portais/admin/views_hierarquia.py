@@ -1,132 +1,97 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.db import connection, transaction
+from django.http import JsonResponse
 from ..controle_acesso.decorators import require_admin_access
 from portais.controle_acesso import require_funcionalidade
+from wallclub_core.estr_organizacional.arvore import ArvoreHierarquiaService
 from wallclub_core.utilitarios.log_control import registrar_log
 
 
-@require_funcionalidade('hierarquia_list')
-def hierarquia_geral(request):
-    """Visão geral da hierarquia organizacional"""
+def _canal_dict(canal):
+    return {'id': canal.id, 'nome': canal.nome, 'marca': canal.marca}
+
+
+def _regional_dict(arvore, regional):
+    return {'id': regional.id, 'nome': regional.nome, 'canal': _canal_dict(arvore.pai(regional))}
+
+
+def _vendedor_dict(arvore, vendedor):
+    return {'id': vendedor.id, 'nome': vendedor.nome, 'regional': _regional_dict(arvore, arvore.pai(vendedor))}
+
+
+def _filhos_com_total(arvore, tipo, no_id):
+    return [
+        {'id': filho.id, 'nome': filho.nome, 'total_lojas': len(arvore.lojas_ids(filho.tipo, filho.id))}
+        for filho in arvore.filhos(tipo, no_id)
+    ]
+
+
+def _caminho_completo(arvore, tipo, no_id):
+    """Nó existe e todos os ancestrais também (equivalente aos JOINs até o canal)"""
+    return arvore.no(tipo, no_id) is not None and all(arvore.ancestrais(tipo, no_id).values())
+
+
+def _canais_permitidos(request):
+    """IDs de canal visíveis ao admin_canal - None para os demais níveis"""
     from portais.controle_acesso.services import ControleAcessoService
 
-    # Aplicar filtro por canal se necessário
     usuario_logado = getattr(request, 'portal_usuario', None)
     if usuario_logado:
         nivel_usuario = ControleAcessoService.obter_nivel_portal(usuario_logado, 'admin')
         if nivel_usuario == 'admin_canal':
-            canais_usuario = ControleAcessoService.obter_canais_usuario(usuario_logado)
-            if canais_usuario:
-                canal_filter = f"AND c.id IN ({','.join(map(str, canais_usuario))})"
-            else:
-                canal_filter = "AND 1=0"  # Nenhum canal se não tem canais
-        else:
-            canal_filter = ""
-    else:
-        canal_filter = ""
-
-    # Query para buscar toda a hierarquia de uma vez - com filtro por canal se necessário
-    base_query = f"""
-        SELECT
-            c.id as canal_id,
-            c.nome as canal_nome,
-            c.marca as canal_marca,
-            r.id as regional_id,
-            r.nome as regional_nome,
-            v.id as vendedor_id,
-            v.nome as vendedor_nome,
-            g.id as grupo_id,
-            g.nome as grupo_nome,
-            COUNT(l.id) as total_lojas
-        FROM canal c
-        LEFT JOIN regionais r ON c.id = r.canalId
-        LEFT JOIN vendedores v ON r.id = v.regionalId
-        LEFT JOIN gruposeconomicos g ON v.id = g.vendedorId
-        LEFT JOIN loja l ON g.id = l.GrupoEconomicoId
-        WHERE c.id IS NOT NULL {canal_filter}
-        GROUP BY c.id, r.id, v.id, g.id
-        ORDER BY c.nome, r.nome, v.nome, g.nome
-    """
+            # Nenhum canal se não tem canais
+            return ControleAcessoService.obter_canais_usuario(usuario_logado) or []
+    return None
 
-    with connection.cursor() as cursor:
-        cursor.execute(base_query)
 
-    rows = cursor.fetchall()
+@require_funcionalidade('hierarquia_list')
+def hierarquia_geral(request):
+    """Visão geral da hierarquia organizacional"""
+    arvore = ArvoreHierarquiaService.obter_arvore()
+
+    # Aplicar filtro por canal se necessário
+    canais_permitidos = _canais_permitidos(request)
+    canais = arvore.nos('canal')
+    if canais_permitidos is not None:
+        canais = [canal for canal in canais if canal.id in canais_permitidos]
 
     # Organizar dados em estrutura hierárquica
     hierarquia = {}
-
-    for row in rows:
-        canal_id, canal_nome, canal_marca, regional_id, regional_nome, \
-        vendedor_id, vendedor_nome, grupo_id, grupo_nome, total_lojas = row
-
-        # Inicializar canal se não existe
-        if canal_id not in hierarquia:
-            hierarquia[canal_id] = {
-                'id': canal_id,
-                'nome': canal_nome,
-                'marca': canal_marca,
-                'regionais': {},
-                'total_lojas': 0
-            }
-
-        # Adicionar regional se existe
-        if regional_id:
-            if regional_id not in hierarquia[canal_id]['regionais']:
-                hierarquia[canal_id]['regionais'][regional_id] = {
-                    'id': regional_id,
-                    'nome': regional_nome,
-                    'vendedores': {},
-                    'total_lojas': 0
+    for canal in canais:
+        regionais = {}
+        for regional in arvore.filhos('canal', canal.id):
+            vendedores = {}
+            for vendedor in arvore.filhos('regional', regional.id):
+                vendedores[vendedor.id] = {
+                    'id': vendedor.id,
+                    'nome': vendedor.nome,
+                    'grupos': {
+                        grupo['id']: grupo for grupo in _filhos_com_total(arvore, 'vendedor', vendedor.id)
+                    },
+                    'total_lojas': len(arvore.lojas_ids('vendedor', vendedor.id))
                 }
-
-            # Adicionar vendedor se existe
-            if vendedor_id:
-                if vendedor_id not in hierarquia[canal_id]['regionais'][regional_id]['vendedores']:
-                    hierarquia[canal_id]['regionais'][regional_id]['vendedores'][vendedor_id] = {
-                        'id': vendedor_id,
-                        'nome': vendedor_nome,
-                        'grupos': {},
-                        'total_lojas': 0
-                    }
-
-                # Adicionar grupo se existe
-                if grupo_id:
-                    hierarquia[canal_id]['regionais'][regional_id]['vendedores'][vendedor_id]['grupos'][grupo_id] = {
-                        'id': grupo_id,
-                        'nome': grupo_nome,
-                        'total_lojas': total_lojas or 0
-                    }
-
-                    # Somar totais
-                    hierarquia[canal_id]['regionais'][regional_id]['vendedores'][vendedor_id]['total_lojas'] += (total_lojas or 0)
-                    hierarquia[canal_id]['regionais'][regional_id]['total_lojas'] += (total_lojas or 0)
-                    hierarquia[canal_id]['total_lojas'] += (total_lojas or 0)
+            regionais[regional.id] = {
+                'id': regional.id,
+                'nome': regional.nome,
+                'vendedores': vendedores,
+                'total_lojas': len(arvore.lojas_ids('regional', regional.id))
+            }
+        hierarquia[canal.id] = {
+            'id': canal.id,
+            'nome': canal.nome,
+            'marca': canal.marca,
+            'regionais': regionais,
+            'total_lojas': len(arvore.lojas_ids('canal', canal.id))
+        }
 
     # Estatísticas gerais
-    with connection.cursor() as cursor:
-        cursor.execute("SELECT COUNT(*) FROM canal")
-        total_canais = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM regionais")
-        total_regionais = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM vendedores")
-        total_vendedores = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM gruposeconomicos")
-        total_grupos = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM loja")
-        total_lojas = cursor.fetchone()[0]
-
     estatisticas = {
-        'canais': total_canais,
-        'regionais': total_regionais,
-        'vendedores': total_vendedores,
-        'grupos': total_grupos,
-        'lojas': total_lojas
+        'canais': arvore.total('canal'),
+        'regionais': arvore.total('regional'),
+        'vendedores': arvore.total('vendedor'),
+        'grupos': arvore.total('grupo'),
+        'lojas': arvore.total('loja')
     }
 
     context = {
@@ -137,25 +102,47 @@ def hierarquia_geral(request):
     return render(request, 'portais/admin/hierarquia_geral.html', context)
 
 
+@require_funcionalidade('hierarquia_list')
+def hierarquia_filhos(request):
+    """
+    Filhos diretos de um nó em JSON (carregamento sob demanda da árvore)
+    GET ?tipo=canal&id=1 - sem parâmetros retorna os canais
+    """
+    arvore = ArvoreHierarquiaService.obter_arvore()
+    tipo = request.GET.get('tipo')
+    no_id = request.GET.get('id')
+    canais_permitidos = _canais_permitidos(request)
+
+    if not tipo:
+        filhos = arvore.filhos_json()
+        if canais_permitidos is not None:
+            filhos = [canal for canal in filhos if canal['id'] in canais_permitidos]
+        return JsonResponse({'success': True, 'filhos': filhos})
+
+    if tipo not in ('canal', 'regional', 'vendedor', 'grupo') or arvore.no(tipo, no_id) is None:
+        return JsonResponse({'success': False, 'message': 'Nó não encontrado'}, status=404)
+
+    if canais_permitidos is not None:
+        canal = arvore.no(tipo, no_id) if tipo == 'canal' else arvore.ancestrais(tipo, no_id)['canal']
+        if canal is None or canal.id not in canais_permitidos:
+            return JsonResponse({'success': False, 'message': 'Acesso negado'}, status=403)
+
+    return JsonResponse({'success': True, 'filhos': arvore.filhos_json(tipo, no_id)})
+
+
 @require_admin_access
 def canal_detail(request, canal_id):
     """Detalhes de um canal específico"""
+    arvore = ArvoreHierarquiaService.obter_arvore()
 
-    with connection.cursor() as cursor:
-        # Buscar dados do canal
-        cursor.execute("""
-            SELECT id, nome, marca
-            FROM canal
-            WHERE id = %s
-        """, [canal_id])
-
-        canal_data = cursor.fetchone()
-        if not canal_data:
-            return render(request, 'portais/admin/hierarquia_not_found.html', {
-                'tipo': 'Canal',
-                'id': canal_id
-            })
+    canal_no = arvore.no('canal', canal_id)
+    if canal_no is None:
+        return render(request, 'portais/admin/hierarquia_not_found.html', {
+            'tipo': 'Canal',
+            'id': canal_id
+        })
 
+    with connection.cursor() as cursor:
         # Buscar comissão vigente do canal
         cursor.execute("""
             SELECT comissao, vigencia_inicio, vigencia_fim
@@ -168,62 +155,24 @@ def canal_detail(request, canal_id):
         """, [canal_id])
 
         comissao_data = cursor.fetchone()
-        from decimal import Decimal
-        comissao_vigente = Decimal(str(comissao_data[0])) * 100 if comissao_data else None
-
-        canal = {
-            'id': canal_data[0],
-            'nome': canal_data[1],
-            'marca': canal_data[2],
-            'comissao_vigente': comissao_vigente
-        }
 
-        # Buscar regionais do canal
-        cursor.execute("""
-            SELECT r.id, r.nome, COUNT(DISTINCT l.id) as total_lojas
-            FROM regionais r
-            LEFT JOIN vendedores v ON r.id = v.regionalId
-            LEFT JOIN gruposeconomicos g ON v.id = g.vendedorId
-            LEFT JOIN loja l ON g.id = l.GrupoEconomicoId
-            WHERE r.canalId = %s
-            GROUP BY r.id, r.nome
-            ORDER BY r.nome
-        """, [canal_id])
+    from decimal import Decimal
+    comissao_vigente = Decimal(str(comissao_data[0])) * 100 if comissao_data else None
 
-        regionais = []
-        for row in cursor.fetchall():
-            regionais.append({
-                'id': row[0],
-                'nome': row[1],
-                'total_lojas': row[2] or 0
-            })
-
-        # Estatísticas do canal
-        cursor.execute("""
-            SELECT
-                COUNT(DISTINCT r.id) as total_regionais,
-                COUNT(DISTINCT v.id) as total_vendedores,
-                COUNT(DISTINCT g.id) as total_grupos,
-                COUNT(DISTINCT l.id) as total_lojas
-            FROM canal c
-            LEFT JOIN regionais r ON c.id = r.canalId
-            LEFT JOIN vendedores v ON r.id = v.regionalId
-            LEFT JOIN gruposeconomicos g ON v.id = g.vendedorId
-            LEFT JOIN loja l ON g.id = l.GrupoEconomicoId
-            WHERE c.id = %s
-        """, [canal_id])
+    canal = dict(_canal_dict(canal_no), comissao_vigente=comissao_vigente)
 
-        stats = cursor.fetchone()
-        estatisticas = {
-            'regionais': stats[0] or 0,
-            'vendedores': stats[1] or 0,
-            'grupos': stats[2] or 0,
-            'lojas': stats[3] or 0
-        }
+    # Estatísticas do canal
+    contagens = arvore.contagens('canal', canal_id)
+    estatisticas = {
+        'regionais': contagens['regional'],
+        'vendedores': contagens['vendedor'],
+        'grupos': contagens['grupo'],
+        'lojas': contagens['loja']
+    }
 
     context = {
         'canal': canal,
-        'regionais': regionais,
+        'regionais': _filhos_com_total(arvore, 'canal', canal_id),
         'estatisticas': estatisticas,
     }
 
@@ -289,75 +238,25 @@ def canal_edit_comissao(request, canal_id):
 @require_admin_access
 def regional_detail(request, regional_id):
     """Detalhes de uma regional específica"""
+    arvore = ArvoreHierarquiaService.obter_arvore()
 
-    with connection.cursor() as cursor:
-        # Buscar dados da regional e canal
-        cursor.execute("""
-            SELECT r.id, r.nome, c.id, c.nome, c.marca
-            FROM regionais r
-            JOIN canal c ON r.canalId = c.id
-            WHERE r.id = %s
-        """, [regional_id])
-
-        regional_data = cursor.fetchone()
-        if not regional_data:
-            return render(request, 'portais/admin/hierarquia_not_found.html', {
-                'tipo': 'Regional',
-                'id': regional_id
-            })
-
-        regional = {
-            'id': regional_data[0],
-            'nome': regional_data[1],
-            'canal': {
-                'id': regional_data[2],
-                'nome': regional_data[3],
-                'marca': regional_data[4]
-            }
-        }
-
-        # Buscar vendedores da regional
-        cursor.execute("""
-            SELECT v.id, v.nome, COUNT(DISTINCT l.id) as total_lojas
-            FROM vendedores v
-            LEFT JOIN gruposeconomicos g ON v.id = g.vendedorId
-            LEFT JOIN loja l ON g.id = l.GrupoEconomicoId
-            WHERE v.regionalId = %s
-            GROUP BY v.id, v.nome
-            ORDER BY v.nome
-        """, [regional_id])
-
-        vendedores = []
-        for row in cursor.fetchall():
-            vendedores.append({
-                'id': row[0],
-                'nome': row[1],
-                'total_lojas': row[2] or 0
-            })
+    if not _caminho_completo(arvore, 'regional', regional_id):
+        return render(request, 'portais/admin/hierarquia_not_found.html', {
+            'tipo': 'Regional',
+            'id': regional_id
+        })
 
-        # Estatísticas da regional
-        cursor.execute("""
-            SELECT
-                COUNT(DISTINCT v.id) as total_vendedores,
-                COUNT(DISTINCT g.id) as total_grupos,
-                COUNT(DISTINCT l.id) as total_lojas
-            FROM regionais r
-            LEFT JOIN vendedores v ON r.id = v.regionalId
-            LEFT JOIN gruposeconomicos g ON v.id = g.vendedorId
-            LEFT JOIN loja l ON g.id = l.GrupoEconomicoId
-            WHERE r.id = %s
-        """, [regional_id])
-
-        stats = cursor.fetchone()
-        estatisticas = {
-            'vendedores': stats[0] or 0,
-            'grupos': stats[1] or 0,
-            'lojas': stats[2] or 0
-        }
+    # Estatísticas da regional
+    contagens = arvore.contagens('regional', regional_id)
+    estatisticas = {
+        'vendedores': contagens['vendedor'],
+        'grupos': contagens['grupo'],
+        'lojas': contagens['loja']
+    }
 
     context = {
-        'regional': regional,
-        'vendedores': vendedores,
+        'regional': _regional_dict(arvore, arvore.no('regional', regional_id)),
+        'vendedores': _filhos_com_total(arvore, 'regional', regional_id),
         'estatisticas': estatisticas,
     }
 
@@ -367,76 +266,24 @@ def regional_detail(request, regional_id):
 @require_admin_access
 def vendedor_detail(request, vendedor_id):
     """Detalhes de um vendedor específico"""
+    arvore = ArvoreHierarquiaService.obter_arvore()
 
-    with connection.cursor() as cursor:
-        # Buscar dados do vendedor, regional e canal
-        cursor.execute("""
-            SELECT v.id, v.nome, r.id, r.nome, c.id, c.nome, c.marca
-            FROM vendedores v
-            JOIN regionais r ON v.regionalId = r.id
-            JOIN canal c ON r.canalId = c.id
-            WHERE v.id = %s
-        """, [vendedor_id])
-
-        vendedor_data = cursor.fetchone()
-        if not vendedor_data:
-            return render(request, 'portais/admin/hierarquia_not_found.html', {
-                'tipo': 'Vendedor',
-                'id': vendedor_id
-            })
-
-        vendedor = {
-            'id': vendedor_data[0],
-            'nome': vendedor_data[1],
-            'regional': {
-                'id': vendedor_data[2],
-                'nome': vendedor_data[3],
-                'canal': {
-                    'id': vendedor_data[4],
-                    'nome': vendedor_data[5],
-                    'marca': vendedor_data[6]
-                }
-            }
-        }
+    if not _caminho_completo(arvore, 'vendedor', vendedor_id):
+        return render(request, 'portais/admin/hierarquia_not_found.html', {
+            'tipo': 'Vendedor',
+            'id': vendedor_id
+        })
 
-        # Buscar grupos do vendedor
-        cursor.execute("""
-            SELECT g.id, g.nome, COUNT(DISTINCT l.id) as total_lojas
-            FROM gruposeconomicos g
-            LEFT JOIN loja l ON g.id = l.GrupoEconomicoId
-            WHERE g.vendedorId = %s
-            GROUP BY g.id, g.nome
-            ORDER BY g.nome
-        """, [vendedor_id])
-
-        grupos = []
-        for row in cursor.fetchall():
-            grupos.append({
-                'id': row[0],
-                'nome': row[1],
-                'total_lojas': row[2] or 0
-            })
-
-        # Estatísticas do vendedor
-        cursor.execute("""
-            SELECT
-                COUNT(DISTINCT g.id) as total_grupos,
-                COUNT(DISTINCT l.id) as total_lojas
-            FROM vendedores v
-            LEFT JOIN gruposeconomicos g ON v.id = g.vendedorId
-            LEFT JOIN loja l ON g.id = l.GrupoEconomicoId
-            WHERE v.id = %s
-        """, [vendedor_id])
-
-        stats = cursor.fetchone()
-        estatisticas = {
-            'grupos': stats[0] or 0,
-            'lojas': stats[1] or 0
-        }
+    # Estatísticas do vendedor
+    contagens = arvore.contagens('vendedor', vendedor_id)
+    estatisticas = {
+        'grupos': contagens['grupo'],
+        'lojas': contagens['loja']
+    }
 
     context = {
-        'vendedor': vendedor,
-        'grupos': grupos,
+        'vendedor': _vendedor_dict(arvore, arvore.no('vendedor', vendedor_id)),
+        'grupos': _filhos_com_total(arvore, 'vendedor', vendedor_id),
         'estatisticas': estatisticas,
     }
 
@@ -446,75 +293,30 @@ def vendedor_detail(request, vendedor_id):
 @require_admin_access
 def grupo_detail(request, grupo_id):
     """Detalhes de um grupo econômico específico"""
+    arvore = ArvoreHierarquiaService.obter_arvore()
+
+    if not _caminho_completo(arvore, 'grupo', grupo_id):
+        return render(request, 'portais/admin/hierarquia_not_found.html', {
+            'tipo': 'Grupo Econômico',
+            'id': grupo_id
+        })
+
+    grupo_no = arvore.no('grupo', grupo_id)
+    grupo = {
+        'id': grupo_no.id,
+        'nome': grupo_no.nome,
+        'vendedor': _vendedor_dict(arvore, arvore.pai(grupo_no))
+    }
 
-    with connection.cursor() as cursor:
-        # Buscar dados do grupo, vendedor, regional e canal
-        cursor.execute("""
-            SELECT g.id, g.nome, v.id, v.nome, r.id, r.nome, c.id, c.nome, c.marca
-            FROM gruposeconomicos g
-            JOIN vendedores v ON g.vendedorId = v.id
-            JOIN regionais r ON v.regionalId = r.id
-            JOIN canal c ON r.canalId = c.id
-            WHERE g.id = %s
-        """, [grupo_id])
-
-        grupo_data = cursor.fetchone()
-        if not grupo_data:
-            return render(request, 'portais/admin/hierarquia_not_found.html', {
-                'tipo': 'Grupo Econômico',
-                'id': grupo_id
-            })
-
-        grupo = {
-            'id': grupo_data[0],
-            'nome': grupo_data[1],
-            'vendedor': {
-                'id': grupo_data[2],
-                'nome': grupo_data[3],
-                'regional': {
-                    'id': grupo_data[4],
-                    'nome': grupo_data[5],
-                    'canal': {
-                        'id': grupo_data[6],
-                        'nome': grupo_data[7],
-                        'marca': grupo_data[8]
-                    }
-                }
-            }
-        }
-
-        # Buscar lojas do grupo
-        cursor.execute("""
-            SELECT l.id, l.razao_social, l.cnpj
-            FROM loja l
-            WHERE l.GrupoEconomicoId = %s
-            ORDER BY l.razao_social
-        """, [grupo_id])
-
-        lojas = []
-        for row in cursor.fetchall():
-            lojas.append({
-                'id': row[0],
-                'razao_social': row[1],
-                'cnpj': row[2]
-            })
-
-        # Estatísticas do grupo
-        cursor.execute("""
-            SELECT COUNT(*) as total_lojas
-            FROM loja l
-            WHERE l.GrupoEconomicoId = %s
-        """, [grupo_id])
-
-        stats = cursor.fetchone()
-        estatisticas = {
-            'lojas': stats[0] or 0
-        }
+    lojas = [
+        {'id': loja.id, 'razao_social': loja.nome, 'cnpj': loja.cnpj}
+        for loja in arvore.filhos('grupo', grupo_id)
+    ]
 
     context = {
         'grupo': grupo,
         'lojas': lojas,
-        'estatisticas': estatisticas,
+        'estatisticas': {'lojas': len(lojas)},
     }
 
     return render(request, 'portais/admin/grupo_detail.html', context)
@@ -528,49 +330,36 @@ def loja_detail(request, loja_id):
     from portais.controle_acesso.filtros import FiltrosAcessoService
     FiltrosAcessoService.validar_acesso_loja_ou_403(request.portal_usuario, loja_id)
 
-    with connection.cursor() as cursor:
-        # Buscar dados da loja e hierarquia completa
-        cursor.execute("""
-            SELECT l.id, l.razao_social, l.cnpj, l.canal_id,
-                   g.id, g.nome, v.id, v.nome, r.id, r.nome, c.id, c.nome, c.marca
-            FROM loja l
-            LEFT JOIN gruposeconomicos g ON l.GrupoEconomicoId = g.id
-            LEFT JOIN vendedores v ON g.vendedorId = v.id
-            LEFT JOIN regionais r ON v.regionalId = r.id
-            LEFT JOIN canal c ON r.canalId = c.id
-            WHERE l.id = %s
-        """, [loja_id])
-
-        loja_data = cursor.fetchone()
-        if not loja_data:
-            return render(request, 'portais/admin/hierarquia_not_found.html', {
-                'tipo': 'Loja',
-                'id': loja_id
-            })
-
-        loja = {
-            'id': loja_data[0],
-            'razao_social': loja_data[1],
-            'cnpj': loja_data[2],
-            'canal_id': loja_data[3],
-            'grupo': {
-                'id': loja_data[4],
-                'nome': loja_data[5],
-                'vendedor': {
-                    'id': loja_data[6],
-                    'nome': loja_data[7],
-                    'regional': {
-                        'id': loja_data[8],
-                        'nome': loja_data[9],
-                        'canal': {
-                            'id': loja_data[10],
-                            'nome': loja_data[11],
-                            'marca': loja_data[12]
-                        }
-                    }
-                }
-            } if loja_data[4] else None
-        }
+    arvore = ArvoreHierarquiaService.obter_arvore()
+
+    loja_no = arvore.no('loja', loja_id)
+    if loja_no is None:
+        return render(request, 'portais/admin/hierarquia_not_found.html', {
+            'tipo': 'Loja',
+            'id': loja_id
+        })
+
+    # Hierarquia acima da loja (níveis inexistentes ficam com id/nome None)
+    caminho = arvore.ancestrais('loja', loja_id)
+
+    def campos(no, *extras):
+        return {campo: getattr(no, campo) if no else None for campo in ('id', 'nome') + extras}
+
+    grupo = None
+    if caminho['grupo']:
+        grupo = dict(campos(caminho['grupo']), vendedor=dict(
+            campos(caminho['vendedor']), regional=dict(
+                campos(caminho['regional']), canal=campos(caminho['canal'], 'marca')
+            )
+        ))
+
+    loja = {
+        'id': loja_no.id,
+        'razao_social': loja_no.nome,
+        'cnpj': loja_no.cnpj,
+        'canal_id': loja_no.canal_id,
+        'grupo': grupo
+    }
 
     context = {
         'loja': loja,
@@ -612,6 +401,7 @@ def canal_create(request):
                           marca or None, json_firebase or None, facebook_url or None,
                           facebook_token or None, logo_pos or None])
 
+                ArvoreHierarquiaService.invalidar()
                 messages.success(request, f'Canal "{nome}" criado com sucesso!')
                 return redirect('portais_admin:hierarquia_geral')
             except Exception as e:
@@ -643,6 +433,7 @@ def regional_create(request):
                         VALUES (%s, %s)
                     """, [nome, canal_id])
 
+                ArvoreHierarquiaService.invalidar()
                 messages.success(request, f'Regional "{nome}" criada com sucesso!')
                 return redirect('portais_admin:hierarquia_geral')
             except Exception as e:
@@ -683,6 +474,7 @@ def vendedor_create(request):
                         VALUES (%s, %s)
                     """, [nome, regional_id])
 
+                ArvoreHierarquiaService.invalidar()
                 messages.success(request, f'Vendedor "{nome}" criado com sucesso!')
                 return redirect('portais_admin:hierarquia_geral')
             except Exception as e:
@@ -729,6 +521,7 @@ def grupo_create(request):
                         VALUES (%s, %s)
                     """, [nome, vendedor_id])
 
+                ArvoreHierarquiaService.invalidar()
                 messages.success(request, f'Grupo Econômico "{nome}" criado com sucesso!')
                 return redirect('portais_admin:hierarquia_geral')
             except Exception as e:
@@ -866,6 +659,9 @@ def loja_create(request):
                 cursor.execute("SELECT LAST_INSERT_ID()")
                 loja_id = cursor.fetchone()[0]
 
+            # Nova loja entra na árvore e no escopo de quem tem acesso ao grupo/canal
+            ArvoreHierarquiaService.invalidar()
+
             # Criar/atualizar registro loja_own com campos Own
             from adquirente_own.models_cadastro import LojaOwn
 
@@ -1320,6 +1116,9 @@ def loja_edit(request, loja_id):
                             loja_id
                         ])
 
+                    # Loja pode ter mudado de grupo/canal (árvore e escopos de acesso)
+                    ArvoreHierarquiaService.invalidar()
+
                     # Atualizar registro loja_own com campos Own
                     from adquirente_own.models_cadastro import LojaOwn
 
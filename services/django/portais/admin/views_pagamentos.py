@@ -9,7 +9,6 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
-from django.db import transaction
 from django.urls import reverse
 import csv
 import io
@@ -57,9 +56,11 @@ def pagamentos_busca(request):
         filtros['data_fim'] = search_data_fim
 
     pagamentos = PagamentoService.buscar_pagamentos(filtros)
+    resumo = PagamentoService.resumo_pagamentos(filtros)
 
-    # Paginação
+    # Paginação: total do resumo (em cache) - só a página vai ao banco (LIMIT/OFFSET)
     paginator = Paginator(pagamentos, 20)
+    paginator.count = resumo['total']
     page_number = request.GET.get('page')
     pagamentos_page = paginator.get_page(page_number)
 
@@ -68,7 +69,7 @@ def pagamentos_busca(request):
         'search_nsu': search_nsu,
         'search_data_inicio': search_data_inicio,
         'search_data_fim': search_data_fim,
-        'total_registros': paginator.count if pagamentos.exists() else 0,
+        'total_registros': resumo['total'],
         'has_filters': bool(search_nsu or search_data_inicio or search_data_fim),
     }
 
@@ -446,78 +447,12 @@ def pagamentos_bulk_create(request):
                 'message': 'Nenhum pagamento fornecido'
             })
 
-        created_count = 0
-        errors = []
-
-        # FASE 1: Criar pagamentos dentro de transação atômica
-        with transaction.atomic():
-            for i, pagamento_data in enumerate(pagamentos_data):
-                try:
-                    # LOG: Ver dados da linha
-                    registrar_log('portais.admin', f'BULK CREATE - Linha {i+1}: {pagamento_data}')
-
-                    # Validar NSU obrigatório
-                    nsu = pagamento_data.get('nsu')
-                    registrar_log('portais.admin', f'BULK CREATE - NSU recebido: {nsu} (tipo: {type(nsu).__name__})')
-
-                    if nsu is None or nsu == '':
-                        errors.append(f'Linha {i+1}: NSU é obrigatório')
-                        continue
-
-                    # Converter NSU para string
-                    nsu = str(nsu).strip() if nsu else None
-                    if not nsu:
-                        errors.append(f'Linha {i+1}: NSU é obrigatório')
-                        continue
-
-                    # Verificar se NSU já existe usando serviço
-                    if PagamentoService.verificar_nsu_existe(nsu):
-                        errors.append(f'Linha {i+1}: NSU {nsu} já existe')
-                        continue
-
-                    # Preparar dados do pagamento
-                    dados_pagamento = {
-                        'nsu': nsu
-                    }
-
-                    # Campos monetários opcionais
-                    for campo in ['var44', 'var58', 'var111', 'var112']:
-                        valor = pagamento_data.get(campo)
-                        if valor:
-                            try:
-                                dados_pagamento[campo] = Decimal(str(valor))
-                            except (ValueError, TypeError):
-                                dados_pagamento[campo] = None
-                        else:
-                            dados_pagamento[campo] = None
-
-                    # Campos de texto opcionais
-                    for campo in ['var45', 'var59', 'var66', 'var71', 'var100']:
-                        valor = pagamento_data.get(campo)
-                        if valor is None or valor == '':
-                            dados_pagamento[campo] = None
-                        else:
-                            dados_pagamento[campo] = str(valor).strip()
-
-                    # LOG: Dados que serão enviados ao serviço
-                    registrar_log('portais.admin', f'BULK CREATE - Dados preparados: {dados_pagamento}')
-
-                    # Criar pagamento usando serviço
-                    PagamentoService.criar_pagamento(dados_pagamento, request.portal_usuario)
-                    created_count += 1
-
-                    registrar_log('portais.admin', f'BULK CREATE - Linha {i+1} salva com sucesso')
+        # FASE 1: Validar e criar o lote por conjunto (transação atômica no serviço)
+        resultado = PagamentoService.processar_lote_pagamentos(pagamentos_data, request.portal_usuario)
+        created_count = resultado['total_criados']
+        errors = resultado['erros']
 
-                except ValueError as e:
-                    registrar_log('portais.admin', f'BULK CREATE - ValueError na linha {i+1}: {str(e)}', nivel='ERROR')
-                    errors.append(f'Linha {i+1}: NSU inválido - {str(e)}')
-                except Exception as e:
-                    registrar_log('portais.admin', f'BULK CREATE - Exception na linha {i+1}: {str(e)}', nivel='ERROR')
-                    import traceback
-                    registrar_log('portais.admin', f'BULK CREATE - Traceback: {traceback.format_exc()}', nivel='ERROR')
-                    errors.append(f'Linha {i+1}: Erro - {str(e)}')
-
-        # COMMIT JÁ FOI FEITO (saiu do with transaction.atomic)
+        # COMMIT JÁ FOI FEITO (transação encerrada no serviço)
         registrar_log('portais.admin', f'BULK CREATE - Commit realizado: {created_count} pagamento(s) salvos')
 
         if errors:
@@ -5,3 +5,13 @@ class ControleAcessoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'portais.controle_acesso'
     verbose_name = 'Controle de Acesso'
+
+    def ready(self):
+        from django.core.signals import request_finished
+
+        from .escopo import EscopoAcessoService
+
+        request_finished.connect(
+            EscopoAcessoService.descartar_tabelas_temporarias,
+            dispatch_uid='escopo_descartar_tabelas_temporarias'
+        )
@@ -0,0 +1,274 @@
+"""
+Escopo de acesso materializado por usuário
+Vínculos ativos, níveis por portal e lojas acessíveis calculados uma vez e
+guardados no cache com versão - invalidados a cada alteração de vínculo/permissão
+"""
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+
+from wallclub_core.estr_organizacional.arvore import ArvoreHierarquiaService
+from wallclub_core.utilitarios.log_control import registrar_log
+
+from .models import PortalPermissao, PortalUsuarioAcesso
+
+CACHE_TIMEOUT = 600  # 10 minutos (rede de segurança para mudanças de hierarquia)
+
+# Acima deste tamanho o filtro de lojas vira join com tabela temporária
+LIMITE_LISTA_IN = 500
+PREFIXO_TABELA_TEMP = 'tmp_escopo'
+
+CHAVE_VERSAO_GLOBAL = 'escopo_acesso:versao_global'
+
+# Tabelas temporárias criadas na conexão da thread atual (conexões do Django são por thread)
+_tabelas_temporarias = threading.local()
+
+# Usuários com estes níveis têm acesso a TODAS as lojas
+NIVEIS_ACESSO_GLOBAL = ['admin_total', 'lojista_admin', 'admin_superusuario']
+
+
+class EscopoAcessoService:
+    """
+    Escopo efetivo do usuário nos portais.
+
+    Chaves versionadas:
+    - escopo_acesso:versao:<usuario_id>: muda quando vínculos/permissões do usuário mudam
+    - escopo_acesso:versao_global: invalidação manual de todos os escopos
+    - hierarquia:versao: versão da árvore organizacional (muda a cada escrita na hierarquia)
+    """
+
+    # ------------------------------------------------------------------
+    # Versões / invalidação
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _nova_versao() -> int:
+        return time.time_ns() // 1000
+
+    @classmethod
+    def _obter_versoes(cls, chaves: List[str]) -> Dict[str, int]:
+        versoes = cache.get_many(chaves)
+        novas = {chave: cls._nova_versao() for chave in chaves if chave not in versoes}
+        if novas:
+            cache.set_many(novas, timeout=None)
+            versoes.update(novas)
+        return versoes
+
+    @classmethod
+    def _versoes(cls, usuario_id: int) -> str:
+        chave_usuario = f"escopo_acesso:versao:{usuario_id}"
+        chave_arvore = ArvoreHierarquiaService.CHAVE_VERSAO
+        versoes = cls._obter_versoes([chave_usuario, CHAVE_VERSAO_GLOBAL, chave_arvore])
+        return f"{versoes[chave_usuario]}.{versoes[CHAVE_VERSAO_GLOBAL]}.{versoes[chave_arvore]}"
+
+    @classmethod
+    def invalidar_usuario(cls, usuario_id: int):
+        """Chamar após criar/alterar/remover vínculos ou permissões do usuário"""
+        # Após o commit: evita recalcular (e cachear) o escopo antigo na versão nova
+        transaction.on_commit(
+            lambda: cache.set(f"escopo_acesso:versao:{usuario_id}", cls._nova_versao(), timeout=None)
+        )
+
+    @classmethod
+    def invalidar_todos(cls):
+        """
+        Invalida o escopo de todos os usuários.
+        Mudanças de hierarquia já invalidam via ArvoreHierarquiaService.invalidar().
+        """
+        transaction.on_commit(
+            lambda: cache.set(CHAVE_VERSAO_GLOBAL, cls._nova_versao(), timeout=None)
+        )
+
+    # ------------------------------------------------------------------
+    # Escopo
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def obter_escopo(cls, usuario) -> Dict[str, Any]:
+        """
+        Vínculos ativos e níveis de acesso do usuário (2 queries no cache miss)
+
+        Returns:
+            dict: vinculos [(portal, entidade_tipo, entidade_id)], niveis {portal: nivel},
+                  tem_vinculos, canais, lojas, grupos (ids vinculados diretamente)
+        """
+        chave = f"escopo_acesso:{usuario.id}:base:{cls._versoes(usuario.id)}"
+        escopo = cache.get(chave)
+        if escopo is not None:
+            return escopo
+
+        vinculos = list(
+            PortalUsuarioAcesso.objects.filter(usuario_id=usuario.id, ativo=True)
+            .values_list('portal', 'entidade_tipo', 'entidade_id')
+        )
+        niveis = dict(
+            PortalPermissao.objects.filter(usuario_id=usuario.id)
+            .values_list('portal', 'nivel_acesso')
+        )
+
+        escopo = {
+            'vinculos': vinculos,
+            'niveis': niveis,
+            'tem_vinculos': bool(vinculos),
+            'canais': [eid for _, tipo, eid in vinculos if tipo == 'canal'],
+            'lojas': [eid for _, tipo, eid in vinculos if tipo == 'loja'],
+            'grupos': [eid for _, tipo, eid in vinculos if tipo == 'grupo_economico'],
+        }
+        cache.set(chave, escopo, CACHE_TIMEOUT)
+        return escopo
+
+    @classmethod
+    def obter_lojas_acessiveis(cls, usuario, portal: str = 'lojista') -> List[Dict[str, Any]]:
+        """
+        Lojas acessíveis ao usuário no portal (id, nome, razao_social, cnpj)
+        """
+        escopo = cls.obter_escopo(usuario)
+        if escopo['niveis'].get(portal) in NIVEIS_ACESSO_GLOBAL:
+            return cls._todas_lojas()
+
+        chave = f"escopo_acesso:{usuario.id}:lojas:{portal}:{cls._versoes(usuario.id)}"
+        lojas = cache.get(chave)
+        if lojas is None:
+            lojas = cls._calcular_lojas(escopo['vinculos'], portal)
+            cache.set(chave, lojas, CACHE_TIMEOUT)
+        return lojas
+
+    @classmethod
+    def obter_lojas_ids(cls, usuario, portal: str = 'lojista') -> Optional[List[int]]:
+        """
+        IDs das lojas acessíveis - None para acesso global (nenhum filtro necessário)
+        """
+        escopo = cls.obter_escopo(usuario)
+        if escopo['niveis'].get(portal) in NIVEIS_ACESSO_GLOBAL:
+            return None
+        return [loja['id'] for loja in cls.obter_lojas_acessiveis(usuario, portal)]
+
+    @staticmethod
+    def _formatar_loja(loja) -> Dict[str, Any]:
+        """Loja da árvore da hierarquia (nome = razão social)"""
+        return {
+            'id': loja.id,
+            'nome': loja.nome or f'Loja {loja.id}',
+            'razao_social': loja.nome,
+            'cnpj': loja.cnpj
+        }
+
+    @classmethod
+    def _todas_lojas(cls) -> List[Dict[str, Any]]:
+        """Lista compartilhada por todos os usuários de acesso global"""
+        chave_arvore = ArvoreHierarquiaService.CHAVE_VERSAO
+        versoes = cls._obter_versoes([CHAVE_VERSAO_GLOBAL, chave_arvore])
+        chave = f"escopo_acesso:todas_lojas:{versoes[CHAVE_VERSAO_GLOBAL]}.{versoes[chave_arvore]}"
+        lojas = cache.get(chave)
+        if lojas is None:
+            # Árvore já ordena as lojas por razão social
+            arvore = ArvoreHierarquiaService.obter_arvore()
+            lojas = [cls._formatar_loja(loja) for loja in arvore.nos('loja')]
+            cache.set(chave, lojas, CACHE_TIMEOUT)
+        return lojas
+
+    @classmethod
+    def _calcular_lojas(cls, vinculos: List[Tuple], portal: str) -> List[Dict[str, Any]]:
+        """
+        Resolve vínculos loja/canal/grupo em lojas a partir da árvore da hierarquia
+        (mesma ordem e deduplicação do cálculo vínculo a vínculo)
+        """
+        vinculos = [(tipo, eid) for p, tipo, eid in vinculos if p == portal or p is None]
+        if not vinculos:
+            return []
+
+        arvore = ArvoreHierarquiaService.obter_arvore()
+        tipos_arvore = {'loja': 'loja', 'canal': 'canal', 'grupo_economico': 'grupo'}
+
+        lojas_unicas = {}
+        for tipo, eid in vinculos:
+            if tipo not in tipos_arvore:
+                continue
+            ids = sorted(arvore.lojas_ids(tipos_arvore[tipo], eid))
+            for loja_id in ids:
+                lojas_unicas[loja_id] = cls._formatar_loja(arvore.no('loja', loja_id))
+
+        return list(lojas_unicas.values())
+
+    # ------------------------------------------------------------------
+    # Filtros SQL
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def clausula_ids(cls, campo: str, ids: Optional[List[int]]) -> str:
+        """
+        Filtro SQL para uma lista de IDs inteiros do escopo.
+
+        - None: sem filtro (acesso global)
+        - até LIMITE_LISTA_IN ids: campo IN (1,2,3)
+        - acima: semi-join com tabela temporária da conexão (evita IN gigante)
+
+        A tabela temporária é nomeada pelo conteúdo (hash dos ids): cláusulas
+        com conjuntos diferentes montadas antes da query não se sobrescrevem,
+        e o mesmo conjunto reaproveita a tabela da conexão.
+
+        A tabela só existe na conexão da thread que montou a cláusula: threads
+        de background devem receber os ids e montar a própria cláusula. As
+        tabelas são removidas no fim da requisição (request_finished) ou por
+        descartar_tabelas_temporarias().
+
+        Obs: MySQL não permite referenciar a mesma tabela temporária duas vezes
+        na mesma query - o mesmo conjunto grande no máximo uma vez por query.
+        """
+        if ids is None:
+            return '1 = 1'
+        ids = [int(i) for i in ids]
+        if not ids:
+            return '1 = 0'
+        if len(ids) <= LIMITE_LISTA_IN:
+            return f"{campo} IN ({','.join(map(str, ids))})"
+
+        tabela = cls._carregar_tabela_temporaria(ids)
+        return f"{campo} IN (SELECT id FROM {tabela})"
+
+    @staticmethod
+    def _carregar_tabela_temporaria(ids: List[int]) -> str:
+        unicos = sorted(set(ids))
+        assinatura = hashlib.md5(','.join(map(str, unicos)).encode()).hexdigest()[:16]
+        tabela = f"{PREFIXO_TABELA_TEMP}_{assinatura}"
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TEMPORARY TABLE IF NOT EXISTS {tabela} (
+                    id BIGINT NOT NULL PRIMARY KEY
+                ) ENGINE=MEMORY
+            """)
+            # Mesmo nome = mesmo conjunto: recarregar é idempotente
+            for inicio in range(0, len(unicos), 1000):
+                lote = unicos[inicio:inicio + 1000]
+                cursor.execute(
+                    f"INSERT IGNORE INTO {tabela} (id) VALUES {','.join(['(%s)'] * len(lote))}",
+                    lote
+                )
+        if not hasattr(_tabelas_temporarias, 'nomes'):
+            _tabelas_temporarias.nomes = set()
+        _tabelas_temporarias.nomes.add(tabela)
+        return tabela
+
+    @staticmethod
+    def descartar_tabelas_temporarias(**kwargs):
+        """
+        Remove as tabelas temporárias criadas por clausula_ids na conexão atual.
+        Ligado ao request_finished (conexões persistentes - CONN_MAX_AGE - não
+        acumulam tabelas entre requisições).
+        """
+        nomes = getattr(_tabelas_temporarias, 'nomes', None)
+        if not nomes:
+            return
+        _tabelas_temporarias.nomes = set()
+        # Conexão já fechada: as tabelas temporárias foram junto
+        if connection.connection is None:
+            return
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {', '.join(sorted(nomes))}")
+        except DatabaseError as e:
+            registrar_log('portais.controle_acesso', f"Erro ao remover tabelas temporárias do escopo: {e}", nivel='WARNING')
@@ -4,8 +4,9 @@ Implementa lógica de filtragem conforme permissões do usuário
 """
 from typing import List, Optional, Dict, Any
 from django.db import connection
-from .models import PortalUsuario, PortalPermissao, PortalUsuarioAcesso
+from .models import PortalUsuario, PortalPermissao
 from .services import ControleAcessoService
+from .escopo import EscopoAcessoService
 
 
 class FiltrosAcessoService:
@@ -34,13 +35,13 @@ class FiltrosAcessoService:
             return base_query
             
         # Aplicar filtro de canais específicos
-        canais_str = ','.join(map(str, canais_usuario))
+        filtro = EscopoAcessoService.clausula_ids(campo_canal, canais_usuario)
         
         # Adicionar WHERE ou AND conforme necessário
         if 'WHERE' in base_query.upper():
-            return f"{base_query} AND {campo_canal} IN ({canais_str})"
+            return f"{base_query} AND {filtro}"
         else:
-            return f"{base_query} WHERE {campo_canal} IN ({canais_str})"
+            return f"{base_query} WHERE {filtro}"
     
     @classmethod
     def filtrar_query_por_loja(cls, usuario: PortalUsuario, base_query: str,
@@ -62,14 +63,14 @@ class FiltrosAcessoService:
         if not lojas_usuario:
             return base_query
             
-        # Aplicar filtro de lojas específicas
-        lojas_str = ','.join(map(str, lojas_usuario))
+        # Aplicar filtro de lojas específicas (tabela temporária para escopos grandes)
+        filtro = EscopoAcessoService.clausula_ids(campo_loja, lojas_usuario)
         
         # Adicionar WHERE ou AND conforme necessário
         if 'WHERE' in base_query.upper():
-            return f"{base_query} AND {campo_loja} IN ({lojas_str})"
+            return f"{base_query} AND {filtro}"
         else:
-            return f"{base_query} WHERE {campo_loja} IN ({lojas_str})"
+            return f"{base_query} WHERE {filtro}"
     
     @classmethod
     def filtrar_query_por_grupo_economico(cls, usuario: PortalUsuario, base_query: str,
@@ -85,21 +86,20 @@ class FiltrosAcessoService:
         Returns:
             str: Query com filtro aplicado
         """
-        vinculos = ControleAcessoService.obter_vinculos_usuario(usuario, 'grupo_economico')
+        grupos_ids = EscopoAcessoService.obter_escopo(usuario)['grupos']
         
         # Se sem vínculos = acesso global (sem filtro)
-        if not vinculos:
+        if not grupos_ids:
             return base_query
             
         # Aplicar filtro de grupos específicos
-        grupos_ids = [vinculo.entidade_id for vinculo in vinculos]
-        grupos_str = ','.join(map(str, grupos_ids))
+        filtro = EscopoAcessoService.clausula_ids(campo_grupo, grupos_ids)
         
         # Adicionar WHERE ou AND conforme necessário
         if 'WHERE' in base_query.upper():
-            return f"{base_query} AND {campo_grupo} IN ({grupos_str})"
+            return f"{base_query} AND {filtro}"
         else:
-            return f"{base_query} WHERE {campo_grupo} IN ({grupos_str})"
+            return f"{base_query} WHERE {filtro}"
     
     @classmethod
     def obter_lojas_acessiveis(cls, usuario: PortalUsuario, portal: str = 'lojista') -> List[Dict[str, Any]]:
@@ -113,87 +113,8 @@ class FiltrosAcessoService:
         Returns:
             List[Dict]: Lista de lojas acessíveis
         """
-        from wallclub_core.estr_organizacional.services import HierarquiaOrganizacionalService
-        from .models import PortalPermissao
-        
-        # Verificar nível de acesso do usuário no portal
-        try:
-            permissao = PortalPermissao.objects.get(usuario=usuario, portal=portal)
-            nivel_acesso = permissao.nivel_acesso
-        except PortalPermissao.DoesNotExist:
-            nivel_acesso = None
-        
-        # Usuários com nível admin têm acesso a TODAS as lojas
-        NIVEIS_ACESSO_GLOBAL = ['admin_total', 'lojista_admin', 'admin_superusuario']
-        
-        if nivel_acesso in NIVEIS_ACESSO_GLOBAL:
-            # Acesso global - retornar todas as lojas
-            lojas_queryset = HierarquiaOrganizacionalService.listar_todas_lojas()
-            return [{
-                'id': loja.id,
-                'nome': loja.razao_social or f'Loja {loja.id}',
-                'razao_social': loja.razao_social,
-                'cnpj': loja.cnpj
-            } for loja in lojas_queryset]
-        
-        # Para níveis restritos, verificar vínculos
-        from django.db.models import Q
-        vinculos_query = PortalUsuarioAcesso.objects.filter(
-            Q(usuario=usuario, ativo=True) & 
-            (Q(portal=portal) | Q(portal__isnull=True))
-        )
-        vinculos = list(vinculos_query)
-        
-        if not vinculos:
-            # Sem vínculos e sem acesso global = sem lojas
-            return []
-        
-        lojas_acessiveis = []
-        
-        for vinculo in vinculos:
-            if vinculo.entidade_tipo == 'loja':
-                # Acesso direto à loja
-                loja = HierarquiaOrganizacionalService.get_loja(vinculo.entidade_id)
-                if loja:
-                    lojas_acessiveis.append({
-                        'id': loja.id,
-                        'nome': loja.razao_social or f'Loja {loja.id}',
-                        'razao_social': loja.razao_social,
-                        'cnpj': loja.cnpj
-                    })
-                    
-            elif vinculo.entidade_tipo == 'canal':
-                # Acesso a todas as lojas do canal via navegação hierárquica
-                from wallclub_core.estr_organizacional.loja import Loja
-                lojas_canal = Loja.objects.filter(
-                    GrupoEconomicoId__in=HierarquiaOrganizacionalService.get_grupos_por_canal(vinculo.entidade_id)
-                )
-                for loja in lojas_canal:
-                    lojas_acessiveis.append({
-                        'id': loja.id,
-                        'nome': loja.razao_social or f'Loja {loja.id}',
-                        'razao_social': loja.razao_social,
-                        'cnpj': loja.cnpj
-                    })
-                
-            elif vinculo.entidade_tipo == 'grupo_economico':
-                # Acesso a todas as lojas do grupo econômico
-                from wallclub_core.estr_organizacional.loja import Loja
-                lojas_grupo = Loja.objects.filter(GrupoEconomicoId=vinculo.entidade_id)
-                for loja in lojas_grupo:
-                    lojas_acessiveis.append({
-                        'id': loja.id,
-                        'nome': loja.razao_social or f'Loja {loja.id}',
-                        'razao_social': loja.razao_social,
-                        'cnpj': loja.cnpj
-                    })
-        
-        # Remover duplicatas
-        lojas_unicas = {}
-        for loja in lojas_acessiveis:
-            lojas_unicas[loja['id']] = loja
-            
-        return list(lojas_unicas.values())
+        # Escopo materializado no cache (acesso global, vínculos loja/canal/grupo)
+        return EscopoAcessoService.obter_lojas_acessiveis(usuario, portal)
     
     @classmethod
     def usuario_pode_acessar_loja(cls, usuario: PortalUsuario, loja_id: int) -> bool:
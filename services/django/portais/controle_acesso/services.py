@@ -7,6 +7,7 @@ from django.contrib.sessions.models import Session
 from datetime import datetime
 import hashlib
 from .models import PortalUsuario, PortalPermissao, PortalUsuarioAcesso
+from .escopo import EscopoAcessoService
 
 
 class ControleAcessoService:
@@ -59,14 +60,8 @@ class ControleAcessoService:
         Returns:
             bool: True se tem acesso, False caso contrário
         """
-        try:
-            permissao = PortalPermissao.objects.get(
-                usuario=usuario,
-                portal=portal
-            )
-            return permissao.nivel_acesso != 'negado'
-        except PortalPermissao.DoesNotExist:
-            return False
+        nivel = EscopoAcessoService.obter_escopo(usuario)['niveis'].get(portal)
+        return nivel is not None and nivel != 'negado'
 
     @classmethod
     def obter_nivel_portal(cls, usuario: PortalUsuario, portal: str) -> str:
@@ -80,14 +75,7 @@ class ControleAcessoService:
         Returns:
             str: Nível de acesso ('negado', 'leitura', 'escrita', 'admin')
         """
-        try:
-            permissao = PortalPermissao.objects.get(
-                usuario=usuario,
-                portal=portal
-            )
-            return permissao.nivel_acesso
-        except PortalPermissao.DoesNotExist:
-            return 'negado'
+        return EscopoAcessoService.obter_escopo(usuario)['niveis'].get(portal, 'negado')
 
     @classmethod
     def usuario_tem_nivel_minimo(cls, usuario: PortalUsuario, portal: str, nivel_minimo: str) -> bool:
@@ -146,17 +134,14 @@ class ControleAcessoService:
         Returns:
             bool: True se tem acesso, False caso contrário
         """
+        escopo = EscopoAcessoService.obter_escopo(usuario)
+
         # Se não tem vínculos definidos, assume acesso global (para admins)
-        if not PortalUsuarioAcesso.objects.filter(usuario=usuario, ativo=True).exists():
+        if not escopo['tem_vinculos']:
             return True
 
         # Verificar acesso específico ao canal
-        return PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='canal',
-            entidade_id=canal_id,
-            ativo=True
-        ).exists()
+        return int(canal_id) in escopo['canais']
 
     @classmethod
     def usuario_tem_acesso_loja(cls, usuario: PortalUsuario, loja_id: int) -> bool:
@@ -170,17 +155,14 @@ class ControleAcessoService:
         Returns:
             bool: True se tem acesso, False caso contrário
         """
+        escopo = EscopoAcessoService.obter_escopo(usuario)
+
         # Se não tem vínculos definidos, assume acesso global (para admins)
-        if not PortalUsuarioAcesso.objects.filter(usuario=usuario, ativo=True).exists():
+        if not escopo['tem_vinculos']:
             return True
 
         # Verificar acesso específico à loja
-        if PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='loja',
-            entidade_id=loja_id,
-            ativo=True
-        ).exists():
+        if int(loja_id) in escopo['lojas']:
             return True
 
         # TODO: Verificar se loja pertence a canal/regional que usuário tem acesso
@@ -227,17 +209,12 @@ class ControleAcessoService:
             List[int]: Lista de IDs de canais (vazia = acesso a todos)
         """
         # Se não tem vínculos definidos, retorna lista vazia (acesso global)
-        if not PortalUsuarioAcesso.objects.filter(usuario=usuario, ativo=True).exists():
+        escopo = EscopoAcessoService.obter_escopo(usuario)
+        if not escopo['tem_vinculos']:
             return []  # Lista vazia = acesso a todos os canais
 
-        # Obter canais específicos
-        vinculos = PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='canal',
-            ativo=True
-        ).values_list('entidade_id', flat=True)
-
-        return list(vinculos)
+        # Canais específicos
+        return list(escopo['canais'])
 
     @classmethod
     def obter_canal_principal_usuario(cls, usuario: PortalUsuario) -> int:
@@ -250,18 +227,17 @@ class ControleAcessoService:
         Returns:
             int: ID do canal principal (1 se admin total)
         """
-        # Se não tem acesso, é admin total
-        acessos_count = PortalUsuarioAcesso.objects.filter(usuario=usuario, ativo=True).count()
+        escopo = EscopoAcessoService.obter_escopo(usuario)
 
-        if acessos_count == 0:
+        # Se não tem acesso, é admin total
+        if not escopo['tem_vinculos']:
             return 1
 
+        def primeiro_vinculo(entidade_tipo):
+            return next((eid for _, tipo, eid in escopo['vinculos'] if tipo == entidade_tipo), None)
+
         # Verificar acesso direto a canal
-        canal_id = PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='canal',
-            ativo=True
-        ).values_list('entidade_id', flat=True).first()
+        canal_id = primeiro_vinculo('canal')
 
         if canal_id:
             return canal_id
@@ -269,11 +245,7 @@ class ControleAcessoService:
         from wallclub_core.estr_organizacional.services import HierarquiaOrganizacionalService
 
         # Verificar acesso via grupo econômico
-        grupo_economico_id = PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='grupo_economico',
-            ativo=True
-        ).values_list('entidade_id', flat=True).first()
+        grupo_economico_id = primeiro_vinculo('grupo_economico')
 
         if grupo_economico_id:
             grupo = HierarquiaOrganizacionalService.get_grupo_economico(grupo_economico_id)
@@ -285,11 +257,7 @@ class ControleAcessoService:
                         return regional.canalId
 
         # Verificar acesso via loja
-        loja_id = PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='loja',
-            ativo=True
-        ).values_list('entidade_id', flat=True).first()
+        loja_id = primeiro_vinculo('loja')
 
         if loja_id:
             hierarquia = HierarquiaOrganizacionalService.get_loja_hierarquia_completa(loja_id)
@@ -297,11 +265,7 @@ class ControleAcessoService:
                 return hierarquia['canal']['id']
 
         # Verificar acesso via regional
-        regional_id = PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='regional',
-            ativo=True
-        ).values_list('entidade_id', flat=True).first()
+        regional_id = primeiro_vinculo('regional')
 
         if regional_id:
             regional = HierarquiaOrganizacionalService.get_regional(regional_id)
@@ -309,11 +273,7 @@ class ControleAcessoService:
                 return regional.canalId
 
         # Verificar acesso via vendedor
-        vendedor_id = PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='vendedor',
-            ativo=True
-        ).values_list('entidade_id', flat=True).first()
+        vendedor_id = primeiro_vinculo('vendedor')
 
         if vendedor_id:
             vendedor = HierarquiaOrganizacionalService.get_vendedor(vendedor_id)
@@ -337,17 +297,12 @@ class ControleAcessoService:
             List[int]: Lista de IDs de lojas (vazia = acesso a todas)
         """
         # Se não tem vínculos definidos, retorna lista vazia (acesso global)
-        if not PortalUsuarioAcesso.objects.filter(usuario=usuario, ativo=True).exists():
+        escopo = EscopoAcessoService.obter_escopo(usuario)
+        if not escopo['tem_vinculos']:
             return []  # Lista vazia = acesso a todas as lojas
 
-        # Obter lojas específicas
-        vinculos = PortalUsuarioAcesso.objects.filter(
-            usuario=usuario,
-            entidade_tipo='loja',
-            ativo=True
-        ).values_list('entidade_id', flat=True)
-
-        return list(vinculos)
+        # Lojas específicas
+        return list(escopo['lojas'])
 
     @classmethod
     def criar_permissao_portal(cls, usuario: PortalUsuario, portal: str, nivel_acesso: str,
@@ -375,6 +330,7 @@ class ControleAcessoService:
                 'recursos_permitidos': recursos_permitidos
             }
         )
+        EscopoAcessoService.invalidar_usuario(usuario.id)
         return permissao
 
     @classmethod
@@ -391,11 +347,13 @@ class ControleAcessoService:
         Returns:
             PortalUsuarioAcesso: Vínculo criado
         """
-        return PortalUsuarioAcesso.objects.create(
+        vinculo = PortalUsuarioAcesso.objects.create(
             usuario=usuario,
             entidade_tipo=entidade_tipo,
             entidade_id=entidade_id
         )
+        EscopoAcessoService.invalidar_usuario(usuario.id)
+        return vinculo
 
     @classmethod
     def obter_secoes_permitidas(cls, usuario: PortalUsuario, portal: str) -> List[str]:
@@ -638,6 +596,8 @@ class PermissaoService:
             portal=portal,
             defaults={'nivel_acesso': nivel}
         )
+        if created:
+            EscopoAcessoService.invalidar_usuario(usuario.id)
 
         return permissao
 
@@ -920,6 +880,7 @@ class UsuarioService:
                                 ativo=True
                             )
 
+            EscopoAcessoService.invalidar_usuario(usuario.id)
             registrar_log('portais.controle_acesso', f"Usuário atualizado: ID={usuario_id} - {email}")
             return {'sucesso': True, 'mensagem': 'Usuário atualizado!', 'usuario': usuario}
 
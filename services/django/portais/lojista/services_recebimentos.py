@@ -3,7 +3,7 @@ Serviços de Recebimentos do Portal Lojista
 Camada de negócio para consultas e relatórios de recebimentos
 """
 
-from django.db.models import Q, Sum, Count
+from django.db.models import Q
 from datetime import datetime, date
 from decimal import Decimal
 from wallclub_core.utilitarios.log_control import registrar_log
@@ -32,86 +32,52 @@ class RecebimentoService:
         from wallclub_core.database.queries import TransacoesQueries
         from gestao_financeira.models import LancamentoManual
 
-        # Com GROUP BY e LIMIT, não precisa mais exigir filtros
-
-        # Construir filtros base
-        filtros = Q(var6__in=lojas_ids) & Q(var45__isnull=False) & ~Q(var45='')
-
-        if nsu:
-            filtros &= Q(var9__icontains=nsu)
-
-        # Usar SQL direto para agregar - MUITO mais eficiente
         from django.db import connection
+        from gestao_financeira.services import filtro_data_pagamento
 
         recebimentos_por_data = {}
 
-        # Montar WHERE clause
-        lojas_str = ','.join(map(str, lojas_ids))
-        where_clauses = [f"var6 IN ({lojas_str})", "var45 IS NOT NULL", "var45 != ''"]
-
-        if nsu:
-            where_clauses.append(f"var9 LIKE '%{nsu}%'")
-
-        # Filtro TEF - se não incluir TEF, filtrar apenas transações não-Credenciadora
-        if not incluir_tef:
-            where_clauses.append("tipo_operacao != 'Credenciadora'")
-
-        # Adicionar filtros de data direto no SQL
-        # Como var45 está em formato DD/MM/YYYY, precisamos converter
-        if data_inicio:
-            # Converter YYYY-MM-DD para DD/MM/YYYY
-            data_ini_obj = datetime.strptime(data_inicio, '%Y-%m-%d')
-            data_ini_br = data_ini_obj.strftime('%d/%m/%Y')
-            where_clauses.append(f"STR_TO_DATE(var45, '%d/%m/%Y') >= STR_TO_DATE('{data_ini_br}', '%d/%m/%Y')")
-
-        if data_fim:
-            # Converter YYYY-MM-DD para DD/MM/YYYY
-            data_fim_obj = datetime.strptime(data_fim, '%Y-%m-%d')
-            data_fim_br = data_fim_obj.strftime('%d/%m/%Y')
-            where_clauses.append(f"STR_TO_DATE(var45, '%d/%m/%Y') <= STR_TO_DATE('{data_fim_br}', '%d/%m/%Y')")
-
-        where_sql = ' AND '.join(where_clauses)
-
-        # Query otimizada - base_transacoes_unificadas já tem 1 linha por NSU
-        sql = f"""
-        SELECT
-            var45 as data_recebimento,
-            COUNT(*) as quantidade,
-            SUM(CAST(COALESCE(var44, 0) AS DECIMAL(10,2))) as valor_total
-        FROM base_transacoes_unificadas
-        WHERE {where_sql}
-        GROUP BY var45
-        ORDER BY STR_TO_DATE(var45, '%d/%m/%Y') DESC
-        LIMIT 1000
-        """
-
-        with connection.cursor() as cursor:
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-
-            for row in rows:
-                var45, quantidade, valor_total = row
-
-                if not var45:
-                    continue
-
-                try:
-                    # Converter data
-                    data_recebimento = None
-                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%Y%m%d']:
-                        try:
-                            data_recebimento = datetime.strptime(var45, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-
-                    if not data_recebimento:
-                        continue
-
-                    # Filtros já aplicados no SQL
-                    data_key = data_recebimento.strftime('%Y-%m-%d')
-
-                    recebimentos_por_data[data_key] = {
+        if not nsu:
+            # Sem filtro de NSU: ler do resumo de recebimentos (mantido pelas cargas)
+            from gestao_financeira.services_resumo_diario import ResumoDiarioService
+            for data_recebimento, quantidade, valor_total in ResumoDiarioService.obter_recebimentos_por_data(
+                lojas_ids, data_inicio, data_fim, incluir_tef
+            ):
+                recebimentos_por_data[data_recebimento.strftime('%Y-%m-%d')] = {
+                    'data': data_recebimento,
+                    'data_formatada': data_recebimento.strftime('%d/%m/%Y'),
+                    'valor_total': valor_total,
+                    'quantidade': quantidade,
+                    'transacoes': []
+                }
+        else:
+            # Busca por NSU: agrega no banco com intervalo em data_pagamento (índice (var6, data_pagamento))
+            where_clauses = [f"var6 IN ({','.join(['%s'] * len(lojas_ids))})", "var9 LIKE %s"]
+            params = list(lojas_ids) + [f'%{nsu}%']
+
+            condicoes_data, params_data = filtro_data_pagamento(data_inicio, data_fim)
+            where_clauses.extend(condicoes_data)
+            params.extend(params_data)
+
+            # Filtro TEF - se não incluir TEF, filtrar apenas transações não-Credenciadora
+            if not incluir_tef:
+                where_clauses.append("tipo_operacao != 'Credenciadora'")
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT
+                        data_pagamento,
+                        COUNT(*) as quantidade,
+                        SUM(CAST(COALESCE(var44, 0) AS DECIMAL(10,2))) as valor_total
+                    FROM base_transacoes_unificadas
+                    WHERE {' AND '.join(where_clauses)}
+                    GROUP BY data_pagamento
+                    ORDER BY data_pagamento DESC
+                    LIMIT 1000
+                """, params)
+
+                for data_recebimento, quantidade, valor_total in cursor.fetchall():
+                    recebimentos_por_data[data_recebimento.strftime('%Y-%m-%d')] = {
                         'data': data_recebimento,
                         'data_formatada': data_recebimento.strftime('%d/%m/%Y'),
                         'valor_total': Decimal(str(valor_total)) if valor_total else Decimal('0.00'),
@@ -119,14 +85,6 @@ class RecebimentoService:
                         'transacoes': []  # Não carregar transações individuais por padrão
                     }
 
-                except Exception as e:
-                    registrar_log(
-                        'portais.lojista',
-                        f'Erro ao processar data {var45}: {str(e)}',
-                        nivel='WARNING'
-                    )
-                    continue
-
         # Buscar lançamentos manuais
         filtros_lancamentos = Q(loja_id__in=lojas_ids) & Q(status='processado')
 
@@ -208,15 +166,14 @@ class RecebimentoService:
         if not data_obj:
             return []
 
-        # Formatar data conforme está no banco (DD/MM/YYYY)
         data_formatada = data_obj.strftime('%d/%m/%Y')
 
-        # Montar WHERE clause
-        lojas_str = ','.join(map(str, lojas_ids))
+        # Montar WHERE clause (igualdade em data_pagamento: índice (var6, data_pagamento))
         where_clauses = [
-            f"var6 IN ({lojas_str})",
-            f"var45 = '{data_formatada}'"
+            f"var6 IN ({','.join(['%s'] * len(lojas_ids))})",
+            "data_pagamento = %s"
         ]
+        params = list(lojas_ids) + [data_obj]
 
         # Filtro TEF - se não incluir TEF, excluir transações Credenciadora
         if not incluir_tef:
@@ -246,7 +203,7 @@ class RecebimentoService:
 
         results = []
         with connection.cursor() as cursor:
-            cursor.execute(sql)
+            cursor.execute(sql, params)
             rows = cursor.fetchall()
 
             for row in rows:
@@ -136,7 +136,6 @@ class LojistaHomeView(TemplateView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
-        from django.db import connection
         from datetime import date
 
         context = super().get_context_data(**kwargs)
@@ -178,34 +177,22 @@ class LojistaHomeView(TemplateView):
             except ValueError:
                 loja_id = None  # Ignorar valor inválido
 
-        # Construir WHERE clause baseado no filtro
-        where_clause = ""
+        # Filtro de lojas (None = todas as lojas, admin sem filtro específico)
+        lojas_filtro = None
         if loja_id:
             # Filtro por loja específica (já validado acesso acima)
-            where_clause = f"AND var6 = '{loja_id}'"
+            lojas_filtro = [int(loja_id)]
         elif not is_admin and lojas_ids:
             # Para não-admin: filtrar por lojas acessíveis
-            where_clause = f"AND var6 IN ({','.join(map(str, lojas_ids))})"
-        # Para admin sem filtro específico: sem WHERE clause = todas as lojas
-
-        # Buscar estatísticas consolidadas em uma única query
-        with connection.cursor() as cursor:
-            cursor.execute(f"""
-                SELECT
-                    COUNT(CASE WHEN data_transacao >= CURDATE() THEN 1 END) as transacoes_hoje,
-                    SUM(CASE WHEN data_transacao >= CURDATE() THEN CAST(var19 AS DECIMAL(10,2)) ELSE 0 END) as valor_hoje,
-                    COUNT(CASE WHEN YEAR(data_transacao) = YEAR(CURDATE()) AND MONTH(data_transacao) = MONTH(CURDATE()) THEN 1 END) as transacoes_mes,
-                    SUM(CASE WHEN YEAR(data_transacao) = YEAR(CURDATE()) AND MONTH(data_transacao) = MONTH(CURDATE()) THEN CAST(var19 AS DECIMAL(10,2)) ELSE 0 END) as valor_mes
-                FROM base_transacoes_unificadas
-                WHERE var68 = 'TRANS. APROVADO'
-                AND var19 IS NOT NULL
-                {where_clause}
-            """)
-            row = cursor.fetchone()
-            transacoes_hoje = row[0] or 0
-            valor_hoje = row[1] or 0
-            transacoes_mes = row[2] or 0
-            valor_mes = row[3] or 0
+            lojas_filtro = lojas_ids
+
+        # Estatísticas lidas do resumo diário (mantido pelas cargas da base unificada)
+        from gestao_financeira.services_resumo_diario import ResumoDiarioService
+        estatisticas = ResumoDiarioService.obter_estatisticas_home(lojas_filtro)
+        transacoes_hoje = estatisticas['transacoes_hoje']
+        valor_hoje = estatisticas['valor_hoje']
+        transacoes_mes = estatisticas['transacoes_mes']
+        valor_mes = estatisticas['valor_mes']
 
         context.update({
             'nome_usuario': self.request.session.get('lojista_usuario_nome', 'Usuário'),
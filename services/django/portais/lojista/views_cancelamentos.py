@@ -15,6 +15,7 @@ import csv
 import io
 from decimal import Decimal
 
+from portais.controle_acesso.escopo import EscopoAcessoService
 from .mixins import LojistaAccessMixin, LojistaDataMixin
 from django.apps import apps
 
@@ -81,14 +82,8 @@ class LojistaCancelamentosView(LojistaAccessMixin, LojistaDataMixin, TemplateVie
                 where_conditions = []
                 params = []
 
-                # Filtro de lojas
-                if len(lojas_para_consulta) == 1:
-                    where_conditions.append("var6 = %s")
-                    params.append(lojas_para_consulta[0])
-                else:
-                    placeholders = ','.join(['%s'] * len(lojas_para_consulta))
-                    where_conditions.append(f"var6 IN ({placeholders})")
-                    params.extend(lojas_para_consulta)
+                # Filtro de lojas (tabela temporária para escopos grandes)
+                where_conditions.append(EscopoAcessoService.clausula_ids('var6', lojas_para_consulta))
 
                 # CANCELAMENTOS: var68 != 'TRANS. APROVADO'
                 where_conditions.append("var68 != %s")
@@ -347,14 +342,8 @@ class LojistaCancelamentosExportView(View):
             where_conditions = ["var68 != 'TRANS. APROVADO'"]
             params = []
 
-            # Filtro de lojas
-            if len(lojas_filtro) == 1:
-                where_conditions.append("var6 = %s")
-                params.append(lojas_filtro[0])
-            else:
-                placeholders = ','.join(['%s'] * len(lojas_filtro))
-                where_conditions.append(f"var6 IN ({placeholders})")
-                params.extend(lojas_filtro)
+            # Filtro de lojas (tabela temporária para escopos grandes)
+            where_conditions.append(EscopoAcessoService.clausula_ids('var6', lojas_filtro))
 
             if nsu:
                 where_conditions.append("var9 LIKE %s")
@@ -17,6 +17,7 @@ from decimal import Decimal
 from .mixins import LojistaAccessMixin, LojistaDataMixin
 from django.apps import apps
 from wallclub_core.utilitarios.log_control import registrar_log
+from portais.controle_acesso.escopo import EscopoAcessoService
 
 
 class LojistaConciliacaoView(LojistaAccessMixin, LojistaDataMixin, TemplateView):
@@ -92,14 +93,8 @@ class LojistaConciliacaoView(LojistaAccessMixin, LojistaDataMixin, TemplateView)
                 where_conditions = []
                 params = []
 
-                # Filtro de loja
-                if len(lojas_para_consulta) == 1:
-                    where_conditions.append("btu.var6 = %s")
-                    params.append(lojas_para_consulta[0])
-                else:
-                    placeholders = ','.join(['%s'] * len(lojas_para_consulta))
-                    where_conditions.append(f"btu.var6 IN ({placeholders})")
-                    params.extend(lojas_para_consulta)
+                # Filtro de loja (tabela temporária para escopos grandes)
+                where_conditions.append(EscopoAcessoService.clausula_ids('btu.var6', lojas_para_consulta))
 
                 # Filtros de data de transação - converter formato se necessário
                 if data_inicio:
@@ -134,28 +129,14 @@ class LojistaConciliacaoView(LojistaAccessMixin, LojistaDataMixin, TemplateView)
                         where_conditions.append("btu.data_transacao <= %s")
                         params.append(f"{data_fim} 23:59:59")
 
-                # Filtros de data de pagamento (var45)
-                if data_pagamento_inicio:
-                    try:
-                        # Converter YYYY-MM-DD para DD/MM/YYYY (formato do var45)
-                        if '-' in data_pagamento_inicio and len(data_pagamento_inicio) == 10:
-                            data_obj = datetime.strptime(data_pagamento_inicio, '%Y-%m-%d')
-                            data_formatada_br = data_obj.strftime('%d/%m/%Y')
-                            where_conditions.append("STR_TO_DATE(btu.var45, '%%d/%%m/%%Y') >= STR_TO_DATE(%s, '%%d/%%m/%%Y')")
-                            params.append(data_formatada_br)
-                    except ValueError:
-                        pass
-
-                if data_pagamento_fim:
-                    try:
-                        # Converter YYYY-MM-DD para DD/MM/YYYY (formato do var45)
-                        if '-' in data_pagamento_fim and len(data_pagamento_fim) == 10:
-                            data_obj = datetime.strptime(data_pagamento_fim, '%Y-%m-%d')
-                            data_formatada_br = data_obj.strftime('%d/%m/%Y')
-                            where_conditions.append("STR_TO_DATE(btu.var45, '%%d/%%m/%%Y') <= STR_TO_DATE(%s, '%%d/%%m/%%Y')")
-                            params.append(data_formatada_br)
-                    except ValueError:
-                        pass
+                # Filtros de data de pagamento (data_pagamento = var45 tipada, usa índice)
+                if data_pagamento_inicio or data_pagamento_fim:
+                    from gestao_financeira.services import filtro_data_pagamento
+                    condicoes_data, params_data = filtro_data_pagamento(
+                        data_pagamento_inicio, data_pagamento_fim, coluna='btu.data_pagamento'
+                    )
+                    where_conditions.extend(condicoes_data)
+                    params.extend(params_data)
 
                 # Filtro de NSU
                 if nsu:
@@ -456,9 +437,8 @@ class LojistaConciliacaoExportView(View):
             where_conditions = []
             params = []
 
-            # Filtro de loja
-            where_conditions.append("btu.var6 IN %s")
-            params.append(tuple(lojas_query))
+            # Filtro de loja (tabela temporária para escopos grandes)
+            where_conditions.append(EscopoAcessoService.clausula_ids('btu.var6', lojas_query))
 
             # Filtro TEF - usar mesma lógica da view principal
             if not incluir_tef:
@@ -524,7 +504,7 @@ class LojistaConciliacaoExportView(View):
             SELECT DISTINCT
                 DATE_FORMAT(btu.data_transacao, '%%d/%%m/%%Y')   AS `Data`,
                 STR_TO_DATE(btu.var43, '%%d/%%m/%%Y')       AS `Dt_credito`,
-                STR_TO_DATE(btu.var45, '%%d/%%m/%%Y')       AS `Dt_pagto`,
+                btu.data_pagamento                          AS `Dt_pagto`,
                 CASE
                     WHEN TRIM(btu.var70) = '0001-01-01T00:00:00' OR btu.var70 IS NULL OR TRIM(btu.var70) = ''
                         THEN NULL
@@ -710,6 +690,9 @@ class LojistaConciliacaoExportView(View):
     def _executar_export_background(self, request, where_conditions, params, total_registros, formato, lojas_query, data_inicio, data_fim, nsu, incluir_tef):
         """Executar export em background e enviar por email"""
         try:
+            # Filtro de loja (1ª condição) remontado na conexão desta thread
+            where_conditions = [EscopoAcessoService.clausula_ids('btu.var6', lojas_query)] + where_conditions[1:]
+
             from django.conf import settings
             from wallclub_core.integracoes.email_service import EmailService
             import tempfile
@@ -745,7 +728,7 @@ class LojistaConciliacaoExportView(View):
                     SELECT
                         DATE_FORMAT(btu.data_transacao, '%%d/%%m/%%Y')   AS `Data`,
                         STR_TO_DATE(btu.var43, '%%d/%%m/%%Y')       AS `Dt_credito`,
-                        STR_TO_DATE(btu.var45, '%%d/%%m/%%Y')       AS `Dt_pagto`,
+                        btu.data_pagamento                          AS `Dt_pagto`,
                         CASE
                             WHEN TRIM(btu.var70) = '0001-01-01T00:00:00' OR btu.var70 IS NULL OR TRIM(btu.var70) = ''
                                 THEN NULL
@@ -889,3 +872,6 @@ Sistema WallClub
 
         except Exception as e:
             registrar_log('portais.lojista', f"CONCILIACAO - ERRO no export grande: {str(e)}", nivel='ERROR')
+        finally:
+            # Conexão própria da thread (leva junto a tabela temporária do escopo)
+            connection.close()
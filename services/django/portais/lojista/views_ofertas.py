@@ -11,6 +11,7 @@ import json
 from .mixins import LojistaAuthMixin, LojistaDataMixin
 from wallclub_core.integracoes.ofertas_api_client import ofertas_api
 from wallclub_core.utilitarios.log_control import registrar_log
+from portais.controle_acesso.escopo import EscopoAcessoService
 
 
 class OfertasListView(LojistaAuthMixin, LojistaDataMixin, View):
@@ -31,11 +32,10 @@ class OfertasListView(LojistaAuthMixin, LojistaDataMixin, View):
             lojas_acessiveis = self.get_lojas_acessiveis()
             lojas_ids = [loja['id'] if isinstance(loja, dict) else loja.id for loja in lojas_acessiveis]
 
-            # Buscar ofertas do canal via service
-            todas_ofertas = OfertaService.listar_todas_ofertas()
-            
-            # Filtrar: ofertas das lojas acessíveis OU ofertas globais (loja_id=NULL)
-            ofertas = [o for o in todas_ofertas if o.canal_id == canal_id and (o.loja_id in lojas_ids or o.loja_id is None)]
+            # Ofertas do canal: das lojas acessíveis OU globais (loja_id=NULL), filtradas no banco
+            ofertas = OfertaService.listar_ofertas_canal(
+                canal_id, EscopoAcessoService.clausula_ids('loja_id', lojas_ids)
+            )
             
             registrar_log('portais.lojista', f'DEBUG: Filtrando ofertas - canal_id={canal_id}, lojas_acessiveis={lojas_ids}, total={len(ofertas)}')
 
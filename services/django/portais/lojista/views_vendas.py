@@ -16,6 +16,7 @@ import io
 from decimal import Decimal
 
 from wallclub_core.utilitarios.log_control import registrar_log
+from portais.controle_acesso.escopo import EscopoAcessoService
 from .mixins import LojistaAccessMixin, LojistaDataMixin
 
 
@@ -126,14 +127,8 @@ class LojistaVendasView(LojistaAccessMixin, LojistaDataMixin, TemplateView):
                 where_conditions = []
                 params = []
 
-                # Filtro de loja - corrigir sintaxe SQL
-                if len(lojas_para_consulta) == 1:
-                    where_conditions.append("var6 = %s")
-                    params.append(lojas_para_consulta[0])
-                else:
-                    placeholders = ','.join(['%s'] * len(lojas_para_consulta))
-                    where_conditions.append(f"var6 IN ({placeholders})")
-                    params.extend(lojas_para_consulta)
+                # Filtro de loja (tabela temporária para escopos grandes)
+                where_conditions.append(EscopoAcessoService.clausula_ids('var6', lojas_para_consulta))
 
                 # Filtro var68 = 'TRANS. APROVADO'
                 where_conditions.append("var68 = %s")
@@ -285,37 +280,50 @@ class LojistaVendasView(LojistaAccessMixin, LojistaDataMixin, TemplateView):
                             })
 
                 # Calcular totais REAIS (de todos os registros filtrados, não apenas da página)
-                sql_totais = f"""
-                    SELECT
-                        SUM(CAST(var19 AS DECIMAL(15,2))) as total_bruto,
-                        SUM(CAST(COALESCE(NULLIF(var44, 0), var42) AS DECIMAL(15,2))) as total_pago
-                    FROM base_transacoes_unificadas
-                    WHERE {where_clause}
-                """
-
-                with connection.cursor() as cursor:
-                    cursor.execute(sql_totais, params)
-                    totais_row = cursor.fetchone()
-
-                registrar_log('portais.lojista', f"VENDAS DEBUG TOTAIS - Row: {totais_row}")
-
-                totais = {
-                    'total_bruto': float(totais_row[0] or 0),
-                    'total_pago': float(totais_row[1] or 0)
-                }
+                if not nsu:
+                    # Sem filtro de NSU: totais e contagem vêm do resumo diário (atualizado
+                    # pelas cargas e no commit de cada venda POSP2, mesma base das linhas)
+                    from gestao_financeira.services_resumo_diario import ResumoDiarioService
+                    resumo = ResumoDiarioService.obter_totais_vendas(
+                        lojas_para_consulta, data_inicio, data_fim, incluir_tef
+                    )
+                    totais = {
+                        'total_bruto': resumo['total_bruto'],
+                        'total_pago': resumo['total_pago']
+                    }
+                    total_registros = resumo['total_registros']
+                else:
+                    sql_totais = f"""
+                        SELECT
+                            SUM(CAST(var19 AS DECIMAL(15,2))) as total_bruto,
+                            SUM(CAST(COALESCE(NULLIF(var44, 0), var42) AS DECIMAL(15,2))) as total_pago
+                        FROM base_transacoes_unificadas
+                        WHERE {where_clause}
+                    """
+
+                    with connection.cursor() as cursor:
+                        cursor.execute(sql_totais, params)
+                        totais_row = cursor.fetchone()
+
+                    registrar_log('portais.lojista', f"VENDAS DEBUG TOTAIS - Row: {totais_row}")
 
-                registrar_log('portais.lojista', f"VENDAS DEBUG TOTAIS - Dict: {totais}")
+                    totais = {
+                        'total_bruto': float(totais_row[0] or 0),
+                        'total_pago': float(totais_row[1] or 0)
+                    }
 
-                # Query de contagem para paginação
-                sql_count = f"""
-                    SELECT COUNT(*)
-                    FROM base_transacoes_unificadas
-                    WHERE {where_clause}
-                """
+                    registrar_log('portais.lojista', f"VENDAS DEBUG TOTAIS - Dict: {totais}")
+
+                    # Query de contagem para paginação
+                    sql_count = f"""
+                        SELECT COUNT(*)
+                        FROM base_transacoes_unificadas
+                        WHERE {where_clause}
+                    """
 
-                with connection.cursor() as cursor:
-                    cursor.execute(sql_count, params)
-                    total_registros = cursor.fetchone()[0]
+                    with connection.cursor() as cursor:
+                        cursor.execute(sql_count, params)
+                        total_registros = cursor.fetchone()[0]
 
                 # Salvar no cache por 5 minutos
                 cache_data = {
@@ -607,9 +615,8 @@ class LojistaVendasExportView(LojistaAccessMixin, LojistaDataMixin, View):
             where_conditions = []
             params = []
 
-            # Filtro de loja
-            where_conditions.append("var6 IN %s")
-            params.append(tuple(lojas_filtro))
+            # Filtro de loja (tabela temporária para escopos grandes)
+            where_conditions.append(EscopoAcessoService.clausula_ids('var6', lojas_filtro))
 
             # Filtro var68 = 'TRANS. APROVADO'
             where_conditions.append("var68 = 'TRANS. APROVADO'")
@@ -651,9 +658,10 @@ class LojistaVendasExportView(LojistaAccessMixin, LojistaDataMixin, View):
             # Se mais de 5000 registros, processar em background e enviar por email
             if total_registros > 5000:
                 # Processar em background
+                # Filtro de loja remontado na thread (tabela temporária é da conexão)
                 thread = threading.Thread(
                     target=self._processar_export_grande,
-                    args=(request, where_clause, params, total_registros)
+                    args=(request, lojas_filtro, where_conditions[1:], params, total_registros)
                 )
                 thread.start()
 
@@ -750,9 +758,13 @@ class LojistaVendasExportView(LojistaAccessMixin, LojistaDataMixin, View):
             registrar_log('portais.lojista', f"ERRO EXPORT VENDAS: {str(e)}", nivel='ERROR')
             return JsonResponse({'error': f'Erro na exportação: {str(e)}'}, status=500)
 
-    def _processar_export_grande(self, request, where_clause, params, total_registros):
+    def _processar_export_grande(self, request, lojas_filtro, condicoes, params, total_registros):
         """Processar export grande em background com envio por email"""
         try:
+            where_clause = " AND ".join(
+                [EscopoAcessoService.clausula_ids('var6', lojas_filtro)] + condicoes
+            )
+
             from django.conf import settings
             from wallclub_core.integracoes.email_service import EmailService
             import tempfile
@@ -856,3 +868,6 @@ class LojistaVendasExportView(LojistaAccessMixin, LojistaDataMixin, View):
 
         except Exception as e:
             registrar_log('portais.lojista', f"ERRO EXPORT GRANDE: {str(e)}", nivel='ERROR')
+        finally:
+            # Conexão própria da thread (leva junto a tabela temporária do escopo)
+            connection.close()
@@ -8,6 +8,7 @@ from django.db import connection
 from datetime import datetime
 
 from wallclub_core.utilitarios.log_control import registrar_log
+from portais.controle_acesso.escopo import EscopoAcessoService
 from .mixins import LojistaAccessMixin, LojistaDataMixin
 
 
@@ -98,14 +99,8 @@ class LojistaVendasOperadorView(LojistaAccessMixin, LojistaDataMixin, TemplateVi
                 data_fim_inclusiva = (data_fim_obj + timedelta(days=1)).strftime('%Y-%m-%d')
                 params.append(f"{data_fim_inclusiva} 00:00:00")
 
-                # Filtro de loja
-                if len(lojas_para_consulta) == 1:
-                    where_conditions.append("b.var6 = %s")
-                    params.append(lojas_para_consulta[0])
-                else:
-                    placeholders = ','.join(['%s'] * len(lojas_para_consulta))
-                    where_conditions.append(f"b.var6 IN ({placeholders})")
-                    params.extend(lojas_para_consulta)
+                # Filtro de loja (tabela temporária para escopos grandes)
+                where_conditions.append(EscopoAcessoService.clausula_ids('b.var6', lojas_para_consulta))
 
                 # Filtro de NSU (opcional)
                 if nsu:
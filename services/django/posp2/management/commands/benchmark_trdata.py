@@ -0,0 +1,222 @@
+"""
+Benchmark de latência do processamento TRData (POS → transação).
+
+Executa TRDataService.processar_dados_transacao de ponta a ponta com banco,
+APIs internas, calculadora, antifraude e push substituídos por stubs com
+latência fixa por round-trip. Compara três cenários:
+
+- legado: round-trips do fluxo anterior (terminal/loja/canal via ORM,
+  verificar_cadastro e consultar_por_cpf via API, COUNT antes do INSERT)
+- frio: ContextoPOSService sem cache (1 query de loja/canal + 1 de cliente)
+- quente: ContextoPOSService com cache populado
+
+Uso:
+    python manage.py benchmark_trdata
+    python manage.py benchmark_trdata --transacoes 500 --latencia-db-ms 2 --latencia-api-ms 20
+"""
+import hashlib
+import json
+import statistics
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posp2.services_contexto import ContextoPOSService
+from posp2.services_transacao import TRDataService
+
+TERMINAL = 'PBBENCH0001'
+CPF = '12345678909'
+CANAL_ID = 1
+
+
+class _CursorFalso:
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.resultado = None
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conexao.round_trip()
+        if 'FROM terminais' in sql:
+            self.resultado = (10, 'Loja Benchmark', '00000000000191', CANAL_ID,
+                              CANAL_ID, 'WALLCLUB', '1', '2', 'chave')
+        elif 'FROM cliente' in sql:
+            self.resultado = (1,)
+        else:
+            self.resultado = None
+            self.rowcount = 1
+            self.lastrowid = self.conexao.queries
+
+    def fetchone(self):
+        return self.resultado
+
+
+class _ConexaoFalsa:
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.queries = 0
+
+    def round_trip(self):
+        self.queries += 1
+        time.sleep(self.latencia)
+
+    def cursor(self):
+        return _CursorFalso(self)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de latência do TRData: legado vs contexto do POS em cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transacoes', type=int, default=200,
+                            help='Transações por cenário (padrão: 200)')
+        parser.add_argument('--latencia-db-ms', type=float, default=1.0,
+                            help='Latência simulada por query (padrão: 1ms)')
+        parser.add_argument('--latencia-api-ms', type=float, default=15.0,
+                            help='Latência simulada por chamada HTTP (padrão: 15ms)')
+
+    def handle(self, *args, **options):
+        total = options['transacoes']
+        self.latencia_api = options['latencia_api_ms'] / 1000
+        self.conexao = _ConexaoFalsa(options['latencia_db_ms'] / 1000)
+        self.chamadas_api = 0
+
+        resultados = {}
+        with self._stubs():
+            for cenario in ('legado', 'frio', 'quente'):
+                resultados[cenario] = self._executar(cenario, total)
+
+        base = resultados['legado'][0]
+        for cenario, (media, p50, p95, queries, apis) in resultados.items():
+            self.stdout.write(
+                f'{cenario:<7} média={media:7.2f} ms  p50={p50:7.2f} ms  p95={p95:7.2f} ms  '
+                f'queries/tx={queries:.1f}  apis/tx={apis:.1f}  ({base / media:.1f}x)'
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark concluído'))
+
+    # ------------------------------------------------------------------
+
+    def _api(self, *args, **kwargs):
+        self.chamadas_api += 1
+        time.sleep(self.latencia_api)
+        return {'sucesso': True, 'dados': {'nome': 'Cliente Benchmark'}}
+
+    def _antifraude(self, **kwargs):
+        self._api()
+        return True, {'decisao': 'APROVADO', 'score_risco': 0}
+
+    def _stubs(self):
+        notificacao = mock.Mock()
+        notificacao.send_push.side_effect = lambda **kwargs: self._api()
+
+        calculadora = mock.Mock()
+        calculadora.return_value.calcular_valores_primarios.side_effect = (
+            lambda *args, **kwargs: {0: '2025-01-01', 9: kwargs.get('info_loja', {}).get('id'), 26: 10.0,
+                                     'canal_id': CANAL_ID}
+        )
+
+        pilha = ExitStack()
+        for alvo, valor in (
+            ('posp2.services_contexto.connection', self.conexao),
+            ('posp2.services_transacao.connection', self.conexao),
+            ('django.db.connection', self.conexao),
+            ('posp2.services_transacao.registrar_log', lambda *a, **k: None),
+            ('posp2.services_transacao.CalculadoraBaseUnificada', calculadora),
+        ):
+            pilha.enter_context(mock.patch(alvo, valor))
+        pilha.enter_context(mock.patch(
+            'posp2.services_transacao.interceptar_transacao_pos',
+            side_effect=self._antifraude))
+        pilha.enter_context(mock.patch.object(
+            TRDataService, '_inserir_transaction_data',
+            side_effect=lambda *args, **kwargs: self.conexao.round_trip()))
+        pilha.enter_context(mock.patch(
+            'wallclub_core.integracoes.notification_service.NotificationService.get_instance',
+            return_value=notificacao))
+        pilha.enter_context(mock.patch(
+            'wallclub_core.integracoes.api_interna_service.APIInternaService.chamar_api_interna',
+            side_effect=self._api))
+        return pilha
+
+    def _legado(self):
+        """Round-trips do fluxo anterior ao ContextoPOSService"""
+        pilha = mock.patch.multiple(
+            ContextoPOSService,
+            obter_loja_canal=mock.Mock(side_effect=self._legado_loja_canal),
+            cliente_cadastrado=mock.Mock(side_effect=lambda *args, **kwargs: bool(self._api())),
+        )
+        inserir_original = TRDataService._inserir_base_transacoes_unificadas
+
+        def inserir_com_count(servico, *args, **kwargs):
+            self.conexao.round_trip()  # SELECT COUNT(*) por (var9, tipo_operacao)
+            return inserir_original(servico, *args, **kwargs)
+
+        return pilha, mock.patch.object(TRDataService, '_inserir_base_transacoes_unificadas', inserir_com_count)
+
+    def _legado_loja_canal(self, terminal):
+        # Terminal, Loja e Canal via ORM: 2 round-trips + o da consulta abaixo
+        for _ in range(2):
+            self.conexao.round_trip()
+        return ContextoPOSService._consultar_loja_canal(terminal)
+
+    def _payload(self, i):
+        trdata = {
+            'nsuPinbank': 900000000 + i, 'amount': 1000, 'brand': 'VISA',
+            'paymentMethod': 'CREDIT_ONE_INSTALLMENT', 'totalInstallments': 1,
+            'hostTimestamp': '20250912130603', 'cardNumber': '411111******1111',
+            'authorizationCode': '123456', 'status': 'APPROVED',
+        }
+        return json.dumps({
+            'terminal': TERMINAL, 'cpf': CPF, 'celular': '', 'valororiginal': 'R$10,00',
+            'trdata': json.dumps(trdata),
+        })
+
+    def _executar(self, cenario, total):
+        servico = TRDataService()
+        payloads = [self._payload(i) for i in range(total)]
+        cpf_hash = hashlib.sha256(CPF.encode()).hexdigest()[:32]
+        chaves = [f'{ContextoPOSService.PREFIXO_TERMINAL}:{TERMINAL}',
+                  f'{ContextoPOSService.PREFIXO_CLIENTE}:{CANAL_ID}:{cpf_hash}']
+        cache.delete_many(chaves)
+
+        patches = self._legado() if cenario == 'legado' else ()
+        for patch in patches:
+            patch.start()
+        try:
+            if cenario == 'quente':
+                servico.processar_dados_transacao(payloads[0])
+
+            tempos = []
+            queries, apis = self.conexao.queries, self.chamadas_api
+            for payload in payloads:
+                if cenario == 'frio':
+                    cache.delete_many(chaves)
+                inicio = time.perf_counter()
+                resultado = servico.processar_dados_transacao(payload)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+                if not resultado.get('sucesso'):
+                    self.stdout.write(self.style.ERROR(f'{cenario}: {resultado.get("mensagem")}'))
+                    break
+        finally:
+            for patch in patches:
+                patch.stop()
+
+        tempos.sort()
+        n = len(tempos)
+        return (
+            statistics.mean(tempos),
+            tempos[n // 2],
+            tempos[min(n - 1, int(n * 0.95))],
+            (self.conexao.queries - queries) / n,
+            (self.chamadas_api - apis) / n,
+        )
@@ -0,0 +1,144 @@
+"""
+Contexto do POS em cache para o caminho crítico do TRData
+- terminal → loja_info/canal_info (uma query desnormalizada no cache miss)
+- cliente cadastrado no canal (consulta local no lugar da API interna, TTL curto)
+"""
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from wallclub_core.estr_organizacional.arvore import ArvoreHierarquiaService
+
+# Marcador no cache para "não cadastrado" (None não é cacheável)
+_SEM_CADASTRO = 'N'
+
+
+class ContextoPOSService:
+    """
+    Lookups do TRData que antes iam ao banco/API a cada transação.
+
+    Chaves:
+    - pos_contexto:terminal:<serial>: (versao_hierarquia, loja_info, canal_info)
+      invalidada por alteração do terminal e por qualquer escrita na hierarquia
+    - pos_contexto:cliente:<canal_id>:<sha256(cpf)>: situação do cadastro
+    """
+
+    PREFIXO_TERMINAL = 'pos_contexto:terminal'
+    PREFIXO_CLIENTE = 'pos_contexto:cliente'
+    CACHE_TIMEOUT_TERMINAL = 3600
+    CACHE_TIMEOUT_CLIENTE = 300
+    CACHE_TIMEOUT_CLIENTE_SEM_CADASTRO = 60  # cliente pode se cadastrar a qualquer momento
+
+    # ------------------------------------------------------------------
+    # Terminal → loja / canal
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def obter_loja_canal(cls, terminal: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Loja e canal do terminal no formato usado pela calculadora/slip
+
+        Returns:
+            (loja_info, canal_info) - None onde não encontrado
+        """
+        chave = f"{cls.PREFIXO_TERMINAL}:{terminal}"
+        chave_versao = ArvoreHierarquiaService.CHAVE_VERSAO
+        valores = cache.get_many([chave, chave_versao])
+
+        versao = valores.get(chave_versao)
+        entrada = valores.get(chave)
+        if entrada is not None and versao is not None and entrada[0] == versao:
+            return entrada[1], entrada[2]
+
+        loja_info, canal_info = cls._consultar_loja_canal(terminal)
+        if versao is None:
+            versao = ArvoreHierarquiaService.versao()
+        cache.set(chave, (versao, loja_info, canal_info), cls.CACHE_TIMEOUT_TERMINAL)
+        return loja_info, canal_info
+
+    @classmethod
+    def invalidar_terminal(cls, *terminais: str):
+        """Chamar após criar/alterar/remover terminal (troca de loja, encerramento)"""
+        chaves = [f"{cls.PREFIXO_TERMINAL}:{t}" for t in terminais if t]
+        if chaves:
+            transaction.on_commit(lambda: cache.delete_many(chaves))
+
+    @staticmethod
+    def _consultar_loja_canal(terminal: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        # Mesmo critério do lookup anterior: primeiro terminal (menor id) com o serial
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT l.id, l.razao_social, l.cnpj, l.canal_id,
+                       c.id, c.nome, c.canal, c.codigo_cliente, c.keyvalue
+                FROM terminais t
+                LEFT JOIN loja l ON l.id = t.loja_id
+                LEFT JOIN canal c ON c.id = l.canal_id
+                WHERE t.terminal = %s
+                ORDER BY t.id
+                LIMIT 1
+            """, [terminal])
+            row = cursor.fetchone()
+
+        if not row or row[0] is None:
+            return None, None
+
+        loja_id, razao_social, cnpj, loja_canal_id, canal_id, nome, codigo_canal, codigo_cliente, keyvalue = row
+        loja_info = {
+            'id': loja_id,
+            'loja_id': loja_id,
+            'loja': razao_social,
+            'cnpj': cnpj,
+            'canal_id': loja_canal_id
+        }
+
+        canal_info = None
+        if canal_id is not None:
+            canal_info = {
+                'id': canal_id,
+                'codigo_canal': int(codigo_canal) if codigo_canal and codigo_canal.isdigit() else 0,
+                'codigo_cliente': int(codigo_cliente) if codigo_cliente and codigo_cliente.isdigit() else 0,
+                'key_loja': keyvalue or '',
+                'canal': nome or '',
+                'nome': nome or ''
+            }
+        return loja_info, canal_info
+
+    # ------------------------------------------------------------------
+    # Cliente cadastrado no canal
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def cliente_cadastrado(cls, cpf: str, canal_id: int, somente_ativo: bool = False) -> bool:
+        """
+        Cliente tem cadastro no canal (equivalente a /cliente/verificar_cadastro/;
+        com somente_ativo, equivalente a consultar_por_cpf + is_active)
+        """
+        if not cpf or not canal_id:
+            return False
+
+        # CPF não vai em claro para a chave do cache
+        chave = f"{cls.PREFIXO_CLIENTE}:{canal_id}:{hashlib.sha256(str(cpf).encode()).hexdigest()[:32]}"
+
+        situacao = cache.get(chave)
+        if situacao is None:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT is_active FROM cliente
+                    WHERE cpf = %s AND canal_id = %s
+                    ORDER BY id
+                    LIMIT 1
+                """, [cpf, canal_id])
+                row = cursor.fetchone()
+
+            if row is None:
+                situacao = _SEM_CADASTRO
+                cache.set(chave, situacao, cls.CACHE_TIMEOUT_CLIENTE_SEM_CADASTRO)
+            else:
+                situacao = 1 if row[0] else 0
+                cache.set(chave, situacao, cls.CACHE_TIMEOUT_CLIENTE)
+
+        if situacao == _SEM_CADASTRO:
+            return False
+        return bool(situacao) if somente_ativo else True
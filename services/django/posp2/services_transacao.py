@@ -13,9 +13,11 @@ from parametros_wallclub.services import ParametrosService
 from parametros_wallclub.calculadora_base_unificada import CalculadoraBaseUnificada
 from pinbank.services import PinbankService
 from wallclub_core.utilitarios.log_control import registrar_log
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
 from wallclub_core.services.auditoria_service import AuditoriaService
 from django.apps import apps
 from .services_antifraude import interceptar_transacao_pos
+from .services_contexto import ContextoPOSService
 
 
 class TRDataService:
@@ -42,17 +44,8 @@ class TRDataService:
         - Não tem CPF → 'N' (Cliente anônimo)
         """
         try:
-            from wallclub_core.integracoes.api_interna_service import APIInternaService
-
-            # Verificar cadastro via API interna
-            response = APIInternaService.chamar_api_interna(
-                metodo='POST',
-                endpoint='/api/internal/cliente/verificar_cadastro/',
-                payload={'cpf': cpf, 'canal_id': canal_id},
-                contexto='apis'
-            )
-
-            tem_cadastro = response.get('tem_cadastro', False) if response.get('sucesso') else False
+            # Consulta local com cache (antes: round-trip HTTP para /cliente/verificar_cadastro/)
+            tem_cadastro = ContextoPOSService.cliente_cadastrado(cpf, canal_id)
 
             if tem_cadastro:
                 registrar_log('posp2', f'Cliente {cpf[:3]}*** tem cadastro → wall=S')
@@ -284,42 +277,13 @@ class TRDataService:
             if terminal:
                 registrar_log('posp2', f'Buscando loja e canal para terminal: "{terminal}"')
 
-                from wallclub_core.estr_organizacional.canal import Canal
-                from django.apps import apps
-                
-                # Buscar terminal
-                Terminal = apps.get_model('posp2', 'Terminal')
-                terminal_obj = Terminal.objects.filter(terminal=terminal).first()
-                
-                if terminal_obj and terminal_obj.loja_id:
-                    from wallclub_core.estr_organizacional.loja import Loja
-                    loja = Loja.objects.filter(id=terminal_obj.loja_id).first()
-                    
-                    if loja:
-                        loja_info = {
-                            'id': loja.id,
-                            'loja_id': loja.id,
-                            'loja': loja.razao_social,
-                            'cnpj': loja.cnpj,
-                            'canal_id': loja.canal_id
-                        }
-                        registrar_log('posp2', f'Loja encontrada: {loja_info}')
-                        
-                        # Buscar canal
-                        if loja.canal_id:
-                            canal = Canal.objects.filter(id=loja.canal_id).first()
-                            if canal:
-                                canal_info = {
-                                    'id': canal.id,
-                                    'codigo_canal': int(canal.canal) if canal.canal and canal.canal.isdigit() else 0,
-                                    'codigo_cliente': int(canal.codigo_cliente) if canal.codigo_cliente and canal.codigo_cliente.isdigit() else 0,
-                                    'key_loja': canal.keyvalue or '',
-                                    'canal': canal.nome or '',
-                                    'nome': canal.nome or ''
-                                }
-                                registrar_log('posp2', f'Canal encontrado: {canal_info}')
-                    else:
-                        registrar_log('posp2', f'Loja não encontrada para terminal {terminal}', nivel='WARNING')
+                # Terminal → loja → canal em cache (invalidado na alteração do terminal/hierarquia)
+                loja_info, canal_info = ContextoPOSService.obter_loja_canal(terminal)
+
+                if loja_info:
+                    registrar_log('posp2', f'Loja encontrada: {loja_info}')
+                    if canal_info:
+                        registrar_log('posp2', f'Canal encontrado: {canal_info}')
                 else:
                     registrar_log('posp2', f'Terminal {terminal} não encontrado ou sem loja associada', nivel='WARNING')
 
@@ -502,19 +466,8 @@ class TRDataService:
                         if canal_id and id_loja:
                             registrar_log('posp2', f'Canal da loja {id_loja}: {canal_id}')
 
-                            # Validar que o cliente existe neste canal específico via API interna
-                            from wallclub_core.integracoes.api_interna_service import APIInternaService
-
-                            response = APIInternaService.chamar_api_interna(
-                                metodo='POST',
-                                endpoint='/api/internal/cliente/consultar_por_cpf/',
-                                payload={'cpf': cpf, 'canal_id': canal_id},
-                                contexto='apis'
-                            )
-
-                            cliente_canal = response.get('cliente') if response.get('sucesso') else None
-
-                            if not cliente_canal or not cliente_canal.get('is_active'):
+                            # Validar que o cliente existe (ativo) neste canal específico
+                            if not ContextoPOSService.cliente_cadastrado(cpf, canal_id, somente_ativo=True):
                                 registrar_log('posp2', f'AVISO: Cliente {cpf} não encontrado no canal {canal_id} da loja {id_loja}')
                                 canal_id = None
                             else:
@@ -1349,18 +1302,6 @@ class TRDataService:
         try:
             from django.db import connection
 
-            # Verificar se NSU já existe (evitar duplicação)
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) FROM base_transacoes_unificadas
-                    WHERE var9 = %s AND tipo_operacao = 'Wallet'
-                """, [str(nsu)])
-                existe = cursor.fetchone()[0] > 0
-
-                if existe:
-                    registrar_log('posp2', f'⚠️ NSU {nsu} já existe em base_transacoes_unificadas, pulando INSERT')
-                    return
-
             # Preparar dados para inserção
             dados_insert = {
                 'tipo_operacao': 'Wallet',
@@ -1402,6 +1343,7 @@ class TRDataService:
             dados_insert['authorization_code'] = dados.get('authorizationCode')
             dados_insert['amount'] = dados.get('amount', 0)
             dados_insert['valor_cashback'] = dados.get('valor_cashback', 0)
+            dados_insert['data_pagamento'] = converter_data_ou_nula(dados_insert.get('var45'))
 
             # Converter strings vazias em NULL
             for key, value in dados_insert.items():
@@ -1416,12 +1358,18 @@ class TRDataService:
             placeholders = ', '.join(['%s'] * len(valores))
             campos_sql = ', '.join(campos)
 
-            sql = f"INSERT INTO base_transacoes_unificadas ({campos_sql}) VALUES ({placeholders})"
+            # uk_nsu_tipo (var9, tipo_operacao): duplicado é ignorado sem SELECT prévio
+            sql = f"INSERT IGNORE INTO base_transacoes_unificadas ({campos_sql}) VALUES ({placeholders})"
 
             with connection.cursor() as cursor:
                 cursor.execute(sql, valores)
+                inserido = cursor.rowcount > 0
                 base_id = cursor.lastrowid
 
+            if not inserido:
+                registrar_log('posp2', f'⚠️ NSU {nsu} já existe em base_transacoes_unificadas, INSERT ignorado')
+                return
+
             registrar_log('posp2', f'✅ base_transacoes_unificadas inserida - ID: {base_id}, NSU: {nsu}')
 
         except Exception as e:
@@ -10,6 +10,7 @@ from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, Any
 from django.db import connection, transaction
 from wallclub_core.utilitarios.log_control import registrar_log
+from wallclub_core.utilitarios.calendario import converter_data_ou_nula
 from parametros_wallclub.calculadora_base_unificada import CalculadoraBaseUnificada
 from parametros_wallclub.services import ParametrosService
 
@@ -913,6 +914,9 @@ class TRDataPosService:
                             except (ValueError, TypeError):
                                 dados_insert[campo_nome] = None
 
+            # Data de pagamento tipada (var45 DD/MM/YYYY): filtros por intervalo usam índice
+            dados_insert['data_pagamento'] = converter_data_ou_nula(dados_insert.get('var45'))
+
             # Inserir usando raw SQL
             campos = list(dados_insert.keys())
             valores = list(dados_insert.values())
@@ -925,6 +929,10 @@ class TRDataPosService:
                     VALUES ({placeholders})
                 """, valores)
 
+            # Totais do Portal Lojista vêm do resumo diário: venda entra no commit, sem esperar a carga
+            from gestao_financeira.services_resumo_diario import ResumoDiarioService
+            transaction.on_commit(lambda: ResumoDiarioService.atualizar_por_nsus([nsu]))
+
             registrar_log('posp2', f'✅ Inserido em base_transacoes_unificadas - NSU: {nsu}')
 
         except Exception as e:
@@ -97,6 +97,41 @@ app.conf.beat_schedule = {
         }
     },
 
+    # Micro-lote - A cada 5 minutos, fora dos horários das cargas completas
+    'cargas-micro-lote-pinbank': {
+        'task': 'pinbank.cargas_micro_lote',
+        'schedule': crontab(minute='5-25/5,35-55/5'),  # xx:05..25 e xx:35..55
+        'options': {
+            'expires': 300,  # Expira em 5 minutos
+        }
+    },
+
+    # ============================================
+    # EMAILS - FILA DE SAÍDA
+    # ============================================
+
+    # Enviar emails pendentes/reagendados de email_outbox - A cada minuto
+    'processar-email-outbox': {
+        'task': 'wallclub_core.processar_email_outbox',
+        'schedule': crontab(minute='*'),  # A cada minuto
+        'options': {
+            'expires': 60,  # Expira em 1 minuto
+        }
+    },
+
+    # ============================================
+    # OWN FINANCIAL - WEBHOOKS
+    # ============================================
+
+    # Processar eventos de webhook pendentes/reagendados - A cada minuto
+    'processar-webhooks-own': {
+        'task': 'adquirente_own.processar_webhooks',
+        'schedule': crontab(minute='*'),  # A cada minuto
+        'options': {
+            'expires': 60,  # Expira em 1 minuto
+        }
+    },
+
     # ============================================
     # CONTA DIGITAL - AUTORIZAÇÕES
     # ============================================
@@ -153,6 +188,19 @@ app.conf.beat_schedule = {
             'expires': 1800,  # Expira em 30 minutos
         }
     },
+
+    # ============================================
+    # CLIENTE - HISTÓRICO DE LOGIN
+    # ============================================
+
+    # Gravar tentativas de login enfileiradas - A cada minuto
+    'gravar-tentativas-login': {
+        'task': 'apps.cliente.gravar_tentativas_login',
+        'schedule': crontab(minute='*'),  # A cada minuto
+        'options': {
+            'expires': 60,  # Expira em 1 minuto
+        }
+    },
 }
 
 # Timezone (mesmo do Django)
@@ -325,6 +325,10 @@ EMAIL_HOST_USER = _email_config.get('user')
 EMAIL_HOST_PASSWORD = _email_config.get('password')
 DEFAULT_FROM_EMAIL = 'noreply@wallclub.com.br'
 
+# Fila de saída de emails (wallclub_core.integracoes.email_outbox)
+# Este serviço tem o consumidor Celery: agenda o envio logo após enfileirar
+EMAIL_OUTBOX_CONSUMIDOR = True
+
 # URLs base - obrigatórias via variáveis de ambiente
 BASE_URL = os.environ.get('BASE_URL')
 CHECKOUT_BASE_URL = os.environ.get('CHECKOUT_BASE_URL')
@@ -3,7 +3,7 @@ Sistema de Notificações para Revisões Manuais
 """
 import requests
 from django.conf import settings
-from django.core.mail import send_mail
+from wallclub_core.integracoes.email_service import EmailService
 from datetime import datetime
 
 
@@ -58,13 +58,13 @@ class NotificacaoService:
     
     @staticmethod
     def _enviar_email(mensagem):
-        """Envia email para equipe"""
+        """Envia email para equipe (fila de saída, enviada pelo Celery do Django)"""
         try:
-            send_mail(
-                subject='[ANTIFRAUDE] Revisão Manual Necessária',
-                message=mensagem,
-                from_email='noreply@wallclub.com.br',
-                recipient_list=[settings.NOTIFICACAO_EMAIL],
+            EmailService.enviar_email(
+                destinatarios=[settings.NOTIFICACAO_EMAIL],
+                assunto='[ANTIFRAUDE] Revisão Manual Necessária',
+                mensagem_texto=mensagem,
+                remetente='noreply@wallclub.com.br',
                 fail_silently=True
             )
         except Exception as e: